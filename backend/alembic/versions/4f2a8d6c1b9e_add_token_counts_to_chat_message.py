@@ -0,0 +1,28 @@
+"""add token_counts to chat_message
+
+Revision ID: 4f2a8d6c1b9e
+Revises: 9c1e4b7a2d3f
+Create Date: 2026-10-18 14:03:27.518903
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "4f2a8d6c1b9e"
+down_revision = "9c1e4b7a2d3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chat_message",
+        sa.Column("token_counts", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chat_message", "token_counts")
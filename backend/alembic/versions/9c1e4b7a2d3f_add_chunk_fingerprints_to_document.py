@@ -0,0 +1,28 @@
+"""add chunk_fingerprints to document
+
+Revision ID: 9c1e4b7a2d3f
+Revises: add_external_agent_001
+Create Date: 2026-10-18 09:12:41.301245
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "9c1e4b7a2d3f"
+down_revision = "add_external_agent_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("chunk_fingerprints", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "chunk_fingerprints")
@@ -0,0 +1,57 @@
+"""add chat search indexes
+
+Revision ID: b7e3c1d9a5f2
+Revises: 4f2a8d6c1b9e
+Create Date: 2026-10-18 16:21:42.183547
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e3c1d9a5f2"
+down_revision = "4f2a8d6c1b9e"
+branch_labels = None
+depends_on = None
+
+
+# NOTE:
+# Indexes for the ranked chat search (search_chat_sessions_ranked). The chat_session
+# indexes are partial on the filters of the chat history search, so the deleted and
+# OnyxBot sessions of a user are not part of them. chat_message has no user_id, the
+# messages of a user's sessions are found through the new chat_session_id index.
+# CONCURRENTLY is not used, see 3bd4c84fe72f.
+
+
+def upgrade() -> None:
+    # keyset pagination on (time_created, id) of the sessions of a user
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chat_session_user_search
+        ON chat_session (user_id, time_created DESC, id DESC)
+        WHERE deleted IS false AND onyxbot_flow IS false
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chat_session_user_search_desc_tsv
+        ON chat_session
+        USING GIN (description_tsv)
+        WHERE deleted IS false AND onyxbot_flow IS false
+        """
+    )
+
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chat_message_chat_session_id
+        ON chat_message (chat_session_id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_chat_message_chat_session_id;")
+    op.execute("DROP INDEX IF EXISTS idx_chat_session_user_search_desc_tsv;")
+    op.execute("DROP INDEX IF EXISTS idx_chat_session_user_search;")
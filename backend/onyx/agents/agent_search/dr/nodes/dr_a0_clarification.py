@@ -51,12 +51,12 @@ from onyx.configs.constants import TMP_DRALPHA_PERSONA_NAME
 from onyx.db.chat import create_search_doc_from_saved_search_doc
 from onyx.db.chat import update_db_session_with_messages
 from onyx.db.connector import fetch_unique_document_sources
-from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.models import SearchDoc
 from onyx.db.models import Tool
 from onyx.db.tools import get_tools
 from onyx.file_store.models import ChatFileType
 from onyx.file_store.models import InMemoryChatFile
+from onyx.kg.schema_cache import get_cached_kg_config_settings
 from onyx.kg.utils.extraction_utils import get_entity_types_str
 from onyx.kg.utils.extraction_utils import get_relationship_types_str
 from onyx.llm.utils import check_number_of_tokens
@@ -440,7 +440,7 @@ def clarifier(
         [tool.description for tool in available_tools.values()]
     )
 
-    kg_config = get_kg_config_settings()
+    kg_config = get_cached_kg_config_settings()
     if kg_config.KG_ENABLED and kg_config.KG_EXPOSED:
         all_entity_types = get_entity_types_str(active=True)
         all_relationship_types = get_relationship_types_str(active=True)
@@ -713,6 +713,7 @@ def clarifier(
                     is_agentic=graph_config.behavior.use_agentic_search,
                     message=full_answer,
                     token_count=len(llm_tokenizer.encode(full_answer or "")),
+                    tokenizer_name=llm_tokenizer.name,
                     citations=citations_map,
                     final_documents=final_documents_db or None,
                     update_parent_message=True,
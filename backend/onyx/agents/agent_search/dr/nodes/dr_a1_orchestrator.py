@@ -95,6 +95,9 @@ def orchestrator(
     iteration_nr = state.iteration_nr + 1
     current_step_nr = state.current_step_nr
 
+    run_scheduler = graph_config.tooling.run_scheduler
+    run_scheduler.start_iteration(iteration_nr)
+
     research_type = graph_config.behavior.research_type
     remaining_time_budget = state.remaining_time_budget
     chat_history_string = state.chat_history_string or "(No chat history yet available)"
@@ -136,6 +139,36 @@ def orchestrator(
             ],
         )
 
+    # stop, or allow at most one more tool call, once the time or token budget of
+    # the run is (nearly) spent
+    if iteration_nr > 1 and run_scheduler.is_budget_spent():
+        logger.info("The budget of the research run is spent, closing")
+        return OrchestrationUpdate(
+            tools_used=[DRPath.CLOSER.value],
+            current_step_nr=current_step_nr,
+            query_list=[],
+            iteration_nr=iteration_nr,
+            log_messages=[
+                get_langgraph_node_log_string(
+                    graph_component="main",
+                    node_name="orchestrator",
+                    node_start_time=node_start_time,
+                )
+            ],
+            plan_of_record=plan_of_record,
+            remaining_time_budget=0,
+            iteration_instructions=[
+                IterationInstructions(
+                    iteration_nr=iteration_nr,
+                    plan=None,
+                    reasoning="Time to wrap up.",
+                    purpose="",
+                )
+            ],
+        )
+    elif iteration_nr > 1 and run_scheduler.is_budget_nearly_spent():
+        remaining_time_budget = min(remaining_time_budget, 1.0)
+
     # no early exit forced. Continue.
 
     available_tools = state.available_tools or {}
@@ -245,6 +278,7 @@ def orchestrator(
                     agent_answer_question_num=0,
                     agent_answer_type="agent_level_answer",
                     timeout_override=TF_DR_TIMEOUT_LONG,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     answer_piece=StreamingType.REASONING_DELTA.value,
                     ind=current_step_nr,
                     # max_tokens=None,
@@ -332,6 +366,8 @@ def orchestrator(
                     ),
                     schema=OrchestratorDecisonsNoPlan,
                     timeout_override=TF_DR_TIMEOUT_SHORT,
+                    run_memo=graph_config.tooling.run_memo,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     # max_tokens=2500,
                 )
                 next_step = orchestrator_action.next_step
@@ -384,6 +420,8 @@ def orchestrator(
                     ),
                     schema=OrchestrationPlan,
                     timeout_override=TF_DR_TIMEOUT_SHORT,
+                    run_memo=graph_config.tooling.run_memo,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     # max_tokens=3000,
                 )
             except Exception as e:
@@ -413,6 +451,7 @@ def orchestrator(
                     agent_answer_question_num=0,
                     agent_answer_type="agent_level_answer",
                     timeout_override=TF_DR_TIMEOUT_LONG,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     answer_piece=StreamingType.REASONING_DELTA.value,
                     ind=current_step_nr,
                 ),
@@ -463,6 +502,8 @@ def orchestrator(
                     ),
                     schema=OrchestratorDecisonsNoPlan,
                     timeout_override=TF_DR_TIMEOUT_LONG,
+                    run_memo=graph_config.tooling.run_memo,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     # max_tokens=1500,
                 )
                 next_step = orchestrator_action.next_step
@@ -506,6 +547,7 @@ def orchestrator(
                 agent_answer_question_num=0,
                 agent_answer_type="agent_level_answer",
                 timeout_override=TF_DR_TIMEOUT_LONG,
+                run_scheduler=graph_config.tooling.run_scheduler,
                 answer_piece=StreamingType.REASONING_DELTA.value,
                 ind=current_step_nr,
                 # max_tokens=None,
@@ -564,6 +606,7 @@ def orchestrator(
                     agent_answer_question_num=0,
                     agent_answer_type="agent_level_answer",
                     timeout_override=TF_DR_TIMEOUT_LONG,
+                    run_scheduler=graph_config.tooling.run_scheduler,
                     answer_piece=StreamingType.REASONING_DELTA.value,
                     ind=current_step_nr,
                     # max_tokens=None,
@@ -279,6 +279,8 @@ def closer(
             ),
             schema=TestInfoCompleteResponse,
             timeout_override=TF_DR_TIMEOUT_LONG,
+            run_memo=graph_config.tooling.run_memo,
+            run_scheduler=graph_config.tooling.run_scheduler,
             # max_tokens=1000,
         )
 
@@ -377,6 +379,7 @@ def closer(
                 agent_answer_question_num=0,
                 agent_answer_type="agent_level_answer",
                 timeout_override=int(2 * TF_DR_TIMEOUT_LONG),
+                run_scheduler=graph_config.tooling.run_scheduler,
                 answer_piece=StreamingType.MESSAGE_DELTA.value,
                 ind=current_step_nr,
                 context_docs=all_context_llmdocs,
@@ -95,6 +95,7 @@ def save_iteration(
     all_cited_documents: list[InferenceSection],
     is_internet_marker_dict: dict[str, bool],
     num_tokens: int,
+    tokenizer_name: str,
 ) -> None:
     db_session = graph_config.persistence.db_session
     message_id = graph_config.persistence.message_id
@@ -144,6 +145,7 @@ def save_iteration(
         update_parent_message=True,
         research_answer_purpose=ResearchAnswerPurpose.ANSWER,
         token_count=num_tokens,
+        tokenizer_name=tokenizer_name,
     )
 
     for iteration_preparation in state.iteration_instructions:
@@ -234,10 +236,23 @@ def logging(
         all_cited_documents,
         is_internet_marker_dict,
         num_tokens,
+        llm_tokenizer.name,
     )
 
+    run_stats_messages = graph_config.tooling.run_memo.get_stats_messages()
+    for memo_stats_message in run_stats_messages:
+        logger.info(memo_stats_message)
+
+    # closes the metrics of the last iteration
+    last_iteration_summary = graph_config.tooling.run_scheduler.start_iteration(
+        state.iteration_nr + 1
+    )
+    if last_iteration_summary:
+        run_stats_messages.append(last_iteration_summary)
+
     return LoggerUpdate(
-        log_messages=[
+        log_messages=run_stats_messages
+        + [
             get_langgraph_node_log_string(
                 graph_component="main",
                 node_name="logger",
@@ -10,6 +10,9 @@ from onyx.agents.agent_search.dr.enums import ResearchType
 from onyx.agents.agent_search.dr.models import BaseSearchProcessingResponse
 from onyx.agents.agent_search.dr.models import IterationAnswer
 from onyx.agents.agent_search.dr.models import SearchAnswer
+from onyx.agents.agent_search.dr.sub_agents.basic_search.speculative_search import (
+    SpeculativeSearch,
+)
 from onyx.agents.agent_search.dr.sub_agents.states import BranchInput
 from onyx.agents.agent_search.dr.sub_agents.states import BranchUpdate
 from onyx.agents.agent_search.dr.utils import convert_inference_sections_to_search_docs
@@ -17,12 +20,16 @@ from onyx.agents.agent_search.dr.utils import extract_document_citations
 from onyx.agents.agent_search.kb_search.graph_utils import build_document_context
 from onyx.agents.agent_search.models import GraphConfig
 from onyx.agents.agent_search.shared_graph_utils.llm import invoke_llm_json
+from onyx.agents.agent_search.shared_graph_utils.run_memo import memo_key
+from onyx.agents.agent_search.shared_graph_utils.run_memo import RunMemo
+from onyx.agents.agent_search.shared_graph_utils.run_scheduler import RunScheduler
 from onyx.agents.agent_search.shared_graph_utils.utils import (
     get_langgraph_node_log_string,
 )
 from onyx.agents.agent_search.shared_graph_utils.utils import write_custom_event
 from onyx.agents.agent_search.utils import create_question_prompt
 from onyx.chat.models import LlmDoc
+from onyx.configs.agent_configs import TF_DR_SPECULATIVE_SEARCH
 from onyx.configs.agent_configs import TF_DR_TIMEOUT_LONG
 from onyx.configs.agent_configs import TF_DR_TIMEOUT_SHORT
 from onyx.context.search.models import InferenceSection
@@ -38,10 +45,77 @@ from onyx.tools.tool_implementations.search.search_tool import (
 from onyx.tools.tool_implementations.search.search_tool import SearchResponseSummary
 from onyx.tools.tool_implementations.search.search_tool import SearchTool
 from onyx.utils.logger import setup_logger
+from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
 
 
+def _run_search(
+    search_tool: SearchTool,
+    query: str,
+    query_embedding: Embedding | None,
+    document_sources: list[DocumentSource] | None,
+    time_filter: datetime | None,
+    user_file_ids: list[UUID] | None,
+    project_id: int | None,
+    run_memo: RunMemo,
+    run_scheduler: RunScheduler,
+) -> list[InferenceSection]:
+    # parallel branches often search for the same query, the embedding is derived
+    # from the query so it is not part of the key
+    key = memo_key(query, document_sources, time_filter, user_file_ids, project_id)
+
+    def search() -> list[InferenceSection]:
+        with run_scheduler.slot("search"):
+            return _search_sections(
+                search_tool=search_tool,
+                query=query,
+                query_embedding=query_embedding,
+                document_sources=document_sources,
+                time_filter=time_filter,
+                user_file_ids=user_file_ids,
+                project_id=project_id,
+            )
+
+    return list(run_memo.get_or_compute("search", key, search))
+
+
+def _search_sections(
+    search_tool: SearchTool,
+    query: str,
+    query_embedding: Embedding | None,
+    document_sources: list[DocumentSource] | None,
+    time_filter: datetime | None,
+    user_file_ids: list[UUID] | None,
+    project_id: int | None,
+) -> list[InferenceSection]:
+    callback_container: list[list[InferenceSection]] = []
+
+    # new db session to avoid concurrency issues
+    with get_session_with_current_tenant() as search_db_session:
+        for tool_response in search_tool.run(
+            query=query,
+            document_sources=document_sources,
+            time_filter=time_filter,
+            override_kwargs=SearchToolOverrideKwargs(
+                force_no_rerank=True,
+                alternate_db_session=search_db_session,
+                retrieved_sections_callback=callback_container.append,
+                skip_query_analysis=True,
+                original_query=query,
+                precomputed_query_embedding=query_embedding,
+                user_file_ids=user_file_ids,
+                project_id=project_id,
+            ),
+        ):
+            # get retrieved docs to send to the rest of the graph
+            if tool_response.id == SEARCH_RESPONSE_SUMMARY_ID:
+                response = cast(SearchResponseSummary, tool_response.response)
+                return response.top_sections
+
+    return []
+
+
 def basic_search(
     state: BranchInput,
     config: RunnableConfig,
@@ -85,6 +159,33 @@ def basic_search(
         [source.value for source in state.active_source_types or []]
     )
 
+    user_file_ids: list[UUID] | None = None
+    project_id: int | None = None
+    if force_use_tool.override_kwargs and isinstance(
+        force_use_tool.override_kwargs, SearchToolOverrideKwargs
+    ):
+        override_kwargs = force_use_tool.override_kwargs
+        user_file_ids = override_kwargs.user_file_ids
+        project_id = override_kwargs.project_id
+
+    # search for the query as it is while it is being rewritten
+    speculative_search: SpeculativeSearch | None = None
+    if TF_DR_SPECULATIVE_SEARCH:
+        speculative_search = SpeculativeSearch(
+            query=branch_query,
+            run_search=lambda query, query_embedding: _run_search(
+                search_tool=search_tool,
+                query=query,
+                query_embedding=query_embedding,
+                document_sources=None,
+                time_filter=None,
+                user_file_ids=user_file_ids,
+                project_id=project_id,
+                run_memo=graph_config.tooling.run_memo,
+                run_scheduler=graph_config.tooling.run_scheduler,
+            ),
+        )
+
     base_search_processing_prompt = BASE_SEARCH_PROCESSING_PROMPT.build(
         active_source_types_str=active_source_types_str,
         branch_query=branch_query,
@@ -99,6 +200,8 @@ def basic_search(
             ),
             schema=BaseSearchProcessingResponse,
             timeout_override=TF_DR_TIMEOUT_SHORT,
+            run_memo=graph_config.tooling.run_memo,
+            run_scheduler=graph_config.tooling.run_scheduler,
             # max_tokens=100,
         )
     except Exception as e:
@@ -140,40 +243,29 @@ def basic_search(
         f"Search start for Standard Search {iteration_nr}.{parallelization_nr} at {datetime.now()}"
     )
 
-    retrieved_docs: list[InferenceSection] = []
-    callback_container: list[list[InferenceSection]] = []
-
-    user_file_ids: list[UUID] | None = None
-    project_id: int | None = None
-    if force_use_tool.override_kwargs and isinstance(
-        force_use_tool.override_kwargs, SearchToolOverrideKwargs
-    ):
-        override_kwargs = force_use_tool.override_kwargs
-        user_file_ids = override_kwargs.user_file_ids
-        project_id = override_kwargs.project_id
+    retrieved_docs: list[InferenceSection] | None = None
+    rewritten_query_embedding: Embedding | None = None
+    if speculative_search is not None:
+        retrieved_docs = speculative_search.get_sections(
+            rewritten_query,
+            has_filters=(
+                specified_source_types is not None or implied_time_filter is not None
+            ),
+        )
+        rewritten_query_embedding = speculative_search.rewritten_query_embedding
 
-    # new db session to avoid concurrency issues
-    with get_session_with_current_tenant() as search_db_session:
-        for tool_response in search_tool.run(
+    if retrieved_docs is None:
+        retrieved_docs = _run_search(
+            search_tool=search_tool,
             query=rewritten_query,
+            query_embedding=rewritten_query_embedding,
             document_sources=specified_source_types,
             time_filter=implied_time_filter,
-            override_kwargs=SearchToolOverrideKwargs(
-                force_no_rerank=True,
-                alternate_db_session=search_db_session,
-                retrieved_sections_callback=callback_container.append,
-                skip_query_analysis=True,
-                original_query=rewritten_query,
-                user_file_ids=user_file_ids,
-                project_id=project_id,
-            ),
-        ):
-            # get retrieved docs to send to the rest of the graph
-            if tool_response.id == SEARCH_RESPONSE_SUMMARY_ID:
-                response = cast(SearchResponseSummary, tool_response.response)
-                retrieved_docs = response.top_sections
-
-                break
+            user_file_ids=user_file_ids,
+            project_id=project_id,
+            run_memo=graph_config.tooling.run_memo,
+            run_scheduler=graph_config.tooling.run_scheduler,
+        )
 
     # render the retrieved docs in the UI
     write_custom_event(
@@ -220,6 +312,8 @@ def basic_search(
             ),
             schema=SearchAnswer,
             timeout_override=TF_DR_TIMEOUT_LONG,
+            run_memo=graph_config.tooling.run_memo,
+            run_scheduler=graph_config.tooling.run_scheduler,
             # max_tokens=1500,
         )
 
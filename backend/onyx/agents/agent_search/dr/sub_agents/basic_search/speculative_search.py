@@ -0,0 +1,123 @@
+import threading
+from collections.abc import Callable
+
+import numpy as np
+
+from onyx.configs.agent_configs import TF_DR_SPECULATIVE_SEARCH_SIMILARITY_THRESHOLD
+from onyx.context.search.models import InferenceSection
+from onyx.context.search.utils import get_query_embedding
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_in_background
+from onyx.utils.threadpool_concurrency import wait_on_background
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# How often the hit rate is logged
+_LOG_STATS_EVERY = 100
+
+
+class _SpeculativeSearchStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            total = self.hits + self.misses
+            hits = self.hits
+
+        if total % _LOG_STATS_EVERY == 0:
+            logger.info(
+                f"Speculative search hit rate: {hits / total:.1%} "
+                f"({hits} hits, {total - hits} misses)"
+            )
+
+
+speculative_search_stats = _SpeculativeSearchStats()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _cosine_similarity(a: Embedding, b: Embedding) -> float:
+    a_arr = np.array(a)
+    b_arr = np.array(b)
+    norm = np.linalg.norm(a_arr) * np.linalg.norm(b_arr)
+    return float(np.dot(a_arr, b_arr) / norm) if norm else 0.0
+
+
+class SpeculativeSearch:
+    """Runs the search for a query in the background while the query is being
+    rewritten, so that the search is off the critical path if the rewrite does not
+    change the meaning of the query.
+
+    The background search can not be interrupted. On a miss its results are dropped
+    and the search is run again for the rewritten query."""
+
+    def __init__(
+        self,
+        query: str,
+        run_search: Callable[[str, Embedding | None], list[InferenceSection]],
+    ) -> None:
+        self.query = query
+        # set if the queries were compared by embedding, reused for the search of the
+        # rewritten query on a miss
+        self.rewritten_query_embedding: Embedding | None = None
+        self._run_search = run_search
+        self._query_embedding: Embedding | None = None
+        self._query_embedding_done = threading.Event()
+        self._task = run_in_background(self._embed_and_search)
+
+    def _embed_and_search(self) -> list[InferenceSection]:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                self._query_embedding = get_query_embedding(self.query, db_session)
+        finally:
+            self._query_embedding_done.set()
+        return self._run_search(self.query, self._query_embedding)
+
+    def _is_same_query(self, rewritten_query: str) -> bool:
+        if _normalize_query(rewritten_query) == _normalize_query(self.query):
+            return True
+
+        self._query_embedding_done.wait()
+        if self._query_embedding is None:
+            return False
+
+        with get_session_with_current_tenant() as db_session:
+            self.rewritten_query_embedding = get_query_embedding(
+                rewritten_query, db_session
+            )
+        similarity = _cosine_similarity(
+            self._query_embedding, self.rewritten_query_embedding
+        )
+        logger.debug(
+            f"Speculative search similarity {similarity:.3f} between "
+            f"'{self.query}' and '{rewritten_query}'"
+        )
+        return similarity >= TF_DR_SPECULATIVE_SEARCH_SIMILARITY_THRESHOLD
+
+    def get_sections(
+        self, rewritten_query: str, has_filters: bool
+    ) -> list[InferenceSection] | None:
+        """Returns the speculative results if they are valid for the rewritten query.
+        Otherwise returns None and the caller has to search for the rewritten query.
+        The speculative search is not filtered, so it is never valid if the rewrite
+        came up with filters."""
+        sections: list[InferenceSection] | None = None
+        if not has_filters and self._is_same_query(rewritten_query):
+            try:
+                sections = wait_on_background(self._task)
+            except Exception:
+                logger.exception("Speculative search failed")
+
+        speculative_search_stats.record(hit=sections is not None)
+        return sections
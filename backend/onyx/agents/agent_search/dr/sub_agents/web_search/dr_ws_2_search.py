@@ -20,6 +20,7 @@ from onyx.agents.agent_search.dr.sub_agents.web_search.states import (
 )
 from onyx.agents.agent_search.models import GraphConfig
 from onyx.agents.agent_search.shared_graph_utils.llm import invoke_llm_json
+from onyx.agents.agent_search.shared_graph_utils.run_memo import memo_key
 from onyx.agents.agent_search.shared_graph_utils.utils import (
     get_langgraph_node_log_string,
 )
@@ -74,11 +75,20 @@ def web_search(
     if not provider:
         raise ValueError("No internet search provider found")
 
+    def _scheduled_search(search_query: str) -> list[InternetSearchResult]:
+        with graph_config.tooling.run_scheduler.slot("web_search"):
+            return provider.search(search_query)
+
     @traceable(name="Search Provider API Call")
     def _search(search_query: str) -> list[InternetSearchResult]:
         search_results: list[InternetSearchResult] = []
         try:
-            search_results = provider.search(search_query)
+            # parallel branches often issue the same query
+            search_results = graph_config.tooling.run_memo.get_or_compute(
+                "web_search",
+                memo_key(search_query),
+                lambda: _scheduled_search(search_query),
+            )
         except Exception as e:
             logger.error(f"Error performing search: {e}")
         return search_results
@@ -110,6 +120,8 @@ def web_search(
         ),
         schema=WebSearchAnswer,
         timeout_override=TF_DR_TIMEOUT_SHORT,
+        run_memo=graph_config.tooling.run_memo,
+        run_scheduler=graph_config.tooling.run_scheduler,
     )
     results_to_open = [
         (search_query, search_results[i])
@@ -9,6 +9,9 @@ from onyx.agents.agent_search.dr.sub_agents.web_search.providers import (
 )
 from onyx.agents.agent_search.dr.sub_agents.web_search.states import FetchInput
 from onyx.agents.agent_search.dr.sub_agents.web_search.states import FetchUpdate
+from onyx.agents.agent_search.dr.sub_agents.web_search.url_contents import (
+    fetch_url_contents,
+)
 from onyx.agents.agent_search.dr.sub_agents.web_search.utils import (
     dummy_inference_section_from_internet_content,
 )
@@ -45,14 +48,11 @@ def web_fetch(
     if provider is None:
         raise ValueError("No web search provider found")
 
-    retrieved_docs: list[InferenceSection] = []
-    try:
-        retrieved_docs = [
-            dummy_inference_section_from_internet_content(result)
-            for result in provider.contents(state.urls_to_open)
-        ]
-    except Exception as e:
-        logger.error(f"Error fetching URLs: {e}")
+    # URLs that fail or time out are skipped, the others are still used
+    retrieved_docs: list[InferenceSection] = [
+        dummy_inference_section_from_internet_content(result)
+        for result in fetch_url_contents(provider, state.urls_to_open)
+    ]
 
     if not retrieved_docs:
         logger.warning("No content retrieved from URLs")
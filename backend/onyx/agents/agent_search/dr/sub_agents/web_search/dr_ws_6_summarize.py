@@ -9,6 +9,9 @@ from onyx.agents.agent_search.dr.models import IterationAnswer
 from onyx.agents.agent_search.dr.models import SearchAnswer
 from onyx.agents.agent_search.dr.sub_agents.states import BranchUpdate
 from onyx.agents.agent_search.dr.sub_agents.web_search.states import SummarizeInput
+from onyx.agents.agent_search.dr.sub_agents.web_search.url_contents import (
+    normalize_url,
+)
 from onyx.agents.agent_search.dr.utils import extract_document_citations
 from onyx.agents.agent_search.kb_search.graph_utils import build_document_context
 from onyx.agents.agent_search.models import GraphConfig
@@ -40,10 +43,15 @@ def is_summarize(
     # build branch iterations from fetch inputs
     url_to_raw_document: dict[str, InferenceSection] = {}
     for raw_document in state.raw_documents:
-        url_to_raw_document[raw_document.center_chunk.semantic_identifier] = (
-            raw_document
-        )
-    urls = state.branch_questions_to_urls[state.branch_question]
+        url_to_raw_document[
+            normalize_url(raw_document.center_chunk.semantic_identifier)
+        ] = raw_document
+    # pages that could not be fetched are left out
+    cited_raw_documents = [
+        url_to_raw_document[normalize_url(url)]
+        for url in state.branch_questions_to_urls[state.branch_question]
+        if normalize_url(url) in url_to_raw_document
+    ]
     current_iteration = state.iteration_nr
     graph_config = cast(GraphConfig, config["metadata"]["config"])
     research_type = graph_config.behavior.research_type
@@ -52,7 +60,6 @@ def is_summarize(
     is_tool_info = state.available_tools[state.tools_used[-1]]
 
     if research_type == ResearchType.DEEP:
-        cited_raw_documents = [url_to_raw_document[url] for url in urls]
         document_texts = _create_document_texts(cited_raw_documents)
         search_prompt = INTERNAL_SEARCH_PROMPTS[research_type].build(
             search_query=state.branch_question,
@@ -68,6 +75,8 @@ def is_summarize(
             ),
             schema=SearchAnswer,
             timeout_override=TF_DR_TIMEOUT_SHORT,
+            run_memo=graph_config.tooling.run_memo,
+            run_scheduler=graph_config.tooling.run_scheduler,
         )
         answer_string = search_answer_json.answer
         claims = search_answer_json.claims or []
@@ -86,7 +95,6 @@ def is_summarize(
         answer_string = ""
         reasoning = ""
         claims = []
-        cited_raw_documents = [url_to_raw_document[url] for url in urls]
         cited_documents = {
             doc_num + 1: retrieved_doc
             for doc_num, retrieved_doc in enumerate(cited_raw_documents)
@@ -9,6 +9,9 @@ from onyx.agents.agent_search.dr.sub_agents.web_search.states import (
     InternetSearchInput,
 )
 from onyx.agents.agent_search.dr.sub_agents.web_search.states import SummarizeInput
+from onyx.agents.agent_search.dr.sub_agents.web_search.url_contents import (
+    normalize_url,
+)
 
 
 def branching_router(state: SubAgentInput) -> list[Send | Hashable]:
@@ -37,6 +40,11 @@ def branching_router(state: SubAgentInput) -> list[Send | Hashable]:
 
 def fetch_router(state: InternetSearchInput) -> list[Send | Hashable]:
     branch_questions_to_urls = state.branch_questions_to_urls
+    # branches often find the same pages, every page is only fetched once
+    normalized_url_to_url: dict[str, str] = {}
+    for urls in branch_questions_to_urls.values():
+        for url in urls:
+            normalized_url_to_url.setdefault(normalize_url(url), url)
     return [
         Send(
             "fetch",
@@ -52,9 +60,7 @@ def fetch_router(state: InternetSearchInput) -> list[Send | Hashable]:
                 raw_documents=state.raw_documents,
             ),
         )
-        for url in set(
-            url for urls in branch_questions_to_urls.values() for url in urls
-        )
+        for url in normalized_url_to_url.values()
     ]
 
 
@@ -0,0 +1,164 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from onyx.agents.agent_search.dr.sub_agents.web_search.models import (
+    InternetContent,
+)
+from onyx.agents.agent_search.dr.sub_agents.web_search.models import (
+    InternetSearchProvider,
+)
+from onyx.configs.agent_configs import TF_DR_URL_CONTENT_CACHE_MAX_BYTES
+from onyx.configs.agent_configs import TF_DR_URL_CONTENT_CACHE_TTL_SECONDS
+from onyx.configs.agent_configs import TF_DR_URL_FETCH_TIMEOUT_SECONDS
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from onyx.utils.threadpool_concurrency import run_with_timeout
+
+logger = setup_logger()
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_QUERY_PARAM_PREFIXES = ("utm_",)
+_TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes the parts of a URL that do not change the page: the case of the
+    scheme and host, default ports, fragments, trailing slashes, the order of the query
+    parameters and tracking parameters."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name not in _TRACKING_QUERY_PARAMS
+            and not name.startswith(_TRACKING_QUERY_PARAM_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class _URLContentCache:
+    """In-process LRU cache of fetched pages by normalized URL. Pages are stored
+    compressed and the cache is bounded by the total compressed size."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: int) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> InternetContent | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, compressed = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+
+        return InternetContent.model_validate_json(zlib.decompress(compressed))
+
+    def put(self, key: str, content: InternetContent) -> None:
+        compressed = zlib.compress(content.model_dump_json().encode())
+        if len(compressed) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, compressed)
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, compressed = self._entries.pop(key)
+        self._size -= len(compressed)
+
+
+_url_content_cache = _URLContentCache(
+    max_bytes=TF_DR_URL_CONTENT_CACHE_MAX_BYTES,
+    ttl_seconds=TF_DR_URL_CONTENT_CACHE_TTL_SECONDS,
+)
+
+# fetches in progress by normalized URL, so that parallel branches that open the same
+# page wait for one fetch instead of fetching it again
+_in_flight_fetches: dict[str, Future[InternetContent | None]] = {}
+_in_flight_fetches_lock = threading.Lock()
+
+
+def _fetch_url(provider: InternetSearchProvider, url: str) -> InternetContent | None:
+    try:
+        contents = run_with_timeout(
+            TF_DR_URL_FETCH_TIMEOUT_SECONDS, provider.contents, [url]
+        )
+    except Exception as e:
+        logger.warning(f"Failed to fetch {url}: {e}")
+        return None
+
+    if not contents or not contents[0].full_content:
+        logger.warning(f"No content retrieved from {url}")
+        return None
+    return contents[0]
+
+
+def _fetch_url_deduplicated(
+    provider: InternetSearchProvider, url: str
+) -> InternetContent | None:
+    key = normalize_url(url)
+    content = _url_content_cache.get(key)
+
+    if content is None:
+        with _in_flight_fetches_lock:
+            in_flight_fetch = _in_flight_fetches.get(key)
+            if in_flight_fetch is None:
+                fetch: Future[InternetContent | None] = Future()
+                _in_flight_fetches[key] = fetch
+
+        if in_flight_fetch is not None:
+            try:
+                content = in_flight_fetch.result(
+                    timeout=TF_DR_URL_FETCH_TIMEOUT_SECONDS
+                )
+            except Exception:
+                content = None
+        else:
+            try:
+                content = _fetch_url(provider, url)
+                if content is not None:
+                    _url_content_cache.put(key, content)
+            finally:
+                fetch.set_result(content)
+                with _in_flight_fetches_lock:
+                    _in_flight_fetches.pop(key, None)
+
+    # the provider may return a canonical URL, the caller looks pages up by its own
+    return content.model_copy(update={"link": url}) if content is not None else None
+
+
+def fetch_url_contents(
+    provider: InternetSearchProvider, urls: list[str]
+) -> list[InternetContent]:
+    """Fetches every URL separately and in parallel, with a timeout per URL. URLs that
+    fail or time out are left out of the results."""
+    contents = run_functions_tuples_in_parallel(
+        [(_fetch_url_deduplicated, (provider, url)) for url in urls],
+        allow_failures=True,
+    )
+    return [content for content in contents if content is not None]
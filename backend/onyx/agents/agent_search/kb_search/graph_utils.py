@@ -14,7 +14,7 @@ from onyx.db.document import get_kg_doc_info_for_entity_name
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.entities import get_document_id_for_entity
 from onyx.db.entities import get_entity_name
-from onyx.db.entity_type import get_entity_types
+from onyx.kg.schema_cache import get_active_entity_type_names
 from onyx.kg.utils.formatting_utils import make_entity_id
 from onyx.kg.utils.formatting_utils import split_relationship_id
 from onyx.utils.logger import setup_logger
@@ -145,11 +145,8 @@ def rename_entities_in_answer(answer: str) -> str:
     logger.debug(f"Found {len(matches)} matches")
 
     # get active entity types
-    with get_session_with_current_tenant() as db_session:
-        active_entity_types = [
-            x.id_name for x in get_entity_types(db_session, active=True)
-        ]
-        logger.debug(f"Active entity types: {active_entity_types}")
+    active_entity_types = get_active_entity_type_names()
+    logger.debug(f"Active entity types: {active_entity_types}")
 
     # Create dictionary for processed references
     processed_refs = {}
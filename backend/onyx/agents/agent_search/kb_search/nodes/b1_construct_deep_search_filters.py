@@ -13,8 +13,7 @@ from onyx.agents.agent_search.shared_graph_utils.utils import (
     get_langgraph_node_log_string,
 )
 from onyx.configs.kg_configs import KG_FILTER_CONSTRUCTION_TIMEOUT
-from onyx.db.engine.sql_engine import get_session_with_current_tenant
-from onyx.db.entity_type import get_entity_types_with_grounded_source_name
+from onyx.kg.schema_cache import get_grounded_source_names
 from onyx.kg.utils.formatting_utils import make_entity_id
 from onyx.prompts.kg_prompts import SEARCH_FILTER_CONSTRUCTION_PROMPT
 from onyx.utils.logger import setup_logger
@@ -146,20 +145,11 @@ def construct_deep_search_filters(
 
     logger.info(f"div_con_structure: {div_con_structure}")
 
-    with get_session_with_current_tenant() as db_session:
-        double_grounded_entity_types = get_entity_types_with_grounded_source_name(
-            db_session
-        )
-
     source_division = False
 
     if div_con_structure:
-        for entity_type in double_grounded_entity_types:
-            # entity_type is guaranteed to have grounded_source_name
-            if (
-                cast(str, entity_type.grounded_source_name).lower()
-                in div_con_structure[0].lower()
-            ):
+        for grounded_source_name in get_grounded_source_names():
+            if grounded_source_name.lower() in div_con_structure[0].lower():
                 source_division = True
                 break
 
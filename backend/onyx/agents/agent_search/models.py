@@ -1,10 +1,13 @@
 from uuid import UUID
 
 from pydantic import BaseModel
+from pydantic import Field
 from pydantic import model_validator
 from sqlalchemy.orm import Session
 
 from onyx.agents.agent_search.dr.enums import ResearchType
+from onyx.agents.agent_search.shared_graph_utils.run_memo import RunMemo
+from onyx.agents.agent_search.shared_graph_utils.run_scheduler import RunScheduler
 from onyx.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
 from onyx.context.search.models import RerankingDetails
 from onyx.db.models import Persona
@@ -41,6 +44,10 @@ class GraphTooling(BaseModel):
     # force tool args IF the tool is used
     force_use_tool: ForceUseTool
     using_tool_calling_llm: bool = False
+    # memoized search and LLM calls, scoped to the run
+    run_memo: RunMemo = Field(default_factory=RunMemo)
+    # limits the calls in flight and tracks the time and token budget of the run
+    run_scheduler: RunScheduler = Field(default_factory=RunScheduler)
 
     class Config:
         arbitrary_types_allowed = True
@@ -12,6 +12,7 @@ from onyx.agents.agent_search.orchestration.states import ToolChoiceUpdate
 from onyx.tools.message import build_tool_message
 from onyx.tools.message import ToolCallSummary
 from onyx.tools.tool_runner import ToolRunner
+from onyx.utils.cancellation import RequestCancelledError
 from onyx.utils.logger import setup_logger
 
 
@@ -49,6 +50,8 @@ def call_tool(
             tool_responses.append(response)
 
         tool_final_result = tool_runner.tool_final_result()
+    except RequestCancelledError:
+        raise
     except Exception as e:
         raise ToolCallException(
             f"Error during tool call for {tool.display_name}: {e}"
@@ -1,4 +1,5 @@
 import re
+from collections.abc import Iterator
 from datetime import datetime
 from typing import cast
 from typing import Literal
@@ -6,12 +7,19 @@ from typing import Type
 from typing import TypeVar
 
 from langchain.schema.language_model import LanguageModelInput
+from langchain_core.messages import BaseMessageChunk
 from langchain_core.messages import HumanMessage
 from langgraph.types import StreamWriter
 from litellm import get_supported_openai_params
 from litellm import supports_response_schema
 from pydantic import BaseModel
 
+from onyx.agents.agent_search.shared_graph_utils.run_memo import prompt_memo_key
+from onyx.agents.agent_search.shared_graph_utils.run_memo import RunMemo
+from onyx.agents.agent_search.shared_graph_utils.run_scheduler import (
+    count_llm_tokens,
+)
+from onyx.agents.agent_search.shared_graph_utils.run_scheduler import RunScheduler
 from onyx.agents.agent_search.shared_graph_utils.utils import write_custom_event
 from onyx.chat.stream_processing.citation_processing import CitationProcessorGraph
 from onyx.chat.stream_processing.citation_processing import LlmDoc
@@ -43,6 +51,7 @@ def stream_llm_answer(
     ind: int | None = None,
     context_docs: list[LlmDoc] | None = None,
     replace_citations: bool = False,
+    run_scheduler: RunScheduler | None = None,
 ) -> tuple[list[str], list[float], list[CitationInfo]]:
     """Stream the initial answer from the LLM.
 
@@ -61,6 +70,7 @@ def stream_llm_answer(
         tools: The tools to use.
         tool_choice: The tool choice to use.
         structured_response_format: The structured response format to use.
+        run_scheduler: The scheduler of the run, if the call is part of one.
 
     Returns:
         A tuple of the response and the dispatch timings.
@@ -76,11 +86,15 @@ def stream_llm_answer(
     else:
         citation_processor = None
 
-    for message in llm.stream(
+    messages = llm.stream(
         prompt,
         timeout_override=timeout_override,
         max_tokens=max_tokens,
-    ):
+    )
+    if run_scheduler is not None:
+        messages = _scheduled_stream(llm, prompt, messages, run_scheduler)
+
+    for message in messages:
 
         # TODO: in principle, the answer here COULD contain images, but we don't support that yet
         content = message.content
@@ -134,6 +148,21 @@ def stream_llm_answer(
     return response, dispatch_timings, citation_infos
 
 
+def _scheduled_stream(
+    llm: LLM,
+    prompt: LanguageModelInput,
+    messages: Iterator[BaseMessageChunk],
+    run_scheduler: RunScheduler,
+) -> Iterator[BaseMessageChunk]:
+    """Holds a slot of the run for as long as the answer is streamed"""
+    response: list[str] = []
+    with run_scheduler.slot("llm") as call_record:
+        for message in messages:
+            response.append(str(message.content))
+            yield message
+        call_record.tokens = count_llm_tokens(llm, prompt, "".join(response))
+
+
 def invoke_llm_json(
     llm: LLM,
     prompt: LanguageModelInput,
@@ -142,30 +171,85 @@ def invoke_llm_json(
     tool_choice: ToolChoiceOptions | None = None,
     timeout_override: int | None = None,
     max_tokens: int | None = None,
+    run_memo: RunMemo | None = None,
+    run_scheduler: RunScheduler | None = None,
 ) -> SchemaType:
     """
     Invoke an LLM, forcing it to respond in a specified JSON format if possible,
     and return an object of that schema.
+
+    With a run_memo, identical calls at temperature 0 are only sent to the LLM once.
+    With a run_scheduler, the call waits for a free slot of the run and its tokens
+    count against the budget of the run.
     """
 
+    def invoke() -> SchemaType:
+        return _invoke_llm_json(
+            llm,
+            prompt,
+            schema,
+            tools,
+            tool_choice,
+            timeout_override,
+            max_tokens,
+            run_scheduler,
+        )
+
+    if run_memo is None or llm.config.temperature != 0:
+        return invoke()
+
+    key = prompt_memo_key(
+        prompt,
+        llm.config.model_provider,
+        llm.config.model_name,
+        schema.__name__,
+        tools,
+        tool_choice,
+        max_tokens,
+    )
+    result = run_memo.get_or_compute("llm", key, invoke)
+    # the callers of identical calls must not share a mutable result
+    return result.model_copy(deep=True)
+
+
+def _invoke_llm_json(
+    llm: LLM,
+    prompt: LanguageModelInput,
+    schema: Type[SchemaType],
+    tools: list[dict] | None,
+    tool_choice: ToolChoiceOptions | None,
+    timeout_override: int | None,
+    max_tokens: int | None,
+    run_scheduler: RunScheduler | None,
+) -> SchemaType:
+
     # check if the model supports response_format: json_schema
     supports_json = "response_format" in (
         get_supported_openai_params(llm.config.model_name, llm.config.model_provider)
         or []
     ) and supports_response_schema(llm.config.model_name, llm.config.model_provider)
 
-    response_content = str(
-        llm.invoke(
-            prompt,
-            tools=tools,
-            tool_choice=tool_choice,
-            timeout_override=timeout_override,
-            max_tokens=max_tokens,
-            **cast(
-                dict, {"structured_response_format": schema} if supports_json else {}
-            ),
-        ).content
-    )
+    def invoke() -> str:
+        return str(
+            llm.invoke(
+                prompt,
+                tools=tools,
+                tool_choice=tool_choice,
+                timeout_override=timeout_override,
+                max_tokens=max_tokens,
+                **cast(
+                    dict,
+                    {"structured_response_format": schema} if supports_json else {},
+                ),
+            ).content
+        )
+
+    if run_scheduler is None:
+        response_content = invoke()
+    else:
+        with run_scheduler.slot("llm") as call_record:
+            response_content = invoke()
+            call_record.tokens = count_llm_tokens(llm, prompt, response_content)
 
     if not supports_json:
         # remove newlines as they often lead to json decoding errors
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+from typing import cast
+from typing import TypeVar
+
+from langchain.schema.language_model import LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.prompt_values import PromptValue
+
+from onyx.configs.agent_configs import TF_DR_RUN_MEMOIZATION
+
+T = TypeVar("T")
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseMessage):
+        return [value.type, _to_jsonable(value.content)]
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def memo_key(*parts: Any) -> str:
+    """Key for a memoized call, from its arguments (prompts, queries, filters, ...)"""
+    return hashlib.sha256(
+        json.dumps(_to_jsonable(parts), sort_keys=True).encode()
+    ).hexdigest()
+
+
+def prompt_memo_key(prompt: LanguageModelInput, *parts: Any) -> str:
+    messages = prompt.to_messages() if isinstance(prompt, PromptValue) else prompt
+    return memo_key(messages, *parts)
+
+
+class _MemoStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        # answered from a finished call
+        self.hits = 0
+        # waited for an identical call that was still running
+        self.coalesced = 0
+
+
+class RunMemo:
+    """Memoizes the results of deterministic calls (search tool calls, LLM calls at
+    temperature 0) within one deep research run, so that parallel branches that issue
+    the same call share its result. A call that is identical to one still running waits
+    for that call instead of being issued again.
+
+    Failed calls are not memoized, every caller of a failed call gets its error."""
+
+    def __init__(self, enabled: bool = TF_DR_RUN_MEMOIZATION) -> None:
+        self.enabled = enabled
+        self._results: dict[tuple[str, str], Future[Any]] = {}
+        self._stats: dict[str, _MemoStats] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], T]) -> T:
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            stats = self._stats.setdefault(namespace, _MemoStats())
+            stats.calls += 1
+            future = self._results.get((namespace, key))
+            is_owner = future is None
+            if future is None:
+                future = Future()
+                self._results[(namespace, key)] = future
+            elif future.done():
+                stats.hits += 1
+            else:
+                stats.coalesced += 1
+
+        if not is_owner:
+            return cast(T, future.result())
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._results[(namespace, key)]
+            future.set_exception(e)
+            raise
+
+        future.set_result(result)
+        return result
+
+    def get_stats_messages(self) -> list[str]:
+        """One line per kind of memoized call, with the share of deduplicated calls"""
+        with self._lock:
+            stats_by_namespace = {
+                namespace: (stats.calls, stats.hits, stats.coalesced)
+                for namespace, stats in self._stats.items()
+            }
+
+        return [
+            f"Memoized {namespace} calls: {(hits + coalesced) / calls:.1%} "
+            f"deduplicated ({calls} calls, {hits} hits, {coalesced} coalesced in flight)"
+            for namespace, (calls, hits, coalesced) in stats_by_namespace.items()
+        ]
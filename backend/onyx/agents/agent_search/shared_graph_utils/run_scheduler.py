@@ -0,0 +1,176 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from langchain.schema.language_model import LanguageModelInput
+from langchain_core.prompt_values import PromptValue
+from prometheus_client import Histogram
+
+from onyx.configs.agent_configs import TF_DR_BUDGET_WRAP_UP_THRESHOLD
+from onyx.configs.agent_configs import TF_DR_MAX_IN_FLIGHT_CALLS_PER_RUN
+from onyx.configs.agent_configs import TF_DR_MAX_IN_FLIGHT_CALLS_PER_TENANT
+from onyx.configs.agent_configs import TF_DR_RUN_TIME_BUDGET_SECONDS
+from onyx.configs.agent_configs import TF_DR_RUN_TOKEN_BUDGET
+from onyx.llm.interfaces import LLM
+from onyx.natural_language_processing.utils import get_tokenizer
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+dr_call_latency = Histogram(
+    "onyx_dr_call_latency_seconds",
+    "Latency of the LLM and search calls of deep research runs",
+    ["kind"],
+)
+dr_call_wait = Histogram(
+    "onyx_dr_call_wait_seconds",
+    "Time the LLM and search calls of deep research runs waited for a free slot",
+    ["kind"],
+)
+dr_iteration_duration = Histogram(
+    "onyx_dr_iteration_duration_seconds",
+    "Wall clock time of a deep research iteration",
+)
+dr_iteration_tokens = Histogram(
+    "onyx_dr_iteration_tokens",
+    "LLM tokens (prompt and response) used by a deep research iteration",
+    buckets=(1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000),
+)
+
+_tenant_slots: dict[str, threading.BoundedSemaphore] = {}
+_tenant_slots_lock = threading.Lock()
+
+
+def _get_tenant_slots(tenant_id: str) -> threading.BoundedSemaphore:
+    with _tenant_slots_lock:
+        slots = _tenant_slots.get(tenant_id)
+        if slots is None:
+            slots = threading.BoundedSemaphore(TF_DR_MAX_IN_FLIGHT_CALLS_PER_TENANT)
+            _tenant_slots[tenant_id] = slots
+        return slots
+
+
+def count_llm_tokens(llm: LLM, prompt: LanguageModelInput, response: str) -> int:
+    """Counts the tokens of the prompt and the response with the tokenizer of the LLM"""
+    if isinstance(prompt, str):
+        prompt_texts = [prompt]
+    else:
+        messages = prompt.to_messages() if isinstance(prompt, PromptValue) else prompt
+        prompt_texts = [
+            str(getattr(message, "content", message)) for message in messages
+        ]
+
+    tokenizer = get_tokenizer(
+        model_name=llm.config.model_name, provider_type=llm.config.model_provider
+    )
+    return sum(
+        len(tokens) for tokens in tokenizer.encode_batch(prompt_texts + [response])
+    )
+
+
+class _IterationMetrics:
+    def __init__(self, iteration_nr: int) -> None:
+        self.iteration_nr = iteration_nr
+        self.start = time.monotonic()
+        self.calls = 0
+        self.tokens = 0
+        self.call_seconds = 0.0
+        self.wait_seconds = 0.0
+
+
+class CallRecord:
+    def __init__(self) -> None:
+        self.tokens = 0
+
+
+class RunScheduler:
+    """Schedules the LLM and search calls of a deep research run. The calls in flight
+    are limited per run and per tenant, and the tokens and latency of the calls are
+    tracked per iteration against the time and token budget of the run."""
+
+    def __init__(
+        self,
+        tenant_id: str | None = None,
+        max_in_flight_calls: int = TF_DR_MAX_IN_FLIGHT_CALLS_PER_RUN,
+        time_budget_seconds: int = TF_DR_RUN_TIME_BUDGET_SECONDS,
+        token_budget: int = TF_DR_RUN_TOKEN_BUDGET,
+    ) -> None:
+        self.time_budget_seconds = time_budget_seconds
+        self.token_budget = token_budget
+        self.start = time.monotonic()
+        self.total_tokens = 0
+        self._run_slots = threading.BoundedSemaphore(max_in_flight_calls)
+        self._tenant_slots = _get_tenant_slots(tenant_id or get_current_tenant_id())
+        self._iteration = _IterationMetrics(iteration_nr=0)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, kind: str) -> Iterator[CallRecord]:
+        """Waits for a free slot of the run and of the tenant and holds them for the
+        duration of the call. The tokens of LLM calls are set on the yielded record."""
+        wait_start = time.monotonic()
+        # the slot of the run first, so a run does not hold slots of the tenant
+        # while it waits for its own
+        with self._run_slots, self._tenant_slots:
+            call_start = time.monotonic()
+            record = CallRecord()
+            try:
+                yield record
+            finally:
+                self._record_call(
+                    kind,
+                    wait_seconds=call_start - wait_start,
+                    call_seconds=time.monotonic() - call_start,
+                    tokens=record.tokens,
+                )
+
+    def _record_call(
+        self, kind: str, wait_seconds: float, call_seconds: float, tokens: int
+    ) -> None:
+        dr_call_wait.labels(kind).observe(wait_seconds)
+        dr_call_latency.labels(kind).observe(call_seconds)
+        with self._lock:
+            self.total_tokens += tokens
+            self._iteration.calls += 1
+            self._iteration.tokens += tokens
+            self._iteration.call_seconds += call_seconds
+            self._iteration.wait_seconds += wait_seconds
+
+    def start_iteration(self, iteration_nr: int) -> str | None:
+        """Closes the metrics of the previous iteration, returns their summary"""
+        with self._lock:
+            previous_iteration = self._iteration
+            self._iteration = _IterationMetrics(iteration_nr)
+
+        if previous_iteration.calls == 0:
+            return None
+
+        duration = time.monotonic() - previous_iteration.start
+        dr_iteration_duration.observe(duration)
+        dr_iteration_tokens.observe(previous_iteration.tokens)
+        summary = (
+            f"Iteration {previous_iteration.iteration_nr}: {duration:.1f}s, "
+            f"{previous_iteration.calls} calls ({previous_iteration.call_seconds:.1f}s "
+            f"in calls, {previous_iteration.wait_seconds:.1f}s waiting for slots), "
+            f"{previous_iteration.tokens} tokens; run budget {self.budget_spent():.0%} "
+            "spent"
+        )
+        logger.info(summary)
+        return summary
+
+    def budget_spent(self) -> float:
+        """Share of the time or token budget spent, whichever is larger"""
+        spent = 0.0
+        if self.time_budget_seconds > 0:
+            spent = (time.monotonic() - self.start) / self.time_budget_seconds
+        if self.token_budget > 0:
+            spent = max(spent, self.total_tokens / self.token_budget)
+        return spent
+
+    def is_budget_spent(self) -> bool:
+        return self.budget_spent() >= 1.0
+
+    def is_budget_nearly_spent(self) -> bool:
+        return self.budget_spent() >= TF_DR_BUDGET_WRAP_UP_THRESHOLD
@@ -323,6 +323,7 @@ celery_app.autodiscover_tasks(
         "onyx.background.celery.tasks.shared",
         "onyx.background.celery.tasks.vespa",
         "onyx.background.celery.tasks.llm_model_update",
+        "onyx.background.celery.tasks.mcp",
         "onyx.background.celery.tasks.kg_processing",
     ]
 )
@@ -0,0 +1,78 @@
+from celery import shared_task
+from celery import Task
+
+from onyx.background.celery.apps.app_base import task_logger
+from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.enums import MCPAuthenticationPerformer
+from onyx.db.enums import MCPAuthenticationType
+from onyx.db.mcp import get_all_mcp_servers
+from onyx.db.mcp import get_mcp_server_auth_performer
+from onyx.db.mcp import get_user_connection_configs_for_server
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import fetch_mcp_tool_catalog
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import (
+    mcp_tool_catalog_key,
+)
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import (
+    was_mcp_tool_catalog_requested,
+)
+
+
+@shared_task(
+    name=OnyxCeleryTask.CHECK_FOR_MCP_TOOL_CATALOG_REFRESH,
+    ignore_result=True,
+    soft_time_limit=JOB_TIMEOUT,
+    trail=False,
+    bind=True,
+)
+def check_for_mcp_tool_catalog_refresh(self: Task, *, tenant_id: str) -> None:
+    """Refreshes the tool catalog of every MCP server, so that tool listings are
+    served from the catalog without a round trip to the server. Catalogs of per-user
+    credentials are only refreshed while they are in use, i.e. requested in the last
+    MCP_TOOL_CATALOG_MAX_AGE_SECONDS."""
+    # (server id, server url, connection headers)
+    to_refresh: dict[str, tuple[int, str, dict[str, str]]] = {}
+
+    with get_session_with_current_tenant() as db_session:
+        for server in get_all_mcp_servers(db_session):
+            # (connection headers, whether to refresh without a prior request)
+            candidates: list[tuple[dict[str, str], bool]]
+            if server.auth_type == MCPAuthenticationType.NONE:
+                candidates = [({}, True)]
+            elif (
+                get_mcp_server_auth_performer(server)
+                == MCPAuthenticationPerformer.ADMIN
+            ):
+                admin_config = server.admin_connection_config
+                candidates = (
+                    [(admin_config.config.get("headers", {}), True)]
+                    if admin_config
+                    else []
+                )
+            else:
+                candidates = [
+                    (user_config.config.get("headers", {}), False)
+                    for user_config in get_user_connection_configs_for_server(
+                        server.id, db_session
+                    )
+                    if user_config.config.get("headers")
+                ]
+
+            for headers, always_refresh in candidates:
+                if not always_refresh and not was_mcp_tool_catalog_requested(
+                    server.id, server.server_url, headers, tenant_id
+                ):
+                    continue
+                key = mcp_tool_catalog_key(server.id, server.server_url, headers)
+                to_refresh[key] = (server.id, server.server_url, headers)
+
+    for server_id, server_url, headers in to_refresh.values():
+        catalog = fetch_mcp_tool_catalog(server_id, server_url, headers, tenant_id)
+        if catalog.tools is None:
+            task_logger.warning(
+                f"Failed to refresh the tools of MCP server {server_url}: "
+                f"{catalog.error}"
+            )
+
+    task_logger.info(f"Refreshed {len(to_refresh)} MCP tool catalogs")
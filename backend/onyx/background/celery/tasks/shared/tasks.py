@@ -28,6 +28,7 @@ from onyx.db.search_settings import get_active_search_settings
 from onyx.document_index.factory import get_default_document_index
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
+from onyx.redis.redis_answer_cache import invalidate_cached_answers_for_documents
 from onyx.redis.redis_pool import get_redis_client
 from onyx.server.documents.models import ConnectorCredentialPairIdentifier
 
@@ -130,6 +131,7 @@ def document_by_cc_pair_cleanup_task(
                     document_ids=[document_id],
                 )
                 db_session.commit()
+                invalidate_cached_answers_for_documents([document_id], tenant_id)
 
                 completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
             elif count > 1:
@@ -177,6 +179,7 @@ def document_by_cc_pair_cleanup_task(
 
                 mark_document_as_synced(document_id, db_session)
                 db_session.commit()
+                invalidate_cached_answers_for_documents([document_id], tenant_id)
 
                 completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
             else:
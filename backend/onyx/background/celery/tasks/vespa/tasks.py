@@ -52,6 +52,7 @@ from onyx.db.sync_record import update_sync_record_status
 from onyx.document_index.factory import get_default_document_index
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
+from onyx.redis.redis_answer_cache import invalidate_cached_answers_for_documents
 from onyx.redis.redis_document_set import RedisDocumentSet
 from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_pool import get_redis_replica_client
@@ -512,6 +513,8 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
                 # update db last. Worst case = we crash right before this and
                 # the sync might repeat again later
                 mark_document_as_synced(document_id, db_session)
+                # access or document sets may have changed
+                invalidate_cached_answers_for_documents([document_id], tenant_id)
 
                 elapsed = time.monotonic() - start
                 task_logger.info(
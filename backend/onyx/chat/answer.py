@@ -21,9 +21,9 @@ from onyx.configs.agent_configs import AGENT_ALLOW_REFINEMENT
 from onyx.configs.agent_configs import INITIAL_SEARCH_DECOMPOSITION_ENABLED
 from onyx.configs.agent_configs import TF_DR_DEFAULT_FAST
 from onyx.context.search.models import RerankingDetails
-from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.models import Persona
 from onyx.file_store.utils import InMemoryChatFile
+from onyx.kg.schema_cache import get_cached_kg_config_settings
 from onyx.llm.interfaces import LLM
 from onyx.server.query_and_chat.streaming_models import CitationInfo
 from onyx.tools.force import ForceUseTool
@@ -127,7 +127,7 @@ class Answer:
             allow_refinement=AGENT_ALLOW_REFINEMENT,
             allow_agent_reranking=allow_agent_reranking,
             perform_initial_search_decomposition=INITIAL_SEARCH_DECOMPOSITION_ENABLED,
-            kg_config_settings=get_kg_config_settings(),
+            kg_config_settings=get_cached_kg_config_settings(),
             research_type=research_type,
         )
         self.graph_config = GraphConfig(
@@ -169,9 +169,8 @@ class Answer:
         if self._is_cancelled:
             return True
 
-        if self.is_connected is not None:
-            if not self.is_connected():
-                logger.debug("Answer stream has been cancelled")
-            self._is_cancelled = not self.is_connected()
+        if self.is_connected is not None and not self.is_connected():
+            logger.debug("Answer stream has been cancelled")
+            self._is_cancelled = True
 
         return self._is_cancelled
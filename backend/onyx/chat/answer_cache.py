@@ -0,0 +1,371 @@
+"""Opt-in cache of the final answers of personas, for questions that are asked over and
+over again (e.g. through the Slack bot). A cached answer is only reused for the same
+persona configuration and for users with the same access, and it is dropped as soon as
+one of its documents is re-indexed or deleted.
+
+Redis layout (all keys are tenant prefixed by the redis client):
+- answer_cache:entry:{entry_id} -> the CachedAnswer json
+- answer_cache:exact:{scope}:{question hash} -> entry_id of the last answer to the
+  normalized question
+- answer_cache:recent:{scope} -> list of entry_id + question embedding of the most
+  recent answers, used for the similarity lookup
+- answer_cache:doc:{document_id} -> set of the entry_ids that use the document
+"""
+
+import hashlib
+import json
+import re
+from collections.abc import Generator
+from collections.abc import Iterator
+from datetime import date
+from uuid import UUID
+from uuid import uuid4
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from onyx.access.access import get_acl_for_user
+from onyx.agents.agent_search.dr.enums import ResearchAnswerPurpose
+from onyx.chat.models import AnswerStreamPart
+from onyx.chat.models import PromptConfig
+from onyx.chat.models import StreamingError
+from onyx.configs.chat_configs import ANSWER_CACHE_PERSONA_IDS
+from onyx.configs.chat_configs import ANSWER_CACHE_SIMILARITY_THRESHOLD
+from onyx.configs.chat_configs import ANSWER_CACHE_TTL_SECONDS
+from onyx.context.search.models import RetrievalDetails
+from onyx.context.search.models import SavedSearchDoc
+from onyx.context.search.utils import get_query_embedding
+from onyx.db.chat import create_search_doc_from_saved_search_doc
+from onyx.db.chat import update_db_session_with_messages
+from onyx.db.models import ChatMessage
+from onyx.db.models import ChatSession
+from onyx.db.models import Persona
+from onyx.db.models import User
+from onyx.llm.interfaces import LLMConfig
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.onyxbot.slack.models import SlackContext
+from onyx.redis.redis_answer_cache import answer_cache_document_key
+from onyx.redis.redis_answer_cache import answer_cache_entry_key
+from onyx.redis.redis_answer_cache import ANSWER_CACHE_PREFIX
+from onyx.redis.redis_pool import get_redis_client
+from onyx.server.query_and_chat.models import CreateChatMessageRequest
+from onyx.server.query_and_chat.streaming_models import CitationDelta
+from onyx.server.query_and_chat.streaming_models import CitationInfo
+from onyx.server.query_and_chat.streaming_models import CitationStart
+from onyx.server.query_and_chat.streaming_models import MessageDelta
+from onyx.server.query_and_chat.streaming_models import MessageStart
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.streaming_models import ReasoningDelta
+from onyx.server.query_and_chat.streaming_models import ReasoningStart
+from onyx.server.query_and_chat.streaming_models import SearchToolDelta
+from onyx.server.query_and_chat.streaming_models import SearchToolStart
+from onyx.server.query_and_chat.streaming_models import SectionEnd
+from onyx.utils.cancellation import is_request_cancelled
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Number of recent questions per scope that are compared by embedding
+_RECENT_QUESTIONS_LIMIT = 50
+_ENTRY_ID_LENGTH = 32  # uuid4().hex
+
+# Answers that used any other packet type (e.g. internet search, image generation or
+# custom tools) depend on more than the indexed documents and are not cached
+_CACHEABLE_PACKET_TYPES = (
+    MessageStart,
+    MessageDelta,
+    SectionEnd,
+    CitationStart,
+    CitationDelta,
+    OverallStop,
+    SearchToolStart,
+    SearchToolDelta,
+    ReasoningStart,
+    ReasoningDelta,
+)
+
+
+class CachedAnswer(BaseModel):
+    question: str
+    answer: str
+    final_documents: list[SavedSearchDoc]
+    citations: list[CitationInfo]
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+def is_answer_cacheable(
+    new_msg_req: CreateChatMessageRequest,
+    chat_session: ChatSession,
+    persona: Persona,
+    history_msgs: list[ChatMessage],
+    single_message_history: str | None,
+) -> bool:
+    """Only standalone questions to an opted in persona are cached, i.e. the answer may
+    not depend on earlier messages, files or any per request overrides."""
+    return (
+        persona.id in ANSWER_CACHE_PERSONA_IDS
+        and not history_msgs
+        and not single_message_history
+        and not new_msg_req.regenerate
+        and not new_msg_req.use_existing_user_message
+        and not new_msg_req.search_doc_ids
+        and not new_msg_req.file_descriptors
+        and not new_msg_req.current_message_files
+        and not new_msg_req.query_override
+        and new_msg_req.llm_override is None
+        and chat_session.llm_override is None
+        and new_msg_req.prompt_override is None
+        and chat_session.prompt_override is None
+        and new_msg_req.persona_override_config is None
+        and new_msg_req.temperature_override is None
+        and new_msg_req.structured_response_format is None
+        and new_msg_req.allowed_tool_ids is None
+        and new_msg_req.forced_tool_ids is None
+        and not new_msg_req.use_agentic_search
+        and not new_msg_req.skip_gen_ai_answer_generation
+        and chat_session.project_id is None
+        and not persona.user_files
+    )
+
+
+def get_answer_cache_scope(
+    persona: Persona,
+    prompt_config: PromptConfig,
+    llm_config: LLMConfig,
+    user: User | None,
+    db_session: Session,
+    retrieval_options: RetrievalDetails | None,
+    slack_context: SlackContext | None,
+    bypass_acl: bool,
+) -> str:
+    """Everything besides the question that the answer depends on. Changing the prompt,
+    tools, document sets or model of the persona starts a new scope."""
+    scope = {
+        "persona_id": persona.id,
+        "prompt_config": prompt_config.model_dump(),
+        # the prompt contains the current date
+        "date": date.today().isoformat() if prompt_config.datetime_aware else None,
+        "tool_ids": sorted(tool.id for tool in persona.tools),
+        "document_set_ids": sorted(
+            document_set.id for document_set in persona.document_sets
+        ),
+        "num_chunks": persona.num_chunks,
+        "recency_bias": persona.recency_bias,
+        "llm_relevance_filter": persona.llm_relevance_filter,
+        "llm_filter_extraction": persona.llm_filter_extraction,
+        "search_start_date": persona.search_start_date,
+        "model": f"{llm_config.model_provider}/{llm_config.model_name}",
+        "acl": None if bypass_acl else sorted(get_acl_for_user(user, db_session)),
+        "retrieval_options": (
+            retrieval_options.model_dump(mode="json") if retrieval_options else None
+        ),
+        "slack_context": (
+            slack_context.model_dump(mode="json") if slack_context else None
+        ),
+    }
+    return hashlib.sha256(
+        json.dumps(scope, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class AnswerCacheQuery:
+    """Looks up and stores the answer to one question within one scope. Failures of
+    Redis or of the embedding model are logged and treated as a cache miss."""
+
+    def __init__(
+        self, scope: str, question: str, db_session: Session, tenant_id: str
+    ) -> None:
+        self.scope = scope
+        self.question = question
+        self.normalized_question = normalize_question(question)
+        self._db_session = db_session
+        self._redis = get_redis_client(tenant_id=tenant_id)
+        self._embedding: np.ndarray | None = None
+
+    @property
+    def _exact_key(self) -> str:
+        question_hash = hashlib.sha256(self.normalized_question.encode()).hexdigest()
+        return f"{ANSWER_CACHE_PREFIX}:exact:{self.scope}:{question_hash}"
+
+    @property
+    def _recent_key(self) -> str:
+        return f"{ANSWER_CACHE_PREFIX}:recent:{self.scope}"
+
+    def _get_embedding(self) -> np.ndarray:
+        if self._embedding is None:
+            embedding = np.array(
+                get_query_embedding(self.normalized_question, self._db_session),
+                dtype=np.float32,
+            )
+            self._embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        return self._embedding
+
+    def _get_entry(self, entry_id: str) -> CachedAnswer | None:
+        # the entry is gone if it expired or one of its documents changed
+        entry = self._redis.get(answer_cache_entry_key(entry_id))
+        return CachedAnswer.model_validate_json(entry) if entry else None
+
+    def fetch(self) -> CachedAnswer | None:
+        try:
+            return self._fetch()
+        except Exception:
+            logger.exception("Failed to fetch the cached answer, skipping cache")
+            return None
+
+    def _fetch(self) -> CachedAnswer | None:
+        entry_id = self._redis.get(self._exact_key)
+        if entry_id:
+            cached_answer = self._get_entry(entry_id.decode())
+            if cached_answer:
+                return cached_answer
+
+        recent_questions = self._redis.lrange(self._recent_key, 0, -1)
+        if not recent_questions:
+            return None
+
+        embedding = self._get_embedding()
+        candidates: list[tuple[float, str]] = []
+        for recent_question in recent_questions:
+            candidate_embedding = np.frombuffer(
+                recent_question[_ENTRY_ID_LENGTH:], dtype=np.float32
+            )
+            # the embedding model changed since the answer was cached
+            if candidate_embedding.shape != embedding.shape:
+                continue
+
+            similarity = float(np.dot(embedding, candidate_embedding))
+            if similarity >= ANSWER_CACHE_SIMILARITY_THRESHOLD:
+                candidates.append(
+                    (similarity, recent_question[:_ENTRY_ID_LENGTH].decode())
+                )
+
+        for _, candidate_entry_id in sorted(candidates, reverse=True):
+            cached_answer = self._get_entry(candidate_entry_id)
+            if cached_answer:
+                return cached_answer
+        return None
+
+    def store(self, cached_answer: CachedAnswer) -> None:
+        try:
+            self._store(cached_answer)
+        except Exception:
+            logger.exception("Failed to cache the answer")
+
+    def _store(self, cached_answer: CachedAnswer) -> None:
+        entry_id = uuid4().hex
+        embedding = self._get_embedding()
+
+        pipe = self._redis.pipeline()
+        pipe.set(
+            answer_cache_entry_key(entry_id),
+            cached_answer.model_dump_json(),
+            ex=ANSWER_CACHE_TTL_SECONDS,
+        )
+        pipe.set(self._exact_key, entry_id, ex=ANSWER_CACHE_TTL_SECONDS)
+        pipe.lpush(self._recent_key, entry_id.encode() + embedding.tobytes())
+        pipe.ltrim(self._recent_key, 0, _RECENT_QUESTIONS_LIMIT - 1)
+        pipe.expire(self._recent_key, ANSWER_CACHE_TTL_SECONDS)
+        for document_id in {doc.document_id for doc in cached_answer.final_documents}:
+            pipe.sadd(answer_cache_document_key(document_id), entry_id)
+            pipe.expire(
+                answer_cache_document_key(document_id), ANSWER_CACHE_TTL_SECONDS
+            )
+        pipe.execute()
+
+    def cache_streamed_answer(
+        self, packets: Iterator[AnswerStreamPart]
+    ) -> Generator[AnswerStreamPart, None, None]:
+        """Passes the packets through and caches the answer once the stream completed."""
+        answer_parts: list[str] = []
+        final_documents: list[SavedSearchDoc] = []
+        citations: list[CitationInfo] = []
+        cacheable = True
+
+        for packet in packets:
+            yield packet
+
+            if isinstance(packet, StreamingError):
+                cacheable = False
+            if not isinstance(packet, Packet):
+                continue
+
+            obj = packet.obj
+            if not isinstance(obj, _CACHEABLE_PACKET_TYPES) or (
+                isinstance(obj, SearchToolStart) and obj.is_internet_search
+            ):
+                cacheable = False
+            elif isinstance(obj, MessageStart):
+                answer_parts.append(obj.content)
+                final_documents = obj.final_documents or final_documents
+            elif isinstance(obj, MessageDelta):
+                answer_parts.append(obj.content)
+            elif isinstance(obj, CitationDelta):
+                citations.extend(obj.citations or [])
+
+        answer = "".join(answer_parts)
+        if not cacheable or not answer or is_request_cancelled():
+            return
+
+        self.store(
+            CachedAnswer(
+                question=self.question,
+                answer=answer,
+                final_documents=final_documents,
+                citations=citations,
+            )
+        )
+
+
+def stream_cached_answer(
+    cached_answer: CachedAnswer,
+    db_session: Session,
+    chat_session_id: UUID,
+    message_id: int,
+    llm_tokenizer: BaseTokenizer,
+) -> Generator[Packet, None, None]:
+    """Saves the cached answer as the reserved assistant message and streams it the
+    same way a generated answer is streamed."""
+    db_search_docs = [
+        create_search_doc_from_saved_search_doc(saved_doc)
+        for saved_doc in cached_answer.final_documents
+    ]
+    db_session.add_all(db_search_docs)
+    db_session.flush()
+
+    db_doc_ids = {db_doc.document_id: db_doc.id for db_doc in db_search_docs}
+    update_db_session_with_messages(
+        db_session=db_session,
+        chat_message_id=message_id,
+        chat_session_id=chat_session_id,
+        is_agentic=False,
+        message=cached_answer.answer,
+        token_count=len(llm_tokenizer.encode(cached_answer.answer)),
+        tokenizer_name=llm_tokenizer.name,
+        citations={
+            citation.citation_num: db_doc_ids[citation.document_id]
+            for citation in cached_answer.citations
+            if citation.document_id in db_doc_ids
+        },
+        final_documents=db_search_docs,
+        update_parent_message=True,
+        research_answer_purpose=ResearchAnswerPurpose.ANSWER,
+        commit=True,
+    )
+
+    final_documents = [
+        saved_doc.model_copy(update={"db_doc_id": db_doc.id})
+        for saved_doc, db_doc in zip(cached_answer.final_documents, db_search_docs)
+    ]
+    yield Packet(ind=0, obj=MessageStart(content="", final_documents=final_documents))
+    yield Packet(ind=0, obj=MessageDelta(content=cached_answer.answer))
+    yield Packet(ind=0, obj=SectionEnd())
+    if cached_answer.citations:
+        yield Packet(ind=0, obj=CitationStart())
+        yield Packet(ind=0, obj=CitationDelta(citations=cached_answer.citations))
+        yield Packet(ind=0, obj=SectionEnd())
+    yield Packet(ind=0, obj=OverallStop())
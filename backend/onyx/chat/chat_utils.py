@@ -26,7 +26,6 @@ from onyx.context.search.models import SavedSearchDoc
 from onyx.context.search.models import SearchDoc
 from onyx.db.chat import create_chat_session
 from onyx.db.chat import get_chat_messages_by_session
-from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.kg_config import is_kg_config_settings_enabled_valid
 from onyx.db.llm import fetch_existing_doc_sets
 from onyx.db.llm import fetch_existing_tools
@@ -37,6 +36,8 @@ from onyx.db.models import Tool
 from onyx.db.models import User
 from onyx.db.search_settings import get_current_search_settings
 from onyx.kg.models import KGException
+from onyx.kg.schema_cache import get_cached_kg_config_settings
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
 from onyx.kg.setup.kg_default_entity_definitions import (
     populate_missing_default_entity_types__commit,
 )
@@ -196,6 +197,37 @@ def combine_message_thread(
     return "\n\n".join(message_strs)
 
 
+def get_history_token_counts(
+    history: list[ChatMessage], llm_tokenizer: BaseTokenizer
+) -> list[int]:
+    """Returns the token count of every message with the given tokenizer.
+
+    The counts are stored on the messages per tokenizer, so only the messages that
+    were never counted with this tokenizer are tokenized, in a single batch. The new
+    counts are persisted with the next commit of the session of the messages."""
+    uncounted_messages = [
+        msg
+        for msg in history
+        # empty messages are never part of the prompt
+        if msg.token_count != 0 and llm_tokenizer.name not in (msg.token_counts or {})
+    ]
+    if uncounted_messages:
+        encoded_messages = llm_tokenizer.encode_batch(
+            [msg.message for msg in uncounted_messages]
+        )
+        for msg, tokens in zip(uncounted_messages, encoded_messages):
+            # a new dict, so that SQLAlchemy picks up the change
+            msg.token_counts = {
+                **(msg.token_counts or {}),
+                llm_tokenizer.name: len(tokens),
+            }
+
+    return [
+        0 if msg.token_count == 0 else (msg.token_counts or {})[llm_tokenizer.name]
+        for msg in history
+    ]
+
+
 def create_chat_chain(
     chat_session_id: UUID,
     db_session: Session,
@@ -480,7 +512,7 @@ def process_kg_commands(
     if not persona_name.startswith(TMP_DRALPHA_PERSONA_NAME):
         return
 
-    kg_config_settings = get_kg_config_settings()
+    kg_config_settings = get_cached_kg_config_settings()
     if not is_kg_config_settings_enabled_valid(kg_config_settings):
         return
 
@@ -518,4 +550,5 @@ def process_kg_commands(
 
     elif message == "kg_setup":
         populate_missing_default_entity_types__commit(db_session=db_session)
+        invalidate_kg_schema_cache()
         raise KGException("KG setup done")
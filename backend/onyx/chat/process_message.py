@@ -11,8 +11,13 @@ from sqlalchemy.orm import Session
 
 from onyx.agents.agent_search.orchestration.nodes.call_tool import ToolCallException
 from onyx.chat.answer import Answer
+from onyx.chat.answer_cache import AnswerCacheQuery
+from onyx.chat.answer_cache import get_answer_cache_scope
+from onyx.chat.answer_cache import is_answer_cacheable
+from onyx.chat.answer_cache import stream_cached_answer
 from onyx.chat.chat_utils import create_chat_chain
 from onyx.chat.chat_utils import create_temporary_persona
+from onyx.chat.chat_utils import get_history_token_counts
 from onyx.chat.chat_utils import process_kg_commands
 from onyx.chat.models import AnswerStream
 from onyx.chat.models import AnswerStyleConfig
@@ -101,6 +106,7 @@ from onyx.tools.tool_implementations.search.search_tool import SearchTool
 from onyx.tools.tool_implementations.web_search.web_search_tool import (
     WebSearchTool,
 )
+from onyx.utils.cancellation import RequestCancelledError
 from onyx.utils.logger import setup_logger
 from onyx.utils.long_term_log import LongTermLogger
 from onyx.utils.telemetry import mt_cloud_telemetry
@@ -451,6 +457,7 @@ def stream_chat_message_objects(
                 parent_message=parent_message,
                 message=message_text,
                 token_count=len(llm_tokenizer_encode_func(message_text)),
+                tokenizer_name=llm_tokenizer.name,
                 message_type=MessageType.USER,
                 files=None,  # Need to attach later for optimization to only load files once in parallel
                 db_session=db_session,
@@ -640,6 +647,40 @@ def stream_chat_message_objects(
         else:
             prompt_config = PromptConfig.from_model(persona)
 
+        answer_cache_query: AnswerCacheQuery | None = None
+        if is_answer_cacheable(
+            new_msg_req=new_msg_req,
+            chat_session=chat_session,
+            persona=persona,
+            history_msgs=history_msgs,
+            single_message_history=single_message_history,
+        ):
+            answer_cache_query = AnswerCacheQuery(
+                scope=get_answer_cache_scope(
+                    persona=persona,
+                    prompt_config=prompt_config,
+                    llm_config=llm.config,
+                    user=user,
+                    db_session=db_session,
+                    retrieval_options=retrieval_options,
+                    slack_context=new_msg_req.slack_context,
+                    bypass_acl=bypass_acl,
+                ),
+                question=final_msg.message,
+                db_session=db_session,
+                tenant_id=tenant_id,
+            )
+            cached_answer = answer_cache_query.fetch()
+            if cached_answer is not None:
+                yield from stream_cached_answer(
+                    cached_answer=cached_answer,
+                    db_session=db_session,
+                    chat_session_id=chat_session_id,
+                    message_id=reserved_message_id,
+                    llm_tokenizer=llm_tokenizer,
+                )
+                return
+
         # Retrieve project-specific instructions if this chat session is associated with a project.
         project_instructions: str | None = (
             get_project_instructions(
@@ -714,8 +755,10 @@ def stream_chat_message_objects(
         )
 
         # TODO: unify message history with single message history
+        history_token_counts = get_history_token_counts(history_msgs, llm_tokenizer)
         message_history = [
-            PreviousMessage.from_chat_message(msg, files) for msg in history_msgs
+            PreviousMessage.from_chat_message(msg, files, token_count)
+            for msg, token_count in zip(history_msgs, history_token_counts)
         ]
 
         if not search_tool_override_kwargs_for_user_files and in_memory_user_files:
@@ -781,9 +824,12 @@ def stream_chat_message_objects(
         )
 
         # Process streamed packets using the new packet processing module
-        yield from process_streamed_packets(
+        packets = process_streamed_packets(
             answer_processed_output=answer.processed_streamed_output,
         )
+        if answer_cache_query is not None:
+            packets = answer_cache_query.cache_streamed_answer(packets)
+        yield from packets
 
     except ValueError as e:
         logger.exception("Failed to process chat message.")
@@ -797,6 +843,12 @@ def stream_chat_message_objects(
     except KGException:
         raise
 
+    except RequestCancelledError:
+        # the client is gone, so there is nobody to send an error to
+        logger.info("Chat message processing stopped, the request was cancelled")
+        db_session.rollback()
+        return
+
     except Exception as e:
         logger.exception(f"Failed to process chat message due to {e}")
         error_msg = str(e)
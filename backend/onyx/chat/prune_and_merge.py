@@ -1,6 +1,8 @@
+import hashlib
 import json
+import threading
 from collections import defaultdict
-from copy import deepcopy
+from collections import OrderedDict
 from typing import TypeVar
 
 from pydantic import BaseModel
@@ -17,6 +19,7 @@ from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.llm.interfaces import LLMConfig
+from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.prompts.prompt_utils import build_doc_context_str
@@ -28,6 +31,66 @@ logger = setup_logger()
 
 T = TypeVar("T", bound=LlmDoc | InferenceChunk | InferenceSection)
 
+# The same section contents are counted again on every pruning pass and for follow
+# up questions that retrieve the same documents
+SECTION_TOKEN_COUNT_CACHE_SIZE = 10_000
+_section_token_counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+_section_token_counts_lock = threading.Lock()
+
+
+def _count_section_tokens(section_str: str, llm_tokenizer: BaseTokenizer) -> int:
+    """LRU cached token count, keyed by a digest to not keep the section strings."""
+    key = (llm_tokenizer.name, hashlib.sha256(section_str.encode()).digest())
+    with _section_token_counts_lock:
+        count = _section_token_counts.get(key)
+        if count is not None:
+            _section_token_counts.move_to_end(key)
+            return count
+
+    count = len(llm_tokenizer.encode(section_str))
+    with _section_token_counts_lock:
+        _section_token_counts[key] = count
+        if len(_section_token_counts) > SECTION_TOKEN_COUNT_CACHE_SIZE:
+            _section_token_counts.popitem(last=False)
+    return count
+
+
+def _count_section_prompt_tokens(
+    section: InferenceSection,
+    ind: int,
+    using_tool_message: bool,
+    llm_tokenizer: BaseTokenizer,
+) -> int:
+    """Token count of the section as it appears in the prompt. The content and the
+    title / metadata around it are counted separately, so the content count does not
+    depend on the rank of the section and is reused across pruning passes. This can be
+    off by a few tokens at the boundary between the parts."""
+    content = section.combined_content
+    if using_tool_message:
+        # If using tool message, it will be a bit of an overestimate as the extra json text around the section
+        # will be counted towards the token count. However, once the Sections are merged, the extra json parts
+        # that overlap will not be counted multiple times like it is in the pruning step.
+        section_dict = section_to_dict(section, ind)
+        section_dict["content"] = ""
+        overhead_str = json.dumps(section_dict)
+        # the content is escaped in the tool message json (non-ascii characters,
+        # newlines, quotes), which can take many more tokens than the raw text
+        content = json.dumps(content)
+    else:
+        overhead_str = build_doc_context_str(
+            semantic_identifier=section.center_chunk.semantic_identifier,
+            source_type=section.center_chunk.source_type,
+            content="",
+            metadata_dict=section.center_chunk.metadata,
+            updated_at=section.center_chunk.updated_at,
+            ind=ind,
+        )
+
+    return _count_section_tokens(content, llm_tokenizer) + _count_section_tokens(
+        overhead_str, llm_tokenizer
+    )
+
+
 _METADATA_TOKEN_ESTIMATE = 75
 # Title and additional tokens as part of the tool message json
 # this is only used to log a warning so we can be more forgiving with the buffer
@@ -163,6 +226,11 @@ def _remove_sections_to_ignore(
     ]
 
 
+def _with_content(section: InferenceSection, content: str) -> InferenceSection:
+    """Shallow copy, the sections passed in for pruning belong to the caller."""
+    return section.model_copy(update={"combined_content": content})
+
+
 def _apply_pruning(
     sections: list[InferenceSection],
     section_relevance_list: list[bool] | None,
@@ -178,8 +246,9 @@ def _apply_pruning(
         model_name=llm_config.model_name,
     )
 
-    # combine the section lists, making sure to add the keep_sections first
-    sections = deepcopy(keep_sections) + deepcopy(sections)
+    # combine the section lists, making sure to add the keep_sections first. The
+    # sections are not copied, a section is only copied when its content is trimmed
+    sections = keep_sections + sections
 
     # build combined relevance list, treating the keep_sections as relevant
     if section_relevance_list is not None:
@@ -204,23 +273,9 @@ def _apply_pruning(
     final_section_ind = None
     total_tokens = 0
     for ind, section in enumerate(sections):
-        section_str = (
-            # If using tool message, it will be a bit of an overestimate as the extra json text around the section
-            # will be counted towards the token count. However, once the Sections are merged, the extra json parts
-            # that overlap will not be counted multiple times like it is in the pruning step.
-            json.dumps(section_to_dict(section, ind))
-            if using_tool_message
-            else build_doc_context_str(
-                semantic_identifier=section.center_chunk.semantic_identifier,
-                source_type=section.center_chunk.source_type,
-                content=section.combined_content,
-                metadata_dict=section.center_chunk.metadata,
-                updated_at=section.center_chunk.updated_at,
-                ind=ind,
-            )
+        section_token_count = _count_section_prompt_tokens(
+            section, ind, using_tool_message, llm_tokenizer
         )
-
-        section_token_count = len(llm_tokenizer.encode(section_str))
         # if not using sections (specifically, using Sections where each section maps exactly to the one center chunk),
         # truncate chunks that are way too long. This can happen if the embedding model tokenizer is different
         # than the LLM tokenizer
@@ -242,10 +297,13 @@ def _apply_pruning(
                     "Found more tokens in Section than expected, "
                     "likely mismatch between embedding and LLM tokenizers. Trimming content..."
                 )
-            section.combined_content = tokenizer_trim_content(
-                content=section.combined_content,
-                desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
-                tokenizer=llm_tokenizer,
+            sections[ind] = _with_content(
+                section,
+                tokenizer_trim_content(
+                    content=section.combined_content,
+                    desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
+                    tokenizer=llm_tokenizer,
+                ),
             )
             section_token_count = DOC_EMBEDDING_CONTEXT_SIZE
 
@@ -286,8 +344,8 @@ def _apply_pruning(
             amount_to_truncate = total_tokens - token_limit
             # NOTE: need to recalculate the length here, since the previous calculation included
             # overhead from JSON-fying the doc / the metadata
-            final_doc_content_length = len(
-                llm_tokenizer.encode(sections[final_section_ind].combined_content)
+            final_doc_content_length = _count_section_tokens(
+                sections[final_section_ind].combined_content, llm_tokenizer
             ) - (amount_to_truncate)
             # this could occur if we only have space for the title / metadata
             # not ideal, but it's the most reasonable thing to do
@@ -301,10 +359,13 @@ def _apply_pruning(
                 )
                 sections.pop()
             else:
-                sections[final_section_ind].combined_content = tokenizer_trim_content(
-                    content=sections[final_section_ind].combined_content,
-                    desired_length=final_doc_content_length,
-                    tokenizer=llm_tokenizer,
+                sections[final_section_ind] = _with_content(
+                    sections[final_section_ind],
+                    tokenizer_trim_content(
+                        content=sections[final_section_ind].combined_content,
+                        desired_length=final_doc_content_length,
+                        tokenizer=llm_tokenizer,
+                    ),
                 )
         else:
             # For search on chunk level (Section is just a chunk), don't truncate the final Chunk/Section unless it's the only one
@@ -312,12 +373,16 @@ def _apply_pruning(
             if final_section_ind != 0:
                 sections = sections[:final_section_ind]
             else:
-                sections[0].combined_content = tokenizer_trim_content(
-                    content=sections[0].combined_content,
-                    desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
-                    tokenizer=llm_tokenizer,
-                )
-                sections = [sections[0]]
+                sections = [
+                    _with_content(
+                        sections[0],
+                        tokenizer_trim_content(
+                            content=sections[0].combined_content,
+                            desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
+                            tokenizer=llm_tokenizer,
+                        ),
+                    )
+                ]
 
     # sort by relevance, then by score (as we added the keep_sections first)
     sections.sort(
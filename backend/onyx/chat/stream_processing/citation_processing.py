@@ -5,7 +5,6 @@ from onyx.chat.models import LlmDoc
 from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
 from onyx.configs.chat_configs import STOP_STREAM_PAT
-from onyx.prompts.constants import TRIPLE_BACKTICK
 from onyx.server.query_and_chat.streaming_models import CitationInfo
 from onyx.utils.logger import setup_logger
 
@@ -41,9 +40,36 @@ def normalize_square_bracket_citations_to_double_with_links(text: str) -> str:
     return pattern_single.sub(_repl_single, text)
 
 
-def in_code_block(llm_text: str) -> bool:
-    count = llm_text.count(TRIPLE_BACKTICK)
-    return count % 2 != 0
+class CodeFenceTracker:
+    """
+    Tracks whether a stream of tokens is inside a code block, i.e. whether the text so
+    far holds an odd number of triple backticks. They are counted like `str.count`
+    does, non-overlapping from the left, so a run of n backticks holds n // 3 of them
+    and only the length of the trailing run needs to be kept between tokens.
+    """
+
+    def __init__(self) -> None:
+        self.closed_fence_count = 0  # fences in the runs that already ended
+        self.trailing_backtick_run = 0
+
+    def update(self, token: str) -> None:
+        if "`" not in token:
+            if token:
+                self.closed_fence_count += self.trailing_backtick_run // 3
+                self.trailing_backtick_run = 0
+            return
+
+        for char in token:
+            if char == "`":
+                self.trailing_backtick_run += 1
+            else:
+                self.closed_fence_count += self.trailing_backtick_run // 3
+                self.trailing_backtick_run = 0
+
+    @property
+    def in_code_block(self) -> bool:
+        fence_count = self.closed_fence_count + self.trailing_backtick_run // 3
+        return fence_count % 2 != 0
 
 
 class CitationProcessor:
@@ -60,7 +86,8 @@ class CitationProcessor:
         self.max_citation_num = len(context_docs)
         self.stop_stream = stop_stream
 
-        self.llm_out = ""  # entire output so far
+        # code fence state of the entire output so far
+        self.code_fence_tracker = CodeFenceTracker()
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
 
@@ -94,7 +121,7 @@ class CitationProcessor:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.code_fence_tracker.update(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -102,7 +129,10 @@ class CitationProcessor:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if (
+                    piece_that_comes_after == "\n"
+                    and self.code_fence_tracker.in_code_block
+                ):
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
         citation_matches = list(self.citation_pattern.finditer(self.curr_segment))
@@ -111,7 +141,7 @@ class CitationProcessor:
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not self.code_fence_tracker.in_code_block:
             match_idx = 0
             for match in citation_matches:
                 match_span = match.span()
@@ -213,7 +243,8 @@ class CitationProcessorGraph:
         self.max_citation_num = len(context_docs)
         self.stop_stream = stop_stream
 
-        self.llm_out = ""  # entire output so far
+        # code fence state of the entire output so far
+        self.code_fence_tracker = CodeFenceTracker()
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
 
@@ -250,7 +281,7 @@ class CitationProcessorGraph:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.code_fence_tracker.update(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -258,7 +289,10 @@ class CitationProcessorGraph:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if (
+                    piece_that_comes_after == "\n"
+                    and self.code_fence_tracker.in_code_block
+                ):
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
         citation_matches = list(self.citation_pattern.finditer(self.curr_segment))
@@ -267,7 +301,7 @@ class CitationProcessorGraph:
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not self.code_fence_tracker.in_code_block:
             match_idx = 0
             citation_infos = []
             for match in citation_matches:
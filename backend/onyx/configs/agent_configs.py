@@ -386,4 +386,49 @@ TF_DR_TIMEOUT_SHORT = int(os.environ.get("TF_DR_TIMEOUT_SHORT") or 60)
 
 TF_DR_DEFAULT_FAST = (os.environ.get("TF_DR_DEFAULT_FAST") or "False").lower() == "true"
 
+# Starts the internal search with the unprocessed query while the LLM rewrites it. The
+# results are used if the rewritten query is about the same (by embedding similarity),
+# otherwise the search is run again with the rewritten query
+TF_DR_SPECULATIVE_SEARCH = (
+    os.environ.get("TF_DR_SPECULATIVE_SEARCH") or "False"
+).lower() == "true"
+TF_DR_SPECULATIVE_SEARCH_SIMILARITY_THRESHOLD = float(
+    os.environ.get("TF_DR_SPECULATIVE_SEARCH_SIMILARITY_THRESHOLD") or 0.9
+)
+
+# Web pages fetched by the web search sub-agent are cached (compressed, in-process) by
+# normalized URL. Every URL is fetched separately with its own timeout.
+TF_DR_URL_CONTENT_CACHE_TTL_SECONDS = int(
+    os.environ.get("TF_DR_URL_CONTENT_CACHE_TTL_SECONDS") or 60 * 60
+)
+TF_DR_URL_CONTENT_CACHE_MAX_BYTES = int(
+    os.environ.get("TF_DR_URL_CONTENT_CACHE_MAX_BYTES") or 64 * 1024 * 1024
+)
+TF_DR_URL_FETCH_TIMEOUT_SECONDS = int(
+    os.environ.get("TF_DR_URL_FETCH_TIMEOUT_SECONDS") or 30
+)
+# Within a deep research run, identical search tool calls and LLM calls at temperature
+# 0 (e.g. from parallel branches with the same sub-question) are only issued once
+TF_DR_RUN_MEMOIZATION = (
+    os.environ.get("TF_DR_RUN_MEMOIZATION", "true").lower() == "true"
+)
+# Limits on the concurrent LLM and search calls of deep research, per run and per tenant
+# (per process), so that a few research runs can not take all of the LLM rate limits
+TF_DR_MAX_IN_FLIGHT_CALLS_PER_RUN = int(
+    os.environ.get("TF_DR_MAX_IN_FLIGHT_CALLS_PER_RUN") or 4
+)
+TF_DR_MAX_IN_FLIGHT_CALLS_PER_TENANT = int(
+    os.environ.get("TF_DR_MAX_IN_FLIGHT_CALLS_PER_TENANT") or 16
+)
+# Wall clock and token budgets of a deep research run (0 for no limit). Once the share
+# of the budget in TF_DR_BUDGET_WRAP_UP_THRESHOLD is spent, the orchestrator allows at
+# most one more tool call, and closes once the budget is spent.
+TF_DR_RUN_TIME_BUDGET_SECONDS = int(
+    os.environ.get("TF_DR_RUN_TIME_BUDGET_SECONDS") or 15 * 60
+)
+TF_DR_RUN_TOKEN_BUDGET = int(os.environ.get("TF_DR_RUN_TOKEN_BUDGET") or 1_000_000)
+TF_DR_BUDGET_WRAP_UP_THRESHOLD = float(
+    os.environ.get("TF_DR_BUDGET_WRAP_UP_THRESHOLD") or 0.8
+)
+
 GRAPH_VERSION_NAME: str = "a"
@@ -628,6 +628,10 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 8
 )
 
+# Number of processes used to chunk the documents of an indexing batch. The pool is
+# shared by all the indexing threads of the worker. 0 chunks in the calling thread.
+CHUNKING_PROCESS_POOL_SIZE = int(os.environ.get("CHUNKING_PROCESS_POOL_SIZE") or 0)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -653,6 +657,25 @@ AVERAGE_SUMMARY_EMBEDDINGS = (
 
 MAX_TOKENS_FOR_FULL_INCLUSION = 4096
 
+# Max number of concurrent LLM calls used to build contextual rag summaries for a batch
+CONTEXTUAL_RAG_MAX_CONCURRENCY = int(
+    os.environ.get("CONTEXTUAL_RAG_MAX_CONCURRENCY") or 8
+)
+# Per batch budgets for the chunk level contextual rag summaries. Once a budget would be
+# exceeded, the remaining chunks only get the document summary. 0 disables the budget.
+CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET = int(
+    os.environ.get("CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET") or 0
+)
+CONTEXTUAL_RAG_BATCH_TIME_BUDGET_SECONDS = float(
+    os.environ.get("CONTEXTUAL_RAG_BATCH_TIME_BUDGET_SECONDS") or 0
+)
+
+# Only re-embed and re-write the chunks of an updated document whose content fingerprint
+# changed since the last indexing run. Unchanged chunks are left in place in the index.
+ENABLE_INCREMENTAL_CHUNK_INDEXING = (
+    os.environ.get("ENABLE_INCREMENTAL_CHUNK_INDEXING", "").lower() == "true"
+)
+
 
 #####
 # Tool Configs
@@ -852,6 +875,21 @@ IMAGE_SUMMARIZATION_USER_PROMPT = os.environ.get(
     DEFAULT_IMAGE_SUMMARIZATION_USER_PROMPT,
 )
 
+# Max number of images summarized concurrently within an indexing batch
+IMAGE_SUMMARIZATION_MAX_CONCURRENCY = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_CONCURRENCY") or 8
+)
+
+# Images with a larger width or height are downscaled before being sent to the vision LLM
+IMAGE_SUMMARIZATION_MAX_DIMENSION = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_DIMENSION") or 1024
+)
+
+# Image summaries are cached by image content hash and vision model. 0 disables the cache
+IMAGE_SUMMARY_CACHE_TTL_SECONDS = int(
+    os.environ.get("IMAGE_SUMMARY_CACHE_TTL_SECONDS") or 7 * 24 * 60 * 60
+)
+
 IMAGE_ANALYSIS_SYSTEM_PROMPT = os.environ.get(
     "IMAGE_ANALYSIS_SYSTEM_PROMPT",
     DEFAULT_IMAGE_ANALYSIS_SYSTEM_PROMPT,
@@ -106,3 +106,30 @@ USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH = (
 )
 
 USE_DIV_CON_AGENT = os.environ.get("USE_DIV_CON_AGENT", "false").lower() == "true"
+
+# Streams chat answers from an async generator. The blocking work of each answer (LLM
+# calls, tools, DB sessions, tokenizers) runs on a dedicated executor, so long running
+# streams no longer hold threads of the threadpool that serves the other endpoints
+ASYNC_CHAT_STREAMING_ENABLED = (
+    os.environ.get("ASYNC_CHAT_STREAMING_ENABLED", "false").lower() == "true"
+)
+# Max number of answers streamed at the same time in async mode, each one holds a thread
+# for its whole duration. Further requests are rejected with a 503 until a thread is free
+CHAT_STREAMING_MAX_THREADS = int(os.environ.get("CHAT_STREAMING_MAX_THREADS") or 64)
+
+# Comma separated ids of the personas whose answers are cached. A new question to one of
+# these personas that matches a recent one (same wording or a very similar embedding)
+# gets the cached answer without running search or the LLM. Answers are only shared
+# between users with the same access and are dropped when a cited document changes
+ANSWER_CACHE_PERSONA_IDS = {
+    int(persona_id)
+    for persona_id in os.environ.get("ANSWER_CACHE_PERSONA_IDS", "").split(",")
+    if persona_id.strip()
+}
+ANSWER_CACHE_TTL_SECONDS = int(
+    os.environ.get("ANSWER_CACHE_TTL_SECONDS") or 24 * 60 * 60
+)
+# Min cosine similarity of the question embeddings for a cached answer to be reused
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD") or 0.95
+)
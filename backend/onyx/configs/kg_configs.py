@@ -135,6 +135,43 @@ KG_CLUSTERING_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_THRESHOLD", "0.96")
 )
 
+# Cluster the grounded entities, transfer the relationships and update Vespa in batches
+# (one transaction and one Vespa update per batch) instead of one at a time
+KG_CLUSTERING_BATCHED: bool = (
+    os.environ.get("KG_CLUSTERING_BATCHED", "true").lower() == "true"
+)
+
+KG_CLUSTERING_BATCH_SIZE: int = int(os.environ.get("KG_CLUSTERING_BATCH_SIZE", "256"))
+
+# Extract with a pool of LLM workers and a separate writer stage instead of one document
+# batch at a time
+KG_EXTRACTION_PIPELINED: bool = (
+    os.environ.get("KG_EXTRACTION_PIPELINED", "true").lower() == "true"
+)
+
+KG_EXTRACTION_NUM_WORKERS: int = int(os.environ.get("KG_EXTRACTION_NUM_WORKERS", "8"))
+
+KG_EXTRACTION_MAX_IN_FLIGHT_DOCUMENTS: int = int(
+    os.environ.get("KG_EXTRACTION_MAX_IN_FLIGHT_DOCUMENTS", "64")
+)
+
+KG_EXTRACTION_WRITE_BATCH_SIZE: int = int(
+    os.environ.get("KG_EXTRACTION_WRITE_BATCH_SIZE", "32")
+)
+
+# Small documents are packed into shared extraction prompts, up to these sizes
+KG_EXTRACTION_PACKING_MAX_DOCUMENT_CHARS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKING_MAX_DOCUMENT_CHARS", "2000")
+)
+
+KG_EXTRACTION_PACKING_MAX_PROMPT_CHARS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKING_MAX_PROMPT_CHARS", "8000")
+)
+
+KG_EXTRACTION_PACKING_MAX_DOCUMENTS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKING_MAX_DOCUMENTS", "8")
+)
+
 KG_MAX_SEARCH_DOCUMENTS: int = int(os.environ.get("KG_MAX_SEARCH_DOCUMENTS", "15"))
 
 KG_MAX_DECOMPOSITION_SEGMENTS: int = int(
@@ -24,3 +24,45 @@ if _CUSTOM_TOOL_PASS_THROUGH_HEADERS_RAW:
         logger.error(
             "Failed to parse CUSTOM_TOOL_PASS_THROUGH_HEADERS, must be a valid JSON object"
         )
+
+# MCP client sessions are kept open and reused across tool calls, per server and
+# connection headers. Set to false to open a new session for every call.
+MCP_SESSION_POOL_ENABLED = (
+    os.environ.get("MCP_SESSION_POOL_ENABLED", "true").lower() == "true"
+)
+MCP_SESSION_POOL_MAX_SIZE = int(os.environ.get("MCP_SESSION_POOL_MAX_SIZE") or 100)
+# pooled sessions that are not used for this long are closed
+MCP_SESSION_IDLE_TIMEOUT_SECONDS = int(
+    os.environ.get("MCP_SESSION_IDLE_TIMEOUT_SECONDS") or 300
+)
+# pooled sessions that have not been used for this long are pinged before reuse
+MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS = int(
+    os.environ.get("MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS") or 60
+)
+MCP_REQUEST_TIMEOUT_SECONDS = int(os.environ.get("MCP_REQUEST_TIMEOUT_SECONDS") or 300)
+
+# The tools of MCP servers are served from a catalog (Redis and in-process), entries
+# older than this are refreshed in the background while still being served
+MCP_TOOL_CATALOG_TTL_SECONDS = int(
+    os.environ.get("MCP_TOOL_CATALOG_TTL_SECONDS") or 600
+)
+# entries that are not refreshed for this long are dropped
+MCP_TOOL_CATALOG_MAX_AGE_SECONDS = int(
+    os.environ.get("MCP_TOOL_CATALOG_MAX_AGE_SECONDS") or 24 * 60 * 60
+)
+
+# Requests of custom (OpenAPI) tools share a pooled HTTP/2 client per host
+CUSTOM_TOOL_MAX_CONNECTIONS_PER_HOST = int(
+    os.environ.get("CUSTOM_TOOL_MAX_CONNECTIONS_PER_HOST") or 10
+)
+CUSTOM_TOOL_REQUEST_TIMEOUT_SECONDS = int(
+    os.environ.get("CUSTOM_TOOL_REQUEST_TIMEOUT_SECONDS") or 120
+)
+# larger responses are not read and the tool call fails
+CUSTOM_TOOL_MAX_RESPONSE_BYTES = int(
+    os.environ.get("CUSTOM_TOOL_MAX_RESPONSE_BYTES") or 10 * 1024 * 1024
+)
+# caches the responses of GET tools for as long as their Cache-Control max-age allows
+CUSTOM_TOOL_RESPONSE_CACHE_ENABLED = (
+    os.environ.get("CUSTOM_TOOL_RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+)
@@ -1,3 +1,4 @@
+from collections.abc import Collection
 from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
@@ -16,7 +17,7 @@ from sqlalchemy import Row
 from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.exc import MultipleResultsFound
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import Session
 
 from onyx.agents.agent_search.dr.enums import ResearchAnswerPurpose
@@ -560,29 +561,16 @@ def get_chat_messages_by_session(
     )
 
     if prefetch_tool_calls:
-        # stmt = stmt.options(
-        #     joinedload(ChatMessage.tool_call),
-        #     joinedload(ChatMessage.sub_questions).joinedload(
-        #         AgentSubQuestion.sub_queries
-        #     ),
-        # )
-        # result = db_session.scalars(stmt).unique().all()
-
-        stmt = (
-            select(ChatMessage)
-            .where(ChatMessage.chat_session_id == chat_session_id)
-            .order_by(nullsfirst(ChatMessage.parent_message))
-        )
+        # one query per relationship, instead of one per message
         stmt = stmt.options(
-            joinedload(ChatMessage.research_iterations).joinedload(
+            selectinload(ChatMessage.research_iterations).selectinload(
                 ResearchAgentIteration.sub_steps
-            )
+            ),
+            selectinload(ChatMessage.search_docs),
+            selectinload(ChatMessage.tool_call),
         )
-        result = db_session.scalars(stmt).unique().all()
-    else:
-        result = db_session.scalars(stmt).all()
 
-    return list(result)
+    return list(db_session.scalars(stmt).all())
 
 
 def get_or_create_root_message(
@@ -668,7 +656,10 @@ def create_new_chat_message(
     is_agentic: bool = False,
     research_type: ResearchType | None = None,
     research_plan: dict[str, Any] | None = None,
+    # name of the tokenizer that produced token_count
+    tokenizer_name: str | None = None,
 ) -> ChatMessage:
+    token_counts = {tokenizer_name: token_count} if tokenizer_name else None
     if reserved_message_id is not None:
         # Edit existing message
         existing_message = db_session.query(ChatMessage).get(reserved_message_id)
@@ -680,6 +671,7 @@ def create_new_chat_message(
         existing_message.message = message
         existing_message.rephrased_query = rephrased_query
         existing_message.token_count = token_count
+        existing_message.token_counts = token_counts
         existing_message.message_type = message_type
         existing_message.citations = citations
         existing_message.files = files
@@ -700,6 +692,7 @@ def create_new_chat_message(
             message=message,
             rephrased_query=rephrased_query,
             token_count=token_count,
+            token_counts=token_counts,
             message_type=message_type,
             citations=citations,
             files=files,
@@ -854,6 +847,17 @@ def get_db_search_doc_by_id(doc_id: int, db_session: Session) -> DBSearchDoc | N
     return search_doc
 
 
+def get_db_search_docs_by_ids(
+    doc_ids: Collection[int], db_session: Session
+) -> list[DBSearchDoc]:
+    """There are no safety checks here like user permission etc., use with caution"""
+    if not doc_ids:
+        return []
+    return list(
+        db_session.scalars(select(SearchDoc).where(SearchDoc.id.in_(doc_ids))).all()
+    )
+
+
 def get_db_search_doc_by_document_id(
     document_id: str, db_session: Session
 ) -> DBSearchDoc | None:
@@ -1177,6 +1181,8 @@ def update_db_session_with_messages(
     message: str | None = None,
     message_type: str | None = None,
     token_count: int | None = None,
+    # name of the tokenizer that produced token_count
+    tokenizer_name: str | None = None,
     rephrased_query: str | None = None,
     citations: dict[int, int] | None = None,
     error: str | None = None,
@@ -1202,10 +1208,14 @@ def update_db_session_with_messages(
 
     if message:
         chat_message.message = message
+        # counts of the previous content are stale
+        chat_message.token_counts = None
     if message_type:
         chat_message.message_type = MessageType(message_type)
     if token_count:
         chat_message.token_count = token_count
+        if tokenizer_name:
+            chat_message.token_counts = {tokenizer_name: token_count}
     if rephrased_query:
         chat_message.rephrased_query = rephrased_query
     if citations:
@@ -1,12 +1,20 @@
+import base64
+import binascii
+import json
+from datetime import datetime
 from typing import List
 from typing import Optional
 from typing import Tuple
 from uuid import UUID
 
+from sqlalchemy import cast
 from sqlalchemy import column
 from sqlalchemy import desc
+from sqlalchemy import Float
 from sqlalchemy import func
 from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy import union_all
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import ColumnClause
@@ -109,3 +117,151 @@ def search_chat_sessions(
         session_objs = session_objs[:page_size]
 
     return list(session_objs), has_more
+
+
+# Matches on the session description (the chat name) say more about the session than
+# a match in one of its messages
+_DESCRIPTION_RANK_WEIGHT = 2.0
+
+
+def encode_chat_search_cursor(
+    rank: float | None, time_created: datetime, chat_session_id: UUID
+) -> str:
+    payload = [rank, time_created.isoformat(), str(chat_session_id)]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_chat_search_cursor(cursor: str) -> tuple[float | None, datetime, UUID]:
+    """Raises a ValueError if the cursor was not created by encode_chat_search_cursor"""
+    try:
+        rank, time_created, chat_session_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        return (
+            float(rank) if rank is not None else None,
+            datetime.fromisoformat(time_created),
+            UUID(chat_session_id),
+        )
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid chat search cursor: {cursor}") from e
+
+
+def search_chat_sessions_ranked(
+    user_id: UUID | None,
+    db_session: Session,
+    query: str | None = None,
+    cursor: str | None = None,
+    page_size: int = 10,
+    include_deleted: bool = False,
+    include_onyxbot_flows: bool = False,
+) -> tuple[list[ChatSession], str | None]:
+    """
+    Full-text search on ChatSession + ChatMessage, ordered by relevance.
+
+    Every session is ranked by the best ts_rank_cd of its description and its
+    messages. If no query is provided, returns the most recent chat sessions.
+
+    Pages are fetched with keyset pagination, so deep pages are as fast as the first
+    one. Returns a tuple of (sessions, next_cursor) where next_cursor is None if there
+    are no more results. Raises a ValueError for an invalid cursor.
+    """
+    after = decode_chat_search_cursor(cursor) if cursor else None
+
+    # The default filters match the partial indexes on chat_session
+    base_conditions = []
+    if user_id is not None:
+        base_conditions.append(ChatSession.user_id == user_id)
+    if not include_deleted:
+        base_conditions.append(ChatSession.deleted.is_(False))
+    if not include_onyxbot_flows:
+        base_conditions.append(ChatSession.onyxbot_flow.is_(False))
+
+    if not query or not query.strip():
+        stmt = (
+            select(ChatSession)
+            .where(*base_conditions)
+            .order_by(desc(ChatSession.time_created), desc(ChatSession.id))
+            .limit(page_size + 1)
+            .options(joinedload(ChatSession.persona))
+        )
+        if after is not None:
+            _, after_time_created, after_id = after
+            stmt = stmt.where(
+                tuple_(ChatSession.time_created, ChatSession.id)
+                < tuple_(after_time_created, after_id)
+            )
+
+        sessions = list(db_session.execute(stmt).scalars().all())
+        if len(sessions) <= page_size:
+            return sessions, None
+
+        sessions = sessions[:page_size]
+        last = sessions[-1]
+        return sessions, encode_chat_search_cursor(None, last.time_created, last.id)
+
+    message_tsv: ColumnClause = column("message_tsv")
+    description_tsv: ColumnClause = column("description_tsv")
+
+    ts_query = func.plainto_tsquery("english", query.strip())
+
+    description_ranks = (
+        select(
+            ChatSession.id.label("chat_session_id"),
+            (
+                cast(func.ts_rank_cd(description_tsv, ts_query), Float)
+                * _DESCRIPTION_RANK_WEIGHT
+            ).label("rank"),
+        )
+        .where(*base_conditions)
+        .where(description_tsv.op("@@")(ts_query))
+    )
+
+    message_ranks = (
+        select(
+            ChatMessage.chat_session_id.label("chat_session_id"),
+            cast(func.ts_rank_cd(message_tsv, ts_query), Float).label("rank"),
+        )
+        .join(ChatSession, ChatMessage.chat_session_id == ChatSession.id)
+        .where(*base_conditions)
+        .where(message_tsv.op("@@")(ts_query))
+    )
+
+    ranks = union_all(description_ranks, message_ranks).subquery("ranks")
+    session_ranks = (
+        select(
+            ranks.c.chat_session_id,
+            func.max(ranks.c.rank).label("rank"),
+        )
+        .group_by(ranks.c.chat_session_id)
+        .subquery("session_ranks")
+    )
+
+    stmt = (
+        select(ChatSession, session_ranks.c.rank)
+        .join(session_ranks, ChatSession.id == session_ranks.c.chat_session_id)
+        .order_by(
+            desc(session_ranks.c.rank),
+            desc(ChatSession.time_created),
+            desc(ChatSession.id),
+        )
+        .limit(page_size + 1)
+        .options(joinedload(ChatSession.persona))
+    )
+    if after is not None:
+        after_rank, after_time_created, after_id = after
+        if after_rank is None:
+            raise ValueError(f"Invalid chat search cursor for a query: {cursor}")
+        stmt = stmt.where(
+            tuple_(session_ranks.c.rank, ChatSession.time_created, ChatSession.id)
+            < tuple_(after_rank, after_time_created, after_id)
+        )
+
+    ranked_sessions = list(db_session.execute(stmt).tuples().all())
+    if len(ranked_sessions) <= page_size:
+        return [session for session, _ in ranked_sessions], None
+
+    ranked_sessions = ranked_sessions[:page_size]
+    last_session, last_rank = ranked_sessions[-1]
+    return [session for session, _ in ranked_sessions], encode_chat_search_cursor(
+        last_rank, last_session.time_created, last_session.id
+    )
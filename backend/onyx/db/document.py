@@ -611,6 +611,29 @@ def update_docs_chunk_count__no_commit(
         doc.chunk_count = doc_id_to_chunk_count[doc.id]
 
 
+def update_docs_chunk_fingerprints__no_commit(
+    index_name: str,
+    doc_id_to_chunk_fingerprints: dict[str, dict[str, str] | None],
+    db_session: Session,
+) -> None:
+    """Stores the chunk fingerprints for the given index. A value of None clears the
+    fingerprints for that index so the next run does a full rewrite of the document."""
+    documents_to_update = (
+        db_session.query(DbDocument)
+        .filter(DbDocument.id.in_(list(doc_id_to_chunk_fingerprints.keys())))
+        .all()
+    )
+    for doc in documents_to_update:
+        # reassign rather than mutate in place so the JSONB change is detected
+        chunk_fingerprints = dict(doc.chunk_fingerprints or {})
+        new_fingerprints = doc_id_to_chunk_fingerprints[doc.id]
+        if new_fingerprints is None:
+            chunk_fingerprints.pop(index_name, None)
+        else:
+            chunk_fingerprints[index_name] = new_fingerprints
+        doc.chunk_fingerprints = chunk_fingerprints or None
+
+
 def mark_document_as_modified(
     document_id: str,
     db_session: Session,
@@ -1075,6 +1098,21 @@ def update_document_kg_info(
     db_session.execute(stmt)
 
 
+def update_documents_kg_info(
+    db_session: Session, document_ids: list[str], kg_stage: KGStage
+) -> None:
+    """Updates the knowledge graph related information for multiple documents."""
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(
+            kg_stage=kg_stage,
+            kg_processing_time=datetime.now(timezone.utc),
+        )
+    )
+    db_session.execute(stmt)
+
+
 def update_document_kg_stage(
     db_session: Session,
     document_id: str,
@@ -1362,3 +1400,15 @@ def get_document_kg_entities_and_relationships(
 def get_num_chunks_for_document(db_session: Session, document_id: str) -> int:
     stmt = select(DbDocument.chunk_count).where(DbDocument.id == document_id)
     return db_session.execute(stmt).scalar_one_or_none() or 0
+
+
+def get_num_chunks_for_documents(
+    db_session: Session, document_ids: list[str]
+) -> dict[str, int]:
+    stmt = select(DbDocument.id, DbDocument.chunk_count).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: chunk_count or 0
+        for document_id, chunk_count in db_session.execute(stmt).all()
+    }
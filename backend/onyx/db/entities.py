@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 from datetime import timezone
+from typing import Any
 from typing import List
 
 from sqlalchemy import func
@@ -19,6 +20,7 @@ from onyx.db.models import KGEntityExtractionStaging
 from onyx.db.models import KGEntityType
 from onyx.kg.models import KGGroundingType
 from onyx.kg.models import KGStage
+from onyx.kg.models import KGStagingEntity
 from onyx.kg.utils.formatting_utils import make_entity_id
 
 
@@ -101,6 +103,57 @@ def upsert_staging_entity(
     return result
 
 
+def upsert_staging_entities(
+    db_session: Session, entities: list[KGStagingEntity]
+) -> list[KGEntityExtractionStaging]:
+    """Add or update staging entities to the database with a single statement.
+
+    Args:
+        db_session: SQLAlchemy session
+        entities: Entities to add, at most one per id_name
+
+    Returns:
+        list[KGEntityExtractionStaging]: The created or updated entities
+    """
+    if not entities:
+        return []
+
+    rows: list[dict[str, Any]] = []
+    for entity in entities:
+        entity_type = entity.entity_type.upper()
+        name = entity.name.title()
+        rows.append(
+            dict(
+                id_name=make_entity_id(entity_type, name),
+                name=name,
+                entity_type_id_name=entity_type,
+                entity_key=entity.attributes.get("key"),
+                parent_key=entity.attributes.get("parent"),
+                document_id=entity.document_id,
+                occurrences=entity.occurrences,
+                attributes={
+                    attr_key: attr_val
+                    for attr_key, attr_val in entity.attributes.items()
+                    if attr_key not in ("key", "parent")
+                },
+                event_time=entity.event_time,
+            )
+        )
+
+    stmt = pg_insert(KGEntityExtractionStaging).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id_name"],
+        set_=dict(
+            occurrences=KGEntityExtractionStaging.occurrences
+            + stmt.excluded.occurrences,
+        ),
+    ).returning(KGEntityExtractionStaging)
+
+    result = list(db_session.scalars(stmt).all())
+    db_session.flush()
+    return result
+
+
 def transfer_entity(
     db_session: Session,
     entity: KGEntityExtractionStaging,
@@ -573,6 +573,13 @@ class Document(Base):
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Content fingerprints of the chunks last written to each document index, keyed by
+    # index name and then by chunk key. Used to skip re-indexing unchanged chunks.
+    # Null if the document has not been indexed with fingerprints yet
+    chunk_fingerprints: Mapped[dict[str, dict[str, str]] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True, default=None
+    )
+
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
     last_modified: Mapped[datetime.datetime | None] = mapped_column(
@@ -2100,6 +2107,11 @@ class ChatMessage(Base):
     message: Mapped[str] = mapped_column(Text)
     rephrased_query: Mapped[str] = mapped_column(Text, nullable=True)
     token_count: Mapped[int] = mapped_column(Integer)
+    # Maps the name of a tokenizer to the token count of the message with that
+    # tokenizer, so that the history is only tokenized once per tokenizer
+    token_counts: Mapped[dict[str, int] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True
+    )
     message_type: Mapped[MessageType] = mapped_column(
         Enum(MessageType, native_enum=False)
     )
@@ -99,6 +99,64 @@ def upsert_staging_relationship(
     return result
 
 
+def upsert_staging_relationships(
+    db_session: Session,
+    relationship_occurrences: dict[tuple[str, str | None], int],
+) -> None:
+    """
+    Add or update staging relationships to the database with a single statement.
+
+    Args:
+        db_session: SQLAlchemy database session
+        relationship_occurrences: Number of times each relationship has been found,
+            keyed by the ID name of the relationship and the ID of the source document
+    """
+    rows: dict[tuple[str, str | None], dict] = {}
+    for (
+        relationship_id_name,
+        source_document_id,
+    ), occurrences in relationship_occurrences.items():
+        relationship_id_name = format_relationship_id(relationship_id_name)
+        key = (relationship_id_name, source_document_id)
+        if key in rows:
+            rows[key]["occurrences"] += occurrences
+            continue
+
+        (
+            source_entity_id_name,
+            relationship_string,
+            target_entity_id_name,
+        ) = split_relationship_id(relationship_id_name)
+        rows[key] = {
+            "id_name": relationship_id_name,
+            "source_node": source_entity_id_name,
+            "target_node": target_entity_id_name,
+            "source_node_type": get_entity_type(source_entity_id_name),
+            "target_node_type": get_entity_type(target_entity_id_name),
+            "type": relationship_string.lower(),
+            "relationship_type_id_name": extract_relationship_type_id(
+                relationship_id_name
+            ),
+            "source_document": source_document_id,
+            "occurrences": occurrences,
+        }
+    if not rows:
+        return
+
+    stmt = postgresql.insert(KGRelationshipExtractionStaging).values(
+        list(rows.values())
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id_name", "source_document"],
+        set_=dict(
+            occurrences=KGRelationshipExtractionStaging.occurrences
+            + stmt.excluded.occurrences,
+        ),
+    )
+    db_session.execute(stmt)
+    db_session.flush()
+
+
 def upsert_relationship(
     db_session: Session,
     relationship_id_name: str,
@@ -280,6 +338,59 @@ def upsert_staging_relationship_type(
     return result
 
 
+def upsert_staging_relationship_types(
+    db_session: Session,
+    relationship_type_occurrences: dict[tuple[str, str, str], int],
+) -> None:
+    """
+    Add or update staging relationship types to the database with a single statement.
+
+    Args:
+        db_session: SQLAlchemy session
+        relationship_type_occurrences: Number of times each relationship type has been
+            found, keyed by the source entity type, relationship type and target
+            entity type
+    """
+    rows: dict[str, dict] = {}
+    for (
+        source_entity_type,
+        relationship_type,
+        target_entity_type,
+    ), occurrences in relationship_type_occurrences.items():
+        id_name = make_relationship_type_id(
+            source_entity_type, relationship_type, target_entity_type
+        )
+        if id_name in rows:
+            rows[id_name]["occurrences"] += occurrences
+            continue
+
+        rows[id_name] = {
+            "id_name": id_name,
+            "name": relationship_type,
+            "source_entity_type_id_name": source_entity_type.upper(),
+            "target_entity_type_id_name": target_entity_type.upper(),
+            "definition": False,
+            "occurrences": occurrences,
+            "type": relationship_type,
+            "active": True,
+        }
+    if not rows:
+        return
+
+    stmt = postgresql.insert(KGRelationshipTypeExtractionStaging).values(
+        list(rows.values())
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id_name"],
+        set_=dict(
+            occurrences=KGRelationshipTypeExtractionStaging.occurrences
+            + stmt.excluded.occurrences,
+        ),
+    )
+    db_session.execute(stmt)
+    db_session.flush()
+
+
 def upsert_relationship_type(
     db_session: Session,
     source_entity_type: str,
@@ -1,3 +1,4 @@
+from collections.abc import Collection
 from typing import Any
 from typing import cast
 from typing import Type
@@ -38,6 +39,12 @@ def get_tool_by_id(tool_id: int, db_session: Session) -> Tool:
     return tool
 
 
+def get_tools_by_ids(tool_ids: Collection[int], db_session: Session) -> list[Tool]:
+    if not tool_ids:
+        return []
+    return list(db_session.scalars(select(Tool).where(Tool.id.in_(tool_ids))).all())
+
+
 def get_tool_by_name(tool_name: str, db_session: Session) -> Tool:
     tool = db_session.scalar(select(Tool).where(Tool.name == tool_name))
     if not tool:
@@ -119,6 +119,19 @@ class VespaDocumentUserFields:
     user_projects: list[int] | None = None
 
 
+@dataclass
+class ChunkUpdatedAtRefreshRequest:
+    """
+    Sets a new `doc_updated_at` on specific chunks of a document. Used for the chunks
+    that incremental indexing left in place instead of rewriting.
+    """
+
+    document_id: str
+    doc_updated_at: datetime
+    chunk_ids: list[int]
+    large_chunk_ids: list[int]
+
+
 @dataclass
 class UpdateRequest:
     """
@@ -306,6 +319,22 @@ class Updatable(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def refresh_chunks_updated_at(
+        self,
+        refresh_requests: list[ChunkUpdatedAtRefreshRequest],
+        *,
+        tenant_id: str,
+    ) -> None:
+        """
+        Updates `doc_updated_at` on exactly the chunks listed in the requests, in the primary
+        index only. Chunks that do not exist are left alone.
+
+        Parameters:
+        - refresh_requests: the document, new update time and chunk ids to refresh
+        """
+        raise NotImplementedError
+
 
 class IdRetrievalCapable(abc.ABC):
     """
@@ -32,6 +32,7 @@ from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.db.enums import EmbeddingPrecision
 from onyx.document_index.document_index_utils import get_document_chunk_ids
 from onyx.document_index.document_index_utils import get_uuid_from_chunk_info
+from onyx.document_index.interfaces import ChunkUpdatedAtRefreshRequest
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import EnrichedDocumentIndexingInfo
@@ -53,6 +54,7 @@ from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_exist
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
+from onyx.document_index.vespa.indexing_utils import vespa_get_updated_at_attribute
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
@@ -64,6 +66,7 @@ from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
 from onyx.document_index.vespa_constants import BATCH_SIZE
 from onyx.document_index.vespa_constants import BOOST
 from onyx.document_index.vespa_constants import CONTENT_SUMMARY
+from onyx.document_index.vespa_constants import DOC_UPDATED_AT
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import HIDDEN
@@ -683,6 +686,60 @@ class VespaIndex(DocumentIndex):
             time.monotonic() - update_start,
         )
 
+    def refresh_chunks_updated_at(
+        self,
+        refresh_requests: list[ChunkUpdatedAtRefreshRequest],
+        *,
+        tenant_id: str,
+    ) -> None:
+        update_start = time.monotonic()
+
+        processed_updates_requests: list[_VespaUpdateRequest] = []
+        for refresh_request in refresh_requests:
+            doc_id = replace_invalid_doc_id_characters(refresh_request.document_id)
+            update_dict: dict[str, dict] = {
+                "fields": {
+                    DOC_UPDATED_AT: {
+                        "assign": vespa_get_updated_at_attribute(
+                            refresh_request.doc_updated_at
+                        )
+                    }
+                }
+            }
+
+            doc_chunk_ids = [
+                get_uuid_from_chunk_info(
+                    document_id=doc_id, chunk_id=chunk_id, tenant_id=tenant_id
+                )
+                for chunk_id in refresh_request.chunk_ids
+            ] + [
+                get_uuid_from_chunk_info(
+                    document_id=doc_id,
+                    chunk_id=large_chunk_id,
+                    tenant_id=tenant_id,
+                    large_chunk_id=large_chunk_id,
+                )
+                for large_chunk_id in refresh_request.large_chunk_ids
+            ]
+
+            # no `create=true` here, chunks that do not exist should not be created
+            processed_updates_requests.extend(
+                _VespaUpdateRequest(
+                    document_id=doc_id,
+                    url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=self.index_name)}/{doc_chunk_id}",
+                    update_request=update_dict,
+                )
+                for doc_chunk_id in doc_chunk_ids
+            )
+
+        with self.httpx_client_context as httpx_client:
+            self._apply_updates_batched(processed_updates_requests, httpx_client)
+        logger.debug(
+            "Refreshed doc_updated_at on %d vespa chunks in %.2f seconds",
+            len(processed_updates_requests),
+            time.monotonic() - update_start,
+        )
+
     def kg_chunk_updates(
         self, kg_update_requests: list[KGUChunkUpdateRequest], tenant_id: str
     ) -> None:
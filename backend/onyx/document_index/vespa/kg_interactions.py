@@ -1,5 +1,8 @@
+from sqlalchemy.orm import Session
+
 from onyx.db.document import get_document_kg_entities_and_relationships
 from onyx.db.document import get_num_chunks_for_document
+from onyx.db.document import get_num_chunks_for_documents
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.document_index.vespa.index import KGUChunkUpdateRequest
 from onyx.document_index.vespa.index import VespaIndex
@@ -30,24 +33,18 @@ def update_kg_chunks_vespa_info(
     )
 
 
-def get_kg_vespa_info_update_requests_for_document(
-    document_id: str,
+def _get_kg_vespa_info_update_requests(
+    db_session: Session, document_id: str, num_chunks: int
 ) -> list[KGUChunkUpdateRequest]:
-    """Get the kg_info update requests for a document."""
     # get all entities and relationships tied to the document
-    with get_session_with_current_tenant() as db_session:
-        entities, relationships = get_document_kg_entities_and_relationships(
-            db_session, document_id
-        )
+    entities, relationships = get_document_kg_entities_and_relationships(
+        db_session, document_id
+    )
 
     # create the kg vespa info
     kg_entities = {entity.id_name for entity in entities}
     kg_relationships = {relationship.id_name for relationship in relationships}
 
-    # get chunks in the document
-    with get_session_with_current_tenant() as db_session:
-        num_chunks = get_num_chunks_for_document(db_session, document_id)
-
     # get vespa update requests
     return [
         KGUChunkUpdateRequest(
@@ -59,3 +56,26 @@ def get_kg_vespa_info_update_requests_for_document(
         )
         for chunk_id in range(num_chunks)
     ]
+
+
+def get_kg_vespa_info_update_requests_for_document(
+    document_id: str,
+) -> list[KGUChunkUpdateRequest]:
+    """Get the kg_info update requests for a document."""
+    with get_session_with_current_tenant() as db_session:
+        num_chunks = get_num_chunks_for_document(db_session, document_id)
+        return _get_kg_vespa_info_update_requests(db_session, document_id, num_chunks)
+
+
+def get_kg_vespa_info_update_requests_for_documents(
+    document_ids: list[str],
+) -> dict[str, list[KGUChunkUpdateRequest]]:
+    """Get the kg_info update requests for many documents, by document id."""
+    with get_session_with_current_tenant() as db_session:
+        num_chunks_by_document = get_num_chunks_for_documents(db_session, document_ids)
+        return {
+            document_id: _get_kg_vespa_info_update_requests(
+                db_session, document_id, num_chunks_by_document.get(document_id, 0)
+            )
+            for document_id in document_ids
+        }
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 from io import BytesIO
 
 from langchain_core.messages import BaseMessage
@@ -6,15 +7,20 @@ from langchain_core.messages import HumanMessage
 from langchain_core.messages import SystemMessage
 from PIL import Image
 
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_DIMENSION
 from onyx.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
 from onyx.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARY_CACHE_TTL_SECONDS
 from onyx.llm.interfaces import LLM
 from onyx.llm.utils import message_to_string
+from onyx.redis.redis_pool import get_redis_client
 from onyx.utils.b64 import get_image_type_from_bytes
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+_IMAGE_SUMMARY_CACHE_KEY_PREFIX = "image_summary"
+
 
 class UnsupportedImageFormatError(ValueError):
     """Raised when an image uses a MIME type unsupported by the summarization flow."""
@@ -22,7 +28,8 @@ class UnsupportedImageFormatError(ValueError):
 
 def prepare_image_bytes(image_data: bytes) -> str:
     """Prepare image bytes for summarization.
-    Resizes image if it's larger than 20MB. Encodes image as a base64 string."""
+    Resizes image if it's larger than 20MB or IMAGE_SUMMARIZATION_MAX_DIMENSION.
+    Encodes image as a base64 string."""
     image_data = _resize_image_if_needed(image_data)
 
     # encode image (base64)
@@ -53,6 +60,72 @@ def summarize_image_pipeline(
     return summary
 
 
+def downscale_image_for_summarization(image_data: bytes) -> bytes:
+    """Downscales the image the same way it is done right before the LLM call.
+    Downscaling is idempotent, so this can be done ahead of time."""
+    return _resize_image_if_needed(image_data)
+
+
+def get_image_summary_key(
+    image_data: bytes,
+    context_name: str,
+    llm: LLM,
+    system_prompt: str = IMAGE_SUMMARIZATION_SYSTEM_PROMPT,
+    user_prompt_template: str = IMAGE_SUMMARIZATION_USER_PROMPT,
+) -> str:
+    """Digest of everything the summary depends on: the exact image bytes, the context
+    name and prompts passed to summarize_image_with_error_handling and the model.
+    Images with the same key get the same summary."""
+    key_hash = hashlib.sha256()
+    key_hash.update(hashlib.sha256(image_data).digest())
+    for prompt_input in (
+        context_name,
+        system_prompt,
+        user_prompt_template,
+        llm.config.model_provider,
+        llm.config.model_name,
+    ):
+        # length prefixed so that the inputs cannot run into each other
+        encoded = prompt_input.encode("utf-8")
+        key_hash.update(len(encoded).to_bytes(8, "big"))
+        key_hash.update(encoded)
+    return key_hash.hexdigest()
+
+
+def _get_image_summary_cache_key(summary_key: str) -> str:
+    return f"{_IMAGE_SUMMARY_CACHE_KEY_PREFIX}:{summary_key}"
+
+
+def get_cached_image_summary(summary_key: str) -> str | None:
+    """Returns the cached summary for the image, if any. Cache errors are not fatal."""
+    if IMAGE_SUMMARY_CACHE_TTL_SECONDS <= 0:
+        return None
+
+    try:
+        cached = get_redis_client().get(_get_image_summary_cache_key(summary_key))
+    except Exception:
+        logger.exception("Failed to read image summary from cache")
+        return None
+
+    if cached is None:
+        return None
+    return cached.decode("utf-8") if isinstance(cached, bytes) else str(cached)
+
+
+def cache_image_summary(summary_key: str, summary: str) -> None:
+    if IMAGE_SUMMARY_CACHE_TTL_SECONDS <= 0:
+        return
+
+    try:
+        get_redis_client().set(
+            _get_image_summary_cache_key(summary_key),
+            summary,
+            ex=IMAGE_SUMMARY_CACHE_TTL_SECONDS,
+        )
+    except Exception:
+        logger.exception("Failed to write image summary to cache")
+
+
 def summarize_image_with_error_handling(
     llm: LLM | None,
     image_data: bytes,
@@ -134,20 +207,39 @@ def _encode_image_for_llm_prompt(image_data: bytes) -> str:
     return f"data:{mime_type};base64,{base64_encoded_data}"
 
 
-def _resize_image_if_needed(image_data: bytes, max_size_mb: int = 20) -> bytes:
-    """Resize image if it's larger than the specified max size in MB."""
+def _resize_image_if_needed(
+    image_data: bytes,
+    max_size_mb: int = 20,
+    max_dimension: int = IMAGE_SUMMARIZATION_MAX_DIMENSION,
+) -> bytes:
+    """Resize image if it's larger than the specified max size in MB or if its
+    width or height exceeds max_dimension. Vision models downscale large images
+    anyway, so sending them at full resolution only costs bandwidth and latency."""
     max_size_bytes = max_size_mb * 1024 * 1024
 
-    if len(image_data) > max_size_bytes:
-        with Image.open(BytesIO(image_data)) as img:
-            # Reduce dimensions for better size reduction
-            img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-            output = BytesIO()
-
-            # Save with lower quality for compression
-            img.save(output, format="JPEG", quality=85)
-            resized_data = output.getvalue()
-
-            return resized_data
-
-    return image_data
+    try:
+        img = Image.open(BytesIO(image_data))
+    except Exception:
+        # leave it to the encoding step to reject unsupported formats
+        return image_data
+
+    with img:
+        if (
+            len(image_data) <= max_size_bytes
+            and img.width <= max_dimension
+            and img.height <= max_dimension
+        ):
+            return image_data
+
+        # Reduce dimensions for better size reduction
+        img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        if img.mode not in ("RGB", "L"):
+            # JPEG does not support transparency or palettes
+            img = img.convert("RGB")
+        output = BytesIO()
+
+        # Save with lower quality for compression
+        img.save(output, format="JPEG", quality=85)
+        resized_data = output.getvalue()
+
+        return resized_data
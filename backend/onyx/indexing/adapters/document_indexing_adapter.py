@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from onyx.access.access import get_access_for_documents
 from onyx.access.models import DocumentAccess
+from onyx.configs.app_configs import ENABLE_INCREMENTAL_CHUNK_INDEXING
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
@@ -14,6 +15,7 @@ from onyx.db.document import fetch_chunk_counts_for_documents
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
 from onyx.db.document import update_docs_chunk_count__no_commit
+from onyx.db.document import update_docs_chunk_fingerprints__no_commit
 from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document import update_docs_updated_at__no_commit
 from onyx.db.document_set import fetch_document_sets_for_documents
@@ -70,6 +72,9 @@ class DocumentIndexingBatchAdapter:
                 db_session=self.db_session,
             )
             self.db_session.commit()
+        else:
+            # only documents indexed through this adapter keep chunk fingerprints
+            context.incremental_chunk_indexing = ENABLE_INCREMENTAL_CHUNK_INDEXING
 
         return context
 
@@ -120,16 +125,25 @@ class DocumentIndexingBatchAdapter:
             )
         }
 
-        doc_id_to_new_chunk_cnt: dict[str, int] = {
-            document_id: len(
-                [
-                    chunk
-                    for chunk in chunks_with_embeddings
-                    if chunk.source_document.id == document_id
-                ]
-            )
-            for document_id in updatable_ids
-        }
+        # with incremental indexing, unchanged chunks are not part of this batch
+        # but still count towards the document's chunks
+        doc_id_to_new_chunk_cnt: dict[str, int] = (
+            {
+                document_id: context.chunk_diff.doc_id_to_chunk_cnt.get(document_id, 0)
+                for document_id in updatable_ids
+            }
+            if context.chunk_diff
+            else {
+                document_id: len(
+                    [
+                        chunk
+                        for chunk in chunks_with_embeddings
+                        if chunk.source_document.id == document_id
+                    ]
+                )
+                for document_id in updatable_ids
+            }
+        )
 
         access_aware_chunks = [
             DocMetadataAwareIndexChunk.from_index_chunk(
@@ -191,6 +205,28 @@ class DocumentIndexingBatchAdapter:
             db_session=self.db_session,
         )
 
+        # keep the stored fingerprints in line with what is actually in the index.
+        # If incremental indexing did not run, any stored fingerprints are stale
+        if context.chunk_fingerprint_index_name:
+            doc_id_to_chunk_fingerprints: dict[str, dict[str, str] | None] = (
+                {
+                    doc_id: context.chunk_diff.doc_id_to_chunk_fingerprints.get(doc_id)
+                    for doc_id in updatable_ids
+                }
+                if context.chunk_diff
+                else {
+                    doc_id: None
+                    for doc_id in updatable_ids
+                    if doc_id in context.id_to_chunk_fingerprints
+                }
+            )
+            if doc_id_to_chunk_fingerprints:
+                update_docs_chunk_fingerprints__no_commit(
+                    index_name=context.chunk_fingerprint_index_name,
+                    doc_id_to_chunk_fingerprints=doc_id_to_chunk_fingerprints,
+                    db_session=self.db_session,
+                )
+
         # these documents can now be counted as part of the CC Pairs
         # document count, so we need to mark them as indexed
         # NOTE: even documents we skipped since they were already up
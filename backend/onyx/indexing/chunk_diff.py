@@ -0,0 +1,107 @@
+import hashlib
+import json
+from collections import defaultdict
+
+from pydantic import BaseModel
+
+from onyx.indexing.models import DocAwareChunk
+
+
+class ChunkDiffResult(BaseModel):
+    # chunks that are new, changed, or moved to a different chunk ID and therefore
+    # need to be embedded and written to the document index
+    changed_chunks: list[DocAwareChunk]
+    # number of chunks per document, including the unchanged ones that are skipped
+    doc_id_to_chunk_cnt: dict[str, int]
+    # fingerprints to store for each document once it has been indexed
+    doc_id_to_chunk_fingerprints: dict[str, dict[str, str]]
+    # chunk IDs (regular and large) that were skipped and keep their previous index entry
+    doc_id_to_unchanged_chunk_ids: dict[str, list[int]]
+    doc_id_to_unchanged_large_chunk_ids: dict[str, list[int]]
+
+    @property
+    def doc_ids_with_unchanged_chunks(self) -> set[str]:
+        """Documents that have at least one chunk that was not rewritten."""
+        return set(self.doc_id_to_unchanged_chunk_ids) | set(
+            self.doc_id_to_unchanged_large_chunk_ids
+        )
+
+
+def get_chunk_fingerprint_key(chunk: DocAwareChunk) -> str:
+    """Large chunks share their chunk_id with the first regular chunk they contain,
+    so they get their own key namespace."""
+    if chunk.large_chunk_id is not None:
+        return f"L{chunk.large_chunk_id}"
+    return str(chunk.chunk_id)
+
+
+def compute_chunk_fingerprint(chunk: DocAwareChunk) -> str:
+    """Hash of everything that ends up in the indexed chunk, except for the fields that are
+    kept in sync by the metadata sync (access, document sets, boost) and `doc_updated_at`,
+    which is refreshed separately for chunks that are skipped."""
+    document = chunk.source_document
+    fingerprint_fields = {
+        "blurb": chunk.blurb,
+        "content": chunk.content,
+        "source_links": chunk.source_links,
+        "image_file_id": chunk.image_file_id,
+        "section_continuation": chunk.section_continuation,
+        "title_prefix": chunk.title_prefix,
+        "metadata_suffix_semantic": chunk.metadata_suffix_semantic,
+        "metadata_suffix_keyword": chunk.metadata_suffix_keyword,
+        "mini_chunk_texts": chunk.mini_chunk_texts,
+        "large_chunk_reference_ids": chunk.large_chunk_reference_ids,
+        "title": document.get_title_for_document_index(),
+        "semantic_identifier": document.semantic_identifier,
+        "source": document.source.value,
+        "metadata": document.metadata,
+        "primary_owners": [
+            owner.model_dump() for owner in document.primary_owners or []
+        ],
+        "secondary_owners": [
+            owner.model_dump() for owner in document.secondary_owners or []
+        ],
+    }
+    serialized = json.dumps(fingerprint_fields, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def diff_chunks_against_fingerprints(
+    chunks: list[DocAwareChunk],
+    doc_id_to_previous_fingerprints: dict[str, dict[str, str]],
+) -> ChunkDiffResult:
+    """Compares freshly built chunks to the fingerprints stored during the previous
+    indexing run. Chunk IDs are positional, so a chunk whose content shifted to a new
+    position is treated as changed. Chunks that no longer exist are not returned here,
+    they are deleted by the document index based on the new chunk count."""
+    changed_chunks: list[DocAwareChunk] = []
+    doc_id_to_chunk_cnt: dict[str, int] = defaultdict(int)
+    doc_id_to_chunk_fingerprints: dict[str, dict[str, str]] = defaultdict(dict)
+    doc_id_to_unchanged_chunk_ids: dict[str, list[int]] = defaultdict(list)
+    doc_id_to_unchanged_large_chunk_ids: dict[str, list[int]] = defaultdict(list)
+
+    for chunk in chunks:
+        doc_id = chunk.source_document.id
+        key = get_chunk_fingerprint_key(chunk)
+        fingerprint = compute_chunk_fingerprint(chunk)
+
+        doc_id_to_chunk_cnt[doc_id] += 1
+        doc_id_to_chunk_fingerprints[doc_id][key] = fingerprint
+
+        previous_fingerprints = doc_id_to_previous_fingerprints.get(doc_id) or {}
+        if previous_fingerprints.get(key) == fingerprint:
+            if chunk.large_chunk_id is not None:
+                doc_id_to_unchanged_large_chunk_ids[doc_id].append(chunk.large_chunk_id)
+            else:
+                doc_id_to_unchanged_chunk_ids[doc_id].append(chunk.chunk_id)
+            continue
+
+        changed_chunks.append(chunk)
+
+    return ChunkDiffResult(
+        changed_chunks=changed_chunks,
+        doc_id_to_chunk_cnt=dict(doc_id_to_chunk_cnt),
+        doc_id_to_chunk_fingerprints=dict(doc_id_to_chunk_fingerprints),
+        doc_id_to_unchanged_chunk_ids=dict(doc_id_to_unchanged_chunk_ids),
+        doc_id_to_unchanged_large_chunk_ids=dict(doc_id_to_unchanged_large_chunk_ids),
+    )
@@ -1,3 +1,4 @@
+import hashlib
 from typing import cast
 
 from chonkie import SentenceChunker
@@ -34,10 +35,63 @@ CHUNK_OVERLAP = 0
 # overwhelm the actual contents of the chunk
 MAX_METADATA_PERCENTAGE = 0.25
 CHUNK_MIN_CONTENT = 256
+# Max number of texts whose token count is remembered by a Chunker
+TOKEN_COUNT_CACHE_SIZE = 100_000
 
 logger = setup_logger()
 
 
+class TokenCounter:
+    """
+    Counts tokens with the given tokenizer and remembers the counts. The blurb, chunk
+    and mini-chunk splitters count the same sentences over and over, and section texts
+    are counted again when they are packed into chunks.
+
+    Counts are keyed by a digest of the text, so every entry has the same small size
+    no matter how long the text is (e.g. the growing text of a chunk being packed).
+    """
+
+    def __init__(
+        self, tokenizer: BaseTokenizer, max_size: int = TOKEN_COUNT_CACHE_SIZE
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.max_size = max_size
+        self._counts: dict[bytes, int] = {}
+
+    def count(self, text: str) -> int:
+        key = _get_text_key(text)
+        count = self._counts.get(key)
+        if count is None:
+            count = len(self.tokenizer.encode(text))
+            self._store(key, count)
+        return count
+
+    def prime(self, texts: list[str]) -> None:
+        """Counts the tokens of all the texts with a single batched tokenizer call."""
+        missing = {
+            key: text
+            for text in texts
+            if (key := _get_text_key(text)) not in self._counts
+        }
+        if not missing:
+            return
+
+        for key, tokens in zip(
+            missing, self.tokenizer.encode_batch(list(missing.values()))
+        ):
+            self._store(key, len(tokens))
+
+    def _store(self, key: bytes, count: int) -> None:
+        if len(self._counts) >= self.max_size:
+            # the counts are mostly reused within a batch, so starting over is fine
+            self._counts.clear()
+        self._counts[key] = count
+
+
+def _get_text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
 def _get_metadata_suffix_for_document_index(
     metadata: dict[str, str | list[str]], include_separator: bool = False
 ) -> tuple[str, str]:
@@ -141,6 +195,9 @@ class Chunker:
     ) -> None:
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
+        self.blurb_size = blurb_size
+        self.chunk_overlap = chunk_overlap
+        self.mini_chunk_size = mini_chunk_size
         self.enable_multipass = enable_multipass
         self.enable_large_chunks = enable_large_chunks
         self.enable_contextual_rag = enable_contextual_rag
@@ -157,9 +214,9 @@ class Chunker:
         self.max_context = 0
         self.prompt_tokens = 0
 
-        # Create a token counter function that returns the count instead of the tokens
-        def token_counter(text: str) -> int:
-            return len(tokenizer.encode(text))
+        # Shared by the splitters, which only need the count instead of the tokens
+        self.token_counter = TokenCounter(tokenizer)
+        token_counter = self.token_counter.count
 
         self.blurb_splitter = SentenceChunker(
             tokenizer_or_token_counter=token_counter,
@@ -321,7 +378,7 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_token_count = self.token_counter.count(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -345,7 +402,7 @@ class Chunker:
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and self.token_counter.count(split_text) > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -375,10 +432,10 @@ class Chunker:
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
+            current_token_count = self.token_counter.count(chunk_text)
             current_offset = len(shared_precompare_cleanup(chunk_text))
             next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
+                self.token_counter.count(SECTION_SEPARATOR) + section_token_count
             )
 
             if next_section_tokens + current_token_count <= content_token_limit:
@@ -416,6 +473,20 @@ class Chunker:
             )
         return chunks
 
+    def _prime_token_counts(self, documents: list[IndexingDocument]) -> None:
+        """
+        Counts the tokens of every text section of the batch with one batched tokenizer
+        call, rather than one call per section while chunking.
+        """
+        texts = [SECTION_SEPARATOR]
+        for document in documents:
+            texts.extend(
+                clean_text(str(section.text or ""))
+                for section in document.processed_sections
+                if section.text and not section.image_file_id
+            )
+        self.token_counter.prime(texts)
+
     def _handle_single_document(
         self, document: IndexingDocument
     ) -> list[DocAwareChunk]:
@@ -426,7 +497,7 @@ class Chunker:
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.encode(title_prefix))
+        title_tokens = self.token_counter.count(title_prefix)
 
         # Metadata prep
         metadata_suffix_semantic = ""
@@ -439,7 +510,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.encode(metadata_suffix_semantic))
+            metadata_tokens = self.token_counter.count(metadata_suffix_semantic)
 
         # If metadata is too large, skip it in the semantic content
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
@@ -449,9 +520,9 @@ class Chunker:
         single_chunk_fits = True
         doc_token_count = 0
         if self.enable_contextual_rag:
-            doc_content = document.get_text_content()
-            tokenized_doc = self.tokenizer.tokenize(doc_content)
-            doc_token_count = len(tokenized_doc)
+            # only the count is needed, which `encode` gets without building the
+            # token strings
+            doc_token_count = len(self.tokenizer.encode(document.get_text_content()))
 
             # check if doc + title + metadata fits in a single chunk. If so, no need for contextual RAG
             single_chunk_fits = (
@@ -518,6 +589,8 @@ class Chunker:
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
         """
+        self._prime_token_counts(documents)
+
         final_chunks: list[DocAwareChunk] = []
         for document in documents:
             if self.callback and self.callback.should_stop():
@@ -0,0 +1,214 @@
+"""Process pool for chunking the documents of an indexing batch.
+
+Chunking is pure python CPU work, so in the indexing threads of a docprocessing worker
+it is bound to a single core by the GIL. The pool hands shards of the batch to
+processes that each hold their own Chunker, built once when the process starts."""
+
+import math
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from pydantic import BaseModel
+from pydantic import ConfigDict
+
+from onyx.connectors.models import IndexingDocument
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from onyx.indexing.models import DocAwareChunk
+from onyx.natural_language_processing.utils import get_tokenizer
+from onyx.utils.logger import setup_logger
+from shared_configs.enums import EmbeddingProvider
+
+logger = setup_logger()
+
+# More shards than processes keeps the processes busy when documents vary in length
+_SHARDS_PER_PROCESS = 4
+# How often the stop signal is checked while waiting on a shard
+_STOP_SIGNAL_CHECK_INTERVAL_SECONDS = 1.0
+# Enough for the primary and the secondary index during a search settings swap
+_MAX_CHUNKING_POOLS = 2
+
+# Chunks are sent back without their source document, which the caller already has,
+# as a tuple of the remaining fields in this order
+_CHUNK_FIELDS = tuple(
+    field_name
+    for field_name in DocAwareChunk.model_fields
+    if field_name != "source_document"
+)
+
+
+class ChunkerSettings(BaseModel):
+    """Everything needed to build an identical Chunker in another process."""
+
+    model_config = ConfigDict(frozen=True)
+
+    tokenizer_model_name: str | None
+    tokenizer_provider_type: EmbeddingProvider | None
+    enable_multipass: bool
+    enable_large_chunks: bool
+    enable_contextual_rag: bool
+    include_metadata: bool
+    chunk_token_limit: int
+    blurb_size: int
+    chunk_overlap: int
+    mini_chunk_size: int
+
+    @classmethod
+    def from_chunker(
+        cls,
+        chunker: Chunker,
+        tokenizer_model_name: str | None,
+        tokenizer_provider_type: EmbeddingProvider | None,
+    ) -> "ChunkerSettings | None":
+        """Returns None if the tokenizer of the chunker is not the one built from the
+        given model, in which case the chunker cannot be rebuilt in another process."""
+        if (
+            get_tokenizer(tokenizer_model_name, tokenizer_provider_type)
+            is not chunker.tokenizer
+        ):
+            return None
+
+        return cls(
+            tokenizer_model_name=tokenizer_model_name,
+            tokenizer_provider_type=tokenizer_provider_type,
+            enable_multipass=chunker.enable_multipass,
+            enable_large_chunks=chunker.enable_large_chunks,
+            enable_contextual_rag=chunker.enable_contextual_rag,
+            include_metadata=chunker.include_metadata,
+            chunk_token_limit=chunker.chunk_token_limit,
+            blurb_size=chunker.blurb_size,
+            chunk_overlap=chunker.chunk_overlap,
+            mini_chunk_size=chunker.mini_chunk_size,
+        )
+
+
+# The Chunker of a pool process, built by the pool initializer
+_process_chunker: Chunker | None = None
+
+
+def _init_chunking_process(settings: ChunkerSettings) -> None:
+    global _process_chunker
+    _process_chunker = Chunker(
+        tokenizer=get_tokenizer(
+            model_name=settings.tokenizer_model_name,
+            provider_type=settings.tokenizer_provider_type,
+        ),
+        enable_multipass=settings.enable_multipass,
+        enable_large_chunks=settings.enable_large_chunks,
+        enable_contextual_rag=settings.enable_contextual_rag,
+        blurb_size=settings.blurb_size,
+        include_metadata=settings.include_metadata,
+        chunk_token_limit=settings.chunk_token_limit,
+        chunk_overlap=settings.chunk_overlap,
+        mini_chunk_size=settings.mini_chunk_size,
+    )
+
+
+def _chunk_shard(
+    documents: list[IndexingDocument],
+) -> list[tuple[int, tuple[Any, ...]]]:
+    """Runs in a pool process. Returns for every chunk the index of its document in
+    the shard and the values of the chunk fields in `_CHUNK_FIELDS` order."""
+    if _process_chunker is None:
+        raise RuntimeError("Chunking process was not initialized")
+
+    doc_id_to_index = {document.id: i for i, document in enumerate(documents)}
+    return [
+        (
+            doc_id_to_index[chunk.source_document.id],
+            tuple(getattr(chunk, field_name) for field_name in _CHUNK_FIELDS),
+        )
+        for chunk in _process_chunker.chunk(documents)
+    ]
+
+
+class ChunkingPool:
+    def __init__(self, settings: ChunkerSettings, num_processes: int) -> None:
+        self.num_processes = num_processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_processes,
+            # fork is unsafe with the threads of the worker
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_chunking_process,
+            initargs=(settings,),
+        )
+
+    def chunk(
+        self,
+        documents: list[IndexingDocument],
+        callback: IndexingHeartbeatInterface | None = None,
+    ) -> list[DocAwareChunk]:
+        """Same output as `Chunker.chunk`, in the same order."""
+        shard_size = max(
+            1, math.ceil(len(documents) / (self.num_processes * _SHARDS_PER_PROCESS))
+        )
+        shards = [
+            documents[i : i + shard_size] for i in range(0, len(documents), shard_size)
+        ]
+        futures = [self._executor.submit(_chunk_shard, shard) for shard in shards]
+
+        final_chunks: list[DocAwareChunk] = []
+        try:
+            # results are collected in submission order to keep the chunk order stable
+            for shard, future in zip(shards, futures):
+                shard_chunks = self._wait_for_shard(future, callback)
+                final_chunks.extend(
+                    DocAwareChunk.model_construct(
+                        source_document=shard[doc_index],
+                        **dict(zip(_CHUNK_FIELDS, chunk_values)),
+                    )
+                    for doc_index, chunk_values in shard_chunks
+                )
+
+                if callback:
+                    callback.progress("Chunker.chunk", len(shard_chunks))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+        return final_chunks
+
+    @staticmethod
+    def _wait_for_shard(
+        future: Future[list[tuple[int, tuple[Any, ...]]]],
+        callback: IndexingHeartbeatInterface | None,
+    ) -> list[tuple[int, tuple[Any, ...]]]:
+        while True:
+            if callback and callback.should_stop():
+                raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+            try:
+                return future.result(timeout=_STOP_SIGNAL_CHECK_INTERVAL_SECONDS)
+            except TimeoutError:
+                continue
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_chunking_pools: dict[ChunkerSettings, ChunkingPool] = {}
+_chunking_pools_lock = threading.Lock()
+
+
+def get_chunking_pool(settings: ChunkerSettings, num_processes: int) -> ChunkingPool:
+    """Pools are kept for the lifetime of the worker so that the processes and their
+    tokenizers are only initialized once. One pool exists per chunker configuration,
+    which only changes when the search settings are swapped."""
+    with _chunking_pools_lock:
+        pool = _chunking_pools.get(settings)
+        if pool is None:
+            if len(_chunking_pools) >= _MAX_CHUNKING_POOLS:
+                # the oldest pool belongs to search settings that are no longer used
+                oldest_settings = next(iter(_chunking_pools))
+                _chunking_pools.pop(oldest_settings).shutdown()
+
+            logger.info(
+                f"Starting chunking process pool with {num_processes} processes"
+            )
+            pool = ChunkingPool(settings, num_processes)
+            _chunking_pools[settings] = pool
+        return pool
@@ -1,14 +1,25 @@
+import threading
+import time
 from collections import defaultdict
 from collections.abc import Callable
+from concurrent.futures import Future
+from datetime import datetime
 from typing import Protocol
 
+from langchain.schema.language_model import LanguageModelInput
+from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import CHUNKING_PROCESS_POOL_SIZE
+from onyx.configs.app_configs import CONTEXTUAL_RAG_BATCH_TIME_BUDGET_SECONDS
+from onyx.configs.app_configs import CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET
+from onyx.configs.app_configs import CONTEXTUAL_RAG_MAX_CONCURRENCY
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_CONCURRENCY
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
@@ -37,12 +48,23 @@ from onyx.db.tag import upsert_document_tags
 from onyx.document_index.document_index_utils import (
     get_multipass_config,
 )
+from onyx.document_index.interfaces import ChunkUpdatedAtRefreshRequest
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
+from onyx.file_processing.image_summarization import cache_image_summary
+from onyx.file_processing.image_summarization import (
+    downscale_image_for_summarization,
+)
+from onyx.file_processing.image_summarization import get_cached_image_summary
+from onyx.file_processing.image_summarization import get_image_summary_key
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.file_store import get_default_file_store
+from onyx.indexing.chunk_diff import ChunkDiffResult
+from onyx.indexing.chunk_diff import diff_chunks_against_fingerprints
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunking_pool import ChunkerSettings
+from onyx.indexing.chunking_pool import get_chunking_pool
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
@@ -56,6 +78,7 @@ from onyx.llm.factory import get_llm_for_contextual_rag
 from onyx.llm.interfaces import LLM
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
 from onyx.llm.utils import message_to_string
+from onyx.llm.utils import model_supports_explicit_prompt_caching
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
@@ -65,6 +88,7 @@ from onyx.natural_language_processing.utils import tokenizer_trim_middle
 from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT1
 from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
 from onyx.prompts.chat_prompts import DOCUMENT_SUMMARY_PROMPT
+from onyx.redis.redis_answer_cache import invalidate_cached_answers_for_documents
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
@@ -80,6 +104,16 @@ class DocumentBatchPrepareContext(BaseModel):
     updatable_docs: list[Document]
     id_to_boost_map: dict[str, int]
     indexable_docs: list[IndexingDocument] = []
+    # previously stored chunk fingerprints, keyed by document id and then index name
+    id_to_chunk_fingerprints: dict[str, dict[str, dict[str, str]]] = {}
+    # previously stored doc_updated_at, used to skip refreshing unchanged chunks
+    id_to_previous_doc_updated_at: dict[str, datetime] = {}
+    # set by the adapter, only batches whose fingerprints are tracked are diffed
+    incremental_chunk_indexing: bool = False
+    # name of the index the chunk fingerprints are tracked for in this batch
+    chunk_fingerprint_index_name: str | None = None
+    # only set when incremental chunk indexing is enabled
+    chunk_diff: ChunkDiffResult | None = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
@@ -349,8 +383,17 @@ def index_doc_batch_prepare(
         return None
 
     id_to_boost_map = {doc.id: doc.boost for doc in db_docs}
+    id_to_chunk_fingerprints = {
+        doc.id: doc.chunk_fingerprints for doc in db_docs if doc.chunk_fingerprints
+    }
+    id_to_previous_doc_updated_at = {
+        doc.id: doc.doc_updated_at for doc in db_docs if doc.doc_updated_at
+    }
     return DocumentBatchPrepareContext(
-        updatable_docs=updatable_docs, id_to_boost_map=id_to_boost_map
+        updatable_docs=updatable_docs,
+        id_to_boost_map=id_to_boost_map,
+        id_to_chunk_fingerprints=id_to_chunk_fingerprints,
+        id_to_previous_doc_updated_at=id_to_previous_doc_updated_at,
     )
 
 
@@ -453,54 +496,23 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
             for document in documents
         ]
 
+    image_file_id_to_text = _summarize_image_sections(documents, llm)
+
     indexed_documents: list[IndexingDocument] = []
 
     for document in documents:
         processed_sections: list[Section] = []
 
         for section in document.sections:
-            # For ImageSection, process and create base Section with both text and image_file_id
+            # For ImageSection, create base Section with both the summary and image_file_id
             if isinstance(section, ImageSection):
-                # Default section with image path preserved - ensure text is always a string
                 processed_section = Section(
                     link=section.link,
                     image_file_id=section.image_file_id,
-                    text="",  # Initialize with empty string
+                    text=image_file_id_to_text.get(
+                        section.image_file_id, "[Error processing image]"
+                    ),
                 )
-
-                # Try to get image summary
-                try:
-                    file_store = get_default_file_store()
-
-                    file_record = file_store.read_file_record(
-                        file_id=section.image_file_id
-                    )
-                    if not file_record:
-                        logger.warning(
-                            f"Image file {section.image_file_id} not found in FileStore"
-                        )
-
-                        processed_section.text = "[Image could not be processed]"
-                    else:
-                        # Get the image data
-                        image_data_io = file_store.read_file(
-                            file_id=section.image_file_id
-                        )
-                        image_data = image_data_io.read()
-                        summary = summarize_image_with_error_handling(
-                            llm=llm,
-                            image_data=image_data,
-                            context_name=file_record.display_name or "Image",
-                        )
-
-                        if summary:
-                            processed_section.text = summary
-                        else:
-                            processed_section.text = "[Image could not be summarized]"
-                except Exception as e:
-                    logger.error(f"Error processing image section: {e}")
-                    processed_section.text = "[Error processing image]"
-
                 processed_sections.append(processed_section)
 
             # For TextSection, create a base Section with text and link
@@ -521,6 +533,106 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     return indexed_documents
 
 
+def _load_image_for_summarization(image_file_id: str) -> tuple[str, bytes] | str:
+    """Returns the display name and the downscaled image bytes, or the text to index
+    in place of the image if it could not be loaded."""
+    try:
+        file_store = get_default_file_store()
+
+        file_record = file_store.read_file_record(file_id=image_file_id)
+        if not file_record:
+            logger.warning(f"Image file {image_file_id} not found in FileStore")
+            return "[Image could not be processed]"
+
+        image_data = file_store.read_file(file_id=image_file_id).read()
+        return file_record.display_name or "Image", downscale_image_for_summarization(
+            image_data
+        )
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return "[Error processing image]"
+
+
+def _summarize_image(
+    llm: LLM, summary_key: str, image_data: bytes, context_name: str
+) -> str:
+    """Returns the summary of the image, served from the cache when the same image
+    was already summarized with the same name, model and prompts."""
+    try:
+        cached_summary = get_cached_image_summary(summary_key)
+        if cached_summary is not None:
+            return cached_summary
+
+        summary = summarize_image_with_error_handling(
+            llm=llm,
+            image_data=image_data,
+            context_name=context_name,
+        )
+        if not summary:
+            return "[Image could not be summarized]"
+
+        cache_image_summary(summary_key, summary)
+        return summary
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return "[Error processing image]"
+
+
+def _summarize_image_sections(documents: list[Document], llm: LLM) -> dict[str, str]:
+    """Summarizes every image referenced by the batch and returns the text to use for
+    each image file id. Each worker loads and summarizes one image at a time, so at most
+    IMAGE_SUMMARIZATION_MAX_CONCURRENCY images are held in memory. Identical images with
+    the same name share a summary key and are only summarized once; concurrent workers
+    that hit an image that is already being summarized wait for that result."""
+    image_file_ids = list(
+        dict.fromkeys(
+            section.image_file_id
+            for document in documents
+            for section in document.sections
+            if isinstance(section, ImageSection)
+        )
+    )
+    if not image_file_ids:
+        return {}
+
+    lock = threading.Lock()
+    key_to_summary: dict[str, Future[str]] = {}
+
+    def process_image(image_file_id: str) -> str:
+        loaded_image = _load_image_for_summarization(image_file_id)
+        if isinstance(loaded_image, str):
+            return loaded_image
+
+        context_name, image_data = loaded_image
+        summary_key = get_image_summary_key(image_data, context_name, llm)
+        with lock:
+            summary_future = key_to_summary.get(summary_key)
+            is_first = summary_future is None
+            if summary_future is None:
+                summary_future = Future()
+                key_to_summary[summary_key] = summary_future
+
+        if not is_first:
+            return summary_future.result()
+
+        # _summarize_image never raises, so waiting workers are always released
+        summary = _summarize_image(llm, summary_key, image_data, context_name)
+        summary_future.set_result(summary)
+        return summary
+
+    texts = run_functions_tuples_in_parallel(
+        [(process_image, (image_file_id,)) for image_file_id in image_file_ids],
+        max_workers=IMAGE_SUMMARIZATION_MAX_CONCURRENCY,
+    )
+
+    logger.debug(
+        f"Summarized {len(key_to_summary)} unique images "
+        f"for {len(image_file_ids)} image sections"
+    )
+
+    return dict(zip(image_file_ids, texts))
+
+
 def add_document_summaries(
     chunks_by_doc: list[DocAwareChunk],
     llm: LLM,
@@ -552,21 +664,20 @@ def add_document_summaries(
     return doc_tokens
 
 
-def add_chunk_summaries(
+def _get_chunk_context_prefix(
     chunks_by_doc: list[DocAwareChunk],
     llm: LLM,
     tokenizer: BaseTokenizer,
     trunc_doc_chunk_tokens: int,
     doc_tokens: list[int] | None,
-) -> None:
+) -> str | None:
     """
-    Adds chunk summaries to the chunks grouped by document id.
-    Chunk summaries look at the chunk as well as the entire document (or a summary,
-    if the document is too long) and describe how the chunk relates to the document.
+    Builds the document part of the chunk summary prompt, which is shared by all
+    chunks of the document. Returns None if there is no space for contextual RAG.
     """
     # all chunks within a document have the same contextual_rag_reserved_tokens
     if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
-        return
+        return None
 
     # use values computed in above doc summary section if available
     doc_tokens = doc_tokens or tokenizer.encode(
@@ -590,28 +701,77 @@ def add_chunk_summaries(
             )
         )
 
-    context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
+    return CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
 
-    def assign_context(chunk: DocAwareChunk) -> None:
-        context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
-        try:
-            chunk.chunk_context = message_to_string(
-                llm.invoke(
-                    context_prompt1 + context_prompt2,
-                    max_tokens=MAX_CONTEXT_TOKENS,
-                )
+
+def _build_chunk_context_prompt(
+    context_prefix: str, chunk: DocAwareChunk, cache_prefix: bool
+) -> LanguageModelInput:
+    context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
+    if not cache_prefix:
+        # providers with automatic prompt caching pick up the shared prefix on their own
+        return context_prefix + context_prompt2
+
+    # mark the document prefix as a cache breakpoint so that the provider only
+    # processes it once for all the chunks of the document
+    return [
+        HumanMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": context_prefix,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": context_prompt2},
+            ]
+        )
+    ]
+
+
+def _assign_chunk_context(
+    chunk: DocAwareChunk,
+    llm: LLM,
+    context_prefix: str,
+    cache_prefix: bool,
+    deadline: float | None,
+) -> bool:
+    """Returns False if the chunk was skipped because the batch ran out of time."""
+    if deadline is not None and time.monotonic() > deadline:
+        chunk.chunk_context = ""
+        return False
+
+    try:
+        chunk.chunk_context = message_to_string(
+            llm.invoke(
+                _build_chunk_context_prompt(context_prefix, chunk, cache_prefix),
+                max_tokens=MAX_CONTEXT_TOKENS,
             )
-        except LLMRateLimitError as e:
-            # Erroring during chunker is undesirable, so we log the error and continue
-            # TODO: for v2, add robust retry logic
-            logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-        except Exception as e:
-            logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-
-    run_functions_tuples_in_parallel(
-        [(assign_context, (chunk,)) for chunk in chunks_by_doc]
+        )
+    except LLMRateLimitError as e:
+        # Erroring during chunker is undesirable, so we log the error and continue
+        # TODO: for v2, add robust retry logic
+        logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
+        chunk.chunk_context = ""
+    except Exception as e:
+        logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
+        chunk.chunk_context = ""
+
+    return True
+
+
+def _estimate_chunk_summary_tokens(
+    chunks_by_doc: list[DocAwareChunk],
+    context_prefix: str,
+    tokenizer: BaseTokenizer,
+) -> int:
+    """Upper bound of the tokens used by the chunk summaries of a document, counting
+    the shared prefix once per chunk even though it may be served from a cache."""
+    prefix_tokens = len(tokenizer.encode(context_prefix))
+    return sum(
+        prefix_tokens
+        + len(tokenizer.encode(CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)))
+        + MAX_CONTEXT_TOKENS
+        for chunk in chunks_by_doc
     )
 
 
@@ -624,10 +784,21 @@ def add_contextual_summaries(
     """
     Adds Document summary and chunk-within-document context to the chunks
     based on which environment variables are set.
+
+    The LLM calls of all documents in the batch share one bounded pool of workers.
+    Chunk summaries are subject to the per batch token and time budgets, chunks that
+    do not fit in the budget only get the document summary.
     """
     doc2chunks = defaultdict(list)
     for chunk in chunks:
         doc2chunks[chunk.source_document.id].append(chunk)
+    chunks_by_docs = list(doc2chunks.values())
+
+    deadline = (
+        time.monotonic() + CONTEXTUAL_RAG_BATCH_TIME_BUDGET_SECONDS
+        if CONTEXTUAL_RAG_BATCH_TIME_BUDGET_SECONDS > 0
+        else None
+    )
 
     # The number of tokens allowed for the document when computing a document summary
     trunc_doc_summary_tokens = llm.config.max_input_tokens - len(
@@ -642,21 +813,149 @@ def add_contextual_summaries(
     trunc_doc_chunk_tokens = (
         llm.config.max_input_tokens - prompt_tokens - chunk_token_limit
     )
-    for chunks_by_doc in doc2chunks.values():
-        doc_tokens = None
-        if USE_DOCUMENT_SUMMARY:
-            doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
+
+    docs_tokens: list[list[int] | None] = [None] * len(chunks_by_docs)
+    if USE_DOCUMENT_SUMMARY:
+        docs_tokens = run_functions_tuples_in_parallel(
+            [
+                (
+                    add_document_summaries,
+                    (chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens),
+                )
+                for chunks_by_doc in chunks_by_docs
+            ],
+            max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY,
+        )
+
+    if not USE_CHUNK_SUMMARY:
+        return chunks
+
+    context_prefixes: list[str | None] = run_functions_tuples_in_parallel(
+        [
+            (
+                _get_chunk_context_prefix,
+                (chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens),
             )
+            for chunks_by_doc, doc_tokens in zip(chunks_by_docs, docs_tokens)
+        ],
+        max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY,
+    )
+
+    cache_prefix = model_supports_explicit_prompt_caching(
+        llm.config.model_name, llm.config.model_provider
+    )
+    remaining_token_budget = CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET
+    over_token_budget_chunk_cnt = 0
+    chunk_context_calls: list[tuple[Callable[..., bool], tuple]] = []
+    for chunks_by_doc, context_prefix in zip(chunks_by_docs, context_prefixes):
+        if context_prefix is None:
+            continue
 
-        if USE_CHUNK_SUMMARY:
-            add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
+        if CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET > 0:
+            estimated_tokens = _estimate_chunk_summary_tokens(
+                chunks_by_doc, context_prefix, tokenizer
             )
+            # a document either gets all of its chunk summaries or none of them
+            if estimated_tokens > remaining_token_budget:
+                over_token_budget_chunk_cnt += len(chunks_by_doc)
+                continue
+            remaining_token_budget -= estimated_tokens
+
+        chunk_context_calls.extend(
+            (
+                _assign_chunk_context,
+                (chunk, llm, context_prefix, cache_prefix, deadline),
+            )
+            for chunk in chunks_by_doc
+        )
+
+    assigned = run_functions_tuples_in_parallel(
+        chunk_context_calls, max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY
+    )
+    over_time_budget_chunk_cnt = assigned.count(False)
+    if over_token_budget_chunk_cnt or over_time_budget_chunk_cnt:
+        logger.info(
+            "Contextual RAG budget exceeded, using only the document summary for "
+            f"{over_token_budget_chunk_cnt} chunks over the token budget and "
+            f"{over_time_budget_chunk_cnt} chunks over the time budget"
+        )
 
     return chunks
 
 
+def _chunk_documents(
+    chunker: Chunker, embedder: IndexingEmbedder, documents: list[IndexingDocument]
+) -> list[DocAwareChunk]:
+    """Chunks in the process pool if it is enabled, otherwise in the calling thread."""
+    if CHUNKING_PROCESS_POOL_SIZE > 0 and len(documents) > 1:
+        chunker_settings = ChunkerSettings.from_chunker(
+            chunker, embedder.model_name, embedder.provider_type
+        )
+        if chunker_settings:
+            return get_chunking_pool(
+                chunker_settings, CHUNKING_PROCESS_POOL_SIZE
+            ).chunk(documents, callback=chunker.callback)
+
+    return chunker.chunk(documents)
+
+
+def _refresh_skipped_chunks(
+    document_index: DocumentIndex,
+    chunk_diff: ChunkDiffResult,
+    updatable_docs: list[Document],
+    id_to_previous_doc_updated_at: dict[str, datetime],
+    failures: list[ConnectorFailure],
+    tenant_id: str,
+) -> None:
+    """Chunks skipped by incremental indexing keep their previous index entry, so the
+    document level `doc_updated_at` has to be pushed to them with a partial update
+    when it changed. Fingerprints of documents that failed are dropped so they get
+    fully rewritten on the next run."""
+    failed_doc_ids = {
+        failure.failed_document.document_id
+        for failure in failures
+        if failure.failed_document
+    }
+    for doc_id in failed_doc_ids:
+        chunk_diff.doc_id_to_chunk_fingerprints.pop(doc_id, None)
+
+    refresh_requests: list[ChunkUpdatedAtRefreshRequest] = []
+    for doc in updatable_docs:
+        if (
+            doc.id in failed_doc_ids
+            or doc.id not in chunk_diff.doc_ids_with_unchanged_chunks
+            or doc.doc_updated_at is None
+            or doc.doc_updated_at == id_to_previous_doc_updated_at.get(doc.id)
+        ):
+            continue
+
+        refresh_requests.append(
+            ChunkUpdatedAtRefreshRequest(
+                document_id=doc.id,
+                doc_updated_at=doc.doc_updated_at,
+                chunk_ids=chunk_diff.doc_id_to_unchanged_chunk_ids.get(doc.id, []),
+                large_chunk_ids=chunk_diff.doc_id_to_unchanged_large_chunk_ids.get(
+                    doc.id, []
+                ),
+            )
+        )
+
+    if not refresh_requests:
+        return
+
+    try:
+        document_index.refresh_chunks_updated_at(refresh_requests, tenant_id=tenant_id)
+    except Exception:
+        logger.exception(
+            f"Failed to refresh skipped chunks for {len(refresh_requests)} documents. "
+            "They will be fully rewritten on the next update."
+        )
+        for refresh_request in refresh_requests:
+            chunk_diff.doc_id_to_chunk_fingerprints.pop(
+                refresh_request.document_id, None
+            )
+
+
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -707,9 +1006,28 @@ def index_doc_batch(
     logger.debug("Starting chunking")
     # NOTE: no special handling for failures here, since the chunker is not
     # a common source of failure for the indexing pipeline
-    chunks: list[DocAwareChunk] = chunker.chunk(context.indexable_docs)
+    chunks: list[DocAwareChunk] = _chunk_documents(
+        chunker, embedder, context.indexable_docs
+    )
     llm_tokenizer: BaseTokenizer | None = None
 
+    # Contextual RAG summaries depend on the whole document, so every chunk of a
+    # changed document has to be rewritten in that case
+    context.chunk_fingerprint_index_name = document_index.index_name
+    if context.incremental_chunk_indexing and not enable_contextual_rag:
+        context.chunk_diff = diff_chunks_against_fingerprints(
+            chunks=chunks,
+            doc_id_to_previous_fingerprints={
+                doc_id: fingerprints.get(document_index.index_name, {})
+                for doc_id, fingerprints in context.id_to_chunk_fingerprints.items()
+            },
+        )
+        logger.info(
+            f"Incremental indexing: {len(context.chunk_diff.changed_chunks)} "
+            f"out of {len(chunks)} chunks changed"
+        )
+        chunks = context.chunk_diff.changed_chunks
+
     # contextual RAG
     if enable_contextual_rag:
         assert llm is not None, "must provide an LLM for contextual RAG"
@@ -794,8 +1112,23 @@ def index_doc_batch(
             ),
         )
 
+        if context.chunk_diff:
+            _refresh_skipped_chunks(
+                document_index=document_index,
+                chunk_diff=context.chunk_diff,
+                updatable_docs=context.updatable_docs,
+                id_to_previous_doc_updated_at=context.id_to_previous_doc_updated_at,
+                failures=vector_db_write_failures + embedding_failures,
+                tenant_id=tenant_id,
+            )
+
         all_returned_doc_ids = (
             {record.document_id for record in insertion_records}
+            .union(
+                context.chunk_diff.doc_ids_with_unchanged_chunks
+                if context.chunk_diff
+                else set()
+            )
             .union(
                 {
                     record.failed_document.document_id
@@ -826,6 +1159,8 @@ def index_doc_batch(
             result=result,
         )
 
+        invalidate_cached_answers_for_documents(updatable_ids, tenant_id)
+
     return IndexingPipelineResult(
         new_docs=len([r for r in insertion_records if not r.already_existed]),
         total_docs=len(filtered_documents),
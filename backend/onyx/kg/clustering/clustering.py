@@ -4,11 +4,21 @@ from typing import cast
 
 from rapidfuzz.fuzz import ratio
 from redis.lock import Lock as RedisLock
+from sqlalchemy import column
 from sqlalchemy import func
+from sqlalchemy import Integer
+from sqlalchemy import select
+from sqlalchemy import String
 from sqlalchemy import text
+from sqlalchemy import true
+from sqlalchemy import values
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm import Session
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_CLUSTERING_BATCH_SIZE
+from onyx.configs.kg_configs import KG_CLUSTERING_BATCHED
 from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
 from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -29,8 +39,12 @@ from onyx.db.relationships import upsert_relationship_type
 from onyx.document_index.vespa.kg_interactions import (
     get_kg_vespa_info_update_requests_for_document,
 )
+from onyx.document_index.vespa.kg_interactions import (
+    get_kg_vespa_info_update_requests_for_documents,
+)
 from onyx.document_index.vespa.kg_interactions import update_kg_chunks_vespa_info
 from onyx.kg.models import KGGroundingType
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
 from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
@@ -144,6 +158,22 @@ def _get_batch_kg_processed_documents(
             offset += batch_size
 
 
+def _get_best_match(
+    entity_name: str, similar_entities: list[KGEntity]
+) -> KGEntity | None:
+    best_score = -1.0
+    best_entity = None
+    for similar in similar_entities:
+        # skip those with numbers so we don't cluster version1 and version2, etc.
+        if any(char.isdigit() for char in similar.name):
+            continue
+        score = ratio(similar.name, entity_name)
+        if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
+            best_score = score
+            best_entity = similar
+    return best_entity
+
+
 def _cluster_one_grounded_entity(
     entity: KGEntityExtractionStaging,
 ) -> tuple[KGEntity, bool]:
@@ -187,17 +217,7 @@ def _cluster_one_grounded_entity(
                 .all()
             )
 
-    # find best match
-    best_score = -1.0
-    best_entity = None
-    for similar in similar_entities:
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        if any(char.isdigit() for char in similar.name):
-            continue
-        score = ratio(similar.name, entity_name)
-        if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
-            best_score = score
-            best_entity = similar
+    best_entity = _get_best_match(entity_name, similar_entities)
 
     # if there is a match, update the entity, otherwise create a new one
     with get_session_with_current_tenant() as db_session:
@@ -218,6 +238,152 @@ def _cluster_one_grounded_entity(
     return transferred_entity, update_vespa
 
 
+def _get_similar_entities_batch(
+    db_session: Session,
+    entities: list[KGEntityExtractionStaging],
+    entity_names: list[str],
+) -> list[list[KGEntity]]:
+    """
+    Finds the similar entities of every entity of a batch with a single query.
+    """
+    similar_entities: list[list[KGEntity]] = [[] for _ in entities]
+    queries = [
+        (entity_idx, entity.entity_type_id_name, entity_name, entity.document_id)
+        for entity_idx, (entity, entity_name) in enumerate(zip(entities, entity_names))
+        # skip those with numbers so we don't cluster version1 and version2, etc.
+        if not any(char.isdigit() for char in entity_name)
+    ]
+    if not queries:
+        return similar_entities
+
+    queries_values = values(
+        column("entity_idx", Integer),
+        column("entity_type_id_name", String),
+        column("entity_name", String),
+        column("document_id", String),
+        name="queries",
+    ).data(queries)
+
+    # find entities of the same type with a similar name, entities of documents are
+    # only clustered with entities without a document
+    similar = (
+        select(KGEntity)
+        .where(
+            KGEntity.entity_type_id_name == queries_values.c.entity_type_id_name,
+            getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
+                KGEntity.name, queries_values.c.entity_name
+            ),
+            queries_values.c.document_id.is_(None) | KGEntity.document_id.is_(None),
+        )
+        .correlate(queries_values)
+        .lateral("similar")
+    )
+    similar_entity = aliased(KGEntity, similar)
+
+    db_session.execute(
+        text(
+            "SET pg_trgm.similarity_threshold = "
+            + str(KG_CLUSTERING_RETRIEVE_THRESHOLD)
+        )
+    )
+    rows = db_session.execute(
+        select(queries_values.c.entity_idx, similar_entity)
+        .select_from(queries_values)
+        .join(similar, true())
+    ).all()
+    for entity_idx, entity in rows:
+        similar_entities[entity_idx].append(entity)
+    return similar_entities
+
+
+def _get_batch_candidates(
+    entity: KGEntityExtractionStaging,
+    entity_name: str,
+    similar_entities: list[KGEntity],
+    batch_entities: dict[str, KGEntity],
+) -> list[KGEntity]:
+    """
+    The entities the entity can be merged into: the similar entities found in the db,
+    in their current state, and the entities of the same type transferred earlier in
+    the batch, which were not in the db yet when the similar entities were looked up.
+    """
+    # skip those with numbers so we don't cluster version1 and version2, etc.
+    if any(char.isdigit() for char in entity_name):
+        return []
+
+    similar_id_names = {similar.id_name for similar in similar_entities}
+    candidates = [
+        batch_entities.get(similar.id_name, similar) for similar in similar_entities
+    ] + [
+        batch_entity
+        for batch_entity in batch_entities.values()
+        if batch_entity.entity_type_id_name == entity.entity_type_id_name
+        and batch_entity.id_name not in similar_id_names
+    ]
+    if entity.document_id is not None:
+        candidates = [
+            candidate for candidate in candidates if candidate.document_id is None
+        ]
+    return candidates
+
+
+def _cluster_grounded_entities_batch(
+    entities: list[KGEntityExtractionStaging],
+) -> int:
+    """
+    Clusters a batch of grounded entities in a single transaction, returns the number
+    of entities that were merged into existing ones.
+    """
+    with get_session_with_current_tenant() as db_session:
+        document_ids = {
+            entity.document_id for entity in entities if entity.document_id is not None
+        }
+        semantic_ids: dict[str, str] = dict(
+            db_session.query(Document.id, Document.semantic_id)
+            .filter(Document.id.in_(document_ids))
+            .all()
+        )
+        entity_names = [
+            (
+                semantic_ids.get(entity.document_id, entity.name)
+                if entity.document_id is not None
+                else entity.name
+            ).lower()
+            for entity in entities
+        ]
+
+        similar_entities_by_entity = _get_similar_entities_batch(
+            db_session, entities, entity_names
+        )
+
+        # the entities created or merged into earlier in the batch, which the
+        # one-at-a-time clustering would have seen in their current state
+        batch_entities: dict[str, KGEntity] = {}
+        num_merged = 0
+        for entity, entity_name, similar_entities in zip(
+            entities, entity_names, similar_entities_by_entity
+        ):
+            candidates = _get_batch_candidates(
+                entity, entity_name, similar_entities, batch_entities
+            )
+            best_entity = _get_best_match(entity_name, candidates)
+            if best_entity:
+                logger.debug(f"Merged {entity.name} with {best_entity.name}")
+                transferred_entity = merge_entities(
+                    db_session=db_session, parent=best_entity, child=entity
+                )
+                num_merged += 1
+            else:
+                transferred_entity = transfer_entity(
+                    db_session=db_session, entity=entity
+                )
+            batch_entities[transferred_entity.id_name] = transferred_entity
+
+        db_session.commit()
+
+    return num_merged
+
+
 def _create_one_parent_child_relationship(entity: KGEntityExtractionStaging) -> None:
     """
     Creates a relationship between the entity and its parent, if it exists.
@@ -294,11 +460,103 @@ def _transfer_one_relationship(
         db_session.commit()
 
 
+def _transfer_relationships_batch(
+    relationships: list[KGRelationshipExtractionStaging],
+) -> int:
+    """
+    Transfers a batch of relationships in a single transaction, returns the number of
+    transferred relationships.
+    """
+    with get_session_with_current_tenant() as db_session:
+        # get the translations
+        staging_entity_id_names = {
+            node
+            for relationship in relationships
+            for node in (relationship.source_node, relationship.target_node)
+        }
+        entity_translations: dict[str, str] = {
+            entity.id_name: entity.transferred_id_name
+            for entity in db_session.query(KGEntityExtractionStaging)
+            .filter(KGEntityExtractionStaging.id_name.in_(staging_entity_id_names))
+            .all()
+            if entity.transferred_id_name is not None
+        }
+
+        num_transferred = 0
+        for relationship in relationships:
+            missing_translations = {
+                relationship.source_node,
+                relationship.target_node,
+            } - entity_translations.keys()
+            if missing_translations:
+                logger.error(f"Missing entity translations for {missing_translations}")
+                continue
+
+            transfer_relationship(
+                db_session=db_session,
+                relationship=relationship,
+                entity_translations=entity_translations,
+            )
+            num_transferred += 1
+
+        db_session.commit()
+
+    return num_transferred
+
+
+def _update_vespa_batch(
+    documents: list[Document], index_name: str, tenant_id: str
+) -> int:
+    """
+    Updates the kg info of the chunks of a batch of documents with a single Vespa
+    update, returns the number of updated chunks.
+    """
+    # a document is listed once per staging entity
+    document_ids = list(dict.fromkeys(document.id for document in documents))
+    update_requests_by_document = get_kg_vespa_info_update_requests_for_documents(
+        document_ids
+    )
+    try:
+        update_kg_chunks_vespa_info(
+            [
+                update_request
+                for update_requests in update_requests_by_document.values()
+                for update_request in update_requests
+            ],
+            index_name,
+            tenant_id,
+        )
+        return sum(len(requests) for requests in update_requests_by_document.values())
+    except Exception as e:
+        logger.warning(f"Error updating vespa for a batch, retrying per document: {e}")
+
+    # isolate the failing documents
+    num_updated = 0
+    for document_id, update_requests in update_requests_by_document.items():
+        try:
+            update_kg_chunks_vespa_info(update_requests, index_name, tenant_id)
+            num_updated += len(update_requests)
+        except Exception as e:
+            logger.error(f"Error updating vespa for document {document_id}: {e}")
+    return num_updated
+
+
+def _log_batch_throughput(
+    step: str, i_batch: int, num_items: int, item_name: str, start_time: float
+) -> None:
+    time_delta = time.monotonic() - start_time
+    logger.info(
+        f"KG clustering {step} batch {i_batch}: {num_items} {item_name} in "
+        f"{time_delta:.2f}s ({num_items / max(time_delta, 1e-6):.1f} {item_name}/s)"
+    )
+
+
 def kg_clustering(
     tenant_id: str,
     index_name: str,
     lock: RedisLock,
     processing_chunk_batch_size: int = 16,
+    batched: bool = KG_CLUSTERING_BATCHED,
 ) -> None:
     """
     Here we will cluster the extractions based on their cluster frameworks.
@@ -311,9 +569,15 @@ def kg_clustering(
 
     This will change with deep extraction, where grounded-sourceless entities
     can be extracted and then need to be clustered.
+
+    In batched mode, batches of KG_CLUSTERING_BATCH_SIZE entities and relationships
+    are clustered and transferred in one transaction each, and the kg info of the
+    documents of a batch is updated in Vespa at once.
     """
     logger.info(f"Starting kg clustering for tenant {tenant_id}")
 
+    batch_size = KG_CLUSTERING_BATCH_SIZE if batched else processing_chunk_batch_size
+
     kg_config_settings = get_kg_config_settings()
     validate_kg_settings(kg_config_settings)
 
@@ -323,12 +587,31 @@ def kg_clustering(
     start_time = time.monotonic()
     i_batch = 0
     for i_batch, untransferred_grounded_entities in enumerate(
-        _get_batch_untransferred_grounded_entities(
-            batch_size=processing_chunk_batch_size
-        )
+        _get_batch_untransferred_grounded_entities(batch_size=batch_size)
     ):
-        for entity in untransferred_grounded_entities:
-            _cluster_one_grounded_entity(entity)
+        if batched:
+            batch_start_time = time.monotonic()
+            try:
+                num_merged = _cluster_grounded_entities_batch(
+                    untransferred_grounded_entities
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Error clustering entity batch {i_batch}, retrying per entity: {e}"
+                )
+                num_merged = 0
+                for entity in untransferred_grounded_entities:
+                    _cluster_one_grounded_entity(entity)
+            _log_batch_throughput(
+                f"entity ({num_merged} merged)",
+                i_batch,
+                len(untransferred_grounded_entities),
+                "entities",
+                batch_start_time,
+            )
+        else:
+            for entity in untransferred_grounded_entities:
+                _cluster_one_grounded_entity(entity)
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
@@ -380,14 +663,25 @@ def kg_clustering(
     start_time = time.monotonic()
     i_batch = 0
     for i_batch, relationships in enumerate(
-        _get_batch_untransferred_relationships(batch_size=processing_chunk_batch_size)
+        _get_batch_untransferred_relationships(batch_size=batch_size)
     ):
-        run_functions_tuples_in_parallel(
-            [
-                (_transfer_one_relationship, (relationship,))
-                for relationship in relationships
-            ]
-        )
+        if batched:
+            batch_start_time = time.monotonic()
+            num_transferred = _transfer_relationships_batch(relationships)
+            _log_batch_throughput(
+                "relationship",
+                i_batch,
+                num_transferred,
+                "relationships",
+                batch_start_time,
+            )
+        else:
+            run_functions_tuples_in_parallel(
+                [
+                    (_transfer_one_relationship, (relationship,))
+                    for relationship in relationships
+                ]
+            )
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
@@ -401,8 +695,19 @@ def kg_clustering(
     start_time = time.monotonic()
     i_batch = 0
     for i_batch, documents in enumerate(
-        _get_batch_kg_processed_documents(batch_size=processing_chunk_batch_size)
+        _get_batch_kg_processed_documents(batch_size=batch_size)
     ):
+        if batched:
+            batch_start_time = time.monotonic()
+            num_chunks = _update_vespa_batch(documents, index_name, tenant_id)
+            _log_batch_throughput(
+                "vespa", i_batch, num_chunks, "chunks", batch_start_time
+            )
+            last_lock_time = extend_lock(
+                lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
+            )
+            continue
+
         batch_update_requests = run_functions_tuples_in_parallel(
             [
                 (get_kg_vespa_info_update_requests_for_document, (document.id,))
@@ -449,3 +754,6 @@ def kg_clustering(
     except Exception as e:
         logger.error(f"Error deleting entities: {e}")
     logger.info("Finished deleting all transferred staging entries")
+
+    # new relationship types were transferred
+    invalidate_kg_schema_cache()
@@ -1,17 +1,20 @@
 import re
 from collections import defaultdict
-from typing import cast
 
 import numpy as np
 from nltk import ngrams  # type: ignore
 from rapidfuzz.distance.DamerauLevenshtein import normalized_similarity
+from rapidfuzz.process import cdist
+from sqlalchemy import column
 from sqlalchemy import desc
 from sqlalchemy import Float
 from sqlalchemy import func
-from sqlalchemy import MetaData
+from sqlalchemy import Integer
 from sqlalchemy import select
 from sqlalchemy import String
-from sqlalchemy import Table
+from sqlalchemy import table
+from sqlalchemy import true
+from sqlalchemy import values
 from sqlalchemy.dialects.postgresql import ARRAY
 
 from onyx.configs.kg_configs import KG_NORMALIZATION_RERANK_LEVENSHTEIN_WEIGHT
@@ -32,7 +35,6 @@ from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.kg.utils.formatting_utils import split_entity_id
 from onyx.kg.utils.formatting_utils import split_relationship_id
 from onyx.utils.logger import setup_logger
-from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 
 logger = setup_logger()
@@ -54,141 +56,204 @@ def _clean_name(entity_name: str) -> str:
     )
 
 
-def _normalize_one_entity(
-    entity: str,
-    attributes: dict[str, str],
-    allowed_docs_temp_view_name: str | None = None,
-) -> str | None:
+def _get_entity_candidates(
+    queries: list[tuple[str, str | None, str]],
+    allowed_docs_temp_view_name: str,
+) -> list[list[tuple[str, str]]]:
     """
-    Matches a single entity to the best matching entity of the same type.
+    Retrieves the candidates (id_name, name) for many entities at once. Each query is an
+    (entity type, subtype or None, cleaned entity name), the candidates of a query are
+    the entities of the same type that share trigrams with the name, best first.
     """
-    entity_type, entity_name = split_entity_id(entity)
-    if entity_name == "*":
-        return entity
+    # the view is only used for its allowed_doc_id column, so it is not reflected
+    allowed_docs_temp_view = table(
+        allowed_docs_temp_view_name.split(".")[-1],
+        column("allowed_doc_id", String),
+    )
 
-    cleaned_entity = _clean_name(entity_name)
+    queries_values = values(
+        column("query_idx", Integer),
+        column("entity_type", String),
+        column("subtype", String),
+        column("cleaned_name", String),
+        name="queries",
+    ).data(
+        [
+            (query_idx, entity_type, subtype, cleaned_name)
+            for query_idx, (entity_type, subtype, cleaned_name) in enumerate(queries)
+        ]
+    )
 
-    # narrow filter to subtype if requested
-    type_filters = [KGEntity.entity_type_id_name == entity_type]
-    if "subtype" in attributes:
-        type_filters.append(
-            KGEntity.attributes.op("@>")({"subtype": attributes["subtype"]})
+    # generate trigrams of each queried entity Q
+    query_trigrams = select(
+        queries_values.c.query_idx,
+        queries_values.c.entity_type,
+        queries_values.c.subtype,
+        getattr(func, POSTGRES_DEFAULT_SCHEMA)
+        .show_trgm(queries_values.c.cleaned_name)
+        .cast(ARRAY(String(3)))
+        .label("trigrams"),
+    ).cte("query_trigrams")
+
+    # for each entity E, compute score = | Q ∩ E | / min(|Q|, |E|)
+    score = (
+        func.cardinality(
+            func.array(
+                select(func.unnest(KGEntity.name_trigrams))
+                .correlate(KGEntity)
+                .intersect(
+                    select(func.unnest(query_trigrams.c.trigrams)).correlate(
+                        query_trigrams
+                    )
+                )
+                .scalar_subquery()
+            )
+        ).cast(Float)
+        / func.least(
+            func.cardinality(query_trigrams.c.trigrams),
+            func.cardinality(KGEntity.name_trigrams),
+        )
+    ).label("score")
+
+    # the best candidates of each query, found with the trigram index
+    candidates = (
+        select(KGEntity.id_name, KGEntity.name, score)
+        .outerjoin(
+            allowed_docs_temp_view,
+            KGEntity.document_id == allowed_docs_temp_view.c.allowed_doc_id,
         )
+        .where(
+            KGEntity.entity_type_id_name == query_trigrams.c.entity_type,
+            # narrow filter to subtype if requested
+            query_trigrams.c.subtype.is_(None)
+            | KGEntity.attributes.op("@>")(
+                func.jsonb_build_object("subtype", query_trigrams.c.subtype)
+            ),
+            KGEntity.name_trigrams.overlap(query_trigrams.c.trigrams),
+            # either document_id is NULL or it's in allowed_docs
+            KGEntity.document_id.is_(None)
+            | allowed_docs_temp_view.c.allowed_doc_id.isnot(None),
+        )
+        .correlate(query_trigrams)
+        .order_by(desc("score"))
+        .limit(KG_NORMALIZATION_RETRIEVE_ENTITIES_LIMIT)
+        .lateral("candidates")
+    )
 
-    # step 1: find entities containing the entity_name or something similar
     with get_session_with_current_tenant() as db_session:
+        rows = db_session.execute(
+            select(query_trigrams.c.query_idx, candidates.c.id_name, candidates.c.name)
+            .select_from(query_trigrams)
+            .join(candidates, true())
+            .order_by(query_trigrams.c.query_idx, desc(candidates.c.score))
+        ).all()
 
-        # get allowed documents
-        metadata = MetaData()
-        if allowed_docs_temp_view_name is None:
-            raise ValueError("allowed_docs_temp_view_name is not available")
+    candidates_by_query: list[list[tuple[str, str]]] = [[] for _ in queries]
+    for query_idx, candidate_id_name, candidate_name in rows:
+        candidates_by_query[query_idx].append((candidate_id_name, candidate_name))
+    return candidates_by_query
 
-        effective_schema_allowed_docs_temp_view_name = (
-            allowed_docs_temp_view_name.split(".")[-1]
-        )
 
-        allowed_docs_temp_view = Table(
-            effective_schema_allowed_docs_temp_view_name,
-            metadata,
-            autoload_with=db_session.get_bind(),
-        )
+def _get_ngrams(name: str) -> tuple[set[tuple[str, ...]], ...]:
+    return set(ngrams(name, 1)), set(ngrams(name, 2)), set(ngrams(name, 3))
 
-        # generate trigrams of the queried entity Q
-        query_trigrams = db_session.query(
-            getattr(func, POSTGRES_DEFAULT_SCHEMA)
-            .show_trgm(cleaned_entity)
-            .cast(ARRAY(String(3)))
-            .label("trigrams")
-        ).cte("query")
-
-        candidates = cast(
-            list[tuple[str, str, float]],
-            db_session.query(
-                KGEntity.id_name,
-                KGEntity.name,
-                (
-                    # for each entity E, compute score = | Q ∩ E | / min(|Q|, |E|)
-                    func.cardinality(
-                        func.array(
-                            select(func.unnest(KGEntity.name_trigrams))
-                            .correlate(KGEntity)
-                            .intersect(
-                                select(
-                                    func.unnest(query_trigrams.c.trigrams)
-                                ).correlate(query_trigrams)
-                            )
-                            .scalar_subquery()
-                        )
-                    ).cast(Float)
-                    / func.least(
-                        func.cardinality(query_trigrams.c.trigrams),
-                        func.cardinality(KGEntity.name_trigrams),
-                    )
-                ).label("score"),
-            )
-            .select_from(KGEntity, query_trigrams)
-            .outerjoin(
-                allowed_docs_temp_view,
-                KGEntity.document_id == allowed_docs_temp_view.c.allowed_doc_id,
-            )
-            .filter(
-                *type_filters,
-                KGEntity.name_trigrams.overlap(query_trigrams.c.trigrams),
-                # Add filter for allowed docs - either document_id is NULL or it's in allowed_docs
-                (
-                    KGEntity.document_id.is_(None)
-                    | allowed_docs_temp_view.c.allowed_doc_id.isnot(None)
-                ),
-            )
-            .order_by(desc("score"))
-            .limit(KG_NORMALIZATION_RETRIEVE_ENTITIES_LIMIT)
-            .all(),
-        )
-    if not candidates:
-        return None
 
-    # step 2: do a weighted ngram analysis and damerau levenshtein distance to rerank
-    n1, n2, n3 = (
-        set(ngrams(cleaned_entity, 1)),
-        set(ngrams(cleaned_entity, 2)),
-        set(ngrams(cleaned_entity, 3)),
+def _rerank_candidates(
+    cleaned_entity: str,
+    candidates: list[tuple[str, str]],
+    ngrams_cache: dict[str, tuple[set[tuple[str, ...]], ...]],
+) -> str | None:
+    """
+    Reranks the candidates of an entity with a weighted ngram analysis and the damerau
+    levenshtein distance, returns the id_name of the best candidate above the threshold.
+    The ngrams of the candidates are cached, candidates are often shared by entities.
+    """
+    cleaned_candidates = [
+        _clean_name(candidate_name) for _, candidate_name in candidates
+    ]
+    for cleaned_candidate in cleaned_candidates:
+        if cleaned_candidate not in ngrams_cache:
+            ngrams_cache[cleaned_candidate] = _get_ngrams(cleaned_candidate)
+
+    # compute | Q ∩ E | / min(|Q|, |E|) for unigrams, bigrams and trigrams
+    query_ngrams = _get_ngrams(cleaned_entity)
+    ngram_overlaps = np.array(
+        [
+            [
+                len(query_grams & candidate_grams)
+                / max(1, min(len(query_grams), len(candidate_grams)))
+                for query_grams, candidate_grams in zip(
+                    query_ngrams, ngrams_cache[cleaned_candidate]
+                )
+            ]
+            for cleaned_candidate in cleaned_candidates
+        ]
     )
-    for i, (candidate_id_name, candidate_name, _) in enumerate(candidates):
-        cleaned_candidate = _clean_name(candidate_name)
-        h_n1, h_n2, h_n3 = (
-            set(ngrams(cleaned_candidate, 1)),
-            set(ngrams(cleaned_candidate, 2)),
-            set(ngrams(cleaned_candidate, 3)),
-        )
 
-        # compute ngram overlap, renormalize scores if the names are too short for larger ngrams
-        grams_used = min(2, len(cleaned_entity) - 1, len(cleaned_candidate) - 1)
-        W_n1, W_n2, W_n3 = KG_NORMALIZATION_RERANK_NGRAM_WEIGHTS
-        ngram_score = (
-            # compute | Q ∩ E | / min(|Q|, |E|) for unigrams and bigrams (trigrams already computed)
-            W_n1 * len(n1 & h_n1) / max(1, min(len(n1), len(h_n1)))
-            + W_n2 * len(n2 & h_n2) / max(1, min(len(n2), len(h_n2)))
-            + W_n3 * len(n3 & h_n3) / max(1, min(len(n3), len(h_n3)))
-        ) / (W_n1, W_n1 + W_n2, 1.0)[grams_used]
-
-        # compute damerau levenshtein distance to fuzzy match against typos
-        W_leven = KG_NORMALIZATION_RERANK_LEVENSHTEIN_WEIGHT
-        leven_score = normalized_similarity(cleaned_entity, cleaned_candidate)
-
-        # combine scores
-        score = (1.0 - W_leven) * ngram_score + W_leven * leven_score
-        candidates[i] = (candidate_id_name, candidate_name, score)
-    candidates = list(
-        sorted(
-            filter(lambda x: x[2] > KG_NORMALIZATION_RERANK_THRESHOLD, candidates),
-            key=lambda x: x[2],
-            reverse=True,
-        )
+    # renormalize scores if the names are too short for larger ngrams
+    W_n1, W_n2, W_n3 = KG_NORMALIZATION_RERANK_NGRAM_WEIGHTS
+    candidate_lengths = np.array([len(candidate) for candidate in cleaned_candidates])
+    grams_used = np.minimum(2, np.minimum(len(cleaned_entity), candidate_lengths) - 1)
+    ngram_scores = (
+        ngram_overlaps
+        @ np.array([W_n1, W_n2, W_n3])
+        / np.array([W_n1, W_n1 + W_n2, 1.0])[grams_used]
     )
-    if not candidates:
+
+    # compute damerau levenshtein distance to fuzzy match against typos
+    W_leven = KG_NORMALIZATION_RERANK_LEVENSHTEIN_WEIGHT
+    leven_scores = cdist(
+        [cleaned_entity], cleaned_candidates, scorer=normalized_similarity
+    )[0]
+
+    # combine scores
+    scores = (1.0 - W_leven) * ngram_scores + W_leven * leven_scores
+    best_idx = int(np.argmax(scores))
+    if scores[best_idx] <= KG_NORMALIZATION_RERANK_THRESHOLD:
         return None
+    return candidates[best_idx][0]
+
+
+def _normalize_entities_batch(
+    entities: list[str],
+    entity_attributes: list[dict[str, str]],
+    allowed_docs_temp_view_name: str | None = None,
+) -> list[str | None]:
+    """
+    Matches each entity to the best matching entity of the same type. The candidates of
+    all entities are retrieved with a single query.
+    """
+    if allowed_docs_temp_view_name is None:
+        raise ValueError("allowed_docs_temp_view_name is not available")
+
+    mapping: list[str | None] = [None] * len(entities)
+    queries: list[tuple[str, str | None, str]] = []
+    query_entity_indices: list[int] = []
+    for entity_idx, (entity, attributes) in enumerate(zip(entities, entity_attributes)):
+        entity_type, entity_name = split_entity_id(entity)
+        if entity_name == "*":
+            mapping[entity_idx] = entity
+            continue
+        queries.append(
+            (entity_type, attributes.get("subtype"), _clean_name(entity_name))
+        )
+        query_entity_indices.append(entity_idx)
 
-    return candidates[0][0]
+    if not queries:
+        return mapping
+
+    candidates_by_query = _get_entity_candidates(queries, allowed_docs_temp_view_name)
+
+    ngrams_cache: dict[str, tuple[set[tuple[str, ...]], ...]] = {}
+    for entity_idx, (_, _, cleaned_entity), candidates in zip(
+        query_entity_indices, queries, candidates_by_query
+    ):
+        if candidates:
+            mapping[entity_idx] = _rerank_candidates(
+                cleaned_entity, candidates, ngrams_cache
+            )
+
+    return mapping
 
 
 def _get_existing_normalized_relationships(
@@ -248,11 +313,8 @@ def normalize_entities(
         get_attributes(attr_entity) for attr_entity in raw_entities_w_attributes
     ]
 
-    mapping: list[str | None] = run_functions_tuples_in_parallel(
-        [
-            (_normalize_one_entity, (entity, attributes, allowed_docs_temp_view_name))
-            for entity, attributes in zip(raw_entities, entity_attributes)
-        ]
+    mapping = _normalize_entities_batch(
+        raw_entities, entity_attributes, allowed_docs_temp_view_name
     )
     for entity, attributes, normalized_entity in zip(
         raw_entities, entity_attributes, mapping
@@ -0,0 +1,536 @@
+import contextvars
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+
+from redis.lock import Lock as RedisLock
+from sqlalchemy import select
+
+from onyx.background.celery.tasks.kg_processing.utils import extend_lock
+from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_EXTRACTION_MAX_IN_FLIGHT_DOCUMENTS
+from onyx.configs.kg_configs import KG_EXTRACTION_NUM_WORKERS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKING_MAX_DOCUMENT_CHARS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKING_MAX_DOCUMENTS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKING_MAX_PROMPT_CHARS
+from onyx.configs.kg_configs import KG_EXTRACTION_WRITE_BATCH_SIZE
+from onyx.db.document import update_documents_kg_info
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.entities import upsert_staging_entities
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.db.models import KGStage
+from onyx.db.relationships import upsert_staging_relationship_types
+from onyx.db.relationships import upsert_staging_relationships
+from onyx.kg.models import KGAttributeProperty
+from onyx.kg.models import KGChunkFormat
+from onyx.kg.models import KGConfigSettings
+from onyx.kg.models import KGDocumentExtraction
+from onyx.kg.models import KGStagingEntity
+from onyx.kg.utils.extraction_utils import EntityTypeMetadataTracker
+from onyx.kg.utils.extraction_utils import get_entity_types_str
+from onyx.kg.utils.extraction_utils import get_relationship_types_str
+from onyx.kg.utils.extraction_utils import is_packable_for_extraction
+from onyx.kg.utils.extraction_utils import kg_deep_extract_packed_documents
+from onyx.kg.utils.extraction_utils import kg_deep_extraction
+from onyx.kg.utils.formatting_utils import format_relationship_id
+from onyx.kg.utils.formatting_utils import get_entity_type
+from onyx.kg.utils.formatting_utils import make_entity_id
+from onyx.kg.utils.formatting_utils import split_entity_id
+from onyx.kg.utils.formatting_utils import split_relationship_id
+from onyx.kg.vespa.vespa_interactions import get_document_vespa_contents
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_in_background
+from onyx.utils.threadpool_concurrency import wait_on_background
+
+logger = setup_logger()
+
+_WAIT_INTERVAL_SECONDS = 1.0
+
+
+class KGExtractionPipeline:
+    """
+    Extracts documents in three stages. The caller submits the documents with their
+    implied extraction, a pool of workers deep extracts them with the LLM (packing
+    short documents into shared prompts), and a writer upserts the results in bulk
+    and marks the documents as extracted.
+
+    Only the thread that created the pipeline extends the lock, so submit and close
+    must be called from it.
+    """
+
+    def __init__(
+        self,
+        tenant_id: str,
+        index_name: str,
+        lock: RedisLock,
+        kg_config_settings: KGConfigSettings,
+        active_entity_types: set[str],
+        entity_metadata_conversion_instructions: dict[
+            str, dict[str, KGAttributeProperty]
+        ],
+        metadata_tracker: EntityTypeMetadataTracker,
+        num_workers: int = KG_EXTRACTION_NUM_WORKERS,
+        max_in_flight_documents: int = KG_EXTRACTION_MAX_IN_FLIGHT_DOCUMENTS,
+        write_batch_size: int = KG_EXTRACTION_WRITE_BATCH_SIZE,
+    ) -> None:
+        self.tenant_id = tenant_id
+        self.index_name = index_name
+        self.lock = lock
+        self.kg_config_settings = kg_config_settings
+        self.active_entity_types = active_entity_types
+        self.entity_metadata_conversion_instructions = (
+            entity_metadata_conversion_instructions
+        )
+        self.metadata_tracker = metadata_tracker
+        self.write_batch_size = write_batch_size
+
+        self.entity_types_str = get_entity_types_str(active=True)
+        self.relationship_types_str = get_relationship_types_str(active=True)
+
+        self.last_lock_time = time.monotonic()
+        self.start_time = time.monotonic()
+        self.num_written = 0
+        self.num_failed = 0
+        self.num_prompts = 0
+        self.num_packed_documents = 0
+
+        self._in_flight = threading.BoundedSemaphore(max_in_flight_documents)
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._futures: list[Future] = []
+        self._pack: list[tuple[KGDocumentExtraction, list[KGChunkFormat]]] = []
+        self._pack_chars = 0
+        self._lock = threading.Lock()
+        self._write_queue: queue.Queue[KGDocumentExtraction | None] = queue.Queue()
+        self._writer = run_in_background(self._write_loop)
+
+    def submit(self, extraction: KGDocumentExtraction) -> None:
+        """Queues a document, waits while too many documents are in flight"""
+        self._wait_until(
+            lambda: self._in_flight.acquire(timeout=_WAIT_INTERVAL_SECONDS)
+        )
+        if extraction.metadata.deep_extraction:
+            self._submit(self._deep_extract, extraction)
+        else:
+            self._write_queue.put(extraction)
+
+    def close(self) -> None:
+        """Waits for all submitted documents to be extracted and written"""
+        self._wait_until(self._are_futures_done)
+        # the documents of the last pack are only extracted when it is flushed
+        with self._lock:
+            last_pack = self._take_pack()
+        if last_pack:
+            self._submit(self._extract_pack, last_pack)
+        self._wait_until(self._are_futures_done)
+        self._executor.shutdown()
+
+        self._write_queue.put(None)
+        while self._writer.is_alive():
+            self._extend_lock()
+            self._writer.join(_WAIT_INTERVAL_SECONDS)
+        wait_on_background(self._writer)
+
+        time_delta = time.monotonic() - self.start_time
+        logger.info(
+            f"KG extraction wrote {self.num_written} documents "
+            f"({self.num_failed} failed) in {time_delta:.2f}s "
+            f"({self.num_written / max(time_delta, 1e-6):.2f} documents/s) with "
+            f"{self.num_prompts} extraction prompts, {self.num_packed_documents} "
+            "documents were packed into shared prompts"
+        )
+
+    def _extend_lock(self) -> None:
+        self.last_lock_time = extend_lock(
+            self.lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, self.last_lock_time
+        )
+
+    def _wait_until(self, condition: Callable[[], bool]) -> None:
+        """Extends the lock until the condition, which should block for a while, holds"""
+        while True:
+            # the writer only stops when the pipeline is closed
+            if not self._writer.is_alive():
+                wait_on_background(self._writer)
+                raise RuntimeError("KG extraction writer stopped unexpectedly")
+            self._extend_lock()
+            if condition():
+                return
+
+    def _are_futures_done(self) -> bool:
+        with self._lock:
+            futures = list(self._futures)
+        return not wait(futures, timeout=_WAIT_INTERVAL_SECONDS).not_done
+
+    def _submit(self, func: Callable[..., None], *args: Any) -> None:
+        # the tenant id is read from the context in the workers
+        future = self._executor.submit(contextvars.copy_context().run, func, *args)
+        with self._lock:
+            self._futures.append(future)
+
+    def _count_prompts(self, num_prompts: int, num_packed_documents: int = 0) -> None:
+        with self._lock:
+            self.num_prompts += num_prompts
+            self.num_packed_documents += num_packed_documents
+
+    def _deep_extract(self, extraction: KGDocumentExtraction) -> None:
+        try:
+            chunk_batches = list(
+                get_document_vespa_contents(
+                    extraction.document_id, self.index_name, self.tenant_id
+                )
+            )
+            if is_packable_for_extraction(
+                extraction.metadata,
+                chunk_batches,
+                KG_EXTRACTION_PACKING_MAX_DOCUMENT_CHARS,
+            ):
+                self._add_to_pack(extraction, chunk_batches[0])
+                return
+
+            extraction.deep_extraction = kg_deep_extraction(
+                extraction.document_id,
+                extraction.metadata,
+                extraction.implied_extraction,
+                self.tenant_id,
+                self.index_name,
+                self.kg_config_settings,
+                chunk_batches=chunk_batches,
+                entity_types_str=self.entity_types_str,
+                relationship_types_str=self.relationship_types_str,
+            )
+            self._count_prompts(len(chunk_batches))
+        except Exception:
+            logger.exception(f"Error extracting document {extraction.document_id}")
+            extraction.failed = True
+        self._write_queue.put(extraction)
+
+    def _add_to_pack(
+        self, extraction: KGDocumentExtraction, chunks: list[KGChunkFormat]
+    ) -> None:
+        num_chars = sum(len(chunk.content) for chunk in chunks)
+        full_packs: list[list[tuple[KGDocumentExtraction, list[KGChunkFormat]]]] = []
+        with self._lock:
+            if (
+                self._pack
+                and self._pack_chars + num_chars
+                > KG_EXTRACTION_PACKING_MAX_PROMPT_CHARS
+            ):
+                full_packs.append(self._take_pack())
+            self._pack.append((extraction, chunks))
+            self._pack_chars += num_chars
+            if len(self._pack) >= KG_EXTRACTION_PACKING_MAX_DOCUMENTS:
+                full_packs.append(self._take_pack())
+
+        for pack in full_packs:
+            self._submit(self._extract_pack, pack)
+
+    def _take_pack(self) -> list[tuple[KGDocumentExtraction, list[KGChunkFormat]]]:
+        pack = self._pack
+        self._pack = []
+        self._pack_chars = 0
+        return pack
+
+    def _extract_pack(
+        self, pack: list[tuple[KGDocumentExtraction, list[KGChunkFormat]]]
+    ) -> None:
+        try:
+            if len(pack) > 1:
+                pack_results = kg_deep_extract_packed_documents(
+                    [
+                        (extraction.implied_extraction.document_entity, chunks)
+                        for extraction, chunks in pack
+                    ],
+                    self.kg_config_settings,
+                    self.entity_types_str,
+                    self.relationship_types_str,
+                )
+                self._count_prompts(1, num_packed_documents=len(pack))
+            else:
+                pack_results = [None]
+
+            for (extraction, chunks), pack_result in zip(pack, pack_results):
+                if pack_result is None:
+                    # extract the documents missing from the shared response on their own
+                    pack_result = kg_deep_extraction(
+                        extraction.document_id,
+                        extraction.metadata,
+                        extraction.implied_extraction,
+                        self.tenant_id,
+                        self.index_name,
+                        self.kg_config_settings,
+                        chunk_batches=[chunks],
+                        entity_types_str=self.entity_types_str,
+                        relationship_types_str=self.relationship_types_str,
+                    )
+                    self._count_prompts(1)
+                extraction.deep_extraction = pack_result
+        except Exception:
+            logger.exception(
+                "Error extracting packed documents "
+                f"{[extraction.document_id for extraction, _ in pack]}"
+            )
+            for extraction, _ in pack:
+                extraction.failed = extraction.deep_extraction is None
+
+        for extraction, _ in pack:
+            self._write_queue.put(extraction)
+
+    def _write_loop(self) -> None:
+        batch: list[KGDocumentExtraction] = []
+        while True:
+            try:
+                extraction = self._write_queue.get(timeout=_WAIT_INTERVAL_SECONDS)
+            except queue.Empty:
+                # don't hold back finished documents while the workers are busy
+                if batch:
+                    self._flush(batch)
+                    batch = []
+                continue
+
+            if extraction is None:
+                if batch:
+                    self._flush(batch)
+                return
+
+            batch.append(extraction)
+            if len(batch) >= self.write_batch_size:
+                self._flush(batch)
+                batch = []
+
+    def _flush(self, extractions: list[KGDocumentExtraction]) -> None:
+        try:
+            self._write(extractions)
+        except Exception:
+            logger.exception(
+                f"Error writing {len(extractions)} documents, retrying per document"
+            )
+            for extraction in extractions:
+                try:
+                    self._write([extraction])
+                except Exception:
+                    logger.exception(f"Error writing document {extraction.document_id}")
+                    self._mark_failed(extraction.document_id)
+        finally:
+            for _ in extractions:
+                self._in_flight.release()
+
+    def _mark_failed(self, document_id: str) -> None:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                update_documents_kg_info(db_session, [document_id], KGStage.FAILED)
+                db_session.commit()
+            self.num_failed += 1
+        except Exception:
+            logger.exception(f"Error marking document {document_id} as failed")
+
+    def _write(self, extractions: list[KGDocumentExtraction]) -> None:
+        """
+        Upserts the entities and relationships of the documents and marks the
+        documents as extracted in a single transaction.
+        """
+        entities: dict[str, KGStagingEntity] = {}
+        relationship_occurrences: dict[tuple[str, str | None], int] = defaultdict(int)
+        relationship_type_occurrences: dict[tuple[str, str, str], int] = defaultdict(
+            int
+        )
+
+        for extraction in extractions:
+            if extraction.failed:
+                continue
+            self._collect_extraction(
+                extraction,
+                entities,
+                relationship_occurrences,
+                relationship_type_occurrences,
+            )
+
+        with get_session_with_current_tenant() as db_session:
+            upserted_entities = upsert_staging_entities(
+                db_session, list(entities.values())
+            )
+
+            # relationships can only be added between existing staging entities
+            relationship_nodes = {
+                node
+                for relationship_id_name, _ in relationship_occurrences
+                for node in split_relationship_id(relationship_id_name)[::2]
+            }
+            missing_nodes = relationship_nodes - entities.keys()
+            if missing_nodes:
+                missing_nodes -= set(
+                    db_session.scalars(
+                        select(KGEntityExtractionStaging.id_name).where(
+                            KGEntityExtractionStaging.id_name.in_(missing_nodes)
+                        )
+                    ).all()
+                )
+            for relationship_id_name, document_id in list(relationship_occurrences):
+                source_node, _, target_node = split_relationship_id(
+                    relationship_id_name
+                )
+                if source_node in missing_nodes or target_node in missing_nodes:
+                    logger.error(
+                        f"Error adding relationship {relationship_id_name} to the "
+                        "database: missing entities"
+                    )
+                    del relationship_occurrences[(relationship_id_name, document_id)]
+
+            upsert_staging_relationship_types(db_session, relationship_type_occurrences)
+            upsert_staging_relationships(db_session, relationship_occurrences)
+
+            extracted_document_ids = [
+                extraction.document_id
+                for extraction in extractions
+                if not extraction.failed
+            ]
+            failed_document_ids = [
+                extraction.document_id
+                for extraction in extractions
+                if extraction.failed
+            ]
+            if extracted_document_ids:
+                update_documents_kg_info(
+                    db_session, extracted_document_ids, KGStage.EXTRACTED
+                )
+            if failed_document_ids:
+                update_documents_kg_info(
+                    db_session, failed_document_ids, KGStage.FAILED
+                )
+            db_session.commit()
+
+        for upserted_entity in upserted_entities:
+            self.metadata_tracker.track_metadata(
+                upserted_entity.entity_type_id_name, upserted_entity.attributes
+            )
+        self.num_written += len(extracted_document_ids)
+        self.num_failed += len(failed_document_ids)
+
+    def _collect_extraction(
+        self,
+        extraction: KGDocumentExtraction,
+        entities: dict[str, KGStagingEntity],
+        relationship_occurrences: dict[tuple[str, str | None], int],
+        relationship_type_occurrences: dict[tuple[str, str, str], int],
+    ) -> None:
+        implied_extraction = extraction.implied_extraction
+        deep_extraction = extraction.deep_extraction
+
+        entity_classification: dict[str, str] = {}
+        if deep_extraction and deep_extraction.classification_result:
+            classification_result = deep_extraction.classification_result
+            entity_classification[classification_result.document_entity] = (
+                classification_result.classification_class
+            )
+
+        document_entities: list[tuple[str | None, str]] = [
+            (None, entity) for entity in implied_extraction.implied_entities
+        ]
+        document_entities.append(
+            (extraction.document_id, implied_extraction.document_entity)
+        )
+        relationships = set(implied_extraction.implied_relationships)
+        if deep_extraction:
+            document_entities += [
+                (None, entity) for entity in deep_extraction.deep_extracted_entities
+            ]
+            relationships.update(deep_extraction.deep_extracted_relationships)
+
+        for potential_document_id, entity in document_entities:
+            self._collect_entity(
+                extraction,
+                potential_document_id,
+                entity,
+                entity_classification,
+                entities,
+            )
+
+        for relationship in relationships:
+            relationship_split = split_relationship_id(relationship)
+            if len(relationship_split) != 3 or any(
+                len(split_entity_id(node)) != 2 for node in relationship_split[::2]
+            ):
+                logger.error(
+                    f"Invalid relationship {relationship} in document "
+                    f"{extraction.document_id}"
+                )
+                continue
+
+            source_entity, relationship_type, target_entity = relationship_split
+            source_entity_type = get_entity_type(source_entity)
+            target_entity_type = get_entity_type(target_entity)
+            if (
+                source_entity_type not in self.active_entity_types
+                or target_entity_type not in self.active_entity_types
+            ):
+                continue
+
+            relationship_type_occurrences[
+                (source_entity_type, relationship_type, target_entity_type)
+            ] += 1
+            relationship_occurrences[
+                (format_relationship_id(relationship), extraction.document_id)
+            ] += 1
+
+    def _collect_entity(
+        self,
+        extraction: KGDocumentExtraction,
+        potential_document_id: str | None,
+        entity: str,
+        entity_classification: dict[str, str],
+        entities: dict[str, KGStagingEntity],
+    ) -> None:
+        parts = split_entity_id(entity)
+        if len(parts) != 2:
+            logger.error(
+                f"Invalid entity {entity} in document {extraction.document_id}"
+            )
+            return
+
+        entity_type, entity_name = parts
+        entity_type = entity_type.upper()
+        entity_name = entity_name.capitalize()
+        if entity_type not in self.active_entity_types:
+            return
+
+        entity_attributes: dict[str, Any] = {}
+        if potential_document_id:
+            entity_attributes = extraction.metadata.document_metadata or {}
+
+        # only keep selected attributes (and translate the attribute names)
+        metadata_attributes = self.entity_metadata_conversion_instructions.get(
+            entity_type, {}
+        )
+        keep_attributes = {
+            metadata_attributes[attr_name].name: attr_val
+            for attr_name, attr_val in entity_attributes.items()
+            if attr_name in metadata_attributes and metadata_attributes[attr_name].keep
+        }
+
+        # add the classification result to the attributes
+        if entity in entity_classification:
+            keep_attributes["classification"] = entity_classification[entity]
+
+        staging_entity = KGStagingEntity(
+            name=entity_name,
+            entity_type=entity_type,
+            document_id=potential_document_id,
+            attributes=keep_attributes,
+            event_time=extraction.event_time if potential_document_id else None,
+        )
+
+        # the same entity can be found in several documents of the batch, the one
+        # grounded in a document takes precedence
+        id_name = make_entity_id(entity_type, entity_name)
+        existing_entity = entities.get(id_name)
+        if existing_entity is None:
+            entities[id_name] = staging_entity
+        elif existing_entity.document_id is None and potential_document_id:
+            staging_entity.occurrences += existing_entity.occurrences
+            entities[id_name] = staging_entity
+        else:
+            existing_entity.occurrences += 1
@@ -5,12 +5,15 @@ from redis.lock import Lock as RedisLock
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_EXTRACTION_PIPELINED
 from onyx.db.connector import get_kg_enabled_connectors
 from onyx.db.document import get_document_updated_at
 from onyx.db.document import get_skipped_kg_documents
 from onyx.db.document import get_unprocessed_kg_document_batch_for_connector
 from onyx.db.document import update_document_kg_info
 from onyx.db.document import update_document_kg_stage
+from onyx.db.document import update_document_kg_stages
+from onyx.db.document import update_documents_kg_info
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.entities import delete_from_kg_entities__no_commit
 from onyx.db.entities import upsert_staging_entity
@@ -22,12 +25,19 @@ from onyx.db.models import KGStage
 from onyx.db.relationships import delete_from_kg_relationships__no_commit
 from onyx.db.relationships import upsert_staging_relationship
 from onyx.db.relationships import upsert_staging_relationship_type
+from onyx.kg.extractions.extraction_pipeline import KGExtractionPipeline
+from onyx.kg.models import KGAttributeProperty
 from onyx.kg.models import KGClassificationInstructions
+from onyx.kg.models import KGConfigSettings
+from onyx.kg.models import KGConnectorData
 from onyx.kg.models import KGDocumentDeepExtractionResults
+from onyx.kg.models import KGDocumentExtraction
 from onyx.kg.models import KGEnhancedDocumentMetadata
 from onyx.kg.models import KGEntityTypeInstructions
 from onyx.kg.models import KGExtractionInstructions
 from onyx.kg.models import KGImpliedExtractionResults
+from onyx.kg.schema_cache import get_active_entity_type_names
+from onyx.kg.schema_cache import get_cached_kg_schema_value
 from onyx.kg.utils.extraction_utils import EntityTypeMetadataTracker
 from onyx.kg.utils.extraction_utils import (
     get_batch_documents_metadata,
@@ -52,7 +62,15 @@ def _get_classification_extraction_instructions() -> (
     """
     Prepare the classification instructions for the given source.
     """
+    return get_cached_kg_schema_value(
+        "classification_extraction_instructions",
+        _build_classification_extraction_instructions,
+    )
+
 
+def _build_classification_extraction_instructions() -> (
+    dict[str | None, dict[str, KGEntityTypeInstructions]]
+):
     classification_instructions_dict: dict[
         str | None, dict[str, KGEntityTypeInstructions]
     ] = {}
@@ -99,6 +117,16 @@ def _get_classification_extraction_instructions() -> (
     return classification_instructions_dict
 
 
+def _build_entity_metadata_conversion_instructions() -> (
+    dict[str, dict[str, KGAttributeProperty]]
+):
+    with get_session_with_current_tenant() as db_session:
+        return {
+            entity_type.id_name: entity_type.parsed_attributes.metadata_attribute_conversion
+            for entity_type in get_entity_types(db_session, active=None)
+        }
+
+
 def _get_batch_documents_enhanced_metadata(
     unprocessed_document_batch: list[Document],
     source_type_classification_extraction_instructions: dict[
@@ -200,11 +228,123 @@ def _get_batch_documents_enhanced_metadata(
     return kg_document_meta_data_dict
 
 
+def _kg_extraction_pipelined(
+    kg_enabled_connectors: list[KGConnectorData],
+    document_classification_extraction_instructions: dict[
+        str | None, dict[str, KGEntityTypeInstructions]
+    ],
+    kg_config_settings: KGConfigSettings,
+    active_entity_types: set[str],
+    pipeline: KGExtractionPipeline,
+    processing_chunk_batch_size: int,
+) -> None:
+    """
+    Prepares the documents of the connectors and submits them to the extraction
+    pipeline, which extracts and writes them concurrently with the preparation
+    of the next batches.
+    """
+    for kg_enabled_connector in kg_enabled_connectors:
+        connector_id = kg_enabled_connector.id
+        connector_source = kg_enabled_connector.source
+
+        document_batch_counter = 0
+
+        # iterate over un-kg-processed documents in connector
+        while True:
+            # get a batch of unprocessed documents. The documents being extracted
+            # have a later kg_processing_time, so they are not returned again
+            with get_session_with_current_tenant() as db_session:
+                unprocessed_document_batch = (
+                    get_unprocessed_kg_document_batch_for_connector(
+                        db_session,
+                        connector_id,
+                        kg_coverage_start=kg_config_settings.KG_COVERAGE_START_DATE,
+                        kg_max_coverage_days=kg_enabled_connector.kg_coverage_days
+                        or kg_config_settings.KG_MAX_COVERAGE_DAYS,
+                        batch_size=processing_chunk_batch_size,
+                    )
+                )
+
+            if len(unprocessed_document_batch) == 0:
+                logger.info(
+                    f"No unprocessed documents found for connector {connector_id}. "
+                    f"Processed {document_batch_counter} batches."
+                )
+                break
+
+            document_batch_counter += 1
+            logger.info(f"Processing document batch {document_batch_counter}")
+
+            # Get the document attributes and entity types
+            batch_metadata = _get_batch_documents_enhanced_metadata(
+                unprocessed_document_batch,
+                document_classification_extraction_instructions.get(
+                    connector_source, {}
+                ),
+                connector_source,
+            )
+            documents_to_process = [
+                document
+                for document in unprocessed_document_batch
+                if batch_metadata[document.id].entity_type is not None
+                and not batch_metadata[document.id].skip
+            ]
+            document_ids_to_process = [document.id for document in documents_to_process]
+
+            # mark the documents as EXTRACTING (or SKIPPED) and clear their previous
+            # extractions, the pipeline marks them as EXTRACTED once written
+            with get_session_with_current_tenant() as db_session:
+                update_documents_kg_info(
+                    db_session,
+                    [
+                        document.id
+                        for document in unprocessed_document_batch
+                        if document.id not in document_ids_to_process
+                    ],
+                    KGStage.SKIPPED,
+                )
+                update_documents_kg_info(
+                    db_session, document_ids_to_process, KGStage.EXTRACTING
+                )
+                delete_from_kg_relationships__no_commit(
+                    db_session, document_ids_to_process
+                )
+                delete_from_kg_entities__no_commit(db_session, document_ids_to_process)
+                db_session.commit()
+
+            for document in documents_to_process:
+                pipeline.submit(
+                    KGDocumentExtraction(
+                        document_id=document.id,
+                        metadata=batch_metadata[document.id],
+                        implied_extraction=kg_implied_extraction(
+                            document,
+                            batch_metadata[document.id],
+                            active_entity_types,
+                            kg_config_settings,
+                        ),
+                        event_time=document.doc_updated_at,
+                    )
+                )
+
+        # Update the the Skipped Docs back to Not Started
+        with get_session_with_current_tenant() as db_session:
+            skipped_documents = get_skipped_kg_documents(db_session)
+            for document_id in skipped_documents:
+                update_document_kg_stage(
+                    db_session,
+                    document_id,
+                    KGStage.NOT_STARTED,
+                )
+                db_session.commit()
+
+
 def kg_extraction(
     tenant_id: str,
     index_name: str,
     lock: RedisLock,
     processing_chunk_batch_size: int = 8,
+    pipelined: bool = KG_EXTRACTION_PIPELINED,
 ) -> None:
     """
     This extraction will try to extract from all chunks that have not been kg-processed yet.
@@ -219,6 +359,11 @@ def kg_extraction(
             - Update chunks in Vespa
             - Update temporary KG extraction tables
             - Update document table to set kg_extracted = True
+
+    In pipelined mode, the documents are deep extracted by a pool of LLM workers
+    (with short documents packed into shared prompts) and written in bulk by a
+    separate writer while the next batches are prepared. Documents left EXTRACTING
+    by an interrupted run are extracted again.
     """
 
     logger.info(f"Starting kg extraction for tenant {tenant_id}")
@@ -235,23 +380,51 @@ def kg_extraction(
     )
 
     # get entity type info
-    with get_session_with_current_tenant() as db_session:
-        all_entity_types = get_entity_types(db_session)
-        active_entity_types = {
-            entity_type.id_name
-            for entity_type in get_entity_types(db_session, active=True)
-        }
+    active_entity_types = set(get_active_entity_type_names())
 
-        # entity_type: (metadata: conversion property)
-        entity_metadata_conversion_instructions = {
-            entity_type.id_name: entity_type.parsed_attributes.metadata_attribute_conversion
-            for entity_type in all_entity_types
-        }
+    # entity_type: (metadata: conversion property)
+    entity_metadata_conversion_instructions = get_cached_kg_schema_value(
+        "entity_metadata_conversion_instructions",
+        _build_entity_metadata_conversion_instructions,
+    )
 
     # Track which metadata attributes are possible for each entity type
     metadata_tracker = EntityTypeMetadataTracker()
     metadata_tracker.import_typeinfo()
 
+    if pipelined:
+        # only one kg processing task runs at a time, so documents that are still
+        # EXTRACTING were left by an interrupted run
+        with get_session_with_current_tenant() as db_session:
+            update_document_kg_stages(
+                db_session, KGStage.EXTRACTING, KGStage.NOT_STARTED
+            )
+            db_session.commit()
+
+        pipeline = KGExtractionPipeline(
+            tenant_id=tenant_id,
+            index_name=index_name,
+            lock=lock,
+            kg_config_settings=kg_config_settings,
+            active_entity_types=active_entity_types,
+            entity_metadata_conversion_instructions=entity_metadata_conversion_instructions,
+            metadata_tracker=metadata_tracker,
+        )
+        try:
+            _kg_extraction_pipelined(
+                kg_enabled_connectors,
+                document_classification_extraction_instructions,
+                kg_config_settings,
+                active_entity_types,
+                pipeline,
+                processing_chunk_batch_size,
+            )
+        finally:
+            pipeline.close()
+
+        metadata_tracker.export_typeinfo()
+        return
+
     last_lock_time = time.monotonic()
 
     # Iterate over connectors that are enabled for KG extraction
@@ -432,8 +605,8 @@ def kg_extraction(
                         relationship
                     )
                     if (
-                        source_entity in active_entity_types
-                        and target_entity in active_entity_types
+                        get_entity_type(source_entity) in active_entity_types
+                        and get_entity_type(target_entity) in active_entity_types
                     ):
                         batch_relationships += [(document_id, relationship)]
 
@@ -186,5 +186,23 @@ class KGDocumentDeepExtractionResults(BaseModel):
     deep_extracted_relationships: set[str]
 
 
+class KGDocumentExtraction(BaseModel):
+    document_id: str
+    metadata: KGEnhancedDocumentMetadata
+    implied_extraction: KGImpliedExtractionResults
+    event_time: datetime | None = None
+    deep_extraction: KGDocumentDeepExtractionResults | None = None
+    failed: bool = False
+
+
+class KGStagingEntity(BaseModel):
+    name: str
+    entity_type: str
+    document_id: str | None = None
+    occurrences: int = 1
+    attributes: dict[str, Any] = {}
+    event_time: datetime | None = None
+
+
 class KGException(Exception):
     pass
@@ -16,6 +16,7 @@ from onyx.db.models import KGRelationshipTypeExtractionStaging
 from onyx.db.models import KGStage
 from onyx.kg.resets.reset_index import reset_full_kg_index__commit
 from onyx.kg.resets.reset_vespa import reset_vespa_kg_index
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
 
 
 def reset_source_kg_index(
@@ -30,6 +31,7 @@ def reset_source_kg_index(
     with get_session_with_current_tenant() as db_session:
         if source_name is None:
             reset_full_kg_index__commit(db_session)
+            invalidate_kg_schema_cache()
             return
 
         # get all the entity types for the given source
@@ -77,6 +79,7 @@ def reset_source_kg_index(
                 )
             ).delete()
         db_session.commit()
+    invalidate_kg_schema_cache()
 
     with get_session_with_current_tenant() as db_session:
         # get all the documents for the given source
@@ -0,0 +1,131 @@
+"""Per process cache of the KG schema: the config, the entity and relationship types and
+the instructions built from them for extraction and for every KG query. Changes to the
+schema bump a version in Redis, which is checked before the cached values are used, so
+all processes see the change right away."""
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+from typing import cast
+from typing import TypeVar
+
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.entity_type import get_entity_types
+from onyx.db.entity_type import get_entity_types_with_grounded_source_name
+from onyx.db.kg_config import get_kg_config_settings
+from onyx.kg.models import KGConfigSettings
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+_KG_SCHEMA_CACHE_VERSION_KEY = "kg_schema_cache_version"
+# Safety net for changes made without calling invalidate_kg_schema_cache, e.g. config
+# edited directly in the db during the beta
+_KG_SCHEMA_CACHE_TTL_SECONDS = 60
+
+
+class _TenantKGSchemaCache:
+    def __init__(self, version: bytes | None) -> None:
+        self.version = version
+        self.created_at = time.monotonic()
+        self.values: dict[str, Any] = {}
+
+    def is_valid(self, version: bytes | None) -> bool:
+        return (
+            self.version == version
+            and time.monotonic() - self.created_at < _KG_SCHEMA_CACHE_TTL_SECONDS
+        )
+
+
+_tenant_caches: dict[str, _TenantKGSchemaCache] = {}
+_tenant_caches_lock = threading.Lock()
+
+
+def invalidate_kg_schema_cache() -> None:
+    """Must be called after the KG config, entity types or relationship types of the
+    current tenant are changed."""
+    with _tenant_caches_lock:
+        _tenant_caches.pop(get_current_tenant_id(), None)
+
+    try:
+        get_redis_client().incr(_KG_SCHEMA_CACHE_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to invalidate the KG schema cache")
+
+
+def _get_tenant_cache(tenant_id: str) -> _TenantKGSchemaCache | None:
+    try:
+        version = get_redis_client(tenant_id=tenant_id).get(
+            _KG_SCHEMA_CACHE_VERSION_KEY
+        )
+    except Exception:
+        logger.warning("Failed to get the KG schema cache version, skipping cache")
+        return None
+
+    with _tenant_caches_lock:
+        cache = _tenant_caches.get(tenant_id)
+        if cache is None or not cache.is_valid(version):
+            cache = _TenantKGSchemaCache(version)
+            _tenant_caches[tenant_id] = cache
+        return cache
+
+
+def get_cached_kg_schema_value(name: str, build: Callable[[], T]) -> T:
+    """Returns the cached value with the given name, built with build if missing. The
+    returned value is shared, it must not be modified."""
+    cache = _get_tenant_cache(get_current_tenant_id())
+    if cache is None:
+        return build()
+
+    with _tenant_caches_lock:
+        if name in cache.values:
+            return cache.values[name]
+
+    # if the schema changes in the meantime, this cache is already replaced
+    value = build()
+    with _tenant_caches_lock:
+        cache.values[name] = value
+    return value
+
+
+def _build_active_entity_type_names() -> list[str]:
+    with get_session_with_current_tenant() as db_session:
+        return [
+            entity_type.id_name
+            for entity_type in get_entity_types(db_session, active=True)
+        ]
+
+
+def get_active_entity_type_names() -> list[str]:
+    """Returns the id names of the active entity types."""
+    return get_cached_kg_schema_value(
+        "active_entity_type_names", _build_active_entity_type_names
+    )
+
+
+def _build_grounded_source_names() -> list[str]:
+    with get_session_with_current_tenant() as db_session:
+        return [
+            cast(str, entity_type.grounded_source_name)
+            for entity_type in get_entity_types_with_grounded_source_name(db_session)
+        ]
+
+
+def get_grounded_source_names() -> list[str]:
+    """Returns the grounded source names of the entity types that have one."""
+    return get_cached_kg_schema_value(
+        "grounded_source_names", _build_grounded_source_names
+    )
+
+
+def get_cached_kg_config_settings() -> KGConfigSettings:
+    """Read-only counterpart of get_kg_config_settings, returns a copy that can be
+    modified but must not be stored."""
+    return get_cached_kg_schema_value(
+        "kg_config_settings", get_kg_config_settings
+    ).model_copy(deep=True)
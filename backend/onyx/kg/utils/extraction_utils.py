@@ -1,4 +1,6 @@
 import json
+from collections.abc import Iterable
+from typing import Any
 
 from langchain_core.messages import HumanMessage
 
@@ -23,6 +25,8 @@ from onyx.kg.models import KGDocumentDeepExtractionResults
 from onyx.kg.models import KGEnhancedDocumentMetadata
 from onyx.kg.models import KGImpliedExtractionResults
 from onyx.kg.models import KGMetadataContent
+from onyx.kg.schema_cache import get_cached_kg_schema_value
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
 from onyx.kg.utils.formatting_utils import extract_email
 from onyx.kg.utils.formatting_utils import get_entity_type
 from onyx.kg.utils.formatting_utils import kg_email_processing
@@ -36,6 +40,7 @@ from onyx.prompts.kg_prompts import CALL_CHUNK_PREPROCESSING_PROMPT
 from onyx.prompts.kg_prompts import CALL_DOCUMENT_CLASSIFICATION_PROMPT
 from onyx.prompts.kg_prompts import GENERAL_CHUNK_PREPROCESSING_PROMPT
 from onyx.prompts.kg_prompts import MASTER_EXTRACTION_PROMPT
+from onyx.prompts.kg_prompts import PACKED_DOCUMENTS_PREPROCESSING_PROMPT
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -45,6 +50,12 @@ def get_entity_types_str(active: bool | None = None) -> str:
     """
     Format the entity types into a string for the LLM.
     """
+    return get_cached_kg_schema_value(
+        f"entity_types_str_{active}", lambda: _build_entity_types_str(active)
+    )
+
+
+def _build_entity_types_str(active: bool | None) -> str:
     with get_session_with_current_tenant() as db_session:
         entity_types = get_entity_types(db_session, active)
 
@@ -98,6 +109,13 @@ def get_relationship_types_str(active: bool | None = None) -> str:
     """
     Format the relationship types into a string for the LLM.
     """
+    return get_cached_kg_schema_value(
+        f"relationship_types_str_{active}",
+        lambda: _build_relationship_types_str(active),
+    )
+
+
+def _build_relationship_types_str(active: bool | None) -> str:
     with get_session_with_current_tenant() as db_session:
         active_filters = []
         if active is not None:
@@ -330,9 +348,13 @@ def kg_deep_extraction(
     tenant_id: str,
     index_name: str,
     kg_config_settings: KGConfigSettings,
+    chunk_batches: Iterable[list[KGChunkFormat]] | None = None,
+    entity_types_str: str | None = None,
+    relationship_types_str: str | None = None,
 ) -> KGDocumentDeepExtractionResults:
     """
-    Perform deep extraction and classification on the document.
+    Perform deep extraction and classification on the document. The chunk batches
+    and type descriptions are fetched if they are not provided.
     """
     result = KGDocumentDeepExtractionResults(
         classification_result=None,
@@ -340,12 +362,14 @@ def kg_deep_extraction(
         deep_extracted_relationships=set(),
     )
 
-    entity_types_str = get_entity_types_str(active=True)
-    relationship_types_str = get_relationship_types_str(active=True)
+    if entity_types_str is None:
+        entity_types_str = get_entity_types_str(active=True)
+    if relationship_types_str is None:
+        relationship_types_str = get_relationship_types_str(active=True)
+    if chunk_batches is None:
+        chunk_batches = get_document_vespa_contents(document_id, index_name, tenant_id)
 
-    for i, chunk_batch in enumerate(
-        get_document_vespa_contents(document_id, index_name, tenant_id)
-    ):
+    for i, chunk_batch in enumerate(chunk_batches):
         # use first batch for classification
         if i == 0 and metadata.classification_enabled:
             if not metadata.classification_instructions:
@@ -501,13 +525,7 @@ def kg_deep_extract_chunks(
         last_bracket = cleaned_response.rfind("}")
         cleaned_response = cleaned_response[first_bracket : last_bracket + 1]
         parsed_result = json.loads(cleaned_response)
-        return KGDocumentDeepExtractionResults(
-            classification_result=None,
-            deep_extracted_entities=set(parsed_result.get("entities", [])),
-            deep_extracted_relationships={
-                rel.replace(" ", "_") for rel in parsed_result.get("relationships", [])
-            },
-        )
+        return _to_deep_extraction_results(parsed_result)
     except Exception as e:
         failed_chunks = [chunk.chunk_id for chunk in chunk_batch]
         logger.error(
@@ -517,6 +535,95 @@ def kg_deep_extract_chunks(
     return None
 
 
+def _to_deep_extraction_results(
+    parsed_result: dict[str, Any],
+) -> KGDocumentDeepExtractionResults:
+    return KGDocumentDeepExtractionResults(
+        classification_result=None,
+        deep_extracted_entities=set(parsed_result.get("entities", [])),
+        deep_extracted_relationships={
+            rel.replace(" ", "_") for rel in parsed_result.get("relationships", [])
+        },
+    )
+
+
+def is_packable_for_extraction(
+    metadata: KGEnhancedDocumentMetadata,
+    chunk_batches: list[list[KGChunkFormat]],
+    max_document_chars: int,
+) -> bool:
+    """
+    Whether a document can share an extraction prompt with other documents. Only
+    short documents that use the general prompt and are not classified can.
+    """
+    if metadata.classification_enabled or metadata.entity_type is None:
+        return False
+    if metadata.entity_type in (call_type.value for call_type in OnyxCallTypes):
+        return False
+    return (
+        len(chunk_batches) == 1
+        and sum(len(chunk.content) for chunk in chunk_batches[0]) <= max_document_chars
+    )
+
+
+def kg_deep_extract_packed_documents(
+    document_chunks: list[tuple[str, list[KGChunkFormat]]],
+    kg_config_settings: KGConfigSettings,
+    entity_types_str: str,
+    relationship_types_str: str,
+) -> list[KGDocumentDeepExtractionResults | None]:
+    """
+    Deep extract from several short documents with a single prompt. Takes the
+    document entity and chunks of each document, returns the results in the same
+    order, with None for the documents missing from the response.
+    """
+    content = "\n\n".join(
+        f"Document {i}:\n" + "\n".join(chunk.content for chunk in chunk_batch)
+        for i, (_, chunk_batch) in enumerate(document_chunks, start=1)
+    )
+    llm_context = PACKED_DOCUMENTS_PREPROCESSING_PROMPT.format(
+        num_documents=len(document_chunks),
+        vendor=kg_config_settings.KG_VENDOR,
+        content=content,
+    )
+    prompt = MASTER_EXTRACTION_PROMPT.format(
+        entity_types=entity_types_str,
+        relationship_types=relationship_types_str,
+    ).replace("---content---", llm_context)
+
+    # extract with LLM
+    _, fast_llm = get_default_llms()
+    msg = [HumanMessage(content=prompt)]
+    try:
+        raw_extraction_result = fast_llm.invoke(msg)
+        cleaned_response = (
+            message_to_string(raw_extraction_result)
+            .replace("```json\n", "")
+            .replace("\n```", "")
+        )
+        first_bracket = cleaned_response.find("{")
+        last_bracket = cleaned_response.rfind("}")
+        parsed_result = json.loads(cleaned_response[first_bracket : last_bracket + 1])
+        if not isinstance(parsed_result, dict):
+            raise ValueError("Expected one extraction per document")
+    except Exception as e:
+        document_entities = [document_entity for document_entity, _ in document_chunks]
+        logger.error(
+            f"Failed to process packed documents {document_entities}. Error: {str(e)}"
+        )
+        return [None] * len(document_chunks)
+
+    results: list[KGDocumentDeepExtractionResults | None] = []
+    for i in range(1, len(document_chunks) + 1):
+        document_result = parsed_result.get(str(i))
+        results.append(
+            _to_deep_extraction_results(document_result)
+            if isinstance(document_result, dict)
+            else None
+        )
+    return results
+
+
 def kg_process_person(
     email: str,
     document_entity_id: str,
@@ -654,6 +761,8 @@ class EntityTypeMetadataTracker:
                     synchronize_session=False,
                 )
             db_session.commit()
+        # the attribute values are part of the entity type instructions
+        invalidate_kg_schema_cache()
 
     def track_metadata(
         self, entity_type: str, attributes: dict[str, str | list[str]]
@@ -3,6 +3,7 @@ import os
 import traceback
 from collections.abc import Iterator
 from collections.abc import Sequence
+from functools import lru_cache
 from typing import Any
 from typing import cast
 
@@ -40,6 +41,8 @@ from onyx.llm.interfaces import LLMConfig
 from onyx.llm.interfaces import ToolChoiceOptions
 from onyx.llm.utils import model_is_reasoning_model
 from onyx.server.utils import mask_string
+from onyx.utils.cancellation import is_request_cancelled
+from onyx.utils.cancellation import RequestCancelledError
 from onyx.utils.logger import setup_logger
 from onyx.utils.long_term_log import LongTermLogger
 
@@ -246,6 +249,33 @@ def _prompt_to_dict(
         return [_convert_message_to_dict(message) for message in prompt.to_messages()]
 
 
+@lru_cache(maxsize=1024)
+def _get_max_token_param(model_name: str, model_provider: str) -> str:
+    """Cached since an LLM is built for every message."""
+    try:
+        params = get_supported_openai_params(model_name, model_provider)
+        if STANDARD_MAX_TOKENS_KWARG in (params or []):
+            return STANDARD_MAX_TOKENS_KWARG
+    except Exception as e:
+        logger.warning(f"Error getting supported openai params: {e}")
+    return LEGACY_MAX_TOKENS_KWARG
+
+
+def _close_stream(response: litellm.CustomStreamWrapper) -> None:
+    """Closes the connection to the provider of a stream that is not read to the end,
+    so that the provider stops generating."""
+    # the wrapper does not close the underlying provider stream itself
+    stream = getattr(response, "completion_stream", None)
+    close = getattr(stream, "close", None)
+    if not callable(close):
+        return
+
+    try:
+        close()
+    except Exception:
+        logger.warning("Failed to close the LLM stream", exc_info=True)
+
+
 class DefaultMultiLLM(LLM):
     """Uses Litellm library to allow easy configuration to use a multitude of LLMs
     See https://python.langchain.com/docs/integrations/chat/litellm"""
@@ -319,13 +349,7 @@ class DefaultMultiLLM(LLM):
 
         self._model_kwargs = model_kwargs
 
-        self._max_token_param = LEGACY_MAX_TOKENS_KWARG
-        try:
-            params = get_supported_openai_params(model_name, model_provider)
-            if STANDARD_MAX_TOKENS_KWARG in (params or []):
-                self._max_token_param = STANDARD_MAX_TOKENS_KWARG
-        except Exception as e:
-            logger.warning(f"Error getting supported openai params: {e}")
+        self._max_token_param = _get_max_token_param(model_name, model_provider)
 
     def _safe_model_config(self) -> dict:
         dump = self.config.model_dump()
@@ -564,6 +588,14 @@ class DefaultMultiLLM(LLM):
 
                 yield message_chunk
 
+                if is_request_cancelled():
+                    # nobody is listening anymore, stop paying for the generation
+                    logger.debug("Request cancelled, stopping the LLM stream")
+                    _close_stream(response)
+                    raise RequestCancelledError(
+                        "Request cancelled while streaming the LLM response"
+                    )
+
         except RemoteProtocolError:
             raise RuntimeError(
                 "The AI model failed partway through generation, please try again."
@@ -0,0 +1,91 @@
+"""Per process cache of the LLM provider configs that are loaded to build the LLMs for
+every chat message. Changes to the providers bump a version in Redis, which is checked
+before the cached configs are used, so all processes see the change right away."""
+
+import threading
+import time
+
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.llm import fetch_default_provider
+from onyx.db.llm import fetch_llm_provider_view
+from onyx.redis.redis_pool import get_redis_client
+from onyx.server.manage.llm.models import LLMProviderView
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+_LLM_PROVIDER_CACHE_VERSION_KEY = "llm_provider_cache_version"
+# Safety net for changes made without calling invalidate_llm_provider_cache
+_LLM_PROVIDER_CACHE_TTL_SECONDS = 300
+
+
+class _TenantLLMProviderCache:
+    def __init__(self, version: bytes | None) -> None:
+        self.version = version
+        self.created_at = time.monotonic()
+        # the default provider is stored under None
+        self.providers: dict[str | None, LLMProviderView | None] = {}
+
+    def is_valid(self, version: bytes | None) -> bool:
+        return (
+            self.version == version
+            and time.monotonic() - self.created_at < _LLM_PROVIDER_CACHE_TTL_SECONDS
+        )
+
+
+_tenant_caches: dict[str, _TenantLLMProviderCache] = {}
+_tenant_caches_lock = threading.Lock()
+
+
+def invalidate_llm_provider_cache() -> None:
+    """Must be called after the LLM providers of the current tenant are changed."""
+    with _tenant_caches_lock:
+        _tenant_caches.pop(get_current_tenant_id(), None)
+
+    try:
+        get_redis_client().incr(_LLM_PROVIDER_CACHE_VERSION_KEY)
+    except Exception:
+        logger.exception("Failed to invalidate the LLM provider cache")
+
+
+def _get_tenant_cache(tenant_id: str) -> _TenantLLMProviderCache | None:
+    try:
+        version = get_redis_client(tenant_id=tenant_id).get(
+            _LLM_PROVIDER_CACHE_VERSION_KEY
+        )
+    except Exception:
+        logger.warning("Failed to get the LLM provider cache version, skipping cache")
+        return None
+
+    with _tenant_caches_lock:
+        cache = _tenant_caches.get(tenant_id)
+        if cache is None or not cache.is_valid(version):
+            cache = _TenantLLMProviderCache(version)
+            _tenant_caches[tenant_id] = cache
+        return cache
+
+
+def _fetch_llm_provider(provider_name: str | None) -> LLMProviderView | None:
+    with get_session_with_current_tenant() as db_session:
+        if provider_name is None:
+            return fetch_default_provider(db_session)
+        return fetch_llm_provider_view(db_session, provider_name)
+
+
+def get_cached_llm_provider(provider_name: str | None) -> LLMProviderView | None:
+    """Returns the provider with the given name, or the default provider if the name
+    is None. The returned config is shared, it must not be modified."""
+    cache = _get_tenant_cache(get_current_tenant_id())
+    if cache is None:
+        return _fetch_llm_provider(provider_name)
+
+    with _tenant_caches_lock:
+        if provider_name in cache.providers:
+            return cache.providers[provider_name]
+
+    # if the providers change in the meantime, this cache is already replaced
+    provider = _fetch_llm_provider(provider_name)
+    with _tenant_caches_lock:
+        cache.providers[provider_name] = provider
+    return provider
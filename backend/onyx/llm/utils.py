@@ -444,6 +444,14 @@ def find_model_obj(model_map: dict, provider: str, model_name: str) -> dict | No
     return None
 
 
+@lru_cache(maxsize=1024)
+def get_model_obj(model_provider: str, model_name: str) -> dict | None:
+    """`find_model_obj` on the litellm model map. The same few models are looked up
+    for every message, so the results are kept as an index of the map. The returned
+    dict is shared, it must not be modified."""
+    return find_model_obj(get_model_map(), model_provider, model_name)
+
+
 def get_llm_contextual_cost(
     llm: LLM,
 ) -> float:
@@ -596,6 +604,20 @@ def get_max_input_tokens(
     model_name: str,
     model_provider: str,
     output_tokens: int = GEN_AI_NUM_RESERVED_OUTPUT_TOKENS,
+) -> int:
+    # the override is part of the cache key, so that changing it takes effect
+    return _get_max_input_tokens(
+        model_name, model_provider, output_tokens, GEN_AI_MAX_TOKENS
+    )
+
+
+# cached since unknown models log a stack trace on every lookup
+@lru_cache(maxsize=1024)
+def _get_max_input_tokens(
+    model_name: str,
+    model_provider: str,
+    output_tokens: int,
+    max_tokens_override: int | None,
 ) -> int:
     # NOTE: we previously used `litellm.get_max_tokens()`, but despite the name, this actually
     # returns the max OUTPUT tokens. Under the hood, this uses the `litellm.model_cost` dict,
@@ -603,16 +625,14 @@ def get_max_input_tokens(
     # `model_cost` dict is a named public interface:
     # https://litellm.vercel.app/docs/completion/token_usage#7-model_cost
     # model_map is  litellm.model_cost
-    litellm_model_map = get_model_map()
-
     input_toks = (
-        get_llm_max_tokens(
+        max_tokens_override
+        or get_llm_max_tokens(
             model_name=model_name,
             model_provider=model_provider,
-            model_map=litellm_model_map,
+            model_map=get_model_map(),
         )
-        - output_tokens
-    )
+    ) - output_tokens
 
     if input_toks <= 0:
         return GEN_AI_MODEL_FALLBACK_MAX_TOKENS
@@ -638,14 +658,10 @@ def get_max_input_tokens_from_llm_provider(
     )
 
 
+@lru_cache(maxsize=1024)
 def model_supports_image_input(model_name: str, model_provider: str) -> bool:
-    model_map = get_model_map()
     try:
-        model_obj = find_model_obj(
-            model_map,
-            model_provider,
-            model_name,
-        )
+        model_obj = get_model_obj(model_provider, model_name)
         if not model_obj:
             raise RuntimeError(
                 f"No litellm entry found for {model_provider}/{model_name}"
@@ -658,16 +674,34 @@ def model_supports_image_input(model_name: str, model_provider: str) -> bool:
         return False
 
 
+# Providers that only cache a prompt prefix when it is explicitly marked with a cache
+# breakpoint. Others (e.g. OpenAI) cache long shared prompt prefixes automatically.
+_EXPLICIT_PROMPT_CACHING_PROVIDERS = {"anthropic", "bedrock", "vertex_ai"}
+
+
+def model_supports_explicit_prompt_caching(
+    model_name: str, model_provider: str
+) -> bool:
+    if model_provider not in _EXPLICIT_PROMPT_CACHING_PROVIDERS:
+        return False
+
+    try:
+        model_obj = get_model_obj(model_provider, model_name)
+    except Exception:
+        logger.exception(
+            f"Failed to get model object for {model_provider}/{model_name}"
+        )
+        return False
+
+    return bool(model_obj and model_obj.get("supports_prompt_caching", False))
+
+
+@lru_cache(maxsize=1024)  # the litellm fallback is slow and logs on failure
 def model_is_reasoning_model(model_name: str, model_provider: str) -> bool:
     import litellm
 
-    model_map = get_model_map()
     try:
-        model_obj = find_model_obj(
-            model_map,
-            model_provider,
-            model_name,
-        )
+        model_obj = get_model_obj(model_provider, model_name)
         if model_obj and "supports_reasoning" in model_obj:
             return model_obj["supports_reasoning"]
 
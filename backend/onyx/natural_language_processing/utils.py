@@ -20,6 +20,9 @@ os.environ["HF_HUB_DISABLE_TELEMETRY"] = "1"
 
 
 class BaseTokenizer(ABC):
+    # Identifies the tokenizer, token counts are only comparable for the same name
+    name: str
+
     @abstractmethod
     def encode(self, string: str) -> list[int]:
         pass
@@ -32,6 +35,10 @@ class BaseTokenizer(ABC):
     def decode(self, tokens: list[int]) -> str:
         pass
 
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        """Tokenizers with a native batch API should override this."""
+        return [self.encode(string) for string in strings]
+
 
 class TiktokenTokenizer(BaseTokenizer):
     _instances: dict[str, "TiktokenTokenizer"] = {}
@@ -46,11 +53,16 @@ class TiktokenTokenizer(BaseTokenizer):
             import tiktoken
 
             self.encoder = tiktoken.encoding_for_model(model_name)
+            # models that share an encoding share the token counts
+            self.name = f"tiktoken/{self.encoder.name}"
 
     def encode(self, string: str) -> list[int]:
         # this ignores special tokens that the model is trained on, see encode_ordinary for details
         return self.encoder.encode_ordinary(string)
 
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        return self.encoder.encode_ordinary_batch(strings)
+
     def tokenize(self, string: str) -> list[str]:
         encoded = self.encode(string)
         decoded = [self.encoder.decode([token]) for token in encoded]
@@ -69,6 +81,7 @@ class TiktokenTokenizer(BaseTokenizer):
 class HuggingFaceTokenizer(BaseTokenizer):
     def __init__(self, model_name: str):
         self.encoder: Tokenizer = Tokenizer.from_pretrained(model_name)
+        self.name = f"huggingface/{model_name}"
 
     def _safer_encode(self, string: str) -> Encoding:
         """
@@ -87,6 +100,14 @@ class HuggingFaceTokenizer(BaseTokenizer):
         # this returns no special tokens
         return self._safer_encode(string).ids
 
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        try:
+            # a single call into the rust tokenizer for all the strings
+            encodings = self.encoder.encode_batch(strings, add_special_tokens=False)
+        except Exception:
+            return [self.encode(string) for string in strings]
+        return [encoding.ids for encoding in encodings]
+
     def tokenize(self, string: str) -> list[str]:
         return self._safer_encode(string).tokens
 
@@ -476,6 +476,26 @@ And here is the content:
 """.strip()
 
 
+PACKED_DOCUMENTS_PREPROCESSING_PROMPT = """
+These are {num_documents} short, independent documents that you need to extract information (entities, relationships) \
+from. Extract from each document separately, and do not combine information from different documents.
+
+Note: when you extract relationships, please make sure that:
+  - if you see a relationship for one of our employees, you should extract the relationship both for the employee AND \
+    VENDOR::{vendor}.
+  - if you see a relationship for one of the representatives of other accounts, you should extract the relationship \
+only for the account ACCOUNT::<account_name>!
+
+Instead of a single extraction, please format your answer as a JSON object with one extraction in the format \
+above per document, keyed by the document number:
+{{"1": {{"entities": [...], "relationships": [...], "terms": [...]}}, "2": {{...}}, ...}}
+
+--
+And here are the documents:
+{content}
+""".strip()
+
+
 ### Source-specific prompts
 
 CALL_CHUNK_PREPROCESSING_PROMPT = """
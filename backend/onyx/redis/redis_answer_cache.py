@@ -0,0 +1,48 @@
+"""Redis keys of the answer cache (see onyx.chat.answer_cache). The invalidation lives
+here so that indexing and document sync can use it without importing the chat flow."""
+
+from collections.abc import Iterable
+
+from onyx.configs.chat_configs import ANSWER_CACHE_PERSONA_IDS
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+ANSWER_CACHE_PREFIX = "answer_cache"
+
+
+def answer_cache_entry_key(entry_id: str) -> str:
+    return f"{ANSWER_CACHE_PREFIX}:entry:{entry_id}"
+
+
+def answer_cache_document_key(document_id: str) -> str:
+    return f"{ANSWER_CACHE_PREFIX}:doc:{document_id}"
+
+
+def invalidate_cached_answers_for_documents(
+    document_ids: Iterable[str], tenant_id: str
+) -> None:
+    """Must be called when documents are re-indexed, updated or deleted."""
+    if not ANSWER_CACHE_PERSONA_IDS:
+        return
+
+    document_keys = [
+        answer_cache_document_key(document_id) for document_id in document_ids
+    ]
+    if not document_keys:
+        return
+
+    try:
+        redis_client = get_redis_client(tenant_id=tenant_id)
+        pipe = redis_client.pipeline()
+        for document_key in document_keys:
+            pipe.smembers(document_key)
+        entry_keys = {
+            answer_cache_entry_key(entry_id.decode())
+            for entry_ids in pipe.execute()
+            for entry_id in entry_ids
+        }
+        redis_client.delete(*entry_keys, *document_keys)
+    except Exception:
+        logger.exception("Failed to invalidate the cached answers of the documents")
@@ -61,7 +61,10 @@ from onyx.server.features.mcp.models import MCPUserCredentialsRequest
 from onyx.server.features.mcp.models import MCPUserOAuthInitiateRequest
 from onyx.server.features.mcp.models import MCPUserOAuthInitiateResponse
 from onyx.tools.tool_implementations.mcp.mcp_client import discover_mcp_tools
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import fetch_mcp_tool_catalog
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import get_mcp_tool_catalog
 from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
 
 logger = setup_logger()
 
@@ -869,13 +872,18 @@ def _db_mcp_server_to_api_mcp_server(
         user_config = get_user_connection_config(db_server.id, email, db)
         user_authenticated = user_config is not None
 
-        # Test existing credentials if they exist
+        # Check existing credentials against the tool catalog, so that loading
+        # the servers only waits for the MCP server the first time the credentials
+        # are used
         if user_authenticated and user_config:
             try:
-                is_valid, _ = test_mcp_server_credentials(
-                    db_server.server_url, user_config.config.get("headers", {})
+                catalog = get_mcp_tool_catalog(
+                    db_server.id,
+                    db_server.server_url,
+                    user_config.config.get("headers", {}),
+                    get_current_tenant_id(),
                 )
-                user_authenticated = is_valid
+                user_authenticated = catalog is not None and catalog.tools is not None
                 if (
                     include_auth_config
                     and db_server.auth_type != MCPAuthenticationType.OAUTH
@@ -1076,11 +1084,23 @@ def _list_mcp_tools_by_id(
     # can of course put their own credentials in and list the tools.
     connection_config = _get_connection_config(mcp_server, is_admin, user, db)
 
-    # Discover tools from the MCP server
-    tools = discover_mcp_tools(
-        mcp_server.server_url,
-        connection_config.config.get("headers", {}) if connection_config else {},
+    # Served from the tool catalog, refreshed in the background when stale
+    headers = connection_config.config.get("headers", {}) if connection_config else {}
+    catalog = get_mcp_tool_catalog(
+        mcp_server.id, mcp_server.server_url, headers, get_current_tenant_id()
     )
+    if catalog is not None and catalog.tools is None:
+        # the last listing failed, the credentials may have been fixed since
+        catalog = fetch_mcp_tool_catalog(
+            mcp_server.id, mcp_server.server_url, headers, get_current_tenant_id()
+        )
+    if catalog is None or catalog.tools is None:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to list the tools of the MCP server: "
+            f"{catalog.error if catalog else 'unknown error'}",
+        )
+    tools = catalog.tools
 
     # TODO: Also list resources from the MCP server
     # resources = discover_mcp_resources(mcp_server, connection_config)
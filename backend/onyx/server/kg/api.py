@@ -21,6 +21,7 @@ from onyx.db.persona import mark_persona_as_deleted
 from onyx.db.persona import mark_persona_as_not_deleted
 from onyx.db.tools import get_builtin_tool
 from onyx.kg.resets.reset_index import reset_full_kg_index__commit
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
 from onyx.kg.setup.kg_default_entity_definitions import (
     populate_missing_default_entity_types__commit,
 )
@@ -63,6 +64,7 @@ def reset_kg(
 ) -> SourceAndEntityTypeView:
     reset_full_kg_index__commit(db_session)
     populate_missing_default_entity_types__commit(db_session=db_session)
+    invalidate_kg_schema_cache()
     return get_kg_entity_types(db_session=db_session)
 
 
@@ -92,11 +94,13 @@ def enable_or_disable_kg(
                 db_session=db_session,
             )
         disable_kg()
+        invalidate_kg_schema_cache()
         return
 
     # Enable KG
     enable_kg(enable_req=req)
     populate_missing_default_entity_types__commit(db_session=db_session)
+    invalidate_kg_schema_cache()
 
     # Get the search and knowledge graph tools
     search_tool = get_builtin_tool(db_session=db_session, tool_type=SearchTool)
@@ -164,6 +168,7 @@ def enable_or_disable_kg(
     # Store the persona ID in the KG config
     kg_config_settings.KG_BETA_PERSONA_ID = persona_snapshot.id
     set_kg_config_settings(kg_config_settings)
+    invalidate_kg_schema_cache()
 
 
 # entity-types
@@ -208,3 +213,4 @@ def update_kg_entity_types(
     update_entity_types_and_related_connectors__commit(
         db_session=db_session, updates=updates
     )
+    invalidate_kg_schema_cache()
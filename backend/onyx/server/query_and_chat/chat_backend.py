@@ -2,8 +2,11 @@ import asyncio
 import datetime
 import json
 import os
+import threading
+from collections.abc import AsyncIterator
 from collections.abc import Callable
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from uuid import UUID
 
@@ -16,6 +19,7 @@ from fastapi import Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
 from onyx.auth.users import current_chat_accessible_user
 from onyx.auth.users import current_user
@@ -26,6 +30,8 @@ from onyx.chat.prompt_builder.citations_prompt import (
     compute_max_document_tokens_for_persona,
 )
 from onyx.configs.app_configs import WEB_DOMAIN
+from onyx.configs.chat_configs import ASYNC_CHAT_STREAMING_ENABLED
+from onyx.configs.chat_configs import CHAT_STREAMING_MAX_THREADS
 from onyx.configs.chat_configs import HARD_DELETE_CHATS
 from onyx.configs.constants import MessageType
 from onyx.configs.constants import MilestoneRecordType
@@ -45,10 +51,12 @@ from onyx.db.chat import set_as_latest_chat_message
 from onyx.db.chat import translate_db_message_to_chat_message_detail
 from onyx.db.chat import update_chat_session
 from onyx.db.chat_search import search_chat_sessions
+from onyx.db.chat_search import search_chat_sessions_ranked
 from onyx.db.engine.sql_engine import get_session
 from onyx.db.engine.sql_engine import get_session_with_tenant
 from onyx.db.feedback import create_chat_message_feedback
 from onyx.db.feedback import create_doc_retrieval_feedback
+from onyx.db.models import ChatSession
 from onyx.db.models import User
 from onyx.db.persona import get_persona_by_id
 from onyx.db.projects import check_project_ownership
@@ -81,19 +89,62 @@ from onyx.server.query_and_chat.models import RenameChatSessionResponse
 from onyx.server.query_and_chat.models import SearchFeedbackRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionTemperatureRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionThreadRequest
-from onyx.server.query_and_chat.streaming_models import OverallStop
-from onyx.server.query_and_chat.streaming_models import Packet
-from onyx.server.query_and_chat.streaming_utils import translate_db_message_to_packets
+from onyx.server.query_and_chat.streaming_utils import translate_db_messages_to_packets
 from onyx.server.query_and_chat.token_limit import check_token_rate_limits
+from onyx.utils.cancellation import REQUEST_CANCELLED_EVENT_CONTEXTVAR
 from onyx.utils.headers import get_custom_tool_additional_request_headers
 from onyx.utils.logger import setup_logger
 from onyx.utils.telemetry import create_milestone_and_report
+from onyx.utils.threadpool_concurrency import iterate_in_executor
 from shared_configs.contextvars import get_current_tenant_id
 
 logger = setup_logger()
 
 router = APIRouter(prefix="/chat")
 
+# Runs the blocking part of the answers streamed in async mode, threads are only
+# started when needed. The LLM calls, tools and DB sessions of an answer are blocking,
+# so each answer holds one thread for as long as it streams.
+_CHAT_STREAM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=CHAT_STREAMING_MAX_THREADS, thread_name_prefix="chat_stream"
+)
+# Answers beyond the size of the executor are rejected rather than queued behind
+# answers that can take minutes
+_CHAT_STREAM_SLOTS = threading.BoundedSemaphore(CHAT_STREAMING_MAX_THREADS)
+
+
+def _acquire_chat_stream_slot() -> Callable[[], None]:
+    """Returns the function that releases the slot, it can be called more than once."""
+    if not _CHAT_STREAM_SLOTS.acquire(blocking=False):
+        logger.warning("All chat streaming threads are busy, rejecting the message")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many answers are being generated, please try again shortly",
+        )
+
+    lock = threading.Lock()
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        with lock:
+            if released:
+                return
+            released = True
+        _CHAT_STREAM_SLOTS.release()
+
+    return release
+
+
+async def _release_when_done(
+    stream: AsyncIterator[str], release: Callable[[], None]
+) -> AsyncIterator[str]:
+    try:
+        async for packet in stream:
+            yield packet
+    finally:
+        release()
+
 
 @router.get("/get-user-chat-sessions")
 def get_user_chat_sessions(
@@ -232,18 +283,9 @@ def get_chat_session(
         translate_db_message_to_chat_message_detail(msg) for msg in session_messages
     ]
 
-    simplified_packet_lists: list[list[Packet]] = []
-    end_step_nr = 1
-    for msg in session_messages:
-        if msg.message_type == MessageType.ASSISTANT:
-            msg_packet_object = translate_db_message_to_packets(
-                msg, db_session=db_session, start_step_nr=end_step_nr
-            )
-            end_step_nr = msg_packet_object.end_step_nr
-            msg_packet_list = msg_packet_object.packet_list
-
-            msg_packet_list.append(Packet(ind=end_step_nr, obj=OverallStop()))
-            simplified_packet_lists.append(msg_packet_list)
+    simplified_packet_lists = translate_db_messages_to_packets(
+        session_messages, db_session=db_session
+    )
 
     return ChatSessionDetailResponse(
         chat_session_id=session_id,
@@ -396,27 +438,44 @@ def delete_chat_session_by_id(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-async def is_connected(request: Request) -> Callable[[], bool]:
-    main_loop = asyncio.get_event_loop()
+class ClientDisconnectWatcher:
+    """
+    Waits for the disconnect message on the ASGI receive channel of the request in a
+    background task and sets `disconnected` once it arrives. The streaming threads
+    only read the event instead of running a coroutine on the event loop per check.
+    """
 
-    def is_connected_sync() -> bool:
-        future = asyncio.run_coroutine_threadsafe(request.is_disconnected(), main_loop)
+    def __init__(self, request: Request) -> None:
+        self.request = request
+        self.disconnected = threading.Event()
+        # keep a reference so that the task is not garbage collected
+        self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
         try:
-            is_connected = not future.result(timeout=0.05)
-            return is_connected
-        except asyncio.TimeoutError:
-            logger.warning(
-                "Asyncio timed out (potentially missed request to stop streaming)"
-            )
-            return True
+            while True:
+                # the body was already read, so this only returns once the client
+                # disconnects or the response is complete
+                message = await self.request.receive()
+                if message["type"] == "http.disconnect":
+                    break
         except Exception as e:
-            error_msg = str(e)
             logger.critical(
-                f"An unexpected error occured with the disconnect check coroutine: {error_msg}"
+                f"An unexpected error occured with the disconnect watcher: {str(e)}"
             )
-            return True
+            return
+
+        self.disconnected.set()
+
+    def is_connected(self) -> bool:
+        return not self.disconnected.is_set()
+
 
-    return is_connected_sync
+async def is_connected(request: Request) -> Callable[[], bool]:
+    watcher = ClientDisconnectWatcher(request)
+    # lets the LLM calls and tools of the request stop early, see `is_request_cancelled`
+    REQUEST_CANCELLED_EVENT_CONTEXTVAR.set(watcher.disconnected)
+    return watcher.is_connected
 
 
 @router.post("/send-message")
@@ -484,6 +543,18 @@ def handle_new_chat_message(
         finally:
             logger.debug("Stream generator finished")
 
+    if ASYNC_CHAT_STREAMING_ENABLED:
+        release_slot = _acquire_chat_stream_slot()
+        return StreamingResponse(
+            _release_when_done(
+                iterate_in_executor(stream_generator(), _CHAT_STREAM_EXECUTOR),
+                release_slot,
+            ),
+            media_type="text/event-stream",
+            # the stream is not iterated at all if the client is already gone
+            background=BackgroundTask(release_slot),
+        )
+
     return StreamingResponse(stream_generator(), media_type="text/event-stream")
 
 
@@ -738,31 +809,21 @@ def fetch_chat_file(
     return StreamingResponse(file_io, media_type=media_type)
 
 
-@router.get("/search")
-async def search_chats(
-    query: str | None = Query(None),
-    page: int = Query(1),
-    page_size: int = Query(10),
-    user: User | None = Depends(current_user),
-    db_session: Session = Depends(get_session),
-) -> ChatSearchResponse:
-    """
-    Search for chat sessions based on the provided query.
-    If no query is provided, returns recent chat sessions.
-    """
-
-    # Use the enhanced database function for chat search
-    chat_sessions, has_more = search_chat_sessions(
-        user_id=user.id if user else None,
-        db_session=db_session,
-        query=query,
-        page=page,
-        page_size=page_size,
-        include_deleted=False,
-        include_onyxbot_flows=False,
+def _to_chat_session_summary(session: ChatSession) -> ChatSessionSummary:
+    return ChatSessionSummary(
+        id=session.id,
+        name=session.description,
+        persona_id=session.persona_id,
+        time_created=session.time_created,
+        shared_status=session.shared_status,
+        current_alternate_model=session.current_alternate_model,
+        current_temperature_override=session.temperature_override,
     )
 
-    # Group chat sessions by time period
+
+def _group_chat_sessions_by_date(
+    chat_sessions: list[ChatSession],
+) -> list[ChatSessionGroup]:
     today = datetime.datetime.now().date()
     yesterday = today - timedelta(days=1)
     this_week = today - timedelta(days=7)
@@ -777,15 +838,7 @@ async def search_chats(
     for session in chat_sessions:
         session_date = session.time_created.date()
 
-        chat_summary = ChatSessionSummary(
-            id=session.id,
-            name=session.description,
-            persona_id=session.persona_id,
-            time_created=session.time_created,
-            shared_status=session.shared_status,
-            current_alternate_model=session.current_alternate_model,
-            current_temperature_override=session.temperature_override,
-        )
+        chat_summary = _to_chat_session_summary(session)
 
         if session_date == today:
             today_chats.append(chat_summary)
@@ -811,8 +864,77 @@ async def search_chats(
     if older_chats:
         groups.append(ChatSessionGroup(title="Older", chats=older_chats))
 
+    return groups
+
+
+@router.get("/search")
+async def search_chats(
+    query: str | None = Query(None),
+    page: int = Query(1),
+    page_size: int = Query(10),
+    ranked: bool = Query(False),
+    cursor: str | None = Query(None),
+    user: User | None = Depends(current_user),
+    db_session: Session = Depends(get_session),
+) -> ChatSearchResponse:
+    """
+    Search for chat sessions based on the provided query.
+    If no query is provided, returns recent chat sessions.
+
+    With ranked=true, matches are ordered by relevance instead of by date and pages
+    are fetched with the next_cursor of the previous page instead of page numbers.
+    """
+    if ranked:
+        try:
+            ranked_sessions, next_cursor = search_chat_sessions_ranked(
+                user_id=user.id if user else None,
+                db_session=db_session,
+                query=query,
+                cursor=cursor,
+                page_size=page_size,
+                include_deleted=False,
+                include_onyxbot_flows=False,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if query and query.strip():
+            # A single group, so the order by relevance is kept
+            groups = (
+                [
+                    ChatSessionGroup(
+                        title="Best Matches",
+                        chats=[
+                            _to_chat_session_summary(session)
+                            for session in ranked_sessions
+                        ],
+                    )
+                ]
+                if ranked_sessions
+                else []
+            )
+        else:
+            groups = _group_chat_sessions_by_date(ranked_sessions)
+
+        return ChatSearchResponse(
+            groups=groups,
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor,
+        )
+
+    # Use the enhanced database function for chat search
+    chat_sessions, has_more = search_chat_sessions(
+        user_id=user.id if user else None,
+        db_session=db_session,
+        query=query,
+        page=page,
+        page_size=page_size,
+        include_deleted=False,
+        include_onyxbot_flows=False,
+    )
+
     return ChatSearchResponse(
-        groups=groups,
+        groups=_group_chat_sessions_by_date(chat_sessions),
         has_more=has_more,
         next_page=page + 1 if has_more else None,
     )
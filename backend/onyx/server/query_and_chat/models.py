@@ -329,6 +329,8 @@ class ChatSearchResponse(BaseModel):
     groups: list[ChatSessionGroup]
     has_more: bool
     next_page: int | None = None
+    # only set for ranked searches, which are paginated with a cursor
+    next_cursor: str | None = None
 
 
 class ChatSearchRequest(BaseModel):
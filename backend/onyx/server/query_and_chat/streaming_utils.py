@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import re
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
 from datetime import datetime
+from typing import Any
 from typing import cast
 
 from sqlalchemy.orm import Session
@@ -14,9 +18,13 @@ from onyx.configs.constants import MessageType
 from onyx.context.search.models import SavedSearchDoc
 from onyx.db.chat import get_db_search_doc_by_document_id
 from onyx.db.chat import get_db_search_doc_by_id
+from onyx.db.chat import get_db_search_docs_by_ids
 from onyx.db.chat import translate_db_search_doc_to_server_search_doc
 from onyx.db.models import ChatMessage
+from onyx.db.models import SearchDoc as DbSearchDoc
+from onyx.db.models import Tool
 from onyx.db.tools import get_tool_by_id
+from onyx.db.tools import get_tools_by_ids
 from onyx.server.query_and_chat.streaming_models import CitationDelta
 from onyx.server.query_and_chat.streaming_models import CitationInfo
 from onyx.server.query_and_chat.streaming_models import CitationStart
@@ -45,10 +53,13 @@ from onyx.tools.tool_implementations.okta_profile.okta_profile_tool import (
 )
 from onyx.tools.tool_implementations.search.search_tool import SearchTool
 from onyx.tools.tool_implementations.web_search.web_search_tool import WebSearchTool
+from shared_configs.contextvars import get_current_tenant_id
 
 
 _CANNOT_SHOW_STEP_RESULTS_STR = "[Cannot display step results]"
 
+TRANSLATED_PACKETS_CACHE_SIZE = 1_000
+
 
 def _adjust_message_text_for_agent_search_results(
     adjusted_message_text: str, final_documents: list[SavedSearchDoc]
@@ -245,12 +256,80 @@ def create_search_packets(
     return packets
 
 
+class PacketTranslationLookups:
+    """The search docs and tools that messages refer to. Each one is queried on first
+    use, unless `prefetch` already loaded everything for a set of messages."""
+
+    def __init__(self, db_session: Session) -> None:
+        self.db_session = db_session
+        self._search_docs_by_id: dict[int, DbSearchDoc | None] = {}
+        self._search_docs_by_document_id: dict[str, DbSearchDoc | None] = {}
+        self._tools_by_id: dict[int, Tool] = {}
+
+    def prefetch(self, chat_messages: Sequence[ChatMessage]) -> None:
+        """Loads the lookups of all the messages with a constant number of queries. The
+        search docs, research iterations and sub steps of the messages should be
+        eagerly loaded already, see `get_chat_messages_by_session`."""
+        cited_doc_ids: set[int] = set()
+        tool_ids: set[int] = set()
+        for chat_message in chat_messages:
+            for search_doc in chat_message.search_docs:
+                self._search_docs_by_id[search_doc.id] = search_doc
+            cited_doc_ids.update((chat_message.citations or {}).values())
+            for research_iteration in chat_message.research_iterations:
+                tool_ids.update(
+                    sub_step.sub_step_tool_id
+                    for sub_step in research_iteration.sub_steps
+                    if sub_step.sub_step_tool_id is not None
+                )
+
+        missing_doc_ids = cited_doc_ids - self._search_docs_by_id.keys()
+        for search_doc in get_db_search_docs_by_ids(missing_doc_ids, self.db_session):
+            self._search_docs_by_id[search_doc.id] = search_doc
+        for doc_id in missing_doc_ids - self._search_docs_by_id.keys():
+            self._search_docs_by_id[doc_id] = None
+
+        # cited documents are looked up by document id as well, the docs of the
+        # messages themselves are used for that
+        for maybe_search_doc in self._search_docs_by_id.values():
+            if maybe_search_doc is not None:
+                self._search_docs_by_document_id.setdefault(
+                    maybe_search_doc.document_id, maybe_search_doc
+                )
+
+        for tool in get_tools_by_ids(
+            tool_ids - self._tools_by_id.keys(), self.db_session
+        ):
+            self._tools_by_id[tool.id] = tool
+
+    def get_search_doc(self, doc_id: int) -> DbSearchDoc | None:
+        if doc_id not in self._search_docs_by_id:
+            self._search_docs_by_id[doc_id] = get_db_search_doc_by_id(
+                doc_id, self.db_session
+            )
+        return self._search_docs_by_id[doc_id]
+
+    def get_search_doc_by_document_id(self, document_id: str) -> DbSearchDoc | None:
+        if document_id not in self._search_docs_by_document_id:
+            self._search_docs_by_document_id[document_id] = (
+                get_db_search_doc_by_document_id(document_id, self.db_session)
+            )
+        return self._search_docs_by_document_id[document_id]
+
+    def get_tool(self, tool_id: int) -> Tool:
+        if tool_id not in self._tools_by_id:
+            self._tools_by_id[tool_id] = get_tool_by_id(tool_id, self.db_session)
+        return self._tools_by_id[tool_id]
+
+
 def translate_db_message_to_packets(
     chat_message: ChatMessage,
     db_session: Session,
     remove_doc_content: bool = False,
     start_step_nr: int = 1,
+    lookups: PacketTranslationLookups | None = None,
 ) -> EndStepPacketList:
+    lookups = lookups or PacketTranslationLookups(db_session)
     step_nr = start_step_nr
     packet_list: list[Packet] = []
 
@@ -260,7 +339,7 @@ def translate_db_message_to_packets(
         citation_info_list: list[CitationInfo] = []
         if citations:
             for citation_num, search_doc_id in citations.items():
-                search_doc = get_db_search_doc_by_id(search_doc_id, db_session)
+                search_doc = lookups.get_search_doc(search_doc_id)
                 if search_doc:
                     citation_info_list.append(
                         CitationInfo(
@@ -352,7 +431,7 @@ def translate_db_message_to_packets(
                     tool_id = tool_call_ids[0]
                     if not tool_id:
                         raise ValueError("Tool ID is required")
-                    tool = get_tool_by_id(tool_id, db_session)
+                    tool = lookups.get_tool(tool_id)
                     tool_name = tool.name
 
                     if tool_name in [SearchTool.__name__, KnowledgeGraphTool.__name__]:
@@ -420,8 +499,8 @@ def translate_db_message_to_packets(
         if len(citation_info_list) > 0 and len(research_iterations) == 0:
             saved_search_docs: list[SavedSearchDoc] = []
             for citation_info in citation_info_list:
-                cited_doc = get_db_search_doc_by_document_id(
-                    citation_info.document_id, db_session
+                cited_doc = lookups.get_search_doc_by_document_id(
+                    citation_info.document_id
                 )
                 if cited_doc:
                     saved_search_docs.append(
@@ -444,3 +523,88 @@ def translate_db_message_to_packets(
         end_step_nr=step_nr,
         packet_list=packet_list,
     )
+
+
+# (tenant id, message id, remove_doc_content) -> (message fingerprint, packets)
+_translated_packets_cache: OrderedDict[
+    tuple[str, int, bool], tuple[tuple[Any, ...], EndStepPacketList]
+] = OrderedDict()
+_translated_packets_cache_lock = threading.Lock()
+
+
+def _message_fingerprint(chat_message: ChatMessage) -> tuple[Any, ...]:
+    """Changes whenever the packets of the message would change, e.g. when the message
+    is edited or regenerated in place."""
+    return (
+        chat_message.message,
+        tuple(sorted((chat_message.citations or {}).items())),
+        chat_message.research_type,
+        tuple(search_doc.id for search_doc in chat_message.search_docs),
+        tuple(
+            (research_iteration.id, len(research_iteration.sub_steps))
+            for research_iteration in chat_message.research_iterations
+        ),
+    )
+
+
+def translate_db_messages_to_packets(
+    chat_messages: Sequence[ChatMessage],
+    db_session: Session,
+    remove_doc_content: bool = False,
+) -> list[list[Packet]]:
+    """Translates all assistant messages of a chat session. The packets of each message
+    are cached, the lookups for the messages that are not cached are loaded in bulk."""
+    tenant_id = get_current_tenant_id()
+    assistant_messages = [
+        chat_message
+        for chat_message in chat_messages
+        if chat_message.message_type == MessageType.ASSISTANT
+    ]
+
+    cached_packets: dict[int, EndStepPacketList] = {}
+    with _translated_packets_cache_lock:
+        for chat_message in assistant_messages:
+            key = (tenant_id, chat_message.id, remove_doc_content)
+            cached = _translated_packets_cache.get(key)
+            if cached is not None and cached[0] == _message_fingerprint(chat_message):
+                _translated_packets_cache.move_to_end(key)
+                cached_packets[chat_message.id] = cached[1]
+
+    lookups = PacketTranslationLookups(db_session)
+    lookups.prefetch(
+        [
+            chat_message
+            for chat_message in assistant_messages
+            if chat_message.id not in cached_packets
+        ]
+    )
+
+    packet_lists: list[list[Packet]] = []
+    end_step_nr = 1
+    for chat_message in assistant_messages:
+        # the packets are cached from step 0 and shifted to the actual start step
+        packets = cached_packets.get(chat_message.id)
+        if packets is None:
+            packets = translate_db_message_to_packets(
+                chat_message,
+                db_session=db_session,
+                remove_doc_content=remove_doc_content,
+                start_step_nr=0,
+                lookups=lookups,
+            )
+            with _translated_packets_cache_lock:
+                _translated_packets_cache[
+                    (tenant_id, chat_message.id, remove_doc_content)
+                ] = (_message_fingerprint(chat_message), packets)
+                if len(_translated_packets_cache) > TRANSLATED_PACKETS_CACHE_SIZE:
+                    _translated_packets_cache.popitem(last=False)
+
+        packet_list = [
+            Packet(ind=packet.ind + end_step_nr, obj=packet.obj)
+            for packet in packets.packet_list
+        ]
+        end_step_nr += packets.end_step_nr
+        packet_list.append(Packet(ind=end_step_nr, obj=OverallStop()))
+        packet_lists.append(packet_list)
+
+    return packet_lists
@@ -27,7 +27,6 @@ from onyx.context.search.models import RerankingDetails
 from onyx.context.search.models import RetrievalDetails
 from onyx.db.enums import MCPAuthenticationPerformer
 from onyx.db.enums import MCPAuthenticationType
-from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.llm import fetch_existing_llm_providers
 from onyx.db.mcp import get_all_mcp_tools_for_server
 from onyx.db.mcp import get_mcp_server_auth_performer
@@ -36,6 +35,7 @@ from onyx.db.mcp import get_user_connection_config
 from onyx.db.models import Persona
 from onyx.db.models import User
 from onyx.file_store.models import InMemoryChatFile
+from onyx.kg.schema_cache import get_cached_kg_config_settings
 from onyx.llm.interfaces import LLM
 from onyx.llm.interfaces import LLMConfig
 from onyx.natural_language_processing.utils import get_tokenizer
@@ -329,7 +329,7 @@ def construct_tools(
             elif tool_cls.__name__ == KnowledgeGraphTool.__name__:
 
                 # skip the knowledge graph tool if KG is not enabled/exposed
-                kg_config = get_kg_config_settings()
+                kg_config = get_cached_kg_config_settings()
                 if not kg_config.KG_ENABLED or not kg_config.KG_EXPOSED:
                     logger.debug("Knowledge Graph Tool is not enabled/exposed")
                     continue
@@ -7,13 +7,12 @@ from io import StringIO
 from typing import Any
 from typing import cast
 from typing import Dict
+from typing import IO
 from typing import List
 
-import requests
 from langchain_core.messages import HumanMessage
 from langchain_core.messages import SystemMessage
 from pydantic import BaseModel
-from requests import JSONDecodeError
 
 from onyx.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
 from onyx.configs.constants import FileOrigin
@@ -28,6 +27,12 @@ from onyx.tools.models import CHAT_SESSION_ID_PLACEHOLDER
 from onyx.tools.models import DynamicSchemaInfo
 from onyx.tools.models import MESSAGE_ID_PLACEHOLDER
 from onyx.tools.models import ToolResponse
+from onyx.tools.tool_implementations.custom.custom_tool_http import (
+    CustomToolResponseTooLargeError,
+)
+from onyx.tools.tool_implementations.custom.custom_tool_http import (
+    send_custom_tool_request,
+)
 from onyx.tools.tool_implementations.custom.custom_tool_prompts import (
     SHOULD_USE_CUSTOM_TOOL_SYSTEM_PROMPT,
 )
@@ -208,17 +213,20 @@ class CustomTool(BaseTool):
         return None
 
     def _save_and_get_file_references(
-        self, file_content: bytes | str, content_type: str
+        self, file_content: bytes | str | IO[bytes], content_type: str
     ) -> List[str]:
         file_store = get_default_file_store()
 
         file_id = str(uuid.uuid4())
 
-        # Handle both binary and text content
+        # Handle binary, text and streamed content
+        content: IO
         if isinstance(file_content, str):
             content = BytesIO(file_content.encode())
-        else:
+        elif isinstance(file_content, bytes):
             content = BytesIO(file_content)
+        else:
+            content = file_content
 
         file_store.save_file(
             file_id=file_id,
@@ -260,24 +268,37 @@ class CustomTool(BaseTool):
         url = self._method_spec.build_url(self._base_url, path_params, query_params)
         method = self._method_spec.method
 
-        response = requests.request(
-            method, url, json=request_body, headers=self.headers
-        )
+        try:
+            response = send_custom_tool_request(
+                method,
+                url,
+                json=request_body,
+                headers=self.headers,
+                tool_name=self._name,
+            )
+        except CustomToolResponseTooLargeError as e:
+            logger.warning(f"Response of tool '{self._name}' is too large: {e}")
+            yield ToolResponse(
+                id=CUSTOM_TOOL_RESPONSE_ID,
+                response=CustomToolCallSummary(
+                    tool_name=self._name,
+                    response_type="json",
+                    tool_result={"error": f"Tool response is too large: {e}"},
+                ),
+            )
+            return
+
         content_type = response.headers.get("Content-Type", "")
 
         tool_result: Any
         response_type: str
         if "text/csv" in content_type:
-            file_ids = self._save_and_get_file_references(
-                response.content, content_type
-            )
+            file_ids = self._save_and_get_file_references(response.body, content_type)
             tool_result = CustomToolUserFileSnapshot(file_ids=file_ids)
             response_type = "csv"
 
         elif "image/" in content_type:
-            file_ids = self._save_and_get_file_references(
-                response.content, content_type
-            )
+            file_ids = self._save_and_get_file_references(response.body, content_type)
             tool_result = CustomToolUserFileSnapshot(file_ids=file_ids)
             response_type = "image"
 
@@ -285,7 +306,7 @@ class CustomTool(BaseTool):
             try:
                 tool_result = response.json()
                 response_type = "json"
-            except JSONDecodeError:
+            except ValueError:
                 logger.exception(
                     f"Failed to parse response as JSON for tool '{self._name}'"
                 )
@@ -0,0 +1,254 @@
+"""
+HTTP execution of custom (OpenAPI) tools.
+
+Requests go through a pooled HTTP/2 client per host, so consecutive calls of the tools
+of a host reuse their connections, and the pool size limits the concurrent requests
+per host. Responses are streamed into a spooled file with a size budget instead of
+being buffered whole, and the responses of GET requests can be cached for as long as
+their Cache-Control header allows.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any
+from typing import IO
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import Histogram
+
+from onyx.configs.tool_configs import CUSTOM_TOOL_MAX_CONNECTIONS_PER_HOST
+from onyx.configs.tool_configs import CUSTOM_TOOL_MAX_RESPONSE_BYTES
+from onyx.configs.tool_configs import CUSTOM_TOOL_REQUEST_TIMEOUT_SECONDS
+from onyx.configs.tool_configs import CUSTOM_TOOL_RESPONSE_CACHE_ENABLED
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# responses larger than this are written to a temporary file while they are read
+_SPOOL_MAX_MEMORY_BYTES = 1024 * 1024
+_MAX_CLIENTS = 64
+_RESPONSE_CACHE_SIZE = 256
+_MAX_CACHED_RESPONSE_BYTES = 1024 * 1024
+
+custom_tool_request_latency = Histogram(
+    "onyx_custom_tool_request_latency_seconds",
+    "Latency of the HTTP requests of custom tools",
+    ["tool_name", "status"],
+)
+
+
+class CustomToolResponseTooLargeError(Exception):
+    pass
+
+
+class CustomToolHttpResponse:
+    def __init__(
+        self,
+        status_code: int,
+        headers: httpx.Headers,
+        body: IO[bytes],
+        encoding: str | None = None,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        # positioned at the start of the response body
+        self.body = body
+        self.encoding = encoding
+
+    def read(self) -> bytes:
+        self.body.seek(0)
+        return self.body.read()
+
+    @property
+    def text(self) -> str:
+        return self.read().decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Raises a ValueError if the body is not valid JSON"""
+        return json.loads(self.read())
+
+
+class _CachedResponse:
+    def __init__(
+        self,
+        status_code: int,
+        headers: httpx.Headers,
+        content: bytes,
+        encoding: str | None,
+        expires: float,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.expires = expires
+
+
+_clients: OrderedDict[str, httpx.Client] = OrderedDict()
+_clients_pid: int | None = None
+_clients_lock = threading.Lock()
+
+_response_cache: OrderedDict[str, _CachedResponse] = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _build_client() -> httpx.Client:
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=CUSTOM_TOOL_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=CUSTOM_TOOL_MAX_CONNECTIONS_PER_HOST,
+        ),
+        timeout=httpx.Timeout(CUSTOM_TOOL_REQUEST_TIMEOUT_SECONDS),
+    )
+
+
+def _get_client(url: str) -> httpx.Client:
+    global _clients_pid
+
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _clients_lock:
+        # connections must not be shared with a forked process
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(host)
+        if client is None:
+            client = _build_client()
+            _clients[host] = client
+            while len(_clients) > _MAX_CLIENTS:
+                _, evicted_client = _clients.popitem(last=False)
+                evicted_client.close()
+        _clients.move_to_end(host)
+        return client
+
+
+def _cache_key(url: str, headers: dict[str, str]) -> str:
+    # the headers carry the credentials, responses are never shared across them
+    return hashlib.sha256(
+        json.dumps([url, headers], sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _get_cache_ttl(headers: httpx.Headers) -> int | None:
+    directives: dict[str, str] = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives or "no-cache" in directives:
+        return None
+    try:
+        max_age = int(directives.get("max-age", ""))
+    except ValueError:
+        return None
+    return max_age if max_age > 0 else None
+
+
+def _get_cached_response(key: str) -> CustomToolHttpResponse | None:
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is None:
+            return None
+        if cached.expires < time.monotonic():
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+
+    return CustomToolHttpResponse(
+        cached.status_code, cached.headers, BytesIO(cached.content), cached.encoding
+    )
+
+
+def _cache_response(key: str, response: CustomToolHttpResponse, size: int) -> None:
+    ttl = _get_cache_ttl(response.headers)
+    if ttl is None or response.status_code != 200:
+        return
+    if size > _MAX_CACHED_RESPONSE_BYTES:
+        return
+
+    with _response_cache_lock:
+        _response_cache[key] = _CachedResponse(
+            response.status_code,
+            response.headers,
+            response.read(),
+            response.encoding,
+            time.monotonic() + ttl,
+        )
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+def _read_body(response: httpx.Response) -> tuple[IO[bytes], int]:
+    content_length = response.headers.get("Content-Length")
+    if content_length and int(content_length) > CUSTOM_TOOL_MAX_RESPONSE_BYTES:
+        raise CustomToolResponseTooLargeError(
+            f"Response of {content_length} bytes exceeds the limit of "
+            f"{CUSTOM_TOOL_MAX_RESPONSE_BYTES} bytes"
+        )
+
+    body = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY_BYTES)
+    size = 0
+    for chunk in response.iter_bytes():
+        size += len(chunk)
+        if size > CUSTOM_TOOL_MAX_RESPONSE_BYTES:
+            body.close()
+            raise CustomToolResponseTooLargeError(
+                f"Response exceeds the limit of {CUSTOM_TOOL_MAX_RESPONSE_BYTES} bytes"
+            )
+        body.write(chunk)
+
+    body.seek(0)
+    return body, size
+
+
+def send_custom_tool_request(
+    method: str,
+    url: str,
+    json: Any,
+    headers: dict[str, str],
+    tool_name: str,
+) -> CustomToolHttpResponse:
+    """Sends the request of a custom tool. Raises a CustomToolResponseTooLargeError if
+    the response is larger than CUSTOM_TOOL_MAX_RESPONSE_BYTES."""
+    cache_key: str | None = None
+    if CUSTOM_TOOL_RESPONSE_CACHE_ENABLED and method.upper() == "GET":
+        cache_key = _cache_key(url, headers)
+        cached_response = _get_cached_response(cache_key)
+        if cached_response is not None:
+            custom_tool_request_latency.labels(tool_name, "cached").observe(0)
+            return cached_response
+
+    start = time.monotonic()
+    status = "error"
+    try:
+        with _get_client(url).stream(
+            method, url, json=json, headers=headers
+        ) as response:
+            status = str(response.status_code)
+            body, size = _read_body(response)
+            tool_response = CustomToolHttpResponse(
+                response.status_code,
+                response.headers,
+                body,
+                response.charset_encoding,
+            )
+    finally:
+        elapsed = time.monotonic() - start
+        custom_tool_request_latency.labels(tool_name, status).observe(elapsed)
+        logger.debug(f"Custom tool '{tool_name}' request took {elapsed:.3f}s")
+
+    if cache_key is not None:
+        _cache_response(cache_key, tool_response, size)
+
+    return tool_response
@@ -4,7 +4,7 @@ from typing import Any
 from sqlalchemy.orm import Session
 
 from onyx.chat.prompt_builder.answer_prompt_builder import AnswerPromptBuilder
-from onyx.db.kg_config import get_kg_config_settings
+from onyx.kg.schema_cache import get_cached_kg_config_settings
 from onyx.llm.interfaces import LLM
 from onyx.llm.models import PreviousMessage
 from onyx.tools.message import ToolCallSummary
@@ -46,7 +46,7 @@ class KnowledgeGraphTool(Tool[None]):
     @classmethod
     def is_available(cls, db_session: Session) -> bool:
         """Available only if KG is enabled and exposed."""
-        kg_configs = get_kg_config_settings()
+        kg_configs = get_cached_kg_config_settings()
         return kg_configs.KG_ENABLED and kg_configs.KG_EXPOSED
 
     def tool_definition(self) -> dict:
@@ -5,7 +5,6 @@ This module provides a proper MCP client that follows the JSON-RPC 2.0 specifica
 and handles connection initialization, session management, and protocol communication.
 """
 
-import asyncio
 from collections.abc import Awaitable
 from collections.abc import Callable
 from enum import Enum
@@ -15,13 +14,15 @@ from typing import TypeVar
 from urllib.parse import urlencode
 
 from mcp import ClientSession
-from mcp.client.streamable_http import streamablehttp_client  # or use stdio_client
 from mcp.types import CallToolResult
 from mcp.types import InitializeResult
 from mcp.types import ListResourcesResult
 from mcp.types import Tool as MCPLibTool
 from pydantic import BaseModel
 
+from onyx.tools.tool_implementations.mcp.mcp_session_manager import (
+    get_mcp_session_manager,
+)
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -89,39 +90,9 @@ class MCPMessage(BaseModel):
         return msg
 
 
-# TODO: in the future we should do things like manage sessions and handle errors better
-# using an abstraction like this. For now things are purely functional and we initialize
-# a new session for each tool call.
-# class MCPClient:
-#     """
-#     MCP Client implementation that properly handles the protocol lifecycle
-#     and different transport mechanisms.
-#     """
-
-#     def __init__(
-#         self,
-#         server_url: str,
-#         transport: MCPTransport = MCPTransport.HTTP_STREAM,
-#         auth_token: str | None = None,
-#     ):
-#         self.server_url = server_url
-#         self.transport = transport
-#         self.auth_token = auth_token
-
-#         # Session management
-#         self.session: Optional[aiohttp.ClientSession] = None
-#         self.initialized = False
-#         self.capabilities: Dict[str, Any] = {}
-#         self.protocol_version = "2025-03-26"  # Current MCP protocol version
-#         self.session_id: str | None = None
-#         # Legacy HTTP+SSE transport support (backwards compatibility)
-#         self.legacy_post_endpoint: str | None = None
-
-#         # Message ID counter
-#         self._message_id_counter = 0
-
-#         # For stdio transport
-#         self.process: Optional[subprocess.Popen] = None
+def _build_server_url(server_url: str, transport: MCPTransport) -> str:
+    sep = "?" if "?" not in server_url else "&"
+    return server_url.rstrip("/") + sep + urlencode({"transportType": transport.value})
 
 
 def _call_mcp_client_function(
@@ -132,30 +103,12 @@ def _call_mcp_client_function(
     **kwargs: Any,
 ) -> T:
     auth_headers = connection_headers or {}
-    sep = "?" if "?" not in server_url else "&"
-    server_url = (
-        server_url.rstrip("/") + sep + urlencode({"transportType": transport.value})
-    )
-
-    async def run_client_function() -> T:
-        async with streamablehttp_client(server_url, headers=auth_headers) as (
-            read,
-            write,
-            _,
-        ):
-            async with ClientSession(read, write) as session:
-                return await function(session, **kwargs)
+    server_url = _build_server_url(server_url, transport)
 
     try:
-        # Run the async function in a new event loop
-        # TODO: We should use asyncio.get_event_loop() instead,
-        # but not sure whether closing the loop is safe
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(run_client_function())
-        finally:
-            loop.close()
+        return get_mcp_session_manager().run(
+            lambda session: function(session, **kwargs), server_url, auth_headers
+        )
     except Exception as e:
         logger.error(f"Failed to call MCP client function: {e}")
         if isinstance(e, ExceptionGroup):
@@ -180,7 +133,6 @@ def process_mcp_result(call_tool_result: CallToolResult) -> str:
 
 def _call_mcp_tool(tool_name: str, arguments: dict[str, Any]) -> MCPClientFunction[str]:
     async def call_tool(session: ClientSession) -> str:
-        await session.initialize()
         result = await session.call_tool(tool_name, arguments)
         return process_mcp_result(result)
 
@@ -208,20 +160,16 @@ def initialize_mcp_client(
     connection_headers: dict[str, str] | None = None,
     transport: str = "streamable-http",
 ) -> InitializeResult:
-    return _call_mcp_client_function(
-        lambda session: session.initialize(),
-        server_url,
-        connection_headers,
-        MCPTransport(transport),
+    # sessions are initialized when they are opened, a pooled session is not
+    # initialized again
+    return get_mcp_session_manager().get_initialize_result(
+        _build_server_url(server_url, MCPTransport(transport)),
+        connection_headers or {},
     )
 
 
 async def _discover_mcp_tools(session: ClientSession) -> list[MCPLibTool]:
-    # 1) initialize
-    init_result = await session.initialize()  # sends JSON-RPC "initialize"
-    logger.info(f"Initialized with server: {init_result.serverInfo}")
-
-    # 2) tools/list
+    # the session is already initialized by the session manager
     tools_response = await session.list_tools()  # sends JSON-RPC "tools/list"
     return tools_response.tools
 
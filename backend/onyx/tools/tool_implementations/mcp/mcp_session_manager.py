@@ -0,0 +1,320 @@
+"""
+Long-lived MCP client sessions.
+
+All sessions live on a single background event loop. Pooled sessions are keyed by
+server URL and connection headers (the auth identity), so an initialized session is
+reused by every tool call and tool discovery with the same credentials.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Any
+from typing import TypeVar
+
+import anyio
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import InitializeResult
+
+from onyx.configs.tool_configs import MCP_REQUEST_TIMEOUT_SECONDS
+from onyx.configs.tool_configs import MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS
+from onyx.configs.tool_configs import MCP_SESSION_IDLE_TIMEOUT_SECONDS
+from onyx.configs.tool_configs import MCP_SESSION_POOL_ENABLED
+from onyx.configs.tool_configs import MCP_SESSION_POOL_MAX_SIZE
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+_PING_TIMEOUT_SECONDS = 10
+_CLOSE_TIMEOUT_SECONDS = 10
+
+# The session was closed before the request was sent, so it is safe to retry the
+# request on a new session
+_CLOSED_SESSION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+def _session_key(server_url: str, headers: dict[str, str]) -> str:
+    headers_hash = hashlib.sha256(
+        json.dumps(headers, sort_keys=True).encode()
+    ).hexdigest()
+    return f"{server_url}:{headers_hash}"
+
+
+class _MCPSession:
+    """An initialized ClientSession. The streamablehttp_client and ClientSession
+    contexts are entered and exited by the same task, since the anyio task groups
+    inside them can not be exited from another task."""
+
+    def __init__(self, server_url: str, headers: dict[str, str]) -> None:
+        self.server_url = server_url
+        self.headers = headers
+        self.session: ClientSession | None = None
+        self.initialize_result: InitializeResult | None = None
+        self.last_used = time.monotonic()
+        self.last_healthy = time.monotonic()
+        self.in_use = 0
+        self._close_event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def open(self) -> None:
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        await ready
+
+    async def _run(self, ready: asyncio.Future[None]) -> None:
+        try:
+            async with streamablehttp_client(self.server_url, headers=self.headers) as (
+                read,
+                write,
+                _,
+            ):
+                async with ClientSession(
+                    read,
+                    write,
+                    read_timeout_seconds=timedelta(seconds=MCP_REQUEST_TIMEOUT_SECONDS),
+                ) as session:
+                    self.initialize_result = await session.initialize()
+                    logger.info(
+                        f"Initialized MCP session with server: "
+                        f"{self.initialize_result.serverInfo}"
+                    )
+                    self.session = session
+                    ready.set_result(None)
+                    await self._close_event.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session to {self.server_url} failed: {e}")
+        finally:
+            self.session = None
+            if not ready.done():
+                ready.set_exception(
+                    RuntimeError(f"MCP session to {self.server_url} was closed")
+                )
+
+    async def is_healthy(self) -> bool:
+        if not self.is_open or self.session is None:
+            return False
+        if (
+            time.monotonic() - self.last_healthy
+            < MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS
+        ):
+            return True
+
+        try:
+            await asyncio.wait_for(self.session.send_ping(), _PING_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.info(f"MCP session to {self.server_url} failed the ping: {e}")
+            return False
+
+        self.last_healthy = time.monotonic()
+        return True
+
+    async def close(self) -> None:
+        self._close_event.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, _CLOSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to close MCP session to {self.server_url}: {e}")
+
+
+class MCPSessionManager:
+    """Runs MCP client functions on a background event loop, reusing initialized
+    sessions. Pooled sessions are pinged before reuse if they have not been used for a
+    while, closed once they are idle for too long and reconnected on failure."""
+
+    def __init__(self, pooled: bool = MCP_SESSION_POOL_ENABLED) -> None:
+        self.pooled = pooled
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+        # only accessed from the event loop
+        self._sessions: OrderedDict[str, _MCPSession] = OrderedDict()
+        self._session_locks: dict[str, asyncio.Lock] = {}
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            # the loop thread does not survive a fork (e.g. of celery workers)
+            if self._loop is None or self._pid != os.getpid():
+                self._sessions = OrderedDict()
+                self._session_locks = {}
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="mcp-session-manager",
+                    daemon=True,
+                ).start()
+                if self.pooled:
+                    asyncio.run_coroutine_threadsafe(
+                        self._evict_idle_sessions_periodically(), self._loop
+                    )
+            return self._loop
+
+    def _submit(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        future: Future[T] = asyncio.run_coroutine_threadsafe(
+            coroutine, self._get_loop()
+        )
+        return future.result()
+
+    def run(
+        self,
+        function: Callable[[ClientSession], Awaitable[T]],
+        server_url: str,
+        headers: dict[str, str],
+    ) -> T:
+        """Runs the function with an initialized session to the server"""
+
+        async def run_function(mcp_session: _MCPSession) -> T:
+            if mcp_session.session is None:
+                raise anyio.ClosedResourceError()
+            return await function(mcp_session.session)
+
+        return self._submit(self._with_session(run_function, server_url, headers))
+
+    def get_initialize_result(
+        self, server_url: str, headers: dict[str, str]
+    ) -> InitializeResult:
+        async def get_result(mcp_session: _MCPSession) -> InitializeResult:
+            if mcp_session.initialize_result is None:
+                raise RuntimeError(f"MCP session to {server_url} is not initialized")
+            return mcp_session.initialize_result
+
+        return self._submit(self._with_session(get_result, server_url, headers))
+
+    async def _with_session(
+        self,
+        function: Callable[[_MCPSession], Awaitable[T]],
+        server_url: str,
+        headers: dict[str, str],
+    ) -> T:
+        if not self.pooled:
+            mcp_session = _MCPSession(server_url, headers)
+            try:
+                await mcp_session.open()
+                return await function(mcp_session)
+            finally:
+                await mcp_session.close()
+
+        key = _session_key(server_url, headers)
+        for attempt in range(2):
+            mcp_session = await self._get_session(key, server_url, headers)
+            mcp_session.in_use += 1
+            try:
+                result = await function(mcp_session)
+                mcp_session.last_healthy = time.monotonic()
+                return result
+            except McpError:
+                # an error response from the server, the session itself is fine
+                raise
+            except _CLOSED_SESSION_ERRORS as e:
+                await self._close_session(key, mcp_session)
+                if attempt > 0:
+                    raise
+                logger.info(
+                    f"MCP session to {server_url} was closed, reconnecting: {e}"
+                )
+            except Exception:
+                # the request may have been processed, so it is not retried
+                await self._close_session(key, mcp_session)
+                raise
+            finally:
+                mcp_session.in_use -= 1
+                mcp_session.last_used = time.monotonic()
+
+        raise RuntimeError(f"Failed to reconnect the MCP session to {server_url}")
+
+    async def _get_session(
+        self, key: str, server_url: str, headers: dict[str, str]
+    ) -> _MCPSession:
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            mcp_session = self._sessions.get(key)
+            if mcp_session is not None and not await mcp_session.is_healthy():
+                await self._close_session(key, mcp_session)
+                mcp_session = None
+
+            if mcp_session is None:
+                mcp_session = _MCPSession(server_url, headers)
+                await mcp_session.open()
+                self._sessions[key] = mcp_session
+                await self._evict_over_capacity()
+
+            self._sessions.move_to_end(key)
+            return mcp_session
+
+    async def _close_session(self, key: str, mcp_session: _MCPSession) -> None:
+        # the session may already have been replaced by a new one
+        if self._sessions.get(key) is mcp_session:
+            del self._sessions[key]
+        await mcp_session.close()
+
+    async def _evict_over_capacity(self) -> None:
+        unused_keys = [
+            key
+            for key, mcp_session in self._sessions.items()
+            if mcp_session.in_use == 0
+        ]
+        num_to_evict = len(self._sessions) - MCP_SESSION_POOL_MAX_SIZE
+        for key in unused_keys[: max(num_to_evict, 0)]:
+            await self._close_session(key, self._sessions[key])
+
+    async def _evict_idle_sessions(self) -> None:
+        now = time.monotonic()
+        idle_sessions = [
+            (key, mcp_session)
+            for key, mcp_session in self._sessions.items()
+            if mcp_session.in_use == 0
+            and now - mcp_session.last_used > MCP_SESSION_IDLE_TIMEOUT_SECONDS
+        ]
+        for key, mcp_session in idle_sessions:
+            logger.debug(f"Closing idle MCP session to {mcp_session.server_url}")
+            await self._close_session(key, mcp_session)
+
+        for key in list(self._session_locks):
+            if key not in self._sessions and not self._session_locks[key].locked():
+                del self._session_locks[key]
+
+    async def _evict_idle_sessions_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(min(MCP_SESSION_IDLE_TIMEOUT_SECONDS, 60))
+            try:
+                await self._evict_idle_sessions()
+            except Exception:
+                logger.exception("Failed to evict idle MCP sessions")
+
+
+_mcp_session_manager: MCPSessionManager | None = None
+_mcp_session_manager_lock = threading.Lock()
+
+
+def get_mcp_session_manager() -> MCPSessionManager:
+    global _mcp_session_manager
+    with _mcp_session_manager_lock:
+        if _mcp_session_manager is None:
+            _mcp_session_manager = MCPSessionManager()
+        return _mcp_session_manager
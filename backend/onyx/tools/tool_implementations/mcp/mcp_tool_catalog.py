@@ -0,0 +1,209 @@
+"""
+Catalog of the tools of MCP servers.
+
+Listing the tools of a remote MCP server is a network round trip (and a session
+handshake on a cold connection), so the results are kept in Redis and in-process and
+served stale while they are refreshed in the background. A Celery beat task keeps the
+catalog of every configured server fresh.
+
+Entries are keyed by server and connection headers, since the tools a server exposes
+can depend on the credentials. Every entry has a version (a hash of the tools) that
+only changes when the tools change, the in-process copy is reused as long as its
+version matches the one in Redis.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from mcp.types import Tool as MCPLibTool
+from pydantic import BaseModel
+
+from onyx.configs.tool_configs import MCP_TOOL_CATALOG_MAX_AGE_SECONDS
+from onyx.configs.tool_configs import MCP_TOOL_CATALOG_TTL_SECONDS
+from onyx.redis.redis_pool import get_redis_client
+from onyx.tools.tool_implementations.mcp.mcp_client import discover_mcp_tools
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_in_background
+
+logger = setup_logger()
+
+MCP_TOOL_CATALOG_PREFIX = "mcp_tool_catalog"
+
+_REFRESH_LOCK_TIMEOUT_SECONDS = 60
+_LOCAL_CATALOG_SIZE = 256
+
+
+class MCPToolCatalog(BaseModel):
+    version: str
+    fetched_at: float
+    # None if the tools could not be listed with these connection headers
+    tools: list[MCPLibTool] | None
+    error: str | None = None
+
+
+_local_catalogs: OrderedDict[tuple[str, str], MCPToolCatalog] = OrderedDict()
+_local_catalogs_lock = threading.Lock()
+
+
+def mcp_tool_catalog_key(
+    server_id: int, server_url: str, connection_headers: dict[str, str]
+) -> str:
+    identity = json.dumps([server_url, connection_headers], sort_keys=True)
+    return (
+        f"{MCP_TOOL_CATALOG_PREFIX}:{server_id}:"
+        f"{hashlib.sha256(identity.encode()).hexdigest()}"
+    )
+
+
+def _version_key(key: str) -> str:
+    return f"{key}:version"
+
+
+def _requested_key(key: str) -> str:
+    # only set when the catalog is requested, not when it is refreshed
+    return f"{key}:requested"
+
+
+def _get_local_catalog(tenant_id: str, key: str) -> MCPToolCatalog | None:
+    with _local_catalogs_lock:
+        catalog = _local_catalogs.get((tenant_id, key))
+        if catalog is not None:
+            _local_catalogs.move_to_end((tenant_id, key))
+        return catalog
+
+
+def _set_local_catalog(tenant_id: str, key: str, catalog: MCPToolCatalog) -> None:
+    with _local_catalogs_lock:
+        _local_catalogs[(tenant_id, key)] = catalog
+        _local_catalogs.move_to_end((tenant_id, key))
+        while len(_local_catalogs) > _LOCAL_CATALOG_SIZE:
+            _local_catalogs.popitem(last=False)
+
+
+def _is_stale(catalog: MCPToolCatalog) -> bool:
+    return time.time() - catalog.fetched_at > MCP_TOOL_CATALOG_TTL_SECONDS
+
+
+def fetch_mcp_tool_catalog(
+    server_id: int,
+    server_url: str,
+    connection_headers: dict[str, str],
+    tenant_id: str,
+) -> MCPToolCatalog:
+    """Lists the tools of the server and stores them in the catalog. A failure to list
+    the tools is stored as well, so it is not retried on every request."""
+    tools: list[MCPLibTool] | None = None
+    error: str | None = None
+    try:
+        tools = discover_mcp_tools(server_url, connection_headers)
+    except Exception as e:
+        logger.warning(f"Failed to list the tools of MCP server {server_url}: {e}")
+        error = str(e)
+
+    content = (
+        json.dumps([tool.model_dump(mode="json") for tool in tools], sort_keys=True)
+        if tools is not None
+        else f"error:{error}"
+    )
+    catalog = MCPToolCatalog(
+        version=hashlib.sha256(content.encode()).hexdigest(),
+        fetched_at=time.time(),
+        tools=tools,
+        error=error,
+    )
+
+    key = mcp_tool_catalog_key(server_id, server_url, connection_headers)
+    redis_client = get_redis_client(tenant_id=tenant_id)
+    previous_version = redis_client.get(_version_key(key))
+    pipeline = redis_client.pipeline()
+    pipeline.set(key, catalog.model_dump_json(), ex=MCP_TOOL_CATALOG_MAX_AGE_SECONDS)
+    pipeline.set(
+        _version_key(key), catalog.version, ex=MCP_TOOL_CATALOG_MAX_AGE_SECONDS
+    )
+    pipeline.execute()
+    _set_local_catalog(tenant_id, key, catalog)
+
+    if previous_version is not None and previous_version.decode() != catalog.version:
+        logger.info(f"The tools of MCP server {server_url} changed")
+
+    return catalog
+
+
+def _refresh_in_background(
+    server_id: int,
+    server_url: str,
+    connection_headers: dict[str, str],
+    tenant_id: str,
+) -> None:
+    key = mcp_tool_catalog_key(server_id, server_url, connection_headers)
+    # only one refresh per entry at a time across all processes
+    if not get_redis_client(tenant_id=tenant_id).set(
+        f"{key}:refreshing", 1, nx=True, ex=_REFRESH_LOCK_TIMEOUT_SECONDS
+    ):
+        return
+
+    run_in_background(
+        fetch_mcp_tool_catalog, server_id, server_url, connection_headers, tenant_id
+    )
+
+
+def get_mcp_tool_catalog(
+    server_id: int,
+    server_url: str,
+    connection_headers: dict[str, str],
+    tenant_id: str,
+    block_on_miss: bool = True,
+) -> MCPToolCatalog | None:
+    """Returns the catalog of the server, stale entries are returned while they are
+    refreshed in the background. If there is no entry yet, the tools are listed
+    synchronously, or with block_on_miss=False, None is returned and the tools are
+    listed in the background."""
+    key = mcp_tool_catalog_key(server_id, server_url, connection_headers)
+    redis_client = get_redis_client(tenant_id=tenant_id)
+    redis_client.set(
+        _requested_key(key), int(time.time()), ex=MCP_TOOL_CATALOG_MAX_AGE_SECONDS
+    )
+
+    catalog: MCPToolCatalog | None = None
+    version = redis_client.get(_version_key(key))
+    if version is not None:
+        catalog = _get_local_catalog(tenant_id, key)
+        # a refresh that did not change the tools keeps the version, so a stale
+        # local copy may have been refreshed in Redis
+        if catalog is None or catalog.version != version.decode() or _is_stale(catalog):
+            raw_catalog = redis_client.get(key)
+            catalog = (
+                MCPToolCatalog.model_validate_json(raw_catalog)
+                if raw_catalog is not None
+                else None
+            )
+            if catalog is not None:
+                _set_local_catalog(tenant_id, key, catalog)
+
+    if catalog is None:
+        if not block_on_miss:
+            _refresh_in_background(server_id, server_url, connection_headers, tenant_id)
+            return None
+        return fetch_mcp_tool_catalog(
+            server_id, server_url, connection_headers, tenant_id
+        )
+
+    if _is_stale(catalog):
+        _refresh_in_background(server_id, server_url, connection_headers, tenant_id)
+
+    return catalog
+
+
+def was_mcp_tool_catalog_requested(
+    server_id: int,
+    server_url: str,
+    connection_headers: dict[str, str],
+    tenant_id: str,
+) -> bool:
+    """Whether the catalog was requested in the last MCP_TOOL_CATALOG_MAX_AGE_SECONDS.
+    Refreshes do not count, so catalogs nobody uses are not kept fresh forever."""
+    key = mcp_tool_catalog_key(server_id, server_url, connection_headers)
+    return bool(get_redis_client(tenant_id=tenant_id).exists(_requested_key(key)))
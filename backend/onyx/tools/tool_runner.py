@@ -10,6 +10,8 @@ from onyx.tools.models import ToolCallFinalResult
 from onyx.tools.models import ToolCallKickoff
 from onyx.tools.models import ToolResponse
 from onyx.tools.tool import Tool
+from onyx.utils.cancellation import is_request_cancelled
+from onyx.utils.cancellation import RequestCancelledError
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 
@@ -41,6 +43,14 @@ class ToolRunner(Generic[R]):
             yield tool_response
             tool_responses.append(tool_response)
 
+            if is_request_cancelled():
+                # keep what was produced so that the tool is not run again by
+                # tool_final_result or tool_message_content
+                self._tool_responses = tool_responses
+                raise RequestCancelledError(
+                    f"Request cancelled while running tool {self.tool.name}"
+                )
+
         self._tool_responses = tool_responses
 
     def tool_message_content(self) -> str | list[str | dict[str, Any]]:
@@ -0,0 +1,19 @@
+import contextvars
+import threading
+
+# Set for requests that stream a response, e.g. chat messages. The event is set once
+# the client disconnected, so that the work done for the request can stop early.
+REQUEST_CANCELLED_EVENT_CONTEXTVAR: contextvars.ContextVar[threading.Event | None] = (
+    contextvars.ContextVar("request_cancelled_event", default=None)
+)
+
+
+class RequestCancelledError(Exception):
+    """Raised to stop the work done for a request once its client disconnected, so that
+    partial results are not mistaken for complete ones."""
+
+
+def is_request_cancelled() -> bool:
+    """Cheap enough to be checked for every streamed token."""
+    cancelled_event = REQUEST_CANCELLED_EVENT_CONTEXTVAR.get()
+    return cancelled_event is not None and cancelled_event.is_set()
@@ -1,16 +1,20 @@
+import asyncio
 import collections.abc
 import contextvars
 import copy
 import threading
 import uuid
+from collections.abc import AsyncIterator
 from collections.abc import Callable
 from collections.abc import Iterator
 from collections.abc import MutableMapping
 from collections.abc import Sequence
 from concurrent.futures import as_completed
+from concurrent.futures import CancelledError as FuturesCancelledError
 from concurrent.futures import FIRST_COMPLETED
 from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from concurrent.futures import wait
 from typing import Any
 from typing import cast
@@ -405,3 +409,85 @@ def parallel_yield_from_funcs(
     yield from parallel_yield(
         [func_wrapper(func) for func in funcs], max_workers=max_workers
     )
+
+
+class _GeneratorError:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+_GENERATOR_DONE = object()
+# Max number of items of a generator iterated by iterate_in_executor that wait to be
+# consumed, and how often a paused generator checks whether the caller is gone
+_ITERATE_IN_EXECUTOR_MAX_BUFFERED_ITEMS = 64
+_ITERATE_IN_EXECUTOR_POLL_SECONDS = 1.0
+
+
+async def iterate_in_executor(
+    gen: Iterator[R],
+    executor: ThreadPoolExecutor,
+    max_buffered_items: int = _ITERATE_IN_EXECUTOR_MAX_BUFFERED_ITEMS,
+) -> AsyncIterator[R]:
+    """
+    Iterates a blocking generator on a thread of the given executor and yields its
+    items on the event loop. The whole iteration is a single job of the executor, so
+    the size of the executor bounds the number of generators iterated at the same time.
+    The generator runs with a copy of the context of the caller, e.g. the tenant id.
+
+    At most max_buffered_items items wait to be consumed, the generator is paused
+    until the caller catches up (e.g. a slow client), so the items do not pile up.
+
+    If the caller stops early, the generator is closed once it produces its next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=max_buffered_items)
+    stop_event = threading.Event()
+
+    def put(item: Any) -> None:
+        try:
+            put_future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        except RuntimeError:
+            # the event loop is closed, nobody is waiting for the items anymore
+            stop_event.set()
+            return
+
+        # blocks while the queue is full, unless the caller is gone
+        while True:
+            try:
+                put_future.result(timeout=_ITERATE_IN_EXECUTOR_POLL_SECONDS)
+                return
+            except FuturesTimeoutError:
+                if stop_event.is_set() or loop.is_closed():
+                    stop_event.set()
+                    put_future.cancel()
+                    return
+            except FuturesCancelledError:
+                # the event loop is shutting down
+                stop_event.set()
+                return
+
+    def produce() -> None:
+        try:
+            for item in gen:
+                if stop_event.is_set():
+                    break
+                put(item)
+        except BaseException as e:
+            put(_GeneratorError(e))
+        finally:
+            if stop_event.is_set() and isinstance(gen, collections.abc.Generator):
+                gen.close()
+            put(_GENERATOR_DONE)
+
+    context = contextvars.copy_context()
+    loop.run_in_executor(executor, context.run, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _GENERATOR_DONE:
+                break
+            if isinstance(item, _GeneratorError):
+                raise item.exception
+            yield item
+    finally:
+        stop_event.set()
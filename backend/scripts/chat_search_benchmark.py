@@ -0,0 +1,231 @@
+"""Benchmarks the chat history search with many messages per tenant.
+
+Basic Usage:
+
+python scripts/chat_search_benchmark.py --user-email admin@example.com
+
+Seeds 1M chat messages (in 5000 chat sessions) for the user into the tenant, then
+times walking the search results page by page with the OFFSET pagination of
+search_chat_sessions and with the cursor pagination of search_chat_sessions_ranked.
+The seeded sessions are deleted at the end unless --keep is passed.
+
+For more options, checkout the bottom of the file.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Callable
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Ensure PYTHONPATH is set up for direct script execution
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from onyx.db.chat_search import search_chat_sessions  # noqa: E402
+from onyx.db.chat_search import search_chat_sessions_ranked  # noqa: E402
+from onyx.db.engine.sql_engine import get_session_with_tenant  # noqa: E402
+from onyx.db.engine.sql_engine import SqlEngine  # noqa: E402
+from onyx.db.users import get_user_by_email  # noqa: E402
+from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA  # noqa: E402
+
+_BENCHMARK_DESCRIPTION_PREFIX = "[chat search benchmark]"
+_WORDS = (
+    "how do i reset my password for the vpn and what is the vacation policy for "
+    "new employees in the berlin office when is the next release of the billing "
+    "service and who owns the onboarding docs for the data platform team"
+).split()
+_WORDS_PER_MESSAGE = 40
+
+
+def seed(
+    db_session: Session, user_id: UUID, num_sessions: int, num_messages: int
+) -> None:
+    db_session.execute(
+        text(
+            """
+            INSERT INTO chat_session (
+                id, user_id, description, onyxbot_flow, deleted, shared_status,
+                time_created, time_updated
+            )
+            SELECT
+                gen_random_uuid(),
+                :user_id,
+                :prefix || ' ' || (:words)[1 + floor(random() * :num_words)::int]
+                    || ' ' || (:words)[1 + floor(random() * :num_words)::int],
+                false,
+                false,
+                'PRIVATE',
+                now() - g.i * interval '10 minutes',
+                now()
+            FROM generate_series(1, :num_sessions) AS g(i)
+            """
+        ),
+        {
+            "user_id": str(user_id),
+            "prefix": _BENCHMARK_DESCRIPTION_PREFIX,
+            "words": _WORDS,
+            "num_words": len(_WORDS),
+            "num_sessions": num_sessions,
+        },
+    )
+    db_session.execute(
+        text(
+            """
+            INSERT INTO chat_message (
+                chat_session_id, message, token_count, message_type, time_sent,
+                is_agentic
+            )
+            SELECT
+                s.id,
+                array_to_string(
+                    ARRAY(
+                        SELECT (:words)[1 + floor(random() * :num_words)::int]
+                        FROM generate_series(1, :words_per_message)
+                        WHERE g.i IS NOT NULL
+                    ),
+                    ' '
+                ),
+                :words_per_message,
+                CASE WHEN g.i % 2 = 0 THEN 'USER' ELSE 'ASSISTANT' END,
+                s.time_created + g.i * interval '1 second',
+                false
+            FROM chat_session AS s
+            CROSS JOIN generate_series(1, :messages_per_session) AS g(i)
+            WHERE s.user_id = :user_id AND s.description LIKE :prefix || '%'
+            """
+        ),
+        {
+            "user_id": str(user_id),
+            "prefix": _BENCHMARK_DESCRIPTION_PREFIX,
+            "words": _WORDS,
+            "num_words": len(_WORDS),
+            "words_per_message": _WORDS_PER_MESSAGE,
+            "messages_per_session": max(num_messages // num_sessions, 1),
+        },
+    )
+    db_session.commit()
+    db_session.execute(text("ANALYZE chat_session"))
+    db_session.execute(text("ANALYZE chat_message"))
+
+
+def cleanup(db_session: Session, user_id: UUID) -> None:
+    params = {"user_id": str(user_id), "prefix": _BENCHMARK_DESCRIPTION_PREFIX}
+    db_session.execute(
+        text(
+            """
+            DELETE FROM chat_message WHERE chat_session_id IN (
+                SELECT id FROM chat_session
+                WHERE user_id = :user_id AND description LIKE :prefix || '%'
+            )
+            """
+        ),
+        params,
+    )
+    db_session.execute(
+        text(
+            "DELETE FROM chat_session "
+            "WHERE user_id = :user_id AND description LIKE :prefix || '%'"
+        ),
+        params,
+    )
+    db_session.commit()
+
+
+def time_pages(fetch_page: Callable[[int], bool], num_pages: int) -> list[float]:
+    """Times every page, fetch_page returns False when there are no more pages"""
+    times: list[float] = []
+    for page_ind in range(num_pages):
+        start = time.perf_counter()
+        has_more = fetch_page(page_ind)
+        times.append(time.perf_counter() - start)
+        if not has_more:
+            break
+    return times
+
+
+def report(name: str, times: list[float]) -> None:
+    print(
+        f"{name}: {len(times)} pages, first {times[0] * 1000:.1f}ms, "
+        f"last {times[-1] * 1000:.1f}ms, total {sum(times):.2f}s"
+    )
+
+
+def benchmark(
+    db_session: Session, user_id: UUID, query: str, page_size: int, num_pages: int
+) -> None:
+    def fetch_offset_page(page_ind: int) -> bool:
+        _, has_more = search_chat_sessions(
+            user_id=user_id,
+            db_session=db_session,
+            query=query,
+            page=page_ind + 1,
+            page_size=page_size,
+        )
+        return has_more
+
+    cursor: str | None = None
+
+    def fetch_ranked_page(page_ind: int) -> bool:
+        nonlocal cursor
+        _, cursor = search_chat_sessions_ranked(
+            user_id=user_id,
+            db_session=db_session,
+            query=query,
+            cursor=cursor,
+            page_size=page_size,
+        )
+        return cursor is not None
+
+    report(f"offset '{query}'", time_pages(fetch_offset_page, num_pages))
+    report(f"ranked '{query}'", time_pages(fetch_ranked_page, num_pages))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the chat history search")
+    parser.add_argument("--user-email", type=str, required=True)
+    parser.add_argument("--tenant-id", type=str, default=POSTGRES_DEFAULT_SCHEMA)
+    parser.add_argument("--num-sessions", type=int, default=5_000)
+    parser.add_argument("--num-messages", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--num-pages", type=int, default=50)
+    parser.add_argument(
+        "--queries",
+        type=str,
+        nargs="+",
+        default=["", "password", "vacation policy berlin", "release billing service"],
+    )
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="Reuse previously seeded sessions"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Do not delete the seeded sessions"
+    )
+    args = parser.parse_args()
+
+    SqlEngine.init_engine(pool_size=5, max_overflow=0)
+
+    with get_session_with_tenant(tenant_id=args.tenant_id) as db_session:
+        user = get_user_by_email(args.user_email, db_session)
+        if user is None:
+            raise ValueError(f"No user with email {args.user_email}")
+
+        if not args.skip_seed:
+            start = time.perf_counter()
+            seed(db_session, user.id, args.num_sessions, args.num_messages)
+            print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+        try:
+            for query in args.queries:
+                benchmark(db_session, user.id, query, args.page_size, args.num_pages)
+        finally:
+            if not args.keep:
+                cleanup(db_session, user.id)
+
+
+if __name__ == "__main__":
+    main()
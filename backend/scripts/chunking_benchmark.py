@@ -0,0 +1,145 @@
+"""Benchmarks the indexing Chunker on a synthetic corpus.
+
+Basic Usage:
+
+python scripts/chunking_benchmark.py
+
+Runs the chunker over 10k synthetic documents in batches (the way the docprocessing
+worker does) and reports the throughput and the number of tokenizer calls. Use
+--token-cache-size 1 to get the numbers without the token count cache.
+
+For more options, checkout the bottom of the file.
+"""
+
+import argparse
+import random
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import IndexingDocument
+from onyx.connectors.models import Section
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+
+_WORDS = (
+    "the indexing pipeline splits every document into chunks that are embedded and "
+    "written to the document index while the connector keeps pulling new documents "
+    "from the source so the throughput of the chunker matters for large connectors"
+).split()
+
+
+class CountingTokenizer(BaseTokenizer):
+    """Wraps a tokenizer to count the calls made to it."""
+
+    def __init__(self, tokenizer: BaseTokenizer) -> None:
+        self.tokenizer = tokenizer
+        self.name = tokenizer.name
+        self.encode_calls = 0
+        self.encode_batch_calls = 0
+        self.tokenize_calls = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.encode_calls += 1
+        return self.tokenizer.encode(string)
+
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        self.encode_batch_calls += 1
+        return self.tokenizer.encode_batch(strings)
+
+    def tokenize(self, string: str) -> list[str]:
+        self.tokenize_calls += 1
+        return self.tokenizer.tokenize(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+
+def _random_paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(
+        " ".join(rng.choices(_WORDS, k=rng.randint(8, 30))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def generate_corpus(num_docs: int, seed: int) -> list[IndexingDocument]:
+    rng = random.Random(seed)
+    documents = []
+    for i in range(num_docs):
+        # mostly short documents with a long tail, like most real connectors
+        num_sections = min(int(rng.paretovariate(1.2)), 50)
+        sections = [
+            TextSection(
+                text=_random_paragraph(rng, rng.randint(1, 20)),
+                link=f"https://example.com/doc_{i}#{j}",
+            )
+            for j in range(num_sections)
+        ]
+        documents.append(
+            IndexingDocument(
+                id=f"doc_{i}",
+                source=DocumentSource.WEB,
+                semantic_identifier=f"Document {i}",
+                title=f"Document {i}",
+                metadata={"tags": ["benchmark", f"group_{i % 10}"]},
+                sections=sections,
+                processed_sections=[
+                    Section(text=section.text, link=section.link)
+                    for section in sections
+                ],
+            )
+        )
+    return documents
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chunker benchmark")
+    parser.add_argument("--num-docs", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--tokenizer-model",
+        type=str,
+        default=None,
+        help="HuggingFace tokenizer to use, defaults to the default embedding model",
+    )
+    parser.add_argument("--token-cache-size", type=int, default=None)
+    parser.add_argument("--enable-multipass", action="store_true")
+    parser.add_argument("--enable-large-chunks", action="store_true")
+    args = parser.parse_args()
+
+    documents = generate_corpus(args.num_docs, args.seed)
+    total_chars = sum(doc.get_total_char_length() for doc in documents)
+    print(f"Generated {len(documents)} documents with {total_chars} characters")
+
+    tokenizer = CountingTokenizer(
+        get_tokenizer(model_name=args.tokenizer_model, provider_type=None)
+    )
+    chunker = Chunker(
+        tokenizer=tokenizer,
+        enable_multipass=args.enable_multipass,
+        enable_large_chunks=args.enable_large_chunks,
+    )
+    if args.token_cache_size is not None:
+        chunker.token_counter.max_size = args.token_cache_size
+
+    num_chunks = 0
+    start = time.perf_counter()
+    for i in range(0, len(documents), args.batch_size):
+        num_chunks += len(chunker.chunk(documents[i : i + args.batch_size]))
+    elapsed = time.perf_counter() - start
+
+    print(f"Chunked into {num_chunks} chunks in {elapsed:.2f}s")
+    print(f"Documents/s: {len(documents) / elapsed:.1f}")
+    print(f"Chunks/s: {num_chunks / elapsed:.1f}")
+    print(f"MB/s: {total_chars / elapsed / 1_000_000:.2f}")
+    print(
+        f"Tokenizer calls: {tokenizer.encode_calls} encode, "
+        f"{tokenizer.encode_batch_calls} encode_batch, "
+        f"{tokenizer.tokenize_calls} tokenize"
+    )
+
+
+if __name__ == "__main__":
+    main()
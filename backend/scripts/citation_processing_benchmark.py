@@ -0,0 +1,117 @@
+"""Benchmarks the streaming citation processors on long answers.
+
+Basic Usage:
+
+python scripts/citation_processing_benchmark.py
+
+Streams a synthetic answer of 20k tokens (with citations and code blocks) token by
+token through CitationProcessor and CitationProcessorGraph. Reports the time per
+token at the start and at the end of the stream. The two should be about the same,
+since the per token cost does not depend on the length of the answer so far.
+
+For more options, checkout the bottom of the file.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+from onyx.chat.models import LlmDoc
+from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.citation_processing import CitationProcessorGraph
+from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
+from onyx.configs.constants import DocumentSource
+
+_NUM_DOCS = 20
+_WORDS = "the answer is based on several documents that describe the system".split()
+
+
+def generate_answer_tokens(num_tokens: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        roll = rng.random()
+        if roll < 0.05:
+            tokens.extend(["[", str(rng.randint(1, _NUM_DOCS)), "]"])
+        elif roll < 0.06:
+            tokens.extend(["```", "\n", "x = [1, 2]", "\n", "```", "\n"])
+        else:
+            tokens.append(" " + rng.choice(_WORDS))
+    return tokens[:num_tokens]
+
+
+def _build_docs() -> list[LlmDoc]:
+    return [
+        LlmDoc(
+            document_id=f"doc_{i}",
+            content="content",
+            blurb="blurb",
+            semantic_identifier=f"Doc {i}",
+            source_type=DocumentSource.WEB,
+            metadata={},
+            updated_at=datetime.now(),
+            link=f"https://example.com/{i}",
+            source_links=None,
+            match_highlights=[],
+        )
+        for i in range(_NUM_DOCS)
+    ]
+
+
+def _time_stream(
+    process_token: Callable[[str], object], tokens: list[str], window: int
+) -> tuple[float, float, float]:
+    """Returns the total time and the time per token of the first and last window."""
+    timings: list[float] = []
+    for token in tokens:
+        start = time.perf_counter()
+        result = process_token(token)
+        # the CitationProcessor returns a generator
+        if result is not None and not isinstance(result, (str, tuple)):
+            list(result)  # type: ignore
+        timings.append(time.perf_counter() - start)
+
+    return (
+        sum(timings),
+        sum(timings[:window]) / window,
+        sum(timings[-window:]) / window,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Citation processing benchmark")
+    parser.add_argument("--num-tokens", type=int, default=20_000)
+    parser.add_argument("--window", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokens = generate_answer_tokens(args.num_tokens, args.seed)
+    docs = _build_docs()
+    doc_mapping = DocumentIdOrderMapping(
+        order_mapping={doc.document_id: i + 1 for i, doc in enumerate(docs)}
+    )
+
+    processors: dict[str, Callable[[str], object]] = {
+        "CitationProcessor": CitationProcessor(
+            context_docs=docs,
+            final_doc_id_to_rank_map=doc_mapping,
+            display_doc_id_to_rank_map=doc_mapping,
+        ).process_token,
+        "CitationProcessorGraph": CitationProcessorGraph(
+            context_docs=docs
+        ).process_token,
+    }
+
+    for name, process_token in processors.items():
+        total, first, last = _time_stream(process_token, tokens, args.window)
+        print(
+            f"{name}: {len(tokens)} tokens in {total:.3f}s, "
+            f"first {args.window} tokens {first * 1e6:.1f}us/token, "
+            f"last {args.window} tokens {last * 1e6:.1f}us/token"
+        )
+
+
+if __name__ == "__main__":
+    main()
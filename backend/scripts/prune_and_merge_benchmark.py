@@ -0,0 +1,142 @@
+"""Benchmarks the pruning and merging of retrieved sections for the chat prompt.
+
+Basic Usage:
+
+python scripts/prune_and_merge_benchmark.py
+
+Prunes and merges 50, 200 and 1000 synthetic sections (several sections per document,
+the way the search tool returns them) and reports the time per run, both with a cold
+and a warm token count cache. The time of a deepcopy of the sections is reported as
+well, since pruning used to start with one.
+
+For more options, checkout the bottom of the file.
+"""
+
+import argparse
+import random
+import time
+from copy import deepcopy
+from datetime import datetime
+
+from onyx.chat import prune_and_merge
+from onyx.chat.prune_and_merge import _apply_pruning
+from onyx.chat.prune_and_merge import _merge_sections
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceSection
+from onyx.llm.interfaces import LLMConfig
+
+_WORDS = (
+    "retrieved sections are pruned to fit the context window of the model and the "
+    "sections of the same document are merged before they are added to the prompt"
+).split()
+_CHUNK_WORDS = 400
+_SECTIONS_PER_DOC = 4
+
+
+def generate_sections(num_sections: int, seed: int) -> list[InferenceSection]:
+    rng = random.Random(seed)
+    sections: list[InferenceSection] = []
+    for i in range(num_sections):
+        doc_num = i // _SECTIONS_PER_DOC
+        first_chunk_id = 3 * (i % _SECTIONS_PER_DOC)
+        chunks = [
+            InferenceChunk(
+                chunk_id=chunk_id,
+                document_id=f"doc_{doc_num}",
+                semantic_identifier=f"Document {doc_num}",
+                title=f"Document {doc_num}",
+                blurb="blurb",
+                content=" ".join(rng.choices(_WORDS, k=_CHUNK_WORDS)),
+                source_links={0: f"https://example.com/{doc_num}"},
+                section_continuation=False,
+                source_type=DocumentSource.WEB,
+                boost=0,
+                recency_bias=1.0,
+                score=rng.random(),
+                hidden=False,
+                metadata={"tags": ["benchmark"]},
+                match_highlights=[],
+                updated_at=datetime(2025, 1, 1),
+                image_file_id=None,
+                doc_summary="",
+                chunk_context="",
+            )
+            # each section is the center chunk and its neighbours
+            for chunk_id in range(first_chunk_id, first_chunk_id + 3)
+        ]
+        sections.append(
+            InferenceSection(
+                center_chunk=chunks[1],
+                chunks=chunks,
+                combined_content="\n".join(chunk.content for chunk in chunks),
+            )
+        )
+    return sections
+
+
+def _prune_and_merge(
+    sections: list[InferenceSection], llm_config: LLMConfig, token_limit: int
+) -> list[InferenceSection]:
+    pruned_sections = _apply_pruning(
+        sections=sections,
+        section_relevance_list=None,
+        keep_sections=[],
+        token_limit=token_limit,
+        is_manually_selected_docs=False,
+        use_sections=True,
+        using_tool_message=True,
+        llm_config=llm_config,
+    )
+    return _merge_sections(pruned_sections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prune and merge benchmark")
+    parser.add_argument("--num-sections", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-provider", type=str, default="openai")
+    parser.add_argument("--model-name", type=str, default="gpt-4o")
+    parser.add_argument(
+        "--token-limit",
+        type=int,
+        default=None,
+        help="Defaults to keeping about half of the sections",
+    )
+    args = parser.parse_args()
+
+    llm_config = LLMConfig(
+        model_provider=args.model_provider,
+        model_name=args.model_name,
+        temperature=0.0,
+        max_input_tokens=1_000_000,
+    )
+
+    for num_sections in args.num_sections:
+        sections = generate_sections(num_sections, args.seed)
+        token_limit = args.token_limit or num_sections * _CHUNK_WORDS * 3 // 2
+
+        prune_and_merge._section_token_counts.clear()
+        start = time.perf_counter()
+        merged_sections = _prune_and_merge(sections, llm_config, token_limit)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            _prune_and_merge(sections, llm_config, token_limit)
+        warm = (time.perf_counter() - start) / args.runs
+
+        start = time.perf_counter()
+        deepcopy(sections)
+        copy_time = time.perf_counter() - start
+
+        print(
+            f"{num_sections} sections -> {len(merged_sections)} merged: "
+            f"cold {cold * 1000:.1f}ms, warm {warm * 1000:.1f}ms, "
+            f"deepcopy of the sections alone {copy_time * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
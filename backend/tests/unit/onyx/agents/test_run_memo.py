@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.messages import SystemMessage
+
+from onyx.agents.agent_search.shared_graph_utils.run_memo import memo_key
+from onyx.agents.agent_search.shared_graph_utils.run_memo import prompt_memo_key
+from onyx.agents.agent_search.shared_graph_utils.run_memo import RunMemo
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
+
+def test_run_memo_reuses_results() -> None:
+    run_memo = RunMemo(enabled=True)
+    calls: list[str] = []
+
+    def search(query: str) -> list[str]:
+        calls.append(query)
+        return [f"result for {query}"]
+
+    for query in ["vacation policy", "vacation policy", "expense reports"]:
+        run_memo.get_or_compute("search", memo_key(query), lambda: search(query))
+
+    assert calls == ["vacation policy", "expense reports"]
+    assert run_memo.get_stats_messages() == [
+        "Memoized search calls: 33.3% deduplicated "
+        "(3 calls, 1 hits, 0 coalesced in flight)"
+    ]
+
+
+def test_run_memo_coalesces_concurrent_calls() -> None:
+    run_memo = RunMemo(enabled=True)
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def search() -> str:
+        with lock:
+            calls.append("search")
+        time.sleep(0.2)
+        return "result"
+
+    results = run_functions_tuples_in_parallel(
+        [
+            (run_memo.get_or_compute, ("search", memo_key("same query"), search))
+            for _ in range(4)
+        ]
+    )
+
+    assert results == ["result"] * 4
+    assert calls == ["search"]
+
+
+def test_run_memo_does_not_memoize_failures() -> None:
+    run_memo = RunMemo(enabled=True)
+    attempts: list[int] = []
+
+    def flaky_search() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("search failed")
+        return "result"
+
+    with pytest.raises(RuntimeError):
+        run_memo.get_or_compute("search", "key", flaky_search)
+    assert run_memo.get_or_compute("search", "key", flaky_search) == "result"
+
+
+def test_run_memo_disabled() -> None:
+    run_memo = RunMemo(enabled=False)
+    calls: list[int] = []
+
+    for _ in range(2):
+        run_memo.get_or_compute("search", "key", lambda: calls.append(1))
+
+    assert len(calls) == 2
+    assert run_memo.get_stats_messages() == []
+
+
+def test_prompt_memo_key() -> None:
+    prompt = [SystemMessage(content="system"), HumanMessage(content="question")]
+
+    assert prompt_memo_key(prompt, "gpt-4o") == prompt_memo_key(
+        [SystemMessage(content="system"), HumanMessage(content="question")], "gpt-4o"
+    )
+    assert prompt_memo_key(prompt, "gpt-4o") != prompt_memo_key(
+        [HumanMessage(content="system"), HumanMessage(content="question")], "gpt-4o"
+    )
+    assert prompt_memo_key(prompt, "gpt-4o") != prompt_memo_key(prompt, "gpt-4o-mini")
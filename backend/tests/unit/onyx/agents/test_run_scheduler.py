@@ -0,0 +1,71 @@
+import threading
+import time
+
+from onyx.agents.agent_search.shared_graph_utils.run_scheduler import RunScheduler
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
+
+def test_run_scheduler_limits_calls_in_flight() -> None:
+    run_scheduler = RunScheduler(tenant_id="test_limits", max_in_flight_calls=2)
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def call() -> None:
+        nonlocal in_flight, max_in_flight
+        with run_scheduler.slot("search"):
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+
+    run_functions_tuples_in_parallel([(call, ()) for _ in range(6)])
+
+    assert max_in_flight == 2
+
+
+def test_run_scheduler_token_budget() -> None:
+    run_scheduler = RunScheduler(
+        tenant_id="test_budget", time_budget_seconds=0, token_budget=1000
+    )
+
+    with run_scheduler.slot("llm") as call_record:
+        call_record.tokens = 850
+    assert run_scheduler.is_budget_nearly_spent()
+    assert not run_scheduler.is_budget_spent()
+
+    with run_scheduler.slot("llm") as call_record:
+        call_record.tokens = 200
+    assert run_scheduler.is_budget_spent()
+
+
+def test_run_scheduler_without_budget() -> None:
+    run_scheduler = RunScheduler(
+        tenant_id="test_no_budget", time_budget_seconds=0, token_budget=0
+    )
+
+    with run_scheduler.slot("llm") as call_record:
+        call_record.tokens = 1_000_000
+
+    assert run_scheduler.budget_spent() == 0.0
+
+
+def test_run_scheduler_iteration_summary() -> None:
+    run_scheduler = RunScheduler(tenant_id="test_iterations")
+
+    assert run_scheduler.start_iteration(1) is None
+    with run_scheduler.slot("llm") as call_record:
+        call_record.tokens = 100
+    with run_scheduler.slot("search"):
+        pass
+
+    summary = run_scheduler.start_iteration(2)
+
+    assert summary is not None
+    assert summary.startswith("Iteration 1:")
+    assert "2 calls" in summary
+    assert "100 tokens" in summary
+    # nothing happened in the second iteration yet
+    assert run_scheduler.start_iteration(3) is None
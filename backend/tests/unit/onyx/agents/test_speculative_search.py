@@ -0,0 +1,77 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.agents.agent_search.dr.sub_agents.basic_search import speculative_search
+from onyx.agents.agent_search.dr.sub_agents.basic_search.speculative_search import (
+    SpeculativeSearch,
+)
+
+_EMBEDDINGS = {
+    "vacation policy": [1.0, 0.0],
+    "what is the vacation policy": [0.98, 0.1],
+    "expense report deadline": [0.0, 1.0],
+}
+
+
+@contextmanager
+def _fake_session() -> Iterator[None]:
+    yield None
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        speculative_search,
+        "get_query_embedding",
+        lambda query, db_session: _EMBEDDINGS[query],
+    )
+    monkeypatch.setattr(
+        speculative_search, "get_session_with_current_tenant", _fake_session
+    )
+    monkeypatch.setattr(
+        speculative_search,
+        "speculative_search_stats",
+        speculative_search._SpeculativeSearchStats(),
+    )
+
+
+def _speculative_search(run_search: Any) -> SpeculativeSearch:
+    return SpeculativeSearch(query="vacation policy", run_search=run_search)
+
+
+def test_results_are_used_for_a_similar_query() -> None:
+    run_search = Mock(return_value=["section"])
+    search = _speculative_search(run_search)
+
+    assert search.get_sections("what is the vacation policy", has_filters=False) == [
+        "section"
+    ]
+    run_search.assert_called_once_with("vacation policy", [1.0, 0.0])
+    assert speculative_search.speculative_search_stats.hits == 1
+
+
+def test_results_are_dropped_for_a_different_query() -> None:
+    search = _speculative_search(Mock(return_value=["section"]))
+
+    assert search.get_sections("expense report deadline", has_filters=False) is None
+    # reused for the search of the rewritten query
+    assert search.rewritten_query_embedding == [0.0, 1.0]
+    assert speculative_search.speculative_search_stats.misses == 1
+
+
+def test_results_are_dropped_if_the_rewrite_added_filters() -> None:
+    search = _speculative_search(Mock(return_value=["section"]))
+
+    assert search.get_sections("vacation policy", has_filters=True) is None
+    assert speculative_search.speculative_search_stats.misses == 1
+
+
+def test_failed_speculative_search_is_a_miss() -> None:
+    search = _speculative_search(Mock(side_effect=RuntimeError("vespa is down")))
+
+    assert search.get_sections("vacation policy", has_filters=False) is None
+    assert speculative_search.speculative_search_stats.misses == 1
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from onyx.agents.agent_search.dr.sub_agents.web_search import url_contents
+from onyx.agents.agent_search.dr.sub_agents.web_search.models import (
+    InternetContent,
+)
+from onyx.agents.agent_search.dr.sub_agents.web_search.models import (
+    InternetSearchProvider,
+)
+from onyx.agents.agent_search.dr.sub_agents.web_search.models import (
+    InternetSearchResult,
+)
+from onyx.agents.agent_search.dr.sub_agents.web_search.url_contents import (
+    fetch_url_contents,
+)
+from onyx.agents.agent_search.dr.sub_agents.web_search.url_contents import (
+    normalize_url,
+)
+
+
+class _FakeProvider(InternetSearchProvider):
+    def __init__(self, failing_urls: set[str] | None = None, delay: float = 0) -> None:
+        self.failing_urls = failing_urls or set()
+        self.delay = delay
+        self.fetched_urls: list[str] = []
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> list[InternetSearchResult]:
+        return []
+
+    def contents(self, urls: list[str]) -> list[InternetContent]:
+        with self._lock:
+            self.fetched_urls.extend(urls)
+        time.sleep(self.delay)
+        if any(url in self.failing_urls for url in urls):
+            raise RuntimeError("fetch failed")
+        return [
+            InternetContent(title=url, link=url, full_content=f"content of {url}")
+            for url in urls
+        ]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        url_contents,
+        "_url_content_cache",
+        url_contents._URLContentCache(max_bytes=1024 * 1024, ttl_seconds=60),
+    )
+
+
+def test_normalize_url() -> None:
+    assert normalize_url(
+        "HTTPS://Example.com:443/docs/?b=2&utm_source=x&a=1#section"
+    ) == normalize_url("https://example.com/docs?a=1&b=2")
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert normalize_url("https://example.com/a") != normalize_url(
+        "https://example.com/b"
+    )
+
+
+def test_fetch_url_contents_skips_failed_urls() -> None:
+    provider = _FakeProvider(failing_urls={"https://broken.com"})
+
+    contents = fetch_url_contents(
+        provider, ["https://example.com/a", "https://broken.com"]
+    )
+
+    assert [content.link for content in contents] == ["https://example.com/a"]
+
+
+def test_fetch_url_contents_uses_cache() -> None:
+    provider = _FakeProvider()
+
+    fetch_url_contents(provider, ["https://example.com/a"])
+    contents = fetch_url_contents(provider, ["https://EXAMPLE.com/a/"])
+
+    assert provider.fetched_urls == ["https://example.com/a"]
+    # the content is returned under the requested URL
+    assert contents[0].link == "https://EXAMPLE.com/a/"
+    assert contents[0].full_content == "content of https://example.com/a"
+
+
+def test_fetch_url_contents_deduplicates_concurrent_fetches() -> None:
+    provider = _FakeProvider(delay=0.2)
+
+    fetch_url_contents(
+        provider, ["https://example.com/a", "https://example.com/a#intro"]
+    )
+
+    assert len(provider.fetched_urls) == 1
+
+
+def test_url_content_cache_evicts_least_recently_used() -> None:
+    content = InternetContent(title="", link="", full_content="x" * 100)
+    entry_size = len(url_contents.zlib.compress(content.model_dump_json().encode()))
+    cache = url_contents._URLContentCache(max_bytes=entry_size * 2, ttl_seconds=60)
+
+    cache.put("a", content)
+    cache.put("b", content)
+    cache.get("a")
+    cache.put("c", content)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
@@ -5,6 +5,7 @@ import pytest
 from onyx.chat.models import LlmDoc
 from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.citation_processing import CodeFenceTracker
 from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
 from onyx.configs.constants import DocumentSource
 from onyx.server.query_and_chat.streaming_models import CitationInfo
@@ -537,3 +538,21 @@ def test_citation_extraction(
     ] == expected_citations, (
         f"Test '{test_name}' failed: Citations do not match expected output."
     )
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        ["```", "python\n", "x = [1]\n", "```"],
+        ["`", "`", "`\ncode", "``", "`"],
+        ["``", "``", "``", " text"],
+        ["````", "`", "\n```"],
+    ],
+)
+def test_code_fence_tracker_matches_full_count(tokens: list[str]) -> None:
+    tracker = CodeFenceTracker()
+    text = ""
+    for token in tokens:
+        tracker.update(token)
+        text += token
+        assert tracker.in_code_block == (text.count("```") % 2 != 0)
@@ -0,0 +1,211 @@
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from onyx.chat import answer_cache
+from onyx.chat.answer_cache import AnswerCacheQuery
+from onyx.chat.answer_cache import CachedAnswer
+from onyx.chat.answer_cache import normalize_question
+from onyx.chat.models import StreamingError
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import SavedSearchDoc
+from onyx.redis import redis_answer_cache
+from onyx.redis.redis_answer_cache import invalidate_cached_answers_for_documents
+from onyx.server.query_and_chat.streaming_models import CitationDelta
+from onyx.server.query_and_chat.streaming_models import CitationInfo
+from onyx.server.query_and_chat.streaming_models import MessageDelta
+from onyx.server.query_and_chat.streaming_models import MessageStart
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.streaming_models import SearchToolStart
+
+
+def _to_bytes(value: str | bytes) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.results: list[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        def command(*args: Any, **kwargs: Any) -> None:
+            self.results.append(getattr(self.redis, name)(*args, **kwargs))
+
+        return command
+
+    def execute(self) -> list[Any]:
+        return self.results
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str | bytes, ex: int | None = None) -> None:
+        self.values[key] = _to_bytes(value)
+
+    def lpush(self, key: str, value: bytes) -> None:
+        self.values.setdefault(key, []).insert(0, value)
+
+    def lrange(self, key: str, start: int, end: int) -> list[bytes]:
+        return list(self.values.get(key, []))
+
+    def ltrim(self, key: str, start: int, end: int) -> None:
+        self.values[key] = self.values.get(key, [])[start : end + 1]
+
+    def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    def sadd(self, key: str, value: str) -> None:
+        self.values.setdefault(key, set()).add(_to_bytes(value))
+
+    def smembers(self, key: str) -> set[bytes]:
+        return set(self.values.get(key, set()))
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+
+
+_EMBEDDINGS = {
+    "how do i reset my password": [1.0, 0.0, 0.0],
+    "how can i reset my password": [0.99, 0.1, 0.0],
+    "what is the vacation policy": [0.0, 1.0, 0.0],
+}
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr(answer_cache, "get_redis_client", lambda **_: redis)
+    monkeypatch.setattr(redis_answer_cache, "get_redis_client", lambda **_: redis)
+    monkeypatch.setattr(redis_answer_cache, "ANSWER_CACHE_PERSONA_IDS", {1})
+    monkeypatch.setattr(
+        answer_cache,
+        "get_query_embedding",
+        lambda query, db_session: _EMBEDDINGS[query],
+    )
+    return redis
+
+
+def _query(question: str, scope: str = "scope") -> AnswerCacheQuery:
+    return AnswerCacheQuery(
+        scope=scope, question=question, db_session=None, tenant_id="test_tenant"  # type: ignore
+    )
+
+
+def _saved_doc(document_id: str) -> SavedSearchDoc:
+    return SavedSearchDoc(
+        document_id=document_id,
+        chunk_ind=0,
+        semantic_identifier=document_id,
+        link=None,
+        blurb="blurb",
+        source_type=DocumentSource.WEB,
+        boost=0,
+        hidden=False,
+        metadata={},
+        score=1.0,
+        match_highlights=[],
+        updated_at=datetime(2025, 1, 1),
+        primary_owners=None,
+        secondary_owners=None,
+        is_internet=False,
+        db_doc_id=0,
+    )
+
+
+def _cached_answer(question: str) -> CachedAnswer:
+    return CachedAnswer(
+        question=question,
+        answer="Use the reset link [[1]]",
+        final_documents=[_saved_doc("doc_1")],
+        citations=[CitationInfo(citation_num=1, document_id="doc_1")],
+    )
+
+
+def test_normalize_question() -> None:
+    assert normalize_question("  How do I\nreset my  Password?? ") == (
+        "how do i reset my password"
+    )
+
+
+def test_exact_and_similar_questions_are_cached(fake_redis: FakeRedis) -> None:
+    assert _query("How do I reset my password?").fetch() is None
+
+    _query("How do I reset my password?").store(
+        _cached_answer("How do I reset my password?")
+    )
+
+    assert _query("how do I reset my password").fetch() == _cached_answer(
+        "How do I reset my password?"
+    )
+    assert _query("How can I reset my password?").fetch() is not None
+    assert _query("What is the vacation policy?").fetch() is None
+    # a different persona configuration or ACL
+    assert _query("How do I reset my password?", scope="other").fetch() is None
+
+
+def test_cited_document_changes_invalidate_the_answer(fake_redis: FakeRedis) -> None:
+    _query("How do I reset my password?").store(
+        _cached_answer("How do I reset my password?")
+    )
+
+    invalidate_cached_answers_for_documents(["doc_2"], "test_tenant")
+    assert _query("How do I reset my password?").fetch() is not None
+
+    invalidate_cached_answers_for_documents(["doc_1"], "test_tenant")
+    assert _query("How do I reset my password?").fetch() is None
+    assert _query("How can I reset my password?").fetch() is None
+
+
+def _answer_packets(*extra_packets: Any) -> list[Any]:
+    return [
+        *extra_packets,
+        Packet(
+            ind=0,
+            obj=MessageStart(content="", final_documents=[_saved_doc("doc_1")]),
+        ),
+        Packet(ind=0, obj=MessageDelta(content="Use the reset ")),
+        Packet(ind=0, obj=MessageDelta(content="link [[1]]")),
+        Packet(
+            ind=0,
+            obj=CitationDelta(
+                citations=[CitationInfo(citation_num=1, document_id="doc_1")]
+            ),
+        ),
+        Packet(ind=0, obj=OverallStop()),
+    ]
+
+
+def test_streamed_answer_is_cached(fake_redis: FakeRedis) -> None:
+    query = _query("How do I reset my password?")
+    packets = _answer_packets(Packet(ind=0, obj=SearchToolStart()))
+
+    assert list(query.cache_streamed_answer(iter(packets))) == packets
+    assert query.fetch() == _cached_answer("How do I reset my password?")
+
+
+@pytest.mark.parametrize(
+    "extra_packet",
+    [
+        Packet(ind=0, obj=SearchToolStart(is_internet_search=True)),
+        StreamingError(error="LLM failed"),
+    ],
+)
+def test_streamed_answer_is_not_cached(
+    fake_redis: FakeRedis, extra_packet: Any
+) -> None:
+    query = _query("How do I reset my password?")
+    list(query.cache_streamed_answer(iter(_answer_packets(extra_packet))))
+
+    assert query.fetch() is None
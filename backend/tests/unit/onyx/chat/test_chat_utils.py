@@ -0,0 +1,35 @@
+from unittest.mock import Mock
+
+from onyx.chat.chat_utils import get_history_token_counts
+from onyx.configs.constants import MessageType
+from onyx.db.models import ChatMessage
+
+
+def _message(text: str, token_counts: dict[str, int] | None = None) -> ChatMessage:
+    return ChatMessage(
+        message=text,
+        token_count=len(text.split()),
+        token_counts=token_counts,
+        message_type=MessageType.USER,
+    )
+
+
+def test_history_token_counts_only_tokenize_uncounted_messages() -> None:
+    tokenizer = Mock()
+    tokenizer.name = "tokenizer_a"
+    tokenizer.encode_batch.side_effect = lambda texts: [list(text) for text in texts]
+
+    history = [
+        _message("counted", {"tokenizer_a": 1}),
+        _message("other tokenizer", {"tokenizer_b": 2}),
+        _message("new"),
+        _message(""),
+    ]
+
+    assert get_history_token_counts(history, tokenizer) == [1, 15, 3, 0]
+    tokenizer.encode_batch.assert_called_once_with(["other tokenizer", "new"])
+    assert history[1].token_counts == {"tokenizer_b": 2, "tokenizer_a": 15}
+
+    # the counts are remembered on the messages
+    assert get_history_token_counts(history, tokenizer) == [1, 15, 3, 0]
+    assert tokenizer.encode_batch.call_count == 1
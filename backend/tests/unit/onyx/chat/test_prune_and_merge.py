@@ -1,10 +1,18 @@
+import json
+from unittest.mock import Mock
+
 import pytest
 
+from onyx.chat import prune_and_merge
+from onyx.chat.prune_and_merge import _apply_pruning
+from onyx.chat.prune_and_merge import _count_section_prompt_tokens
+from onyx.chat.prune_and_merge import _count_section_tokens
 from onyx.chat.prune_and_merge import _merge_sections
 from onyx.configs.constants import DocumentSource
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.utils import inference_section_from_chunks
+from onyx.tools.tool_implementations.search.search_utils import section_to_dict
 
 
 # This large test accounts for all of the following:
@@ -224,3 +232,77 @@ def test_merge_minimal_sections(
     merged_sections = _merge_sections(sections)
     assert merged_sections[0].combined_content == expected_content
     assert merged_sections[0].center_chunk == expected_center_chunk
+
+
+def test_count_section_tokens_is_cached_per_tokenizer(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(prune_and_merge, "SECTION_TOKEN_COUNT_CACHE_SIZE", 2)
+    tokenizer = Mock()
+    tokenizer.name = "tokenizer_a"
+    tokenizer.encode.side_effect = lambda text: text.split()
+    other_tokenizer = Mock()
+    other_tokenizer.name = "tokenizer_b"
+    other_tokenizer.encode.side_effect = lambda text: list(text)
+
+    assert _count_section_tokens("one two three", tokenizer) == 3
+    assert _count_section_tokens("one two three", tokenizer) == 3
+    assert tokenizer.encode.call_count == 1
+    assert _count_section_tokens("one two three", other_tokenizer) == 13
+
+    # the least recently used count is evicted
+    _count_section_tokens("four five", tokenizer)
+    _count_section_tokens("one two three", tokenizer)
+    assert tokenizer.encode.call_count == 3
+
+
+def test_count_section_prompt_tokens_counts_escaped_tool_message_content() -> None:
+    tokenizer = Mock()
+    tokenizer.name = "characters"
+    tokenizer.encode.side_effect = lambda text: list(text)
+
+    # escaped to \uXXXX, \" and \n in the tool message json
+    chunk = create_inference_chunk("doc", 0, 'Überblick "Café"\n' * 20, 1.0)
+    section = inference_section_from_chunks(chunk, [chunk])
+    assert section is not None
+
+    prompt_str = json.dumps(section_to_dict(section, 0))
+    assert _count_section_prompt_tokens(section, 0, True, tokenizer) >= len(prompt_str)
+
+
+def test_apply_pruning_does_not_modify_input_sections(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    tokenizer = Mock()
+    tokenizer.name = "whitespace_pruning"
+    tokenizer.encode.side_effect = lambda text: text.split()
+    tokenizer.decode.side_effect = lambda tokens: " ".join(tokens)
+    monkeypatch.setattr(prune_and_merge, "get_tokenizer", lambda **_: tokenizer)
+
+    sections = []
+    for doc_num in range(2):
+        chunk = create_inference_chunk(
+            f"doc{doc_num}", 0, " ".join(["word"] * 100), float(2 - doc_num)
+        )
+        section = inference_section_from_chunks(chunk, [chunk])
+        assert section is not None
+        sections.append(section)
+    original_content = sections[1].combined_content
+
+    pruned_sections = _apply_pruning(
+        sections=sections,
+        section_relevance_list=None,
+        keep_sections=[],
+        token_limit=150,
+        is_manually_selected_docs=False,
+        use_sections=True,
+        using_tool_message=False,
+        llm_config=Mock(),
+    )
+
+    assert len(pruned_sections) == 2
+    # sections that fit are passed through, the trimmed one is a copy
+    assert pruned_sections[0] is sections[0]
+    assert pruned_sections[1] is not sections[1]
+    assert len(pruned_sections[1].combined_content.split()) < 100
+    assert sections[1].combined_content == original_content
@@ -0,0 +1,25 @@
+from datetime import datetime
+from datetime import timezone
+from uuid import uuid4
+
+import pytest
+
+from onyx.db.chat_search import decode_chat_search_cursor
+from onyx.db.chat_search import encode_chat_search_cursor
+
+
+@pytest.mark.parametrize("rank", [None, 0.0, 0.1 + 0.2, 1e-9])
+def test_chat_search_cursor_round_trip(rank: float | None) -> None:
+    time_created = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    chat_session_id = uuid4()
+
+    cursor = encode_chat_search_cursor(rank, time_created, chat_session_id)
+
+    # the rank has to survive exactly, the next page starts strictly after it
+    assert decode_chat_search_cursor(cursor) == (rank, time_created, chat_session_id)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "W10=", "WzEsMl0="])
+def test_invalid_chat_search_cursor(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_chat_search_cursor(cursor)
@@ -0,0 +1,129 @@
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunk_diff import compute_chunk_fingerprint
+from onyx.indexing.chunk_diff import diff_chunks_against_fingerprints
+from onyx.indexing.chunk_diff import get_chunk_fingerprint_key
+from onyx.indexing.models import DocAwareChunk
+
+
+def _make_document(doc_id: str = "doc", title: str = "Title") -> Document:
+    return Document(
+        id=doc_id,
+        source=DocumentSource.WEB,
+        semantic_identifier=title,
+        title=title,
+        metadata={},
+        sections=[TextSection(text="irrelevant", link=None)],
+    )
+
+
+def _make_chunk(
+    document: Document,
+    chunk_id: int,
+    content: str,
+    large_chunk_id: int | None = None,
+) -> DocAwareChunk:
+    return DocAwareChunk(
+        source_document=document,
+        chunk_id=chunk_id,
+        blurb=content[:10],
+        content=content,
+        source_links={0: ""},
+        image_file_id=None,
+        section_continuation=False,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        mini_chunk_texts=None,
+        large_chunk_id=large_chunk_id,
+        doc_summary="",
+        chunk_context="",
+        contextual_rag_reserved_tokens=0,
+    )
+
+
+def _fingerprints(chunks: list[DocAwareChunk]) -> dict[str, str]:
+    return {
+        get_chunk_fingerprint_key(chunk): compute_chunk_fingerprint(chunk)
+        for chunk in chunks
+    }
+
+
+def test_only_edited_chunk_is_changed() -> None:
+    document = _make_document()
+    old_chunks = [_make_chunk(document, i, f"content {i}") for i in range(3)]
+    new_chunks = [
+        _make_chunk(document, 0, "content 0"),
+        _make_chunk(document, 1, "content 1 edited"),
+        _make_chunk(document, 2, "content 2"),
+    ]
+
+    result = diff_chunks_against_fingerprints(
+        new_chunks, {document.id: _fingerprints(old_chunks)}
+    )
+
+    assert [chunk.chunk_id for chunk in result.changed_chunks] == [1]
+    assert result.doc_id_to_chunk_cnt == {document.id: 3}
+    assert result.doc_ids_with_unchanged_chunks == {document.id}
+    assert result.doc_id_to_unchanged_chunk_ids == {document.id: [0, 2]}
+    assert result.doc_id_to_unchanged_large_chunk_ids == {}
+    assert result.doc_id_to_chunk_fingerprints[document.id] == _fingerprints(new_chunks)
+
+
+def test_shifted_and_new_chunks_are_changed() -> None:
+    document = _make_document()
+    old_chunks = [_make_chunk(document, i, f"content {i}") for i in range(2)]
+    # a chunk inserted at the front shifts every following chunk
+    new_chunks = [
+        _make_chunk(document, 0, "inserted"),
+        _make_chunk(document, 1, "content 0"),
+        _make_chunk(document, 2, "content 1"),
+    ]
+
+    result = diff_chunks_against_fingerprints(
+        new_chunks, {document.id: _fingerprints(old_chunks)}
+    )
+
+    assert [chunk.chunk_id for chunk in result.changed_chunks] == [0, 1, 2]
+    assert result.doc_ids_with_unchanged_chunks == set()
+
+
+def test_document_level_change_invalidates_all_chunks() -> None:
+    old_document = _make_document(title="Old Title")
+    new_document = _make_document(title="New Title")
+    old_chunks = [_make_chunk(old_document, i, f"content {i}") for i in range(2)]
+    new_chunks = [_make_chunk(new_document, i, f"content {i}") for i in range(2)]
+
+    result = diff_chunks_against_fingerprints(
+        new_chunks, {new_document.id: _fingerprints(old_chunks)}
+    )
+
+    assert len(result.changed_chunks) == 2
+
+
+def test_large_chunks_are_keyed_separately() -> None:
+    document = _make_document()
+    regular_chunk = _make_chunk(document, 0, "content 0")
+    large_chunk = _make_chunk(document, 0, "content 0 content 1", large_chunk_id=0)
+
+    assert get_chunk_fingerprint_key(regular_chunk) != get_chunk_fingerprint_key(
+        large_chunk
+    )
+
+    result = diff_chunks_against_fingerprints(
+        [regular_chunk, large_chunk], {document.id: _fingerprints([regular_chunk])}
+    )
+
+    assert result.changed_chunks == [large_chunk]
+    assert result.doc_id_to_unchanged_chunk_ids == {document.id: [0]}
+
+
+def test_no_previous_fingerprints() -> None:
+    document = _make_document()
+    new_chunks = [_make_chunk(document, i, f"content {i}") for i in range(2)]
+
+    result = diff_chunks_against_fingerprints(new_chunks, {})
+
+    assert result.changed_chunks == new_chunks
+    assert result.doc_ids_with_unchanged_chunks == set()
@@ -9,6 +9,7 @@ from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunker import TokenCounter
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
@@ -105,3 +106,39 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+def test_token_counter_batches_and_caches_counts(
+    embedder: DefaultIndexingEmbedder,
+) -> None:
+    tokenizer = Mock(wraps=embedder.embedding_model.tokenizer)
+    token_counter = TokenCounter(tokenizer)
+
+    texts = ["This is a short section.", "Another section.", "This is a short section."]
+    token_counter.prime(texts)
+
+    tokenizer.encode_batch.assert_called_once_with(
+        ["This is a short section.", "Another section."]
+    )
+    assert token_counter.count("Another section.") == len(
+        embedder.embedding_model.tokenizer.encode("Another section.")
+    )
+    tokenizer.encode.assert_not_called()
+
+    token_counter.count("Not primed.")
+    token_counter.count("Not primed.")
+    assert tokenizer.encode.call_count == 1
+
+
+def test_token_counter_memory_is_bounded(embedder: DefaultIndexingEmbedder) -> None:
+    token_counter = TokenCounter(embedder.embedding_model.tokenizer, max_size=3)
+
+    # the growing text of a chunk being packed
+    chunk_text = ""
+    for i in range(10):
+        chunk_text += f"Section number {i}. " * 100
+        token_counter.count(chunk_text)
+
+    assert len(token_counter._counts) <= 3
+    # the texts themselves are not kept
+    assert all(len(key) == 16 for key in token_counter._counts)
@@ -0,0 +1,68 @@
+from unittest.mock import Mock
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunking_pool import ChunkerSettings
+from onyx.indexing.chunking_pool import ChunkingPool
+from onyx.indexing.embedder import DefaultIndexingEmbedder
+from onyx.indexing.indexing_pipeline import process_image_sections
+from tests.unit.onyx.indexing.conftest import MockHeartbeat
+
+
+def test_chunking_pool_matches_chunker(
+    embedder: DefaultIndexingEmbedder, mock_heartbeat: MockHeartbeat
+) -> None:
+    documents = [
+        Document(
+            id=f"test_doc_{i}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Test Document {i}",
+            metadata={"tags": ["tag1", "tag2"]},
+            doc_updated_at=None,
+            sections=[
+                TextSection(text=f"Short section of document {i}.", link="link1"),
+                TextSection(text="This is a long section. " * 50 * (i + 1), link="l2"),
+            ],
+        )
+        for i in range(5)
+    ]
+    indexing_documents = process_image_sections(documents)
+
+    chunker = Chunker(
+        tokenizer=embedder.embedding_model.tokenizer,
+        enable_multipass=True,
+        enable_large_chunks=True,
+    )
+    settings = ChunkerSettings.from_chunker(
+        chunker, embedder.model_name, embedder.provider_type
+    )
+    assert settings is not None
+
+    pool = ChunkingPool(settings, num_processes=2)
+    try:
+        pooled_chunks = pool.chunk(indexing_documents, callback=mock_heartbeat)
+    finally:
+        pool.shutdown()
+
+    expected_chunks = chunker.chunk(indexing_documents)
+    assert [chunk.model_dump() for chunk in pooled_chunks] == [
+        chunk.model_dump() for chunk in expected_chunks
+    ]
+    # chunks point to the caller's documents instead of copies
+    assert pooled_chunks[0].source_document is indexing_documents[0]
+    assert mock_heartbeat.call_count > 0
+
+
+def test_chunker_settings_require_rebuildable_tokenizer(
+    embedder: DefaultIndexingEmbedder,
+) -> None:
+    chunker = Chunker(tokenizer=Mock())
+
+    assert (
+        ChunkerSettings.from_chunker(
+            chunker, embedder.model_name, embedder.provider_type
+        )
+        is None
+    )
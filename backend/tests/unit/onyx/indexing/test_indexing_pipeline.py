@@ -1,3 +1,4 @@
+from io import BytesIO
 from typing import Any
 from typing import cast
 from typing import List
@@ -5,12 +6,15 @@ from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
+from PIL import Image
 
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import ImageSection
 from onyx.connectors.models import TextSection
+from onyx.file_processing.image_summarization import _resize_image_if_needed
+from onyx.file_processing.image_summarization import get_image_summary_key
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import _get_aggregated_chunk_boost_factor
@@ -338,3 +342,172 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+@patch("onyx.llm.utils.GEN_AI_MAX_TOKENS", 4096)
+@patch("onyx.indexing.indexing_pipeline.CONTEXTUAL_RAG_BATCH_TOKEN_BUDGET", 1)
+def test_contextual_rag_over_token_budget_uses_document_summary_only(
+    embedder: DefaultIndexingEmbedder,
+) -> None:
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        doc_updated_at=None,
+        sections=[
+            TextSection(text="This is a long section. " * 100, link="link1"),
+        ],
+    )
+
+    mock_llm = Mock()
+    mock_llm.config.max_input_tokens = get_max_input_tokens(
+        model_provider="openai", model_name="gtp-4o"
+    )
+    mock_llm.invoke.return_value = Mock(content="Summary")
+
+    chunker = Chunker(
+        tokenizer=embedder.embedding_model.tokenizer,
+        enable_multipass=False,
+        enable_contextual_rag=True,
+    )
+    chunks = chunker.chunk(process_image_sections([document]))
+
+    chunks = add_contextual_summaries(
+        chunks=chunks,
+        llm=mock_llm,
+        tokenizer=embedder.embedding_model.tokenizer,
+        chunk_token_limit=chunker.chunk_token_limit * 2,
+    )
+
+    # only the document summary fits in the budget
+    assert mock_llm.invoke.call_count == 1
+    for chunk in chunks:
+        assert chunk.doc_summary == "Summary"
+        assert chunk.chunk_context == ""
+
+
+def _make_png(
+    color: tuple[int, int, int],
+    size: tuple[int, int] = (32, 32),
+    split_vertically: bool = True,
+) -> bytes:
+    """Half of the image is `color`, the other half is white."""
+    img = Image.new("RGB", size, "white")
+    width, height = size
+    half = (
+        (0, 0, width // 2, height) if split_vertically else (0, 0, width, height // 2)
+    )
+    img.paste(color, half)
+    output = BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_image_summary_key_covers_image_and_prompt_inputs() -> None:
+    llm = Mock()
+    llm.config.model_provider = "openai"
+    llm.config.model_name = "gpt-4o"
+    logo = _make_png((255, 0, 0), size=(64, 64))
+    # near-duplicates can differ in ways that matter for the summary
+    logo_variant = _make_png((250, 2, 2), size=(64, 64))
+
+    key = get_image_summary_key(logo, "logo.png", llm)
+    assert key == get_image_summary_key(logo, "logo.png", llm)
+    assert key != get_image_summary_key(logo_variant, "logo.png", llm)
+    assert key != get_image_summary_key(logo, "chart.png", llm)
+    assert key != get_image_summary_key(logo, "logo.png", llm, system_prompt="other")
+    assert key != get_image_summary_key(
+        logo, "logo.png", llm, user_prompt_template="other"
+    )
+
+    other_llm = Mock()
+    other_llm.config.model_provider = "openai"
+    other_llm.config.model_name = "gpt-4o-mini"
+    assert key != get_image_summary_key(logo, "logo.png", other_llm)
+
+
+def test_process_image_sections_summarizes_duplicate_images_once() -> None:
+    logo = _make_png((255, 0, 0), size=(64, 64))
+    images = {
+        "logo_1": logo,
+        "logo_2": logo,
+        "logo_3": _make_png((250, 2, 2), size=(64, 64)),
+        "chart": _make_png((0, 0, 255), size=(64, 64), split_vertically=False),
+    }
+    display_names = {
+        "logo_1": "logo",
+        "logo_2": "logo",
+        "logo_3": "logo",
+        "chart": "chart",
+    }
+
+    mock_file_store = Mock()
+    mock_file_store.read_file_record.side_effect = lambda file_id: (
+        Mock(display_name=display_names[file_id]) if file_id in images else None
+    )
+    mock_file_store.read_file.side_effect = lambda file_id: BytesIO(images[file_id])
+
+    mock_llm = Mock()
+    mock_llm.config.model_provider = "openai"
+    mock_llm.config.model_name = "gpt-4o"
+
+    summarized_images: list[bytes] = []
+
+    def mock_summarize(llm: Any, image_data: bytes, context_name: str) -> str:
+        summarized_images.append(image_data)
+        return f"summary of {context_name}"
+
+    document = create_test_document(
+        sections=cast(
+            list[TextSection],
+            [
+                TextSection(text="Some text", link="link"),
+                ImageSection(image_file_id="logo_1", link="link"),
+                ImageSection(image_file_id="logo_2", link="link"),
+                ImageSection(image_file_id="logo_3", link="link"),
+                ImageSection(image_file_id="chart", link="link"),
+                ImageSection(image_file_id="missing", link="link"),
+            ],
+        )
+    )
+
+    module = "onyx.indexing.indexing_pipeline"
+    with (
+        patch(f"{module}.get_image_extraction_and_analysis_enabled", return_value=True),
+        patch(f"{module}.get_default_llm_with_vision", return_value=mock_llm),
+        patch(f"{module}.get_default_file_store", return_value=mock_file_store),
+        patch(f"{module}.get_cached_image_summary", return_value=None),
+        patch(f"{module}.cache_image_summary") as mock_cache,
+        patch(
+            f"{module}.summarize_image_with_error_handling",
+            side_effect=mock_summarize,
+        ),
+    ):
+        indexing_documents = process_image_sections([document])
+
+    section_texts = [
+        section.text for section in indexing_documents[0].processed_sections
+    ]
+    assert section_texts == [
+        "Some text",
+        "summary of logo",
+        "summary of logo",
+        "summary of logo",
+        "summary of chart",
+        "[Image could not be processed]",
+    ]
+    # the identical logos are summarized once, the slightly different one is not
+    # a duplicate
+    assert len(summarized_images) == 3
+    assert mock_cache.call_count == 3
+
+
+def test_resize_image_if_needed_downscales_large_dimensions() -> None:
+    small_image = _make_png((255, 0, 0), size=(100, 50))
+    assert _resize_image_if_needed(small_image, max_dimension=200) == small_image
+
+    large_image = _make_png((255, 0, 0), size=(400, 200))
+    resized = _resize_image_if_needed(large_image, max_dimension=200)
+    with Image.open(BytesIO(resized)) as img:
+        assert img.size == (200, 100)
@@ -0,0 +1,226 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.db.models import Document
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering import clustering
+from onyx.kg.clustering.clustering import _cluster_grounded_entities_batch
+from onyx.kg.clustering.clustering import _get_batch_candidates
+from onyx.kg.clustering.clustering import _get_best_match
+from onyx.kg.clustering.clustering import _update_vespa_batch
+
+
+def _entity(
+    name: str, entity_type: str = "ACCOUNT", document_id: str | None = None
+) -> KGEntity:
+    return KGEntity(
+        id_name=f"{entity_type}::{name}",
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+    )
+
+
+def _staging_entity(
+    name: str, entity_type: str = "ACCOUNT", document_id: str | None = None
+) -> KGEntityExtractionStaging:
+    return KGEntityExtractionStaging(
+        id_name=f"{entity_type}::{name}",
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+    )
+
+
+def test_get_best_match() -> None:
+    candidates = [
+        _entity("acme corporation internal"),
+        _entity("acme corporation international"),
+        _entity("initech"),
+    ]
+
+    best_match = _get_best_match("acme corporation international.", candidates)
+
+    assert best_match is not None
+    assert best_match.name == "acme corporation international"
+    assert _get_best_match("globex", candidates) is None
+
+
+def test_get_best_match_skips_names_with_digits() -> None:
+    assert _get_best_match("version1", [_entity("version2")]) is None
+
+
+def test_get_batch_candidates_tracks_batch_entities() -> None:
+    stale_acme = _entity("acme corp")
+    merged_acme = _entity("acme corp")
+    batch_entities = {
+        merged_acme.id_name: merged_acme,
+        "ACCOUNT::initech": _entity("initech"),
+        "EMPLOYEE::acme corp": _entity("acme corp", entity_type="EMPLOYEE"),
+        "ACCOUNT::globex": _entity("globex", document_id="doc1"),
+    }
+
+    candidates = _get_batch_candidates(
+        _staging_entity("acme corp."), "acme corp.", [stale_acme], batch_entities
+    )
+
+    # the db entity is replaced by its state in the batch, and the entities of the
+    # same type transferred earlier in the batch are added
+    assert candidates[0] is merged_acme
+    assert [candidate.id_name for candidate in candidates] == [
+        "ACCOUNT::acme corp",
+        "ACCOUNT::initech",
+        "ACCOUNT::globex",
+    ]
+
+    # entities of documents are only merged into entities without a document
+    document_candidates = _get_batch_candidates(
+        _staging_entity("acme corp.", document_id="doc2"),
+        "acme corp.",
+        [stale_acme],
+        batch_entities,
+    )
+    assert "ACCOUNT::globex" not in {
+        candidate.id_name for candidate in document_candidates
+    }
+
+
+def test_get_batch_candidates_skips_names_with_digits() -> None:
+    meeting = _entity("quarterly business review meeting")
+
+    assert (
+        _get_batch_candidates(
+            _staging_entity("quarterly business review meeting 2"),
+            "quarterly business review meeting 2",
+            [],
+            {meeting.id_name: meeting},
+        )
+        == []
+    )
+
+
+@pytest.fixture
+def db_session(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    db_session = Mock()
+    db_session.query.return_value.filter.return_value.all.return_value = []
+
+    @contextmanager
+    def get_session() -> Iterator[Mock]:
+        yield db_session
+
+    monkeypatch.setattr(clustering, "get_session_with_current_tenant", get_session)
+    return db_session
+
+
+def test_cluster_grounded_entities_batch(
+    db_session: Mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def transfer_entity(db_session: Any, entity: KGEntityExtractionStaging) -> KGEntity:
+        return _entity(entity.name, entity.entity_type_id_name, entity.document_id)
+
+    merge_entities = Mock(side_effect=lambda db_session, parent, child: parent)
+    monkeypatch.setattr(clustering, "transfer_entity", transfer_entity)
+    monkeypatch.setattr(clustering, "merge_entities", merge_entities)
+    similar_entities_batch = Mock(side_effect=lambda _, entities, __: [[]] * 4)
+    monkeypatch.setattr(
+        clustering, "_get_similar_entities_batch", similar_entities_batch
+    )
+
+    num_merged = _cluster_grounded_entities_batch(
+        [
+            _staging_entity("acme corporation international"),
+            _staging_entity("acme corporation international."),
+            _staging_entity("quarterly business review meeting"),
+            _staging_entity("quarterly business review meeting 2"),
+        ]
+    )
+
+    # the second entity is merged into the first one, created earlier in the batch,
+    # names with digits are not merged
+    assert num_merged == 1
+    merge_entities.assert_called_once()
+    assert (
+        merge_entities.call_args.kwargs["parent"].name
+        == "acme corporation international"
+    )
+    # one lookup of the similar entities and one transaction for the whole batch
+    similar_entities_batch.assert_called_once()
+    db_session.commit.assert_called_once()
+
+
+def test_cluster_grounded_entities_batch_uses_document_titles(
+    db_session: Mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    db_session.query.return_value.filter.return_value.all.return_value = [
+        ("doc1", "Acme Renewal")
+    ]
+    monkeypatch.setattr(clustering, "transfer_entity", Mock())
+    similar_entities_batch = Mock(return_value=[[], []])
+    monkeypatch.setattr(
+        clustering, "_get_similar_entities_batch", similar_entities_batch
+    )
+
+    _cluster_grounded_entities_batch(
+        [
+            _staging_entity("doc1", entity_type="OPPORTUNITY", document_id="doc1"),
+            _staging_entity("doc2", entity_type="OPPORTUNITY", document_id="doc2"),
+        ]
+    )
+
+    # entities of documents are named after the documents, documents that are not
+    # found fall back to the entity name
+    assert similar_entities_batch.call_args.args[2] == ["acme renewal", "doc2"]
+
+
+def test_update_vespa_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    get_update_requests = Mock(
+        return_value={"doc1": ["doc1_chunk0", "doc1_chunk1"], "doc2": ["doc2_chunk0"]}
+    )
+    update_vespa = Mock()
+    monkeypatch.setattr(
+        clustering,
+        "get_kg_vespa_info_update_requests_for_documents",
+        get_update_requests,
+    )
+    monkeypatch.setattr(clustering, "update_kg_chunks_vespa_info", update_vespa)
+
+    # a document is listed once per staging entity
+    documents = [Document(id="doc1"), Document(id="doc2"), Document(id="doc1")]
+    num_chunks = _update_vespa_batch(documents, "index", "tenant")
+
+    assert num_chunks == 3
+    get_update_requests.assert_called_once_with(["doc1", "doc2"])
+    update_vespa.assert_called_once_with(
+        ["doc1_chunk0", "doc1_chunk1", "doc2_chunk0"], "index", "tenant"
+    )
+
+
+def test_update_vespa_batch_isolates_failing_documents(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def update_vespa(update_requests: list[str], *_: Any) -> None:
+        if "doc2_chunk0" in update_requests:
+            raise ValueError("vespa error")
+
+    monkeypatch.setattr(
+        clustering,
+        "get_kg_vespa_info_update_requests_for_documents",
+        Mock(
+            return_value={
+                "doc1": ["doc1_chunk0", "doc1_chunk1"],
+                "doc2": ["doc2_chunk0"],
+            }
+        ),
+    )
+    monkeypatch.setattr(clustering, "update_kg_chunks_vespa_info", update_vespa)
+
+    num_chunks = _update_vespa_batch(
+        [Document(id="doc1"), Document(id="doc2")], "index", "tenant"
+    )
+
+    assert num_chunks == 2
@@ -0,0 +1,313 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.messages import BaseMessage
+
+from onyx.db.models import KGStage
+from onyx.kg.extractions import extraction_pipeline
+from onyx.kg.extractions import extraction_processing
+from onyx.kg.extractions.extraction_pipeline import KGExtractionPipeline
+from onyx.kg.models import KGChunkFormat
+from onyx.kg.models import KGConfigSettings
+from onyx.kg.models import KGDocumentDeepExtractionResults
+from onyx.kg.models import KGDocumentExtraction
+from onyx.kg.models import KGEnhancedDocumentMetadata
+from onyx.kg.models import KGImpliedExtractionResults
+from onyx.kg.models import KGStagingEntity
+from onyx.kg.utils import extraction_utils
+
+
+def _chunk(document_id: str, content: str) -> KGChunkFormat:
+    return KGChunkFormat(
+        document_id=document_id,
+        chunk_id=0,
+        title=document_id,
+        content=content,
+        primary_owners=[],
+        secondary_owners=[],
+        source_type="web",
+    )
+
+
+def _extraction(document_id: str, deep_extraction: bool = True) -> KGDocumentExtraction:
+    return KGDocumentExtraction(
+        document_id=document_id,
+        metadata=KGEnhancedDocumentMetadata(
+            entity_type="TICKET",
+            metadata_attribute_conversion={},
+            document_metadata={},
+            deep_extraction=deep_extraction,
+            classification_enabled=False,
+            classification_instructions=None,
+            skip=False,
+        ),
+        implied_extraction=KGImpliedExtractionResults(
+            document_entity=f"TICKET::{document_id}",
+            implied_entities=set(),
+            implied_relationships=set(),
+            company_participant_emails=set(),
+            account_participant_emails=set(),
+        ),
+    )
+
+
+def _deep_extraction(entity: str) -> KGDocumentDeepExtractionResults:
+    return KGDocumentDeepExtractionResults(
+        classification_result=None,
+        deep_extracted_entities={entity},
+        deep_extracted_relationships=set(),
+    )
+
+
+class _FakeLLM:
+    def __init__(self, response: str) -> None:
+        self.response = response
+        self.prompts: list[list[BaseMessage]] = []
+
+    def invoke(self, prompt: list[BaseMessage]) -> AIMessage:
+        self.prompts.append(prompt)
+        return AIMessage(content=self.response)
+
+
+class _FakeWriter:
+    """Records the writes of the pipeline, fails the writes including the entities
+    of the failing documents"""
+
+    def __init__(self) -> None:
+        self.failing_document_ids: set[str] = set()
+        self.entity_writes: list[list[str]] = []
+        self.stages: dict[str, KGStage] = {}
+        self.db_session = Mock()
+
+    def upsert_staging_entities(
+        self, db_session: Any, entities: list[KGStagingEntity]
+    ) -> list:
+        if any(entity.document_id in self.failing_document_ids for entity in entities):
+            raise ValueError("write error")
+        self.entity_writes.append(sorted(entity.name for entity in entities))
+        return []
+
+    def update_documents_kg_info(
+        self, db_session: Any, document_ids: list[str], kg_stage: KGStage
+    ) -> None:
+        for document_id in document_ids:
+            self.stages[document_id] = kg_stage
+
+
+@pytest.fixture
+def writer(monkeypatch: pytest.MonkeyPatch) -> _FakeWriter:
+    writer = _FakeWriter()
+
+    @contextmanager
+    def get_session() -> Iterator[Mock]:
+        yield writer.db_session
+
+    monkeypatch.setattr(extraction_pipeline, "_WAIT_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(extraction_pipeline, "get_entity_types_str", lambda **_: "")
+    monkeypatch.setattr(
+        extraction_pipeline, "get_relationship_types_str", lambda **_: ""
+    )
+    monkeypatch.setattr(
+        extraction_pipeline, "extend_lock", lambda lock, timeout, last_time: last_time
+    )
+    monkeypatch.setattr(
+        extraction_pipeline, "get_session_with_current_tenant", get_session
+    )
+    monkeypatch.setattr(
+        extraction_pipeline,
+        "get_document_vespa_contents",
+        lambda document_id, *_: [[_chunk(document_id, f"content of {document_id}")]],
+    )
+    monkeypatch.setattr(
+        extraction_pipeline, "upsert_staging_entities", writer.upsert_staging_entities
+    )
+    monkeypatch.setattr(
+        extraction_pipeline, "upsert_staging_relationship_types", Mock()
+    )
+    monkeypatch.setattr(extraction_pipeline, "upsert_staging_relationships", Mock())
+    monkeypatch.setattr(
+        extraction_pipeline, "update_documents_kg_info", writer.update_documents_kg_info
+    )
+    return writer
+
+
+def _pipeline(
+    max_in_flight_documents: int = 8, write_batch_size: int = 8
+) -> KGExtractionPipeline:
+    return KGExtractionPipeline(
+        tenant_id="tenant",
+        index_name="index",
+        lock=Mock(),
+        kg_config_settings=KGConfigSettings(KG_VENDOR="Vendor"),
+        active_entity_types={"ACCOUNT", "TICKET"},
+        entity_metadata_conversion_instructions={},
+        metadata_tracker=Mock(),
+        num_workers=2,
+        max_in_flight_documents=max_in_flight_documents,
+        write_batch_size=write_batch_size,
+    )
+
+
+def test_pipeline_releases_in_flight_documents(
+    writer: _FakeWriter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        extraction_pipeline, "is_packable_for_extraction", lambda *_: False
+    )
+    monkeypatch.setattr(
+        extraction_pipeline,
+        "kg_deep_extraction",
+        Mock(side_effect=ValueError("llm error")),
+    )
+    writer.failing_document_ids = {"doc2"}
+    pipeline = _pipeline(max_in_flight_documents=1)
+
+    # every submit waits for the previous document to be written, including the
+    # documents whose extraction or write failed
+    submitter = threading.Thread(
+        target=lambda: [
+            pipeline.submit(_extraction(document_id, deep_extraction=deep_extraction))
+            for document_id, deep_extraction in [
+                ("doc1", True),
+                ("doc2", False),
+                ("doc3", False),
+            ]
+        ],
+        daemon=True,
+    )
+    submitter.start()
+    submitter.join(timeout=10)
+    assert not submitter.is_alive()
+    pipeline.close()
+
+    assert writer.stages == {
+        "doc1": KGStage.FAILED,
+        "doc2": KGStage.FAILED,
+        "doc3": KGStage.EXTRACTED,
+    }
+    assert pipeline.num_written == 1
+    assert pipeline.num_failed == 2
+
+
+def test_pipeline_flushes_last_pack_on_close(
+    writer: _FakeWriter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fast_llm = _FakeLLM('{"1": {"entities": ["ACCOUNT::Acme"], "relationships": []}}')
+    monkeypatch.setattr(extraction_utils, "get_default_llms", lambda: (None, fast_llm))
+    monkeypatch.setattr(
+        extraction_pipeline, "is_packable_for_extraction", lambda *_: True
+    )
+    monkeypatch.setattr(extraction_pipeline, "KG_EXTRACTION_PACKING_MAX_DOCUMENTS", 3)
+    kg_deep_extraction = Mock(return_value=_deep_extraction("ACCOUNT::Initech"))
+    monkeypatch.setattr(extraction_pipeline, "kg_deep_extraction", kg_deep_extraction)
+    pipeline = _pipeline()
+
+    pipeline.submit(_extraction("doc1"))
+    pipeline.submit(_extraction("doc2"))
+    while not pipeline._are_futures_done():
+        pass
+
+    # the pack is not full, so it waits for more documents
+    assert fast_llm.prompts == []
+    assert writer.stages == {}
+
+    pipeline.close()
+
+    # both documents are extracted with a single prompt, the document missing from
+    # the response is extracted on its own
+    assert len(fast_llm.prompts) == 1
+    kg_deep_extraction.assert_called_once()
+    assert kg_deep_extraction.call_args.args[0] == "doc2"
+    assert writer.stages == {"doc1": KGStage.EXTRACTED, "doc2": KGStage.EXTRACTED}
+    assert sorted(name for write in writer.entity_writes for name in write) == [
+        "Acme",
+        "Doc1",
+        "Doc2",
+        "Initech",
+    ]
+    assert pipeline.num_prompts == 2
+    assert pipeline.num_packed_documents == 2
+
+
+def test_pipeline_writes_documents_separately_when_batch_fails(
+    writer: _FakeWriter,
+) -> None:
+    writer.failing_document_ids = {"doc2"}
+    pipeline = _pipeline()
+
+    pipeline._in_flight.acquire()
+    pipeline._in_flight.acquire()
+    pipeline._flush(
+        [
+            _extraction("doc1", deep_extraction=False),
+            _extraction("doc2", deep_extraction=False),
+        ]
+    )
+    pipeline.close()
+
+    # the batch is written again per document, only the failing document is lost
+    assert writer.entity_writes == [["Doc1"]]
+    assert writer.stages == {"doc1": KGStage.EXTRACTED, "doc2": KGStage.FAILED}
+    assert pipeline.num_written == 1
+    assert pipeline.num_failed == 1
+
+
+def test_pipeline_extraction_resets_interrupted_documents(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    db_session = Mock()
+
+    @contextmanager
+    def get_session() -> Iterator[Mock]:
+        yield db_session
+
+    calls = Mock()
+    pipeline = Mock()
+    monkeypatch.setattr(extraction_processing, "get_kg_config_settings", Mock())
+    monkeypatch.setattr(extraction_processing, "validate_kg_settings", Mock())
+    monkeypatch.setattr(
+        extraction_processing, "get_session_with_current_tenant", get_session
+    )
+    monkeypatch.setattr(
+        extraction_processing, "get_kg_enabled_connectors", Mock(return_value=[])
+    )
+    monkeypatch.setattr(
+        extraction_processing,
+        "_get_classification_extraction_instructions",
+        Mock(return_value={}),
+    )
+    monkeypatch.setattr(
+        extraction_processing, "get_active_entity_type_names", Mock(return_value=[])
+    )
+    monkeypatch.setattr(
+        extraction_processing, "get_cached_kg_schema_value", Mock(return_value={})
+    )
+    monkeypatch.setattr(extraction_processing, "EntityTypeMetadataTracker", Mock())
+    monkeypatch.setattr(
+        extraction_processing, "update_document_kg_stages", calls.reset_stages
+    )
+    monkeypatch.setattr(
+        extraction_processing, "KGExtractionPipeline", Mock(return_value=pipeline)
+    )
+    monkeypatch.setattr(
+        extraction_processing,
+        "_kg_extraction_pipelined",
+        Mock(side_effect=ValueError("extraction error")),
+    )
+    db_session.commit = calls.commit
+
+    with pytest.raises(ValueError):
+        extraction_processing.kg_extraction("tenant", "index", Mock(), pipelined=True)
+
+    # the documents left EXTRACTING by an interrupted run are extracted again, and
+    # the pipeline is closed even if the extraction fails
+    assert calls.mock_calls[:2] == [
+        ("reset_stages", (db_session, KGStage.EXTRACTING, KGStage.NOT_STARTED), {}),
+        ("commit", (), {}),
+    ]
+    pipeline.close.assert_called_once()
@@ -0,0 +1,99 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.messages import BaseMessage
+
+from onyx.kg.models import KGChunkFormat
+from onyx.kg.models import KGConfigSettings
+from onyx.kg.models import KGEnhancedDocumentMetadata
+from onyx.kg.utils import extraction_utils
+from onyx.kg.utils.extraction_utils import is_packable_for_extraction
+from onyx.kg.utils.extraction_utils import kg_deep_extract_packed_documents
+
+
+def _chunk(document_id: str, content: str) -> KGChunkFormat:
+    return KGChunkFormat(
+        document_id=document_id,
+        chunk_id=0,
+        title=document_id,
+        content=content,
+        primary_owners=[],
+        secondary_owners=[],
+        source_type="web",
+    )
+
+
+def _metadata(
+    entity_type: str, classification_enabled: bool = False
+) -> KGEnhancedDocumentMetadata:
+    return KGEnhancedDocumentMetadata(
+        entity_type=entity_type,
+        metadata_attribute_conversion={},
+        document_metadata={},
+        deep_extraction=True,
+        classification_enabled=classification_enabled,
+        classification_instructions=None,
+        skip=False,
+    )
+
+
+def test_is_packable_for_extraction() -> None:
+    short_document = [[_chunk("doc", "short content")]]
+
+    assert is_packable_for_extraction(_metadata("TICKET"), short_document, 100)
+    assert not is_packable_for_extraction(_metadata("TICKET"), short_document, 5)
+    assert not is_packable_for_extraction(_metadata("TICKET"), short_document * 2, 100)
+    assert not is_packable_for_extraction(
+        _metadata("TICKET", classification_enabled=True), short_document, 100
+    )
+
+
+class _FakeLLM:
+    def __init__(self, response: str) -> None:
+        self.response = response
+        self.prompts: list[list[BaseMessage]] = []
+
+    def invoke(self, prompt: list[BaseMessage]) -> AIMessage:
+        self.prompts.append(prompt)
+        return AIMessage(content=self.response)
+
+
+def test_kg_deep_extract_packed_documents(monkeypatch: pytest.MonkeyPatch) -> None:
+    fast_llm = _FakeLLM(
+        '```json\n{"1": {"entities": ["ACCOUNT::Acme"], "relationships": '
+        '["ACCOUNT::Acme__uses__FEATURE::Search"]}, "3": "invalid"}\n```'
+    )
+    monkeypatch.setattr(extraction_utils, "get_default_llms", lambda: (None, fast_llm))
+
+    results = kg_deep_extract_packed_documents(
+        [(f"TICKET::{i}", [_chunk(f"doc{i}", f"content {i}")]) for i in range(1, 4)],
+        KGConfigSettings(KG_VENDOR="Vendor"),
+        entity_types_str="ACCOUNT\nFEATURE",
+        relationship_types_str="",
+    )
+
+    # all documents are extracted with a single prompt
+    assert len(fast_llm.prompts) == 1
+    assert results[0] is not None
+    assert results[0].deep_extracted_entities == {"ACCOUNT::Acme"}
+    assert results[0].deep_extracted_relationships == {
+        "ACCOUNT::Acme__uses__FEATURE::Search"
+    }
+    # missing or malformed extractions are left for a separate extraction
+    assert results[1:] == [None, None]
+
+
+def test_kg_deep_extract_packed_documents_invalid_response(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        extraction_utils, "get_default_llms", lambda: (None, _FakeLLM("no json"))
+    )
+
+    results = kg_deep_extract_packed_documents(
+        [("TICKET::1", [_chunk("doc1", "content")])],
+        KGConfigSettings(),
+        entity_types_str="ACCOUNT",
+        relationship_types_str="",
+    )
+
+    assert results == [None]
@@ -0,0 +1,57 @@
+import pytest
+
+from onyx.kg.clustering import normalizations
+from onyx.kg.clustering.normalizations import _normalize_entities_batch
+from onyx.kg.clustering.normalizations import _rerank_candidates
+
+
+def test_rerank_candidates_matches_typos() -> None:
+    candidates = [
+        ("ACCOUNT::acme_corp", "Acme Corp"),
+        ("ACCOUNT::acme_labs", "Acme Labs"),
+        ("ACCOUNT::initech", "Initech"),
+    ]
+
+    assert _rerank_candidates("acmecrop", candidates, {}) == "ACCOUNT::acme_corp"
+    assert _rerank_candidates("initek", candidates, {}) == "ACCOUNT::initech"
+
+
+def test_rerank_candidates_threshold() -> None:
+    assert _rerank_candidates("zzzzzz", [("ACCOUNT::acme", "Acme")], {}) is None
+
+
+def test_rerank_candidates_short_names() -> None:
+    # too short for bigrams and trigrams
+    assert _rerank_candidates("a", [("GRADE::a", "A"), ("GRADE::b", "B")], {}) == (
+        "GRADE::a"
+    )
+
+
+def test_normalize_entities_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    retrieved_queries: list[list[tuple[str, str | None, str]]] = []
+
+    def fake_get_entity_candidates(
+        queries: list[tuple[str, str | None, str]],
+        allowed_docs_temp_view_name: str,
+    ) -> list[list[tuple[str, str]]]:
+        retrieved_queries.append(queries)
+        return [
+            [("ACCOUNT::acme_corp", "Acme Corp")],
+            [],
+        ]
+
+    monkeypatch.setattr(
+        normalizations, "_get_entity_candidates", fake_get_entity_candidates
+    )
+
+    mapping = _normalize_entities_batch(
+        ["ACCOUNT::Acme Corp.", "ACCOUNT::*", "ACCOUNT::Unknown"],
+        [{"subtype": "customer"}, {}, {}],
+        allowed_docs_temp_view_name='"tenant".allowed_docs_view',
+    )
+
+    # all entities are retrieved with a single query, wildcards are not retrieved
+    assert retrieved_queries == [
+        [("ACCOUNT", "customer", "acmecorp"), ("ACCOUNT", None, "unknown")]
+    ]
+    assert mapping == ["ACCOUNT::acme_corp", "ACCOUNT::*", None]
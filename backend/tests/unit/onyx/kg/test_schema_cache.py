@@ -0,0 +1,77 @@
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.kg import schema_cache
+from onyx.kg.models import KGConfigSettings
+from onyx.kg.schema_cache import get_cached_kg_config_settings
+from onyx.kg.schema_cache import get_cached_kg_schema_value
+from onyx.kg.schema_cache import invalidate_kg_schema_cache
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+
+    def get(self, key: str) -> bytes | None:
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key: str) -> None:
+        self.values[key] = self.values.get(key, 0) + 1
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr(schema_cache, "get_redis_client", lambda **_: redis)
+    monkeypatch.setattr(schema_cache, "get_current_tenant_id", lambda: "test_tenant")
+    monkeypatch.setattr(schema_cache, "_tenant_caches", {})
+    return redis
+
+
+def test_schema_values_are_cached_until_invalidated(fake_redis: FakeRedis) -> None:
+    build = Mock(return_value="ACCOUNT\nEMPLOYEE")
+
+    assert get_cached_kg_schema_value("entity_types_str", build) == "ACCOUNT\nEMPLOYEE"
+    assert get_cached_kg_schema_value("entity_types_str", build) == "ACCOUNT\nEMPLOYEE"
+    assert build.call_count == 1
+
+    invalidate_kg_schema_cache()
+    get_cached_kg_schema_value("entity_types_str", build)
+    assert build.call_count == 2
+
+    # another process changed the schema
+    fake_redis.incr(schema_cache._KG_SCHEMA_CACHE_VERSION_KEY)
+    get_cached_kg_schema_value("entity_types_str", build)
+    assert build.call_count == 3
+
+
+def test_schema_cache_is_skipped_without_redis(
+    fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def failing_get(*args: Any) -> None:
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(fake_redis, "get", failing_get)
+    build = Mock(return_value="ACCOUNT")
+
+    get_cached_kg_schema_value("entity_types_str", build)
+    get_cached_kg_schema_value("entity_types_str", build)
+    assert build.call_count == 2
+
+
+def test_cached_kg_config_settings_are_copied(
+    fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        schema_cache,
+        "get_kg_config_settings",
+        Mock(return_value=KGConfigSettings(KG_ENABLED=True)),
+    )
+
+    kg_config_settings = get_cached_kg_config_settings()
+    kg_config_settings.KG_ENABLED = False
+
+    assert get_cached_kg_config_settings().KG_ENABLED
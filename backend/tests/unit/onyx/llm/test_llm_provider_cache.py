@@ -0,0 +1,67 @@
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.llm import llm_provider_cache
+from onyx.llm.llm_provider_cache import get_cached_llm_provider
+from onyx.llm.llm_provider_cache import invalidate_llm_provider_cache
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, int] = {}
+
+    def get(self, key: str) -> bytes | None:
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def incr(self, key: str) -> None:
+        self.values[key] = self.values.get(key, 0) + 1
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr(llm_provider_cache, "get_redis_client", lambda **_: redis)
+    monkeypatch.setattr(
+        llm_provider_cache, "get_current_tenant_id", lambda: "test_tenant"
+    )
+    monkeypatch.setattr(llm_provider_cache, "_tenant_caches", {})
+    return redis
+
+
+def test_providers_are_cached_until_invalidated(
+    fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fetch = Mock(side_effect=lambda name: f"provider_{name}")
+    monkeypatch.setattr(llm_provider_cache, "_fetch_llm_provider", fetch)
+
+    assert get_cached_llm_provider("openai") == "provider_openai"
+    assert get_cached_llm_provider("openai") == "provider_openai"
+    assert get_cached_llm_provider(None) == "provider_None"
+    assert fetch.call_count == 2
+
+    invalidate_llm_provider_cache()
+    get_cached_llm_provider("openai")
+    assert fetch.call_count == 3
+
+    # another process changed the providers
+    fake_redis.incr(llm_provider_cache._LLM_PROVIDER_CACHE_VERSION_KEY)
+    get_cached_llm_provider("openai")
+    assert fetch.call_count == 4
+
+
+def test_provider_cache_is_skipped_without_redis(
+    fake_redis: FakeRedis, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def failing_get(*args: Any) -> None:
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(fake_redis, "get", failing_get)
+    fetch = Mock(return_value=None)
+    monkeypatch.setattr(llm_provider_cache, "_fetch_llm_provider", fetch)
+
+    assert get_cached_llm_provider("openai") is None
+    assert get_cached_llm_provider("openai") is None
+    assert fetch.call_count == 2
@@ -0,0 +1,15 @@
+import pytest
+
+from onyx.llm import utils
+from onyx.llm.utils import get_max_input_tokens
+
+
+def test_max_input_tokens_follows_max_tokens_override(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(utils, "GEN_AI_MAX_TOKENS", 4096)
+    assert get_max_input_tokens("gpt-4o", "openai", output_tokens=1024) == 3072
+
+    # the previous result is cached but must not be returned for another override
+    monkeypatch.setattr(utils, "GEN_AI_MAX_TOKENS", 8192)
+    assert get_max_input_tokens("gpt-4o", "openai", output_tokens=1024) == 7168
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any
+from typing import cast
+
+import pytest
+from fastapi import Request
+
+from onyx.server.query_and_chat.chat_backend import ClientDisconnectWatcher
+
+
+class _FakeRequest:
+    def __init__(self) -> None:
+        self.messages: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def receive(self) -> dict[str, Any]:
+        return await self.messages.get()
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_watcher_sets_event_on_disconnect() -> None:
+    request = _FakeRequest()
+    watcher = ClientDisconnectWatcher(cast(Request, request))
+
+    await request.messages.put({"type": "http.request", "body": b""})
+    await asyncio.sleep(0)
+    assert watcher.is_connected()
+
+    await request.messages.put({"type": "http.disconnect"})
+    await asyncio.wait_for(watcher._task, timeout=1)
+    assert not watcher.is_connected()
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.configs.constants import MessageType
+from onyx.server.query_and_chat import streaming_utils
+from onyx.server.query_and_chat.streaming_models import EndStepPacketList
+from onyx.server.query_and_chat.streaming_models import MessageDelta
+from onyx.server.query_and_chat.streaming_models import OverallStop
+from onyx.server.query_and_chat.streaming_models import Packet
+from onyx.server.query_and_chat.streaming_utils import PacketTranslationLookups
+from onyx.server.query_and_chat.streaming_utils import (
+    translate_db_messages_to_packets,
+)
+
+
+def _search_doc(doc_id: int, document_id: str) -> Any:
+    return SimpleNamespace(id=doc_id, document_id=document_id)
+
+
+def _message(
+    message_id: int,
+    message: str = "answer",
+    citations: dict[int, int] | None = None,
+    search_docs: list[Any] | None = None,
+    tool_ids: list[int] | None = None,
+) -> Any:
+    return SimpleNamespace(
+        id=message_id,
+        message=message,
+        message_type=MessageType.ASSISTANT,
+        citations=citations,
+        research_type=None,
+        search_docs=search_docs or [],
+        research_iterations=[
+            SimpleNamespace(
+                id=message_id,
+                sub_steps=[
+                    SimpleNamespace(sub_step_tool_id=tool_id)
+                    for tool_id in tool_ids or []
+                ],
+            )
+        ],
+    )
+
+
+def test_prefetch_loads_lookups_in_bulk(monkeypatch: pytest.MonkeyPatch) -> None:
+    get_docs = Mock(return_value=[_search_doc(3, "doc_c")])
+    get_tools = Mock(return_value=[SimpleNamespace(id=7, name="SearchTool")])
+    monkeypatch.setattr(streaming_utils, "get_db_search_docs_by_ids", get_docs)
+    monkeypatch.setattr(streaming_utils, "get_tools_by_ids", get_tools)
+    for single_lookup in [
+        "get_db_search_doc_by_id",
+        "get_db_search_doc_by_document_id",
+        "get_tool_by_id",
+    ]:
+        monkeypatch.setattr(
+            streaming_utils, single_lookup, Mock(side_effect=AssertionError)
+        )
+
+    lookups = PacketTranslationLookups(db_session=None)  # type: ignore
+    lookups.prefetch(
+        [
+            _message(1, citations={1: 1, 2: 3}, search_docs=[_search_doc(1, "doc_a")]),
+            _message(2, citations={1: 2}, search_docs=[_search_doc(2, "doc_b")]),
+            _message(3, tool_ids=[7, 7]),
+        ]
+    )
+
+    # only the cited doc that is not one of the docs of the messages is queried
+    get_docs.assert_called_once_with({3}, None)
+    get_tools.assert_called_once_with({7}, None)
+    assert lookups.get_search_doc(3).document_id == "doc_c"
+    assert lookups.get_search_doc_by_document_id("doc_b").id == 2
+    assert lookups.get_tool(7).name == "SearchTool"
+
+
+def test_translated_packets_are_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(streaming_utils, "get_current_tenant_id", lambda: "tenant")
+    monkeypatch.setattr(streaming_utils, "get_db_search_docs_by_ids", Mock())
+    monkeypatch.setattr(streaming_utils, "get_tools_by_ids", Mock(return_value=[]))
+    translate = Mock(
+        side_effect=lambda chat_message, **_: EndStepPacketList(
+            end_step_nr=1,
+            packet_list=[
+                Packet(ind=0, obj=MessageDelta(content=chat_message.message)),
+                Packet(ind=1, obj=OverallStop()),
+            ],
+        )
+    )
+    monkeypatch.setattr(streaming_utils, "translate_db_message_to_packets", translate)
+    monkeypatch.setattr(
+        streaming_utils,
+        "_translated_packets_cache",
+        streaming_utils.OrderedDict(),
+    )
+
+    messages = [_message(1, "first"), _message(2, "second")]
+    packet_lists = translate_db_messages_to_packets(messages, db_session=None)  # type: ignore
+    assert [[packet.ind for packet in packets] for packets in packet_lists] == [
+        [1, 2, 2],
+        [2, 3, 3],
+    ]
+    assert translate.call_count == 2
+
+    assert (
+        translate_db_messages_to_packets(messages, db_session=None)  # type: ignore
+        == packet_lists
+    )
+    assert translate.call_count == 2
+
+    # an edited message is translated again
+    messages[1].message = "edited"
+    packet_lists = translate_db_messages_to_packets(messages, db_session=None)  # type: ignore
+    assert translate.call_count == 3
+    assert packet_lists[1][0].obj == MessageDelta(content="edited")
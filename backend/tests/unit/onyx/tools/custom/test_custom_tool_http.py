@@ -0,0 +1,85 @@
+import httpx
+import pytest
+
+from onyx.tools.tool_implementations.custom import custom_tool_http
+from onyx.tools.tool_implementations.custom.custom_tool_http import (
+    CustomToolHttpResponse,
+)
+from onyx.tools.tool_implementations.custom.custom_tool_http import (
+    CustomToolResponseTooLargeError,
+)
+from onyx.tools.tool_implementations.custom.custom_tool_http import (
+    send_custom_tool_request,
+)
+
+
+class FakeApi:
+    def __init__(self) -> None:
+        self.num_requests = 0
+        self.num_clients = 0
+        self.body = b'{"result": "ok"}'
+        self.headers: dict[str, str] = {"Content-Type": "application/json"}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.num_requests += 1
+        return httpx.Response(200, headers=self.headers, content=self.body)
+
+    def build_client(self) -> httpx.Client:
+        self.num_clients += 1
+        return httpx.Client(transport=httpx.MockTransport(self.handle))
+
+
+@pytest.fixture
+def api(monkeypatch: pytest.MonkeyPatch) -> FakeApi:
+    api = FakeApi()
+    custom_tool_http._clients.clear()
+    custom_tool_http._response_cache.clear()
+    monkeypatch.setattr(custom_tool_http, "_build_client", api.build_client)
+    return api
+
+
+def _get(
+    url: str = "http://api.test/items", token: str = "a"
+) -> CustomToolHttpResponse:
+    return send_custom_tool_request(
+        "GET", url, json=None, headers={"Authorization": token}, tool_name="getItems"
+    )
+
+
+def test_clients_are_pooled_per_host(api: FakeApi) -> None:
+    assert _get().json() == {"result": "ok"}
+    _get("http://api.test/other")
+    _get("http://other.test/items")
+
+    assert api.num_requests == 3
+    assert api.num_clients == 2
+
+
+def test_response_size_is_capped(api: FakeApi, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(custom_tool_http, "CUSTOM_TOOL_MAX_RESPONSE_BYTES", 8)
+
+    with pytest.raises(CustomToolResponseTooLargeError):
+        _get()
+
+
+@pytest.mark.parametrize(
+    "cache_control,num_requests",
+    [("max-age=60", 1), ("no-store, max-age=60", 2), (None, 2)],
+)
+def test_get_responses_are_cached_per_cache_control(
+    api: FakeApi,
+    monkeypatch: pytest.MonkeyPatch,
+    cache_control: str | None,
+    num_requests: int,
+) -> None:
+    monkeypatch.setattr(custom_tool_http, "CUSTOM_TOOL_RESPONSE_CACHE_ENABLED", True)
+    if cache_control:
+        api.headers["Cache-Control"] = cache_control
+
+    assert _get().json() == {"result": "ok"}
+    assert _get().json() == {"result": "ok"}
+    assert api.num_requests == num_requests
+
+    # never shared across credentials
+    _get(token="b")
+    assert api.num_requests == num_requests + 1
@@ -82,7 +82,9 @@ class TestCustomTool(unittest.TestCase):
             chat_session_id=uuid.uuid4(), message_id=20
         )
 
-    @patch("onyx.tools.tool_implementations.custom.custom_tool.requests.request")
+    @patch(
+        "onyx.tools.tool_implementations.custom.custom_tool.send_custom_tool_request"
+    )
     def test_custom_tool_run_get(self, mock_request: unittest.mock.MagicMock) -> None:
         """
         Test the GET method of a custom tool.
@@ -96,7 +98,9 @@ class TestCustomTool(unittest.TestCase):
 
         result = list(tools[0].run(assistant_id="123"))
         expected_url = f"http://localhost:8080/{self.dynamic_schema_info.chat_session_id}/test/{self.dynamic_schema_info.message_id}/assistant/123"
-        mock_request.assert_called_once_with("GET", expected_url, json=None, headers={})
+        mock_request.assert_called_once_with(
+            "GET", expected_url, json=None, headers={}, tool_name="getAssistant"
+        )
 
         self.assertEqual(
             len(result), 1, "Expected exactly one result from the tool run"
@@ -112,7 +116,9 @@ class TestCustomTool(unittest.TestCase):
             "Tool name in response does not match expected value",
         )
 
-    @patch("onyx.tools.tool_implementations.custom.custom_tool.requests.request")
+    @patch(
+        "onyx.tools.tool_implementations.custom.custom_tool.send_custom_tool_request"
+    )
     def test_custom_tool_run_post(self, mock_request: unittest.mock.MagicMock) -> None:
         """
         Test the POST method of a custom tool.
@@ -127,7 +133,7 @@ class TestCustomTool(unittest.TestCase):
         result = list(tools[1].run(assistant_id="456"))
         expected_url = f"http://localhost:8080/{self.dynamic_schema_info.chat_session_id}/test/{self.dynamic_schema_info.message_id}/assistant/456"
         mock_request.assert_called_once_with(
-            "POST", expected_url, json=None, headers={}
+            "POST", expected_url, json=None, headers={}, tool_name="createAssistant"
         )
 
         self.assertEqual(
@@ -144,7 +150,9 @@ class TestCustomTool(unittest.TestCase):
             "Tool name in response does not match expected value",
         )
 
-    @patch("onyx.tools.tool_implementations.custom.custom_tool.requests.request")
+    @patch(
+        "onyx.tools.tool_implementations.custom.custom_tool.send_custom_tool_request"
+    )
     def test_custom_tool_with_headers(
         self, mock_request: unittest.mock.MagicMock
     ) -> None:
@@ -170,10 +178,16 @@ class TestCustomTool(unittest.TestCase):
             "Custom-Header": "CustomValue",
         }
         mock_request.assert_called_once_with(
-            "GET", expected_url, json=None, headers=expected_headers
+            "GET",
+            expected_url,
+            json=None,
+            headers=expected_headers,
+            tool_name="getAssistant",
         )
 
-    @patch("onyx.tools.tool_implementations.custom.custom_tool.requests.request")
+    @patch(
+        "onyx.tools.tool_implementations.custom.custom_tool.send_custom_tool_request"
+    )
     def test_custom_tool_with_empty_headers(
         self, mock_request: unittest.mock.MagicMock
     ) -> None:
@@ -191,7 +205,9 @@ class TestCustomTool(unittest.TestCase):
 
         list(tools[0].run(assistant_id="123"))
         expected_url = f"http://localhost:8080/{self.dynamic_schema_info.chat_session_id}/test/{self.dynamic_schema_info.message_id}/assistant/123"
-        mock_request.assert_called_once_with("GET", expected_url, json=None, headers={})
+        mock_request.assert_called_once_with(
+            "GET", expected_url, json=None, headers={}, tool_name="getAssistant"
+        )
 
     def test_invalid_openapi_schema(self) -> None:
         """
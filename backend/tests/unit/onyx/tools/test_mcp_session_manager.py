@@ -0,0 +1,124 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import anyio
+import pytest
+
+from onyx.tools.tool_implementations.mcp import mcp_session_manager
+from onyx.tools.tool_implementations.mcp.mcp_session_manager import MCPSessionManager
+
+
+class FakeClientSession:
+    def __init__(self, server: "FakeServer") -> None:
+        self.server = server
+        self.closed = False
+
+    async def __aenter__(self) -> "FakeClientSession":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.closed = True
+
+    async def initialize(self) -> str:
+        self.server.num_initialized += 1
+        return "initialized"
+
+    async def send_ping(self) -> None:
+        self.server.num_pings += 1
+
+    async def call_tool(self, name: str) -> str:
+        if self.closed or self.server.broken:
+            self.server.broken = False
+            raise anyio.ClosedResourceError()
+        return f"{name} called"
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.num_connections = 0
+        self.num_initialized = 0
+        self.num_pings = 0
+        self.broken = False
+        self.sessions: list[FakeClientSession] = []
+
+    @asynccontextmanager
+    async def connect(
+        self, url: str, headers: dict[str, str]
+    ) -> AsyncIterator[tuple[None, None, None]]:
+        self.num_connections += 1
+        yield None, None, None
+
+    def client_session(self, *args: Any, **kwargs: Any) -> FakeClientSession:
+        session = FakeClientSession(self)
+        self.sessions.append(session)
+        return session
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> FakeServer:
+    server = FakeServer()
+    monkeypatch.setattr(mcp_session_manager, "streamablehttp_client", server.connect)
+    monkeypatch.setattr(mcp_session_manager, "ClientSession", server.client_session)
+    return server
+
+
+def _call_tool(manager: MCPSessionManager, headers: dict[str, str]) -> str:
+    return manager.run(
+        lambda session: session.call_tool("search"), "http://mcp", headers
+    )
+
+
+def test_sessions_are_reused_per_auth_identity(server: FakeServer) -> None:
+    manager = MCPSessionManager(pooled=True)
+
+    assert _call_tool(manager, {"Authorization": "a"}) == "search called"
+    assert _call_tool(manager, {"Authorization": "a"}) == "search called"
+    assert manager.get_initialize_result("http://mcp", {"Authorization": "a"}) == (
+        "initialized"
+    )
+    assert server.num_initialized == 1
+
+    _call_tool(manager, {"Authorization": "b"})
+    assert server.num_initialized == 2
+
+
+def test_unpooled_sessions_are_closed(server: FakeServer) -> None:
+    manager = MCPSessionManager(pooled=False)
+
+    _call_tool(manager, {})
+    _call_tool(manager, {})
+
+    assert server.num_initialized == 2
+    assert all(session.closed for session in server.sessions)
+
+
+def test_closed_session_is_reconnected(server: FakeServer) -> None:
+    manager = MCPSessionManager(pooled=True)
+    _call_tool(manager, {})
+
+    server.broken = True
+    assert _call_tool(manager, {}) == "search called"
+    assert server.num_connections == 2
+    assert server.sessions[0].closed
+
+
+def test_idle_sessions_are_pinged_and_evicted(
+    server: FakeServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    manager = MCPSessionManager(pooled=True)
+    _call_tool(manager, {})
+
+    monkeypatch.setattr(
+        mcp_session_manager, "MCP_SESSION_HEALTH_CHECK_INTERVAL_SECONDS", -1
+    )
+    _call_tool(manager, {})
+    assert server.num_pings == 1
+    assert server.num_connections == 1
+
+    monkeypatch.setattr(mcp_session_manager, "MCP_SESSION_IDLE_TIMEOUT_SECONDS", -1)
+    manager._submit(manager._evict_idle_sessions())
+    assert server.sessions[0].closed
+
+    _call_tool(manager, {})
+    assert server.num_connections == 2
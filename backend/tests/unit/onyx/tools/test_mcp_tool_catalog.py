@@ -0,0 +1,136 @@
+from typing import Any
+
+import pytest
+from mcp.types import Tool as MCPLibTool
+
+from onyx.tools.tool_implementations.mcp import mcp_tool_catalog
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import fetch_mcp_tool_catalog
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import get_mcp_tool_catalog
+from onyx.tools.tool_implementations.mcp.mcp_tool_catalog import (
+    was_mcp_tool_catalog_requested,
+)
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.results: list[Any] = []
+
+    def set(self, *args: Any, **kwargs: Any) -> None:
+        self.results.append(self.redis.set(*args, **kwargs))
+
+    def execute(self) -> list[Any]:
+        return self.results
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    def set(
+        self, key: str, value: Any, ex: int | None = None, nx: bool = False
+    ) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = str(value).encode()
+        return True
+
+    def exists(self, key: str) -> int:
+        return int(key in self.values)
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.tools = [MCPLibTool(name="search", inputSchema={})]
+        self.num_listings = 0
+        self.background_refreshes = 0
+
+    def discover(self, server_url: str, headers: dict[str, str]) -> list[MCPLibTool]:
+        self.num_listings += 1
+        if headers.get("Authorization") == "bad":
+            raise ValueError("401 Unauthorized")
+        return self.tools
+
+    def run_in_background(self, func: Any, *args: Any) -> None:
+        self.background_refreshes += 1
+        func(*args)
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> FakeServer:
+    server = FakeServer()
+    redis = FakeRedis()
+    mcp_tool_catalog._local_catalogs.clear()
+    monkeypatch.setattr(mcp_tool_catalog, "get_redis_client", lambda **_: redis)
+    monkeypatch.setattr(mcp_tool_catalog, "discover_mcp_tools", server.discover)
+    monkeypatch.setattr(mcp_tool_catalog, "run_in_background", server.run_in_background)
+    return server
+
+
+def _get_catalog(
+    headers: dict[str, str] | None = None, block_on_miss: bool = True
+) -> mcp_tool_catalog.MCPToolCatalog | None:
+    return get_mcp_tool_catalog(
+        1, "http://mcp", headers or {}, "test_tenant", block_on_miss=block_on_miss
+    )
+
+
+def test_tools_are_listed_once(server: FakeServer) -> None:
+    first = _get_catalog()
+    second = _get_catalog()
+
+    assert first is not None and second is not None
+    assert second.tools == server.tools
+    assert first.version == second.version
+    assert server.num_listings == 1
+
+
+def test_miss_without_blocking_lists_in_background(server: FakeServer) -> None:
+    assert _get_catalog({"Authorization": "bad"}, block_on_miss=False) is None
+    assert server.background_refreshes == 1
+
+    catalog = _get_catalog({"Authorization": "bad"}, block_on_miss=False)
+    assert catalog is not None
+    assert catalog.tools is None
+    assert catalog.error == "401 Unauthorized"
+
+
+def test_stale_catalog_is_served_while_refreshed(
+    server: FakeServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first = _get_catalog()
+    assert first is not None
+
+    server.tools = [
+        MCPLibTool(name="search", inputSchema={}),
+        MCPLibTool(name="fetch", inputSchema={}),
+    ]
+    monkeypatch.setattr(mcp_tool_catalog, "MCP_TOOL_CATALOG_TTL_SECONDS", -1)
+    stale = _get_catalog()
+
+    assert stale is not None
+    # the stale catalog is returned, the refresh only shows up in the next request
+    assert stale.version == first.version
+    assert server.background_refreshes == 1
+    monkeypatch.setattr(mcp_tool_catalog, "MCP_TOOL_CATALOG_TTL_SECONDS", 600)
+    refreshed = _get_catalog()
+    assert refreshed is not None
+    assert refreshed.version != first.version
+    assert [tool.name for tool in refreshed.tools or []] == ["search", "fetch"]
+
+
+def test_refreshes_do_not_count_as_requests(server: FakeServer) -> None:
+    headers = {"Authorization": "user"}
+
+    # refreshed by the beat task only
+    fetch_mcp_tool_catalog(1, "http://mcp", headers, "test_tenant")
+    assert not was_mcp_tool_catalog_requested(1, "http://mcp", headers, "test_tenant")
+
+    _get_catalog(headers)
+    assert was_mcp_tool_catalog_requested(1, "http://mcp", headers, "test_tenant")
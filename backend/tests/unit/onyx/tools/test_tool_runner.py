@@ -0,0 +1,47 @@
+import threading
+from collections.abc import Generator
+from typing import Any
+from typing import cast
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.tools.models import ToolResponse
+from onyx.tools.tool import Tool
+from onyx.tools.tool_runner import ToolRunner
+from onyx.utils.cancellation import REQUEST_CANCELLED_EVENT_CONTEXTVAR
+from onyx.utils.cancellation import RequestCancelledError
+
+
+def test_tool_runner_does_not_rerun_cancelled_tool() -> None:
+    cancelled_event = threading.Event()
+    run_count = 0
+
+    def run(**kwargs: Any) -> Generator[ToolResponse, None, None]:
+        nonlocal run_count
+        run_count += 1
+        yield ToolResponse(id="first", response=1)
+        cancelled_event.set()
+        yield ToolResponse(id="second", response=2)
+
+    tool = Mock()
+    tool.name = "custom_tool"
+    tool.run.side_effect = run
+    tool_runner = ToolRunner(cast(Tool, tool), {})
+
+    token = REQUEST_CANCELLED_EVENT_CONTEXTVAR.set(cancelled_event)
+    try:
+        responses = []
+        with pytest.raises(RequestCancelledError):
+            for response in tool_runner.tool_responses():
+                responses.append(response)
+
+        # the partial responses are reused rather than running the tool again
+        tool_runner.tool_final_result()
+        tool_runner.tool_message_content()
+    finally:
+        REQUEST_CANCELLED_EVENT_CONTEXTVAR.reset(token)
+
+    assert [response.id for response in responses] == ["first", "second"]
+    assert run_count == 1
+    tool.final_result.assert_called_once_with(*responses)
@@ -1,3 +1,4 @@
+import asyncio
 import contextvars
 import threading
 import time
@@ -7,6 +8,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from onyx.utils.threadpool_concurrency import iterate_in_executor
 from onyx.utils.threadpool_concurrency import parallel_yield
 from onyx.utils.threadpool_concurrency import run_in_background
 from onyx.utils.threadpool_concurrency import run_with_timeout
@@ -389,3 +391,74 @@ def test_parallel_yield_non_blocking() -> None:
     # Verify no values are missing
     assert len(results) == 300  # Should have all values from 0 to 299
     assert sorted(results) == list(range(300))
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_yields_items_and_context() -> None:
+    test_context_var.set("chat")
+
+    def gen() -> Generator[str, None, None]:
+        for i in range(3):
+            yield f"{test_context_var.get()}_{threading.current_thread().name}_{i}"
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream") as executor:
+        items = [item async for item in iterate_in_executor(gen(), executor)]
+
+    assert len(items) == 3
+    assert all(item.startswith("chat_stream") for item in items)
+    assert [item[-1] for item in items] == ["0", "1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_raises_and_closes() -> None:
+    closed = threading.Event()
+
+    def failing_gen() -> Generator[int, None, None]:
+        yield 1
+        raise ValueError("boom")
+
+    def endless_gen() -> Generator[int, None, None]:
+        try:
+            i = 0
+            while True:
+                time.sleep(0.01)
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError, match="boom"):
+            async for _ in iterate_in_executor(failing_gen(), executor):
+                pass
+
+        stream = iterate_in_executor(endless_gen(), executor)
+        async for item in stream:
+            if item == 2:
+                break
+        await stream.aclose()
+
+    # the executor waited for the generator, which stopped after the next item
+    assert closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_pauses_slow_consumers() -> None:
+    produced: list[int] = []
+
+    def gen() -> Generator[int, None, None]:
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        stream = iterate_in_executor(gen(), executor, max_buffered_items=3)
+        assert await stream.__anext__() == 0
+        await asyncio.sleep(0.2)
+
+        # the queued items and the one waiting to be queued
+        assert len(produced) <= 5
+
+        items = [item async for item in stream]
+
+    assert items == list(range(1, 20))